@@ -15,15 +15,15 @@ def generate_guides(guide_data):
     return result
 
 
-def update_rig(generated_guides):
+def update_rig(generated_guides, guide_data=None):
     """
-    Call our build_skeleton() function.
+    Call our update_rig() function, only guides that changed since the last update are rebuilt.
     :param generated_guides:
+    :param guide_data:
     :return:
     """
 
-    for guide, value in generated_guides.items():
-        build.build_skeleton(value)
+    return build.update_rig(generated_guides, guide_data)
 
 
 class GuideSelectionWindow:
@@ -161,7 +161,7 @@ class GuideUI:
 
         # Update Rig Button
         try:
-            cmds.button(label="Update Rig", command=lambda x: update_rig(self.generated_guides))
+            cmds.button(label="Update Rig", command=lambda x: update_rig(self.generated_guides, self.guide_data))
         except Exception as e:
             print("Generate Guides First!")
 
@@ -1,8 +1,7 @@
 from maya import cmds
-import maya.OpenMaya as om
-import maya.utils
+import maya.api.OpenMaya as om2
 
-from itertools import chain
+import numpy as np
 
 # from . import utils
 # from . import ops
@@ -10,129 +9,111 @@ from itertools import chain
 try:
     from . import utils
     from . import ops
+    from . import batch_ops
+    from . import scene_index
+    from . import hierarchy
+    from . import transaction
+    from . import tracing
+    from . import namespaces
+    from . import handles
 except Exception as e:
     import sys
     sys.path.append("C:/Users/Thomas Killick/Documents/maya/modules/rigging_tool")
     from scripts.Util import utils
     from scripts.Util import ops
+    from scripts.Util import batch_ops
+    from scripts.Util import scene_index
+    from scripts.Util import hierarchy
+    from scripts.Util import transaction
+    from scripts.Util import tracing
+    from scripts.Util import namespaces
+    from scripts.Util import handles
 
 
 def obj_exists(_object):
     """
     Query if object exists
-    :param _object:
+    :param _object: object name or handles.Node().
     :return:
     """
 
-    if not cmds.objExists(_object):
+    if not handles.exists(_object):
         raise Exception (f"Queried object: {_object} does not exist!")
 
 
 def is_transform(obj):
     """
     Check if obj is a valid transform.
-    :param obj:
+    :param obj: object name or handles.Node().
     :return:
     """
     # Check object exists
-    if not cmds.objExists(obj): return False
+    if not handles.exists(obj): return False
 
-    mObject = getMObject(obj)
-    if not mObject.hasFn(om.MFn.kTransform):
-        return False
+    return handles.as_node(obj).is_transform
 
-    return True
 
-
-def reorder_joints(joint_list):
+def reorder_joints(joint_list, snapshot=None):
     """
     This function would rarely be used, however, re-orders where a list might have ordered joints wrong.
+    Branches are kept: every joint is returned, parents before children (depth-first).
     :param joint_list: list of joints.
+    :param snapshot: optional HierarchySnapshot() to reuse.
     :return: list of ordered joints.
     """
 
-    joint_hiearchy = {}
-
-    for joint in joint_list:
-        parent = cmds.listRelatives(joint, parent=True)
-        joint_hiearchy[joint] = parent[0] if parent else None
-
-    root_joint = None
-    for joint in joint_list:
-        if joint_hiearchy[joint] is None:
-            root_joint = joint
-            break
-
-    ordered_joints = [root_joint]
-    current_joint = root_joint
+    if not joint_list:
+        return []
 
-    while True:
-        children = [joint for joint, parent in joint_hiearchy.items() if parent == current_joint]
-        if not children:
-            break
-        next_joint = children[0]
-        ordered_joints.append(next_joint)
-        current_joint = next_joint
+    joint_list = handles.names_of(joint_list)
+    snapshot = snapshot or hierarchy.HierarchySnapshot.from_scene(joint_list)
 
-    return ordered_joints
+    return snapshot.order(joint_list)
 
 
-def get_joints_between(start_joint, end_joint=None):
+def get_joints_between(start_joint, end_joint=None, snapshot=None):
     """
 
     :param start_joint:
-    :param prefix:
     :param end_joint:
-    :param parent:
+    :param snapshot: optional HierarchySnapshot() to reuse.
     :return:
     """
 
     obj_exists(start_joint)
     obj_exists(end_joint)
 
+    start_joint = handles.name_of(start_joint)
+    end_joint = handles.name_of(end_joint)
+
     if start_joint == end_joint:  # length of 1.
         return start_joint
 
-    relatives = cmds.listRelatives(start_joint, ad=True)
-    filter_joints = cmds.ls(relatives, type="joint")
+    snapshot = snapshot or hierarchy.HierarchySnapshot.from_scene(start_joint)
 
-    if not filter_joints.count(end_joint):
+    if end_joint not in snapshot or not snapshot.is_joint(snapshot.index(end_joint)):
         raise Exception(f'End joint: {end_joint} is not a descendant of start joint {start_joint}')
 
-    jnt_list = [end_joint]
-
-    while(jnt_list[-1] != start_joint):
-        parent_joint = cmds.listRelatives(jnt_list[-1], p=True, pa=True)
-        if not parent_joint:
-            raise Exception(f"Returned root joint when searching for {start_joint}.")
-        jnt_list.append(parent_joint[0])
-
-    jnt_list.reverse()
-
-    return jnt_list
+    return snapshot.path_between(start_joint, end_joint)
 
 
 def getMObject(object):
     """
     Return an MObject data type of our object
-    :param object: Object pointer
+    :param object: Object pointer (name or handles.Node()).
     :return: MObject
     """
 
     # Check input object
-    if not cmds.objExists(object):
+    if not handles.exists(object):
         raise Exception(f"{object}' does not exist.")
 
-    selectionList = om.MSelectionList()
-    om.MGlobal.getSelectionListByName(object,selectionList)
-    mObject = om.MObject()
-    selectionList.getDependNode(0,mObject)
-
-    return mObject
+    return handles.as_node(object).api1_object()
 
 def get_position(point):
     """
     With wildcard position data representing a transform, check typing and return.
+    Single point version of world_positions(), use that for more than one point.
     :param point: Wildcard position data.
     :return:
     """
@@ -143,82 +124,146 @@ def get_position(point):
     if (type(point) == list) or (type(point) == tuple):
         pos = point[0:3]
 
-    elif type(point) == str:
+    elif isinstance(point, (str, handles.Node, om2.MDagPath)):
+        pos = world_positions([point])[0].tolist()
+
+    return pos
 
-        # Check Transform
-        mObject = getMObject(point)
-        if mObject.hasFn(om.MFn.kTransform):
-            try:
-                pos = cmds.xform(point, q=True, ws=True, rp=True)
-            except:
-                pass
 
-        if not pos:
-            try:
-                pos = cmds.pointPosition(point)
-            except:
-                pass
+def _resolve_points(points):
+    """
+    Sort a batch of world space queries once: names go through a single MSelectionList, handles and dag paths are
+    used as they are and anything else is taken as raw values.
+    :param points: list of names, handles.Node(), om2.MDagPath() or raw values.
+    :return: list of (kind, value): ("path", om2.MDagPath()), ("component", (om2.MDagPath(), component MObject))
+    or ("value", raw value).
+    """
 
-        if not pos:
-            try:
-                pos = cmds.xform(point, q=True, ws=True, rp=True)
-            except:
-                pass
+    selection = om2.MSelectionList()
+    selected = {}  # name -> selection index, repeated names are only added once.
+    resolved = []
+    for point in points:
+        if isinstance(point, handles.Node):
+            resolved.append(("path", point.dag_path))
+        elif isinstance(point, om2.MDagPath):
+            resolved.append(("path", point))
+        elif isinstance(point, str):
+            if point not in selected:
+                length = selection.length()
+                try:
+                    selection.add(point)
+                except RuntimeError:
+                    raise Exception(f"Object: '{point}' does not exist.")
+                if selection.length() != length + 1:
+                    raise Exception(f"More than one object matches name: {point}")
+                selected[point] = length
+            resolved.append(("name", point))
+        else:
+            resolved.append(("value", point))
 
-    return pos
+    items = {}
+    for name, index in selected.items():
+        if "." in name:  # component, e.g. "pCube1.vtx[3]"
+            items[name] = ("component", selection.getComponent(index))
+        else:
+            items[name] = ("path", selection.getDagPath(index))
 
+    return [items[value] if kind == "name" else (kind, value) for kind, value in resolved]
 
-def fix_joint_orientations(joint, aim_axis="x", up_axis="y", up_vector=(0, 1, 0)):
+
+def world_positions(points):
     """
-    Called after every skeleton generation event.
-    Using bungnoid's aiming functions in the gllibary, fix our joint's orientations (similar to aim constraint).
-    :param joint: joint object
-    :param aim_axis: string representing axis that aims to child.
-    :param up_axis: string representing up-axis (secondary)
-    :param up_vector: string representing up vector for calculation.
-    :return:
+    Bulk world space positions through one MSelectionList, instead of xform / pointPosition calls per point.
+    Transforms give their world rotate pivot (like cmds.xform(q=True, ws=True, rp=True)), other DAG nodes their world
+    translation and components (e.g. "pCube1.vtx[3]", "curve1.cv[2]") the world position of their first point.
+    :param points: list of transform / component names, handles.Node(), om2.MDagPath() or (x, y, z) coordinates.
+    :return: (N, 3) array.
     """
-    child_list = cmds.listRelatives(joint, c=1)
-    child_jnt_list = cmds.listRelatives(joint, c=1, type="joint", pa=True)
 
-    if child_list:
-        child_list = cmds.parent(child_list, w=True)  # unparent joint children.
+    positions = np.zeros((len(points), 3), dtype=np.float64)
+    for i, (kind, value) in enumerate(_resolve_points(points)):
+        if kind == "value":
+            positions[i] = tuple(value)[:3]
+        elif kind == "component":
+            path, component = value
+            position = om2.MItGeometry(path, component).position(om2.MSpace.kWorld)
+            positions[i] = (position.x, position.y, position.z)
+        elif value.hasFn(om2.MFn.kTransform):
+            pivot = om2.MFnTransform(value).rotatePivot(om2.MSpace.kWorld)
+            positions[i] = (pivot.x, pivot.y, pivot.z)
+        else:
+            positions[i] = tuple(value.inclusiveMatrix())[12:15]
 
-    if not child_jnt_list:
-        cmds.setAttr(joint + ".jo", 0, 0, 0)
+    return positions
 
-    else:
-        parent_jnt_mat = om.MMatrix()
-        parent_jnt = cmds.listRelatives(joint, p=True, pa=True)
 
-        if parent_jnt:
-            parent_jnt_mat = ops.get_matrix(parent_jnt[0])
-            parent_jnt_mat = ops.revert_API_matrix_types(parent_jnt_mat)
+def world_matrices(objects):
+    """
+    Bulk world matrices through one MSelectionList, instead of xform / getAttr calls per object.
+    :param objects: list of DAG node names, handles.Node(), om2.MDagPath() or 16 value / 4x4 matrices.
+    :return: (N, 4, 4) array.
+    """
 
+    matrices = []
+    for kind, value in _resolve_points(objects):
+        if kind == "component":
+            raise Exception("world_matrices() takes DAG nodes, not components.")
+        matrix = tuple(value.inclusiveMatrix()) if kind == "path" else value
+        matrices.append(np.asarray(matrix, dtype=np.float64).reshape(4, 4))
 
-        # calculate aim vector
+    return np.array(matrices, dtype=np.float64).reshape(-1, 4, 4)
 
-        pos_1 = get_position(joint)
-        pos_2 = get_position(child_jnt_list[0])
-        aim_vector = ops.offset_vector(pos_1, pos_2)
 
-        # main target mat
-        target_mat = ops.buildRotation(aim_vector, up_vector=up_vector,
-                                       aim_axis=aim_axis, up_axis=up_axis)
+@tracing.traced
+def sample_transforms(objects):
+    """
+    Bulk query of a whole set of transforms (e.g. a guide set) through one MSelectionList, instead of a getAttr /
+    xform call per channel and object.
+    :param objects: list of transform names or handles.Node().
+    :return: dictionary of arrays:
+        "names": long names.
+        "parents": index of each object's parent within objects, -1 if the parent isn't part of the set.
+        "translate": (N, 3) local translations.
+        "rotate": (N, 3) local rotations in degrees (in each object's rotate order).
+        "rotate_order": (N,) rotate orders.
+        "world_matrix": (N, 4, 4) world matrices.
+        "parent_matrix": (N, 4, 4) parent world matrices.
+    """
 
+    tracing.annotate(objects=len(objects))
 
-        ori_mat = target_mat * parent_jnt_mat.inverse()
+    selection = om2.MSelectionList()
+    for _object in objects:
+        if not handles.exists(_object):
+            raise Exception(f"Object: '{_object}' does not exist.")
+        selection.add(_object.dag_path if isinstance(_object, handles.Node) else _object)
 
+    paths = [selection.getDagPath(i) for i in range(selection.length())]
+    if len(paths) != len(objects):
+        raise Exception(f"Duplicate object(s) found in: {objects}")
 
-        # why is this 0?
-        rotation_order = cmds.getAttr(joint+".ro")
-        ori_rotation = ops.get_rotation(ori_mat, rotation_order)
+    names = [path.fullPathName() for path in paths]
+    index = {name: i for i, name in enumerate(names)}
 
-        cmds.setAttr(joint + '.r', 0, 0, 0)
-        cmds.setAttr(joint + '.jo', ori_rotation[0], ori_rotation[1], ori_rotation[2])
+    translations = []
+    rotations = []
+    rotate_orders = []
+    for path in paths:
+        transform = om2.MFnTransform(path)
+        translations.append(tuple(transform.translation(om2.MSpace.kTransform)))
+        rotation = transform.rotation()
+        rotations.append((rotation.x, rotation.y, rotation.z))
+        rotate_orders.append(rotation.order)
 
-    if child_list:
-        cmds.parent(child_list, joint)
+    return {
+        "names": names,
+        "parents": np.array([index.get(name.rpartition("|")[0], -1) for name in names], dtype=np.int64),
+        "translate": batch_ops.as_vectors(translations),
+        "rotate": np.degrees(batch_ops.as_vectors(rotations)),
+        "rotate_order": np.array(rotate_orders, dtype=np.int64),
+        "world_matrix": batch_ops.as_matrices([tuple(path.inclusiveMatrix()) for path in paths]),
+        "parent_matrix": batch_ops.as_matrices([tuple(path.exclusiveMatrix()) for path in paths]),
+    }
 
 
 def write_and_construct_matrix(translation, orientation, scale, ws=None):
@@ -246,65 +291,30 @@ def write_and_construct_matrix(translation, orientation, scale, ws=None):
     return matrix
 
 
+@tracing.traced
 def search_ns_items(ns, match=None):
     """
-    Search the DAG for items contained within the provided namespace.
+    Search the scene index for items contained within the provided namespace.
     Additionally, match further.
     :param ns: namespace to search within.
     :param match: match string for further match.
-    :return: dictionary of {path: object} pairs.
+    :return: dictionary of {path: object} pairs (om2.MObject).
     """
 
-    found_objects = {}
-    dag_iter = om.MItDag(om.MItDag.kDepthFirst, om.MFn.kInvalid)
-
-    while not dag_iter.isDone():
-        current_obj = dag_iter.currentItem()
-        current_path = dag_iter.fullPathName()  # still unique
-
-        if not current_obj.hasFn(om.MFn.kTransform) or current_obj.hasFn(om.MFn.kInvalid):
-            dag_iter.next()
-            continue
+    items = scene_index.get_index().search(ns, match=match)
+    tracing.annotate(namespace=ns, objects=len(items))
 
-        if ns in dag_iter.partialPathName():
-            current_node = dag_iter.partialPathName()
-            if ":" in current_node:
-                if match:
-                    if match in dag_iter.partialPathName():
-                        found_objects[current_path] = current_obj
-                else:
-                    found_objects[current_path] = current_obj
-        dag_iter.next()
-
-    return found_objects
+    return items
 
 
 def search_items(match):
     """
     Regular search for match pattern in DAG.
     :param match: string to match.
-    :return: dictionary of {path: object} pairs.
+    :return: dictionary of {path: object} pairs (om2.MObject).
     """
 
-    found_objects = {}
-    dag_iter = om.MItDag(om.MItDag.kDepthFirst, om.MFn.kInvalid)
-
-    while not dag_iter.isDone():
-        current_obj = dag_iter.currentItem()
-        current_path = dag_iter.partialPathName()
-
-        if not current_obj.hasFn(om.MFn.kTransform) or current_obj.hasFn(om.MFn.kInvalid):
-            dag_iter.next()
-
-        fn_dag_node = om.MFnDagNode(current_obj)
-        name = fn_dag_node.name()
-        if match in name:
-
-            found_objects[current_path] = current_obj
-
-        dag_iter.next()
-
-    return found_objects
+    return scene_index.get_index().find_name(match)
 
 
 def set_and_add_ns(set_ns, add_ns, reset_current=False):
@@ -318,6 +328,7 @@ def set_and_add_ns(set_ns, add_ns, reset_current=False):
 
     cmds.namespace(set=set_ns)
     cmds.namespace(add=add_ns)
+    transaction.invalidate(objects=False)
 
     if reset_current:
         cmds.namespace(set=":")
@@ -325,78 +336,36 @@ def set_and_add_ns(set_ns, add_ns, reset_current=False):
 
 def filter_for_transforms(objects):
 
-    return [obj for obj in objects if cmds.nodeType(obj) == "transform"]
+    return [obj for obj in objects if cmds.nodeType(handles.name_of(obj)) == "transform"]
 
 
-def relocate_ns(src_ns, parent=None, find_all=True, merge=True, force=True):
+@tracing.traced
+def relocate_ns(src_ns, parent=None, find_all=True, merge=True, force=True, tree=None):
     """
     If parent specified, relocate src_ns contents under parent. Otherwise, relocate under root.
+    Every namespace called src_ns is gathered into parent:src_ns, planned against one namespace snapshot and applied
+    in one pass (see namespaces.plan_relocation()).
     Note: parent should normally be the root.
     :param src_ns: our namespace we're querying.
-    :param parent: if parent specified, query with parent.
+    :param parent: if parent specified, query with parent (namespace path or name).
     :param find_all: find within root namespace.
     :param merge: merge current namespace objects with target namespace.
-    :param force: if force, delete the target namespace object.
-    :return: None
+    :param force: if force, delete the source objects whose names already exist in the target namespace.
+    :param tree: optional namespaces.NamespaceTree() to reuse across calls, it matches the scene again afterwards.
+    :return: report dictionary of the namespaces added / renamed / merged / removed, deleted objects and conflicts
+    left in place (see NamespacePlan.report()).
     """
 
-    cmds.namespace(set=":")
-
-    if find_all:
-        ns_list = cmds.namespaceInfo(cmds.namespaceInfo(cur=True), lon=True, r=True)
-
-    if not parent:
-        if not cmds.namespace(ex=f"{cmds.namespaceInfo(cur=True)}:{src_ns}"):
-            for ns in ns_list:
-                if ns.endswith(src_ns):
-                    set_and_add_ns(":", src_ns)
-                    dst_ns = cmds.namespaceInfo(src_ns, fn=True)
-                    cmds.namespace(mv=(ns, dst_ns), f=True)
-                    cmds.namespace(rm=ns)
-        else:
-            maya.utils.executeDeferred('print("namespace: ({}) already exists at target location. ")'.format(src_ns))
-    else:
-        dst_ns = [path for path in ns_list if path.endswith(parent)]
-
-        if not cmds.namespace(ex=f"{dst_ns[0]}:{src_ns}"):
-            for ns in ns_list:
-                if ns.endswith(src_ns):  # get our src_ns e.g. "arm"
-                    set_and_add_ns(dst_ns[0], src_ns)
-                    cmds.namespace(set=":")
+    scene_index.invalidate()  # namespace moves rename every node below them, rebuild on the next query.
 
-                    dst_ns = cmds.namespaceInfo(f"{dst_ns[0]}:{src_ns}", fn=True)  # prevent error
+    tree = tree or namespaces.NamespaceTree.from_scene()
+    plan = namespaces.plan_relocation(tree, src_ns, parent=parent, find_all=find_all, merge=merge, force=force)
+    tracing.annotate(namespace=src_ns, namespaces=len(tree), operations=len(plan))
 
-                    cmds.namespace(mv=(ns, dst_ns), f=True)
-                    cmds.namespace(rm=ns)
-        else:
+    plan.apply()
+    cmds.namespace(set=":")
 
-            maya.utils.executeDeferred('print("namespace: ({}) already exists at target location. ")'.format(src_ns))
-            if merge:
-                filter_existing = []
-                for ns in ns_list:
-                    if ns.endswith(src_ns):  # we know our src_ns exists
-                        if cmds.namespaceInfo(ns, p=True, bn=True) == parent:
-                            existing_list = cmds.namespaceInfo(ns, ls=True)
-                            if not existing_list:
-                                existing_list = []
-                            filter_existing = filter_for_transforms(existing_list)
-                            continue
-
-                        src_objects = cmds.namespaceInfo(ns, lod=True)
-                        if src_objects:
-                            filter_transforms = filter_for_transforms(src_objects)
-                            for object in filter_transforms:
-                                simple_name = object.split(":")[-1]
-
-                                if f"{dst_ns[0]}:{src_ns}:{simple_name}" in filter_existing:
-                                    if force:
-                                        cmds.delete(object)
-                                    continue
-                                cmds.rename(object, f"{dst_ns[0]}:{src_ns}:{simple_name}")
-
-                        cmds.namespace(rm=ns)
-            if cmds.namespace(ex=src_ns):
-                cmds.namespace(rm=src_ns)
+    return plan.report()
 
 
 def create_ns(ns, full_parent_path):
@@ -407,11 +376,30 @@ def create_ns(ns, full_parent_path):
     :return: None
     """
     cmds.namespace(set=":")
-    if cmds.namespace(ex=full_parent_path):
-        if not cmds.namespace(ex=f"{full_parent_path}:{ns}"):
+    if transaction.namespace_exists(f":{full_parent_path}"):
+        if not transaction.namespace_exists(f":{full_parent_path}:{ns}"):
             set_and_add_ns(full_parent_path, ns, reset_current=True)
 
 
+def create_ns_path(path):
+    """
+    Create every missing namespace along a namespace path e.g. "Guides:rigdef_2:arm".
+    :param path: namespace path, leading ":" optional.
+    :return: None
+    """
+
+    current_ns = cmds.namespaceInfo(cur=True, absoluteName=True)
+    parent = ":"
+    for ns in path.strip(":").split(":"):
+        full_path = f"{parent.rstrip(':')}:{ns}"
+        if not transaction.namespace_exists(full_path):
+            set_and_add_ns(parent, ns)
+        parent = full_path
+
+    cmds.namespace(set=current_ns)
+
+
+@tracing.traced
 def setup_ns_environment(ns="rigdef_1", root="Guides", new_rigdef=False):
     """
     Sets up our namespace environment. If new_rigdef is set to true, then we check for the latest rig_def version
@@ -424,12 +412,13 @@ def setup_ns_environment(ns="rigdef_1", root="Guides", new_rigdef=False):
     cmds.namespace(set=":")
     current_ns = ns
 
-    if not cmds.namespace(ex=root):
+    if not transaction.namespace_exists(f":{root}"):
         cmds.namespace(add=root)
+        transaction.invalidate(objects=False)
 
     cmds.namespace(set=root)
 
-    if not cmds.namespace(ex=ns):
+    if not transaction.namespace_exists(f":{root}:{ns}"):
         cmds.namespace(set=":")
         set_and_add_ns(root, ns, reset_current=False)
 
@@ -448,32 +437,31 @@ def setup_ns_environment(ns="rigdef_1", root="Guides", new_rigdef=False):
 
     return current_ns
 
-def get_ik_joints(ik):
+def get_ik_joints(ik, snapshot=None):
     """
     Gets the joints affected by the IK system. Normally our IK Joint Chain.
     :param ik: IKHandle object.
+    :param snapshot: optional HierarchySnapshot() to reuse.
     :return: list of affected IK joints.
     """
-    if not cmds.objExists(ik):
+    if not handles.exists(ik):
         raise Exception(f"Object: '{ik}' does not exist.")
 
-    if cmds.objectType(ik) != 'ikHandle':
+    ik = handles.as_node(ik)
+    if not ik.has_fn(om2.MFn.kIkHandle):
         raise Exception(f"Object: '{ik}' is nota valid ikHandle.")
 
-    root_joint = cmds.listConnections(ik+'.startJoint',s=True,d=False)[0]
-    ik_effector = cmds.listConnections(ik+'.endEffector',s=True,d=False)[0]
-    end_joint = cmds.listConnections(ik_effector+'.translateX',s=True,d=False)[0]
+    # connections are followed on the nodes, names are only read for the snapshot.
+    root_joint = ik.source("startJoint")
+    end_joint = ik.source("endEffector").source("translateX")
 
-    ik_joints = [end_joint]
+    snapshot = snapshot or hierarchy.HierarchySnapshot.from_scene(root_joint.full_path)
 
-    while ik_joints[-1] != root_joint:
-        ik_joints.append(cmds.listRelatives(ik_joints[-1],p=True)[0])
+    return snapshot.path_between(root_joint.full_path, end_joint.full_path)
 
-    ik_joints.reverse()
-
-    return ik_joints
 
 # TODO: Call after IK is built.
+@tracing.traced
 def position_pole_vector(ik, f=True, distance=1.0):
     """
     With an IK setup already, position our pole vector.
@@ -483,124 +471,83 @@ def position_pole_vector(ik, f=True, distance=1.0):
     :return: pole vector position.
     """
 
-
-    if cmds.objectType(ik) != "ikHandle":
+    ik = handles.as_node(ik)
+    if not ik.has_fn(om2.MFn.kIkHandle):
         raise Exception(f"Object: '{ik}' is not of type IKHandle.")
 
 
-    if cmds.listConnections(ik+'.ikSolver', s=True, d=False)[0] != f'{ik}ikRPsolver':
+    if ik.source("ikSolver").type_name != 'ikRPsolver':
         raise Exception(f"Object: '{ik}' is not of type ikRPsolver.")
 
 
     # get our affected ik joints.
     ik_joints = get_ik_joints(ik)
+    tracing.annotate(joints=len(ik_joints))
 
-    pole_vector = cmds.getAttr(ik+".poleVector")[0]
+    plug = ik.fn.findPlug("poleVector", False)
+    pole_vector = [plug.child(i).asDouble() for i in range(3)]
     pole_vector = ops.normalise_vector(pole_vector)
 
-    ik_parent = cmds.listRelatives(ik, p=True)
+    ik_parent = ik.parent()
 
     if ik_parent:
-        ik_matrix = ops.get_matrix(transform=ik_parent[0])
-        ik_matrix = ops.revert_API_matrix_types(ik_matrix)
+        ik_matrix = ops.get_matrix(transform=ik_parent)
         pole_vector = ops.vector_matrix_mult(pole_vector, ik_matrix)
 
-    root_position = cmds.xform(ik_joints[0], q=True,ws=True,rp=True)
-    end_position =  cmds.xform(ik_joints[-1], q=True,ws=True,rp=True)
+    # same math as the batched IK build, see batch_ops.pole_vector_positions().
+    positions = world_positions(ik_joints)
+    pole_vector_position = batch_ops.pole_vector_positions(positions[np.newaxis], pole_vectors=pole_vector,
+                                                           distance=distance, free=f)[0]
 
-    if f:
-        pole_vector_distance = ops.position_dot_product(root_position, end_position) * distance
-        pv_transform = None
-        if len(ik_joints) == 3:
-            pv_transform = cmds.xform(ik_joints[1],q=True,ws=True,rp=True)
-
-        pole_vector_position = (pv_transform[0]+(pole_vector[0]* pole_vector_distance),pv_transform[1]+
-                                (pole_vector[1]* pole_vector_distance),pv_transform[2]+(pole_vector[2]*
-                                                                                        pole_vector_distance))
-    else:
-        pv_transform = cmds.xform(ik_joints[1], q=True, ws=True, rp=True)
-        pole_vector_distance = ops.position_dot_product(root_position, pv_transform) * distance
-        pole_vector_position = (root_position[0]+(pole_vector[0]*pole_vector_distance),root_position[1]+
-                                (pole_vector[1]*pole_vector_distance),root_position[2]+(pole_vector[2]*
-                                                                                        pole_vector_distance))
+    return tuple(pole_vector_position.tolist())
 
-    return pole_vector_position
 
-
-def get_end_object(current_object, joints_only=False):
+def get_end_object(current_object, joints_only=False, snapshot=None):
     """
     Check if current joint is the top joint in a chain, then from that, find the end joint.
+    At a branch the longest chain is followed, see HierarchySnapshot.chain_end().
     :param current_object:
+    :param joints_only:
+    :param snapshot: optional HierarchySnapshot() to reuse.
     :return:
     """
 
-    end_object = None
-    if joints_only:
-        relatives = cmds.listRelatives(current_object, ap=True, type="joint")
-    else:
-        relatives = cmds.listRelatives(current_object, ap=True)
-
-    if not relatives:
-        start_object = current_object
-        next_object = start_object
-
-        while(next_object):
-
-            child_list = cmds.listRelatives(next_object, c=True) or []  # return empty list
-
-            if joints_only:
-                child_objects = cmds.ls(child_list, type="joint") or []
-            else:
-                child_objects = cmds.ls(child_list, type="joint") + \
-                                cmds.ls(child_list, type="transform") or []
-
-            if child_objects:
-                next_object = child_objects[0]
-            else:
-                end_object = next_object
-                next_object = None
-
-        return end_object
-
-    else:
+    current_object = handles.name_of(current_object)
+    snapshot = snapshot or hierarchy.HierarchySnapshot.from_scene(current_object)
 
+    if snapshot.parent(current_object, joints_only=joints_only):
         return []
 
+    return snapshot.chain_end(current_object, joints_only=joints_only)
+
 
-def traverse_hierarchy(current_object, ascend=False, joints_only=False):
+def traverse_hierarchy(current_object, ascend=False, joints_only=False, snapshot=None):
     """
     Must be called in a loop, we yield the current joint in the traversal.
     :param current_object:
     :param ascend:
+    :param joints_only:
+    :param snapshot: optional HierarchySnapshot() to reuse.
     :return:
     """
 
     objects_to_return = []
 
-    if not cmds.objExists(current_object):
+    if not handles.exists(current_object):
         return objects_to_return
 
-    if ascend:
-        current_object = get_end_object(current_object)
-
-        # Initialize the object to start the loop
-        next_object = current_object
+    current_object = handles.name_of(current_object)
 
-        while next_object:
-            parent_list = cmds.listRelatives(next_object, p=True) or []
+    if ascend:
+        snapshot = snapshot or hierarchy.HierarchySnapshot.from_scene(current_object)
 
-            if joints_only:
-                parent_objects = cmds.ls(parent_list, type="joint") or []
-            else:
-                parent_objects = list(chain(cmds.ls(parent_list, type="joint"),
-                           cmds.ls(parent_list, type="transform")))
+        if current_object not in snapshot:
+            # shapes go with their transform, non-DAG nodes are returned as is.
+            return [] if cmds.ls(current_object, dag=True) else [current_object]
 
-            if parent_objects:
-                objects_to_return.append(next_object)
-                next_object = parent_objects[0]
-            else:
-                objects_to_return.append(next_object)
-                next_object = None
+        current_object = get_end_object(current_object, snapshot=snapshot)
+        if current_object:
+            objects_to_return = snapshot.ascend(current_object, joints_only=joints_only)
 
     else:
         objects_to_return.append(current_object)
@@ -608,6 +555,7 @@ def traverse_hierarchy(current_object, ascend=False, joints_only=False):
     return objects_to_return
 
 
+@tracing.traced
 def clear_objects(name_space, joints_only=False):
     """
     :param name_space: Target namespace to clear object(s) under.
@@ -618,11 +566,17 @@ def clear_objects(name_space, joints_only=False):
 
     print_list = []
     if objects_to_clear:
+        snapshot = hierarchy.HierarchySnapshot.from_scene(objects_to_clear)
         for _object in objects_to_clear:
-            target_objects = traverse_hierarchy(_object, ascend=True, joints_only=joints_only)
+            target_objects = traverse_hierarchy(_object, ascend=True, joints_only=joints_only, snapshot=snapshot)
             for t_object in target_objects:
-                print_list.append(t_object)
-                cmds.delete(t_object)
+                if t_object not in print_list:
+                    print_list.append(t_object)
+
+    tracing.annotate(namespace=name_space, objects=len(print_list))
+
+    if print_list:
+        cmds.delete(print_list)
 
     cmds.evalDeferred(lambda: print(f"Deleted {print_list} object(s)"))
 
@@ -635,8 +589,9 @@ def duplicate_joint(joint, name=None):
     :return:
     """
 
-    if not cmds.objExists(joint):
+    if not handles.exists(joint):
         raise Exception(f"{joint} does not exist.")
+    joint = handles.name_of(joint)
     if not name:
         name = joint+"_duplicate"
     if cmds.objExists(str(name)):
@@ -654,12 +609,162 @@ def duplicate_joint(joint, name=None):
     return duplicated_joint
 
 
+_DUPLICATE_ATTRIBUTES = {
+    "double": ["translateX", "translateY", "translateZ", "rotateX", "rotateY", "rotateZ",
+               "scaleX", "scaleY", "scaleZ", "jointOrientX", "jointOrientY", "jointOrientZ",
+               "rotateAxisX", "rotateAxisY", "rotateAxisZ",
+               "preferredAngleX", "preferredAngleY", "preferredAngleZ", "radius"],
+    "int": ["rotateOrder"],
+    "bool": ["segmentScaleCompensate", "visibility"],
+}
+
+
+@tracing.traced
+def duplicate_chains(chains, prefix=None, parent=None, chain_namespaces=None):
+    """
+    Bulk version of chain_duplication(). Clones one or several joint chains with a single om2.MDagModifier:
+    every joint is created, named, given the source joint's values and wired parent.scale -> inverseScale in one
+    pass, as one undoable edit (see transaction.apply()). New nodes are created unlocked, so no per-attribute setAttr
+    is needed.
+    :param chains: list of start joints, or (start_joint, end_joint) pairs, as names or handles.Node(). Without an
+    end joint the chain runs to the end of its longest branch.
+    :param prefix: prefix for the duplicated joint names, otherwise "_duplicate" is appended.
+    :param parent: parent of the duplicated chains, otherwise world. Chain roots keep their world transform.
+    :param chain_namespaces: namespace of every duplicated chain, otherwise the current namespace.
+    :return: list of duplicated chains (lists of joint names, in order).
+    """
+
+    chains = [(handles.name_of(chain), None) if isinstance(chain, (str, handles.Node)) else
+              tuple(handles.names_of(list(chain))) for chain in chains]
+    parent = handles.name_of(parent)
+
+    if parent:
+        obj_exists(parent)
+        if not is_transform(parent):
+            raise Exception(f'Parent object[{parent}] is not a valid transform!')
+
+    snapshot = hierarchy.HierarchySnapshot.from_scene([start for start, end in chains])
+
+    source_chains = []
+    for start_joint, end_joint in chains:
+        if start_joint not in snapshot:
+            raise Exception(f"Queried object: {start_joint} does not exist!")
+        if not end_joint:
+            end_joint = snapshot.chain_end(start_joint, joints_only=True)
+        source_chains.append(snapshot.path_between(start_joint, end_joint))
+
+    if chain_namespaces is None:
+        chain_namespaces = [cmds.namespaceInfo(cur=True)] * len(source_chains)
+    elif len(chain_namespaces) != len(source_chains):
+        raise Exception(f"Got {len(chain_namespaces)} namespaces for {len(source_chains)} chains.")
+
+    new_names = []
+    for joints, namespace in zip(source_chains, chain_namespaces):
+        current_ns = namespace.strip(":")
+        for joint in joints:
+            string_end = joint.rpartition("|")[2].split(":")[-1]
+            name = prefix + string_end if prefix else string_end + "_duplicate"
+            new_names.append(f"{current_ns}:{name}" if current_ns else name)
+
+    tracing.annotate(chains=len(source_chains), joints=len(new_names))
+
+    existing = cmds.ls(new_names) or []
+    if existing or len(set(new_names)) != len(new_names):
+        raise Exception(f"{existing or new_names} already exists.")
+
+    source_names = [snapshot.long_names[snapshot.index(joint)] for joints in source_chains for joint in joints]
+    selection = om2.MSelectionList()
+    unique_names = list(dict.fromkeys(source_names))
+    for name in unique_names:
+        selection.add(name)
+    paths = {name: selection.getDagPath(i) for i, name in enumerate(unique_names)}
+    source_paths = [paths[name] for name in source_names]
+
+    parent_object = om2.MObject.kNullObj
+    parent_matrix = om2.MMatrix()
+    if parent:
+        parent_selection = om2.MSelectionList()
+        parent_selection.add(parent)
+        parent_object = parent_selection.getDependNode(0)
+        parent_matrix = parent_selection.getDagPath(0).inclusiveMatrix()
+
+    modifier = om2.MDagModifier()
+
+    # create and name everything first, plug values are queued on the created nodes afterwards.
+    created = []
+    names = iter(new_names)
+    for joints in source_chains:
+        chain_objects = []
+        for i, joint in enumerate(joints):
+            node_parent = chain_objects[-1] if i else parent_object
+            mobject = modifier.createNode("joint", node_parent)
+            modifier.renameNode(mobject, next(names))
+            chain_objects.append(mobject)
+        created.append(chain_objects)
+    modifier.doIt()
+
+    new_objects = [mobject for chain_objects in created for mobject in chain_objects]
+    for source_path, mobject in zip(source_paths, new_objects):
+        source = om2.MFnDependencyNode(source_path.node())
+        target = om2.MFnDependencyNode(mobject)
+        for attr in _DUPLICATE_ATTRIBUTES["double"]:
+            modifier.newPlugValueDouble(target.findPlug(attr, False), source.findPlug(attr, False).asDouble())
+        for attr in _DUPLICATE_ATTRIBUTES["int"]:
+            modifier.newPlugValueInt(target.findPlug(attr, False), source.findPlug(attr, False).asInt())
+        for attr in _DUPLICATE_ATTRIBUTES["bool"]:
+            modifier.newPlugValueBool(target.findPlug(attr, False), source.findPlug(attr, False).asBool())
+
+    # chain roots move from their source parent to the new parent, keep them in place.
+    offset = 0
+    for joints, chain_objects in zip(source_chains, created):
+        source_root = om2.MFnDependencyNode(source_paths[offset].node())
+        world_matrix = source_paths[offset].inclusiveMatrix()
+        local_matrix = batch_ops.relative_matrices(tuple(world_matrix), tuple(parent_matrix))[0]
+
+        rotation = [om2.MAngle(source_root.findPlug(f"rotate{axis}", False).asDouble()).asDegrees() for axis in "XYZ"]
+        rotate_axis = [om2.MAngle(source_root.findPlug(f"rotateAxis{axis}", False).asDouble()).asDegrees()
+                       for axis in "XYZ"]
+        rotation_order = source_root.findPlug("rotateOrder", False).asInt()
+
+        # joint local rotation is [rotateAxis][rotate][jointOrient], solve the jointOrient part.
+        rotate_matrix = (batch_ops.rotation_matrices(rotate_axis)[0] @
+                         batch_ops.rotation_matrices(rotation, rotation_order)[0])
+        orient_matrix = batch_ops.build_matrices()[0]
+        orient_matrix[:3, :3] = np.linalg.inv(rotate_matrix) @ batch_ops.normalise_vectors(local_matrix[:3, :3])
+        joint_orient = batch_ops.euler_rotations(orient_matrix, "xyz")[0]
+
+        target = om2.MFnDependencyNode(chain_objects[0])
+        for axis, translate, orient in zip("XYZ", local_matrix[3, :3], joint_orient):
+            modifier.newPlugValueDouble(target.findPlug(f"translate{axis}", False), translate)
+            modifier.newPlugValueMAngle(target.findPlug(f"jointOrient{axis}", False),
+                                        om2.MAngle(orient, om2.MAngle.kDegrees))
+
+        # keep child transform consistent to parent scaling.
+        for parent_joint, child_joint in zip(chain_objects, chain_objects[1:]):
+            modifier.connect(om2.MFnDependencyNode(parent_joint).findPlug("scale", False),
+                             om2.MFnDependencyNode(child_joint).findPlug("inverseScale", False))
+
+        offset += len(joints)
+
+    transaction.apply(modifier)
+
+    duplicated = [[om2.MFnDagNode(mobject).partialPathName() for mobject in chain_objects]
+                  for chain_objects in created]
+
+    # channel box state isn't a modifier edit, set it through cmds so it lands on the undo queue with the rest.
+    for names in duplicated:
+        for name in names:
+            cmds.setAttr(f"{name}.radius", channelBox=True)
+
+    return duplicated
+
+
 def chain_duplication(start_joint,
                           prefix=None,
                           end_joint=None,
                           parent=None):
     """
-
+    Duplicate a single joint chain, see duplicate_chains().
     :param start_joint:
     :param prefix:
     :param end_joint:
@@ -667,56 +772,11 @@ def chain_duplication(start_joint,
     :return:
     """
 
-    duplicate_chain = []
-
     obj_exists(start_joint)
     if end_joint:
         obj_exists(end_joint)
 
-    if parent:
-        obj_exists(parent)
-        if not is_transform(parent):
-            raise Exception(f'Parent object[{parent}] is not a valid transform!')
-
-    if not end_joint:
-        end_joint = get_end_object(start_joint)
-
-    joints = get_joints_between(start_joint, end_joint)
-
-    for i, joint in enumerate(joints):
-        name = None
-
-        if prefix:
-            string_end = joint.split(":")[-1]
-            name = prefix+string_end
-
-        jnt = duplicate_joint(joint, name)  # remove name for now.
-
-        if not i:
-            if not parent:
-                if cmds.listRelatives(jnt, p=True):
-                    try:
-                        cmds.parent(jnt, w=True)
-                    except Exception as e:
-                        pass
-            else:
-                try:
-                    cmds.parent(jnt, parent)
-                except Exception as e:
-                    pass
-        else:
-            try:
-                cmds.parent(jnt, duplicate_chain[-1])
-
-                # keep child transform consistent to parent scaling.
-                if not cmds.isConnected(duplicate_chain[-1]+".scale", jnt+".inverseScale"):
-                    cmds.connectAttr(duplicate_chain[-1]+".scale", jnt+".inverseScale", f=True)
-            except Exception as e:
-                raise Exception("Duplication error. Exception: " + str(e))
-
-        duplicate_chain.append(jnt)
-
-    return duplicate_chain
+    return duplicate_chains([(start_joint, end_joint)], prefix=prefix, parent=parent)[0]
 
 
 """chain = cmds.ls(type="joint")
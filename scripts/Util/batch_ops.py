@@ -0,0 +1,655 @@
+"""
+Batched (vectorised) matrix math.
+
+Every function here works on whole arrays at once: vectors are (N, 3), matrices are (N, 4, 4). Matrices follow
+Maya's row-vector convention (translation lives in row 3, a point is transformed with point * matrix) so results can
+be handed straight to MMatrix / cmds.xform(matrix=...). The single-item helpers in ops.py wrap these.
+"""
+
+import numpy as np
+
+
+ROTATION_ORDERS = {'xyz': 0, 'yzx': 1, 'zxy': 2, 'xzy': 3, 'yxz': 4, 'zyx': 5}
+
+# axis indices for each rotation order, first applied -> last applied.
+_ORDER_AXES = ((0, 1, 2), (1, 2, 0), (2, 0, 1), (0, 2, 1), (1, 0, 2), (2, 1, 0))
+
+_AXES = {'x': 0, 'y': 1, 'z': 2}
+
+
+def as_vectors(values, width=3):
+    """
+    Coerce a single vector or a sequence of vectors to a float (N, width) array.
+    Args:
+        values(tuple)/(list)/(np.ndarray): one vector or many.
+        width(int): expected vector width.
+
+    Returns(np.ndarray):
+
+    """
+
+    array = np.asarray(values, dtype=np.float64)
+    if array.ndim == 1:
+        array = array[np.newaxis, :]
+
+    if array.shape[-1] != width:
+        raise ValueError(f"expected vectors of width {width}, got shape {array.shape}")
+
+    return array
+
+
+def as_matrices(values):
+    """
+    Coerce a single matrix (16 values or 4x4) or a sequence of matrices to a float (N, 4, 4) array.
+    Args:
+        values: matrix data.
+
+    Returns(np.ndarray):
+
+    """
+
+    array = np.asarray(values, dtype=np.float64)
+    if array.shape[-2:] != (4, 4):
+        array = array.reshape(-1, 4, 4)
+    if array.ndim == 2:
+        array = array[np.newaxis]
+
+    return array
+
+
+def rotation_order_index(rotation_order):
+    """
+    Resolve a rotation order given as a name ("xyz") or Maya enum index (0-5).
+    Args:
+        rotation_order(str)/(int):
+
+    Returns(int):
+
+    """
+
+    if isinstance(rotation_order, str):
+        if rotation_order.lower() not in ROTATION_ORDERS:
+            raise Exception(f'invalid rotation order: {rotation_order}')
+        return ROTATION_ORDERS[rotation_order.lower()]
+
+    index = int(rotation_order)
+    if not 0 <= index < len(_ORDER_AXES):
+        raise Exception(f'invalid rotation order: {rotation_order}')
+
+    return index
+
+
+def _order_indices(rotation_order, count):
+    """
+    Broadcast a single rotation order or a per-item sequence of orders to an (N,) int array.
+    """
+
+    if isinstance(rotation_order, (str, int, np.integer)):
+        return np.full(count, rotation_order_index(rotation_order), dtype=np.int64)
+
+    orders = np.asarray([rotation_order_index(order) for order in rotation_order], dtype=np.int64)
+    if orders.shape[0] == 1:
+        orders = np.repeat(orders, count)
+    if orders.shape[0] != count:
+        raise ValueError(f"got {orders.shape[0]} rotation orders for {count} rotations")
+
+    return orders
+
+
+def normalise_vectors(vectors):
+    """
+    Normalise many vectors. Zero length vectors are returned unchanged.
+    Args:
+        vectors: (N, 3) vectors.
+
+    Returns(np.ndarray): (N, 3)
+
+    """
+
+    vectors = as_vectors(vectors)
+    length = np.linalg.norm(vectors, axis=-1, keepdims=True)
+
+    return np.divide(vectors, length, out=vectors.copy(), where=length > 0.0)
+
+
+def _axis_rotations(axis, radians):
+    """
+    Row-vector rotation matrices about a single axis.
+    """
+
+    cos = np.cos(radians)
+    sin = np.sin(radians)
+    matrices = np.zeros(radians.shape + (3, 3))
+
+    a, b = [i for i in range(3) if i != axis]
+    matrices[..., axis, axis] = 1.0
+    matrices[..., a, a] = cos
+    matrices[..., b, b] = cos
+    # row-vector convention: the (a, b) term is +sin for x and z, -sin for y.
+    sign = -1.0 if axis == 1 else 1.0
+    matrices[..., a, b] = sign * sin
+    matrices[..., b, a] = -sign * sin
+
+    return matrices
+
+
+def rotation_matrices(orient, rotation_order=0):
+    """
+    Build (N, 3, 3) rotation matrices from euler angles in degrees.
+    Args:
+        orient: (N, 3) euler rotations in degrees.
+        rotation_order(str)/(int)/(list): rotation order for all rotations, or one per rotation.
+
+    Returns(np.ndarray):
+
+    """
+
+    radians = np.radians(as_vectors(orient))
+    count = radians.shape[0]
+    orders = _order_indices(rotation_order, count)
+
+    per_axis = [_axis_rotations(axis, radians[:, axis]) for axis in range(3)]
+
+    matrices = np.empty((count, 3, 3))
+    for order in np.unique(orders):
+        mask = orders == order
+        first, second, third = _ORDER_AXES[order]
+        matrices[mask] = per_axis[first][mask] @ per_axis[second][mask] @ per_axis[third][mask]
+
+    return matrices
+
+
+def build_matrices(translate=(0, 0, 0), orient=(0, 0, 0), scale=(1, 1, 1), rotation_order=0):
+    """
+    Build (N, 4, 4) scale * rotation matrices with translation from (N, 3) arrays. Single vectors broadcast.
+    Args:
+        translate: (N, 3) translations.
+        orient: (N, 3) euler rotations in degrees.
+        scale: (N, 3) scales.
+        rotation_order(str)/(int)/(list): rotation order(s) of orient.
+
+    Returns(np.ndarray):
+
+    """
+
+    translate, orient, scale = np.broadcast_arrays(as_vectors(translate), as_vectors(orient), as_vectors(scale))
+    count = translate.shape[0]
+
+    matrices = np.zeros((count, 4, 4))
+    matrices[:, :3, :3] = scale[:, :, np.newaxis] * rotation_matrices(orient, rotation_order)
+    matrices[:, 3, :3] = translate
+    matrices[:, 3, 3] = 1.0
+
+    return matrices
+
+
+def build_matrices_from_vectors(translate=(0, 0, 0), x_axis=(1, 0, 0), y_axis=(0, 1, 0), z_axis=(0, 0, 1)):
+    """
+    Build (N, 4, 4) matrices with the provided axis vectors as rows 0-2 and translation as row 3.
+    Args:
+        translate: (N, 3)
+        x_axis: (N, 3)
+        y_axis: (N, 3)
+        z_axis: (N, 3)
+
+    Returns(np.ndarray):
+
+    """
+
+    rows = np.broadcast_arrays(as_vectors(x_axis), as_vectors(y_axis), as_vectors(z_axis), as_vectors(translate))
+
+    matrices = np.zeros((rows[0].shape[0], 4, 4))
+    for i, row in enumerate(rows):
+        matrices[:, i, :3] = row
+    matrices[:, 3, 3] = 1.0
+
+    return matrices
+
+
+def _parse_axis(axis):
+    """
+    Split an axis string e.g. "-x" into (index, negate).
+    """
+
+    negate = False
+    if axis[0] == '-':
+        axis = axis[1]
+        negate = True
+
+    return axis, negate
+
+
+def aim_rotations(aim_vectors, up_vectors=(0, 1, 0), aim_axis='x', up_axis='y'):
+    """
+    Build (N, 4, 4) aim rotation matrices. Batched equivalent of ops.buildRotation().
+    Args:
+        aim_vectors: (N, 3) aim vectors.
+        up_vectors: (N, 3) up vectors.
+        aim_axis(str): axis that aims down the aim vector, may be negated e.g. "-x".
+        up_axis(str): axis that aims towards the up vector, may be negated.
+
+    Returns(np.ndarray):
+
+    """
+
+    aim_axis, negate_aim_axis = _parse_axis(aim_axis)
+    up_axis, negate_up_vector = _parse_axis(up_axis)
+
+    if aim_axis not in _AXES:
+        raise Exception('invalid aim axis')
+    if up_axis not in _AXES:
+        raise Exception('invalid up axis')
+    if aim_axis == up_axis:
+        raise Exception('aim and up axis are not unique.')
+
+    cross_axis = [axis for axis in _AXES if axis not in (aim_axis, up_axis)][0]
+
+    aim_vectors, up_vectors = np.broadcast_arrays(normalise_vectors(aim_vectors), normalise_vectors(up_vectors))
+    if negate_aim_axis:
+        aim_vectors = -aim_vectors
+    if negate_up_vector:
+        up_vectors = -up_vectors
+
+    # keep the basis right-handed for every axis combination, then orthogonalise the up vector.
+    if (aim_axis == 'x' and up_axis == 'z') or (aim_axis == 'z' and up_axis == 'y'):
+        cross_vectors = np.cross(up_vectors, aim_vectors)
+        up_vectors = np.cross(aim_vectors, cross_vectors)
+    else:
+        cross_vectors = np.cross(aim_vectors, up_vectors)
+        up_vectors = np.cross(cross_vectors, aim_vectors)
+
+    axis_dict = {aim_axis: aim_vectors, up_axis: up_vectors, cross_axis: cross_vectors}
+
+    return build_matrices_from_vectors(x_axis=axis_dict['x'], y_axis=axis_dict['y'], z_axis=axis_dict['z'])
+
+
+def euler_rotations(matrices, rotation_order=0):
+    """
+    Decompose (N, 4, 4) matrices into (N, 3) euler rotations in degrees. Scale is removed first.
+    Args:
+        matrices: (N, 4, 4) matrices (or (N, 16)).
+        rotation_order(str)/(int)/(list): rotation order for all matrices, or one per matrix.
+
+    Returns(np.ndarray):
+
+    """
+
+    matrices = as_matrices(matrices)
+    count = matrices.shape[0]
+    orders = _order_indices(rotation_order, count)
+
+    rotation = matrices[:, :3, :3]
+    length = np.linalg.norm(rotation, axis=-1, keepdims=True)
+    rotation = np.divide(rotation, length, out=np.zeros_like(rotation), where=length > 0.0)
+
+    # column-vector form, so the standard Tait-Bryan extraction applies.
+    column = np.swapaxes(rotation, -1, -2)
+
+    angles = np.zeros((count, 3))
+    for order in np.unique(orders):
+        mask = orders == order
+        i, j, k = _ORDER_AXES[order]
+        sign = 1.0 if order < 3 else -1.0  # xyz, yzx, zxy are even permutations.
+        r = column[mask]
+
+        cos_j = np.hypot(r[:, i, i], r[:, j, i])
+        gimbal = cos_j < 1.0e-10
+
+        first = np.where(gimbal,
+                         np.arctan2(-sign * r[:, j, k], r[:, j, j]),
+                         np.arctan2(sign * r[:, k, j], r[:, k, k]))
+        second = np.arctan2(-sign * r[:, k, i], cos_j)
+        third = np.where(gimbal, 0.0, np.arctan2(sign * r[:, j, i], r[:, i, i]))
+
+        angles[np.ix_(mask, [i, j, k])] = np.stack((first, second, third), axis=-1)
+
+    return np.degrees(angles)
+
+
+def decompose_matrices(matrices, rotation_order=0):
+    """
+    Split (N, 4, 4) matrices into translate, euler rotate (degrees) and scale arrays, like cmds.xform(matrix=...)
+    does when it sets a transform's channels. Shear is ignored.
+    Args:
+        matrices: (N, 4, 4) matrices.
+        rotation_order(str)/(int)/(list): rotation order(s) to decompose in.
+
+    Returns(tuple): (N, 3) translate, (N, 3) rotate, (N, 3) scale.
+
+    """
+
+    matrices = as_matrices(matrices)
+
+    return (matrices[:, 3, :3].copy(), euler_rotations(matrices, rotation_order),
+            np.linalg.norm(matrices[:, :3, :3], axis=-1))
+
+
+def relative_matrices(matrices, parent_matrices):
+    """
+    Express (N, 4, 4) world matrices relative to (N, 4, 4) parent world matrices (matrix * parent.inverse()).
+    Args:
+        matrices: (N, 4, 4)
+        parent_matrices: (N, 4, 4)
+
+    Returns(np.ndarray):
+
+    """
+
+    return as_matrices(matrices) @ np.linalg.inv(as_matrices(parent_matrices))
+
+
+def hierarchy_depths(parents):
+    """
+    Depth of every item in a hierarchy given as parent indices.
+    Args:
+        parents: (N,) parent index of every item, -1 for roots.
+
+    Returns(np.ndarray): (N,) depths, roots are 0.
+
+    """
+
+    parents = np.asarray(parents, dtype=np.int64)
+    depths = np.zeros(parents.shape[0], dtype=np.int64)
+
+    current = parents.copy()
+    for _ in range(parents.shape[0] + 1):
+        has_parent = current >= 0
+        if not has_parent.any():
+            return depths
+        depths += has_parent
+        current = np.where(has_parent, parents[current], -1)
+
+    raise ValueError("parents contain a cycle")
+
+
+def world_matrices(local_matrices, parents):
+    """
+    Compose (N, 4, 4) local matrices down a hierarchy (local * parent world), one depth level at a time.
+    Args:
+        local_matrices: (N, 4, 4) matrices relative to the parent.
+        parents: (N,) parent index of every item, -1 for roots (their local matrix is their world matrix).
+
+    Returns(np.ndarray): (N, 4, 4) world matrices.
+
+    """
+
+    local_matrices = as_matrices(local_matrices)
+    parents = np.asarray(parents, dtype=np.int64)
+    depths = hierarchy_depths(parents)
+
+    world = local_matrices.copy()
+    for depth in range(1, int(depths.max(initial=0)) + 1):
+        level = np.nonzero(depths == depth)[0]
+        world[level] = local_matrices[level] @ world[parents[level]]
+
+    return world
+
+
+def solve_chain_orients(positions, parents, parent_matrices=None, aim_axis='x', up_axis='y', up_vector=(0, 1, 0)):
+    """
+    Solve joint orients for a whole (possibly branching) joint hierarchy in one pass.
+    Every joint aims at its first child (lowest index), leaf joints take their parent's orientation (zero orient).
+    Scale is assumed to be compensated (segment scale compensate), only rotation is inherited.
+    Args:
+        positions: (N, 3) joint world positions.
+        parents: (N,) parent index of every joint, -1 where the parent is outside the hierarchy.
+        parent_matrices: (N, 4, 4) world matrix of the outside parent, only read where parents is -1.
+        aim_axis(str): axis that aims to the child.
+        up_axis(str): up-axis (secondary).
+        up_vector(tuple): up vector for calculation.
+
+    Returns(tuple): (N, 3) joint orients in degrees (xyz), (N, 3) local translations that keep every joint in
+    place, (N, 4, 4) new world matrices.
+
+    """
+
+    positions = as_vectors(positions)
+    parents = np.asarray(parents, dtype=np.int64)
+    count = positions.shape[0]
+
+    if parent_matrices is None:
+        parent_matrices = np.identity(4)
+    parent_matrices = np.broadcast_to(as_matrices(parent_matrices), (count, 4, 4))
+
+    # first child of every joint: assigning in reverse lets the lowest index win.
+    first_child = np.full(count, -1, dtype=np.int64)
+    children = np.nonzero(parents >= 0)[0][::-1]
+    first_child[parents[children]] = children
+    has_child = first_child >= 0
+
+    aim_rotation = np.zeros((count, 3, 3))
+    if has_child.any():
+        aim = positions[first_child[has_child]] - positions[has_child]
+        rotation = aim_rotations(aim, up_vector, aim_axis=aim_axis, up_axis=up_axis)[:, :3, :3]
+        length = np.linalg.norm(rotation, axis=-1, keepdims=True)
+        aim_rotation[has_child] = np.divide(rotation, length, out=np.zeros_like(rotation), where=length > 0.0)
+
+    outside = parent_matrices[:, :3, :3]
+    length = np.linalg.norm(outside, axis=-1, keepdims=True)
+    outside = np.divide(outside, length, out=np.zeros_like(outside), where=length > 0.0)
+
+    # a parent inside the hierarchy always has a child, so its world rotation is its aim rotation.
+    inside = parents >= 0
+    parent_rotation = outside.copy()
+    parent_rotation[inside] = aim_rotation[parents[inside]]
+
+    world_rotation = np.where(has_child[:, np.newaxis, np.newaxis], aim_rotation, parent_rotation)
+    orient_matrices = np.zeros((count, 4, 4))
+    orient_matrices[:, :3, :3] = world_rotation @ np.swapaxes(parent_rotation, -1, -2)
+    orient_matrices[:, 3, 3] = 1.0
+    joint_orients = euler_rotations(orient_matrices, 'xyz')
+
+    # point * parent.inverse(), the inverse of an orthonormal parent rotation is its transpose.
+    offsets = positions - parent_matrices[:, 3, :3]
+    translations = np.einsum('ni,nij->nj', offsets, np.linalg.inv(parent_matrices[:, :3, :3]))
+    offsets = positions[inside] - positions[parents[inside]]
+    translations[inside] = np.einsum('ni,nji->nj', offsets, parent_rotation[inside])
+
+    world_matrices = np.zeros((count, 4, 4))
+    world_matrices[:, :3, :3] = world_rotation
+    world_matrices[:, 3, :3] = positions
+    world_matrices[:, 3, 3] = 1.0
+
+    return joint_orients, translations, world_matrices
+
+
+def pad_chains(chains):
+    """
+    Stack joint chains of different lengths into one array, short chains are padded by repeating their end joint.
+    Chains may carry leading axes (e.g. frames), they are stacked on the axis before the joints.
+    Args:
+        chains: sequence of (..., J, 3) joint position arrays, e.g. (J, 3) or (F, J, 3) for sampled frames.
+
+    Returns(tuple): (..., C, J, 3) positions, (C,) chain lengths.
+
+    """
+
+    chains = [np.asarray(chain, dtype=np.float64) for chain in chains]
+    lengths = np.array([chain.shape[-2] for chain in chains], dtype=np.int64)
+    if not chains:
+        return np.zeros((0, 0, 3)), lengths
+
+    leading = chains[0].shape[:-2]
+    positions = np.empty(leading + (len(chains), int(lengths.max()), 3))
+    for i, chain in enumerate(chains):
+        if chain.shape[:-2] != leading or chain.shape[-1] != 3:
+            raise ValueError(f"chain {i} has shape {chain.shape}, expected {leading + (chain.shape[-2], 3)}")
+        positions[..., i, :chain.shape[-2], :] = chain
+        positions[..., i, chain.shape[-2]:, :] = chain[..., -1:, :]
+
+    return positions, lengths
+
+
+def _pole_terms(positions, lengths):
+    """
+    Per chain terms of the pole solve on flattened chains.
+    Args:
+        positions: (N, J, 3) joint positions.
+        lengths: (N,) joint counts.
+
+    Returns(tuple): (N, 3) start, end and bend joint positions, (N, 3) unit start -> end lines and (N, 3) unit bend
+    directions (zero for straight chains).
+
+    """
+
+    count, joints = positions.shape[:2]
+    rows = np.arange(count)
+
+    start = positions[:, 0]
+    end = positions[rows, lengths - 1]
+    line = normalise_vectors(end - start)
+
+    # offset of every joint off the start -> end line, only inner joints can be the bend joint.
+    offsets = positions - start[:, np.newaxis]
+    offsets = offsets - line[:, np.newaxis] * np.einsum('cji,ci->cj', offsets, line)[..., np.newaxis]
+    off_line = np.linalg.norm(offsets, axis=-1)
+    inner = (np.arange(joints) > 0) & (np.arange(joints) < (lengths - 1)[:, np.newaxis])
+    bend_index = np.where(inner.any(axis=1), np.argmax(np.where(inner, off_line, -1.0), axis=1),
+                          np.minimum(1, lengths - 1))
+
+    directions = normalise_vectors(offsets[rows, bend_index])
+    directions[np.linalg.norm(directions, axis=-1) < 1e-9] = 0.0
+
+    return start, end, positions[rows, bend_index], line, directions
+
+
+def _straight_directions(line, up_vectors):
+    """
+    Pole directions for straight chains: up vector made perpendicular to the chain, any axis that isn't along the
+    chain when the up vector is.
+    Args:
+        line: (N, 3) unit start -> end lines.
+        up_vectors: (N, 3) up vectors.
+
+    Returns(np.ndarray): (N, 3)
+
+    """
+
+    fallback = up_vectors - line * np.einsum('ci,ci->c', up_vectors, line)[:, np.newaxis]
+    axes = np.identity(3)[np.argmin(np.abs(line), axis=-1)]
+    axes = axes - line * np.einsum('ci,ci->c', axes, line)[:, np.newaxis]
+    parallel = np.linalg.norm(fallback, axis=-1) < 1e-9
+
+    return normalise_vectors(np.where(parallel[:, np.newaxis], axes, fallback))
+
+
+def _place_poles(start, end, bend, directions, distance, free):
+    """
+    Pole positions from solved directions, see pole_vector_positions().
+    """
+
+    if free:
+        origin = bend
+        pole_distance = np.linalg.norm(end - start, axis=-1) * distance
+    else:
+        origin = start
+        pole_distance = np.linalg.norm(bend - start, axis=-1) * distance
+    # collapsed chains still get their pole off the joints.
+    pole_distance = np.where(pole_distance > 1e-9, pole_distance, distance)
+
+    return origin + directions * pole_distance[:, np.newaxis]
+
+
+def _flatten_chains(positions, lengths):
+    """
+    (..., J, 3) positions and lengths broadcast to the leading axes -> (N, J, 3), (N,) and the leading shape.
+    """
+
+    positions = np.asarray(positions, dtype=np.float64)
+    if positions.ndim < 3 or positions.shape[-1] != 3:
+        raise ValueError(f"expected (..., joints, 3) positions, got shape {positions.shape}")
+
+    leading = positions.shape[:-2]
+    joints = positions.shape[-2]
+    if lengths is None:
+        lengths = np.full(leading, joints, dtype=np.int64)
+    lengths = np.broadcast_to(np.asarray(lengths, dtype=np.int64), leading)
+    if joints and (lengths.min(initial=1) < 1 or lengths.max(initial=1) > joints):
+        raise ValueError(f"chain lengths must be between 1 and {joints}")
+
+    return positions.reshape(-1, joints, 3), lengths.reshape(-1), leading
+
+
+def pole_vector_positions(positions, lengths=None, pole_vectors=None, distance=1.0, free=True,
+                          up_vector=(0, 1, 0)):
+    """
+    Pole vector placement for many IK chains at once, the math of autorig_utils.position_pole_vector().
+    The bend joint is the inner joint furthest off the start -> end line (the middle joint of a 3 joint chain).
+    Without pole vectors the bend direction is used, which is the handle's default pole vector. Straight chains fall
+    back to up_vector made perpendicular to the chain, or to the world axis furthest off the chain when it runs along
+    up_vector. A chain collapsed onto one point gets its pole distance units off it. So the result is finite for any
+    finite positions. Every chain is solved on its own, for frame ranges use pole_vector_frames().
+    Args:
+        positions: (..., J, 3) joint world positions, e.g. (C, J, 3), see pad_chains().
+        lengths: joint count of every chain, broadcast to the leading axes (e.g. (C,)), all J by default.
+        pole_vectors: (..., 3) world space pole vectors (e.g. ikHandle.poleVector), optional.
+        distance(float): pole distance multiplier.
+        free(bool): free pole: placed off the bend joint, distance * chain start -> end length. Otherwise placed off
+        the start joint, distance * start -> bend length.
+        up_vector(tuple): fallback direction for straight chains, one or (..., 3).
+
+    Returns(np.ndarray): (..., 3) pole vector positions.
+
+    """
+
+    flat, lengths, leading = _flatten_chains(positions, lengths)
+    start, end, bend, line, directions = _pole_terms(flat, lengths)
+
+    if pole_vectors is not None:
+        pole_vectors = np.broadcast_to(np.asarray(pole_vectors, dtype=np.float64), leading + (3,))
+        directions = normalise_vectors(pole_vectors.reshape(-1, 3))
+
+    straight = np.linalg.norm(directions, axis=-1) < 1e-9
+    if straight.any():
+        up_vectors = np.broadcast_to(np.asarray(up_vector, dtype=np.float64), leading + (3,)).reshape(-1, 3)
+        directions[straight] = _straight_directions(line[straight], up_vectors[straight])
+
+    return _place_poles(start, end, bend, directions, distance, free).reshape(leading + (3,))
+
+
+def pole_vector_frames(positions, lengths=None, distance=1.0, free=True, up_vector=(0, 1, 0)):
+    """
+    Pole vector placement for many IK chains over a frame range, e.g. to key or match poles (IK/FK matching).
+    Solved like pole_vector_positions(), but kept stable over time: on frames where a chain is straight its bend
+    direction is undefined, the chain then holds the direction of its last bent frame (the next bent frame at the
+    start of the range) instead of snapping to up_vector. Chains that are never bent use up_vector.
+    Args:
+        positions: (F, C, J, 3) joint world positions per frame, see pad_chains().
+        lengths: (C,) joint count of every chain, all J by default.
+        distance(float): pole distance multiplier.
+        free(bool): see pole_vector_positions().
+        up_vector(tuple): fallback direction for chains that are never bent, one or (C, 3).
+
+    Returns(np.ndarray): (F, C, 3) pole vector positions.
+
+    """
+
+    positions = np.asarray(positions, dtype=np.float64)
+    if positions.ndim != 4:
+        raise ValueError(f"expected (frames, chains, joints, 3) positions, got shape {positions.shape}")
+
+    frames, chains = positions.shape[:2]
+    if lengths is not None:
+        lengths = np.broadcast_to(np.asarray(lengths, dtype=np.int64), (chains,))[np.newaxis]
+    flat, flat_lengths, leading = _flatten_chains(positions, lengths)
+    start, end, bend, line, directions = _pole_terms(flat, flat_lengths)
+
+    directions = directions.reshape(frames, chains, 3)
+    bent = np.linalg.norm(directions, axis=-1) > 0.0
+
+    # nearest bent frame per chain: hold the last one, the first one for frames before it.
+    frame_index = np.arange(frames)[:, np.newaxis]
+    last = np.maximum.accumulate(np.where(bent, frame_index, -1), axis=0)
+    following = np.minimum.accumulate(np.where(bent, frame_index, frames)[::-1], axis=0)[::-1]
+    source = np.where(last >= 0, last, following)
+    held = source < frames
+    directions = np.where(held[..., np.newaxis],
+                          directions[np.minimum(source, frames - 1), np.arange(chains)], 0.0).reshape(-1, 3)
+
+    straight = ~held.reshape(-1)
+    if straight.any():
+        up_vectors = np.broadcast_to(np.asarray(up_vector, dtype=np.float64), (chains, 3))
+        up_vectors = np.broadcast_to(up_vectors, (frames, chains, 3)).reshape(-1, 3)
+        directions[straight] = _straight_directions(line[straight], up_vectors[straight])
+
+    return _place_poles(start, end, bend, directions, distance, free).reshape(frames, chains, 3)
@@ -0,0 +1,375 @@
+"""
+Staged build graph.
+
+A build is a set of named stages with dependencies, split into two phases:
+    compute: pure functions of the rig definition and earlier compute results (names, matrices, orientations).
+             No Maya calls, so the compute phase of many rig definitions can run across a thread / process pool.
+    commit:  scene edits made with the computed results, applied serially in Maya's main thread.
+
+Every stage is called with the build context (a dictionary holding the job's inputs and the results of earlier
+stages under their stage names) and its return value is stored in the context under its own name.
+
+    graph = BuildGraph()
+    graph.add("guides", plan_guides)
+    graph.add("skeleton", plan_skeleton, requires=["guides"])
+    graph.add("create_guides", commit_guides, requires=["guides"], phase=COMMIT)
+
+    results = compute(graph, [{"rigdef": "rigdef_1", "guide_data": ...}, ...], workers=8)
+    commit(graph, results)
+"""
+
+import os
+import sys
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+
+try:
+    from . import batch_ops
+    from . import utils
+except Exception as e:
+    sys.path.append("C:/Users/Thomas Killick/Documents/maya/modules/rigging_tool")
+    from scripts.Util import batch_ops
+    from scripts.Util import utils
+
+
+COMPUTE = "compute"
+COMMIT = "commit"
+PHASES = (COMPUTE, COMMIT)
+
+
+class Stage:
+    """
+    One step of a build: a function of the build context.
+    """
+
+    def __init__(self, name, func, requires=(), phase=COMPUTE):
+        if phase not in PHASES:
+            raise Exception(f"Unknown phase: {phase}, expected one of {PHASES}")
+
+        self.name = name
+        self.func = func
+        self.requires = tuple(requires)
+        self.phase = phase
+
+    def __repr__(self):
+        return f"Stage({self.name!r}, phase={self.phase!r}, requires={list(self.requires)})"
+
+
+class BuildGraph:
+    """
+    Dependency graph of build stages.
+    """
+
+    def __init__(self, stages=()):
+        self.stages = {}
+        for stage in stages:
+            self.stages[stage.name] = stage
+
+    def add(self, name, func, requires=(), phase=COMPUTE):
+        """
+        Add a stage.
+        :param name: stage name, also the context key its result is stored under.
+        :param func: callable taking the build context.
+        :param requires: names of the stages (or context inputs) it reads.
+        :param phase: COMPUTE or COMMIT. Compute stages can't depend on commit stages.
+        :return: Stage()
+        """
+
+        if name in self.stages:
+            raise Exception(f"Stage: {name} already exists.")
+
+        stage = Stage(name, func, requires, phase)
+        self.stages[name] = stage
+
+        return stage
+
+    def order(self, phase=None):
+        """
+        Stages sorted so every stage comes after the stages it requires. Requirements that aren't stages are
+        treated as context inputs.
+        :param phase: only return the stages of this phase.
+        :return: list of Stage()
+        """
+
+        ordered = []
+        state = {}  # 1: visiting, 2: done
+
+        def visit(name, path):
+            if state.get(name) == 2:
+                return
+            if state.get(name) == 1:
+                raise Exception(f"Cyclic stage dependency: {' -> '.join(path + [name])}")
+
+            state[name] = 1
+            stage = self.stages[name]
+            for required in stage.requires:
+                if required not in self.stages:
+                    continue
+                if stage.phase == COMPUTE and self.stages[required].phase == COMMIT:
+                    raise Exception(f"Compute stage: {name} can't depend on commit stage: {required}")
+                visit(required, path + [name])
+
+            state[name] = 2
+            ordered.append(stage)
+
+        for name in self.stages:
+            visit(name, [])
+
+        return [stage for stage in ordered if phase is None or stage.phase == phase]
+
+    def phase(self, phase):
+        """
+        :param phase: COMPUTE or COMMIT.
+        :return: BuildGraph() holding only the stages of that phase.
+        """
+
+        return BuildGraph(self.order(phase))
+
+    def run(self, context, phase=None):
+        """
+        Run the stages in dependency order.
+        :param context: dictionary of inputs, updated in place with every stage result.
+        :param phase: only run the stages of this phase.
+        :return: context
+        """
+
+        for stage in self.order(phase):
+            missing = [required for required in stage.requires if required not in context]
+            if missing:
+                raise Exception(f"Stage: {stage.name} is missing {missing}")
+            context[stage.name] = stage.func(context)
+
+        return context
+
+
+def _run_compute(graph, context):
+    return graph.run(dict(context), COMPUTE)
+
+
+def _process_context():
+    """
+    Spawn context for process pools. Inside an interactive Maya session sys.executable is Maya itself, so the
+    workers are pointed at mayapy.
+    """
+
+    context = multiprocessing.get_context("spawn")
+
+    executable = os.path.basename(sys.executable).lower()
+    maya_location = os.environ.get("MAYA_LOCATION")
+    if maya_location and executable.startswith("maya") and not executable.startswith("mayapy"):
+        mayapy = os.path.join(maya_location, "bin", "mayapy.exe" if os.name == "nt" else "mayapy")
+        context.set_executable(mayapy)
+
+    return context
+
+
+def compute(graph, contexts, workers=None, executor="thread"):
+    """
+    Run the compute phase for many build contexts (e.g. one per rigdef) in parallel.
+    :param graph: BuildGraph()
+    :param contexts: list of build context dictionaries.
+    :param workers: pool size, defaults to the number of cores.
+    :param executor: "thread", "process" or "serial". Threads are the default: the planning math is mostly numpy,
+    which releases the GIL, while a process pool spawns new interpreters (mayapy inside Maya) and pickles every
+    context, around a second of overhead before any rig is planned (compare with benchmark.py --executors).
+    Processes avoid the GIL for the python side of the math, so they can pay off for many large rigdefs on many
+    cores, but every stage function has to be importable without Maya and scripts starting the pool need an
+    if __name__ == "__main__" guard.
+    :return: list of computed contexts, in the order of contexts.
+    """
+
+    compute_graph = graph.phase(COMPUTE)
+    contexts = list(contexts)
+    workers = workers or os.cpu_count() or 1
+
+    if executor == "serial" or workers == 1 or len(contexts) < 2:
+        return [_run_compute(compute_graph, context) for context in contexts]
+
+    if executor == "thread":
+        pool = ThreadPoolExecutor(max_workers=workers)
+    elif executor == "process":
+        pool = ProcessPoolExecutor(max_workers=workers, mp_context=_process_context())
+    else:
+        raise Exception(f"Unknown executor: {executor}, expected 'thread', 'process' or 'serial'.")
+
+    with pool:
+        return list(pool.map(_run_compute, [compute_graph] * len(contexts), contexts))
+
+
+def commit(graph, contexts):
+    """
+    Run the commit phase serially over computed contexts.
+    :param graph: BuildGraph()
+    :param contexts: compute() results.
+    :return: list of contexts with commit results added.
+    """
+
+    commit_graph = graph.phase(COMMIT)
+
+    return [commit_graph.run(context) for context in contexts]
+
+
+# compute stages
+
+def guide_layout(guide_values):
+    """
+    Everything needed to create one guide type, computed from its definition.
+    :param guide_values: {guide: definition} e.g. guide_data()["guides"]["biped"]["limb"]["arm"]
+    :return: dictionary: "names" (parents first), "parents" (indices), "translate", "rotate", "scale" (local channel
+    values) and "world_matrix" (N, 4, 4).
+    """
+
+    names = utils.sort_by_parent(guide_values)
+    index = {name: i for i, name in enumerate(names)}
+    parents = [index.get(guide_values[name].get("parent"), -1) for name in names]
+
+    matrices = batch_ops.build_matrices(
+        translate=[guide_values[name]["translateOffsetXYZ"] for name in names],
+        orient=[guide_values[name]["orientOffsetXYZ"] for name in names],
+        scale=[guide_values[name]["scaleXYZ"] for name in names]
+    )
+    translate, rotate, scale = batch_ops.decompose_matrices(matrices)
+
+    return {
+        "names": names,
+        "parents": parents,
+        "translate": translate,
+        "rotate": rotate,
+        "scale": scale,
+        "world_matrix": batch_ops.world_matrices(matrices, parents),
+    }
+
+
+def skeleton_layout(world_matrices, parents, aim_axis="x", up_axis="y", up_vector=(0, 1, 0)):
+    """
+    Joint values for a skeleton following guides: joints sit on the guide positions and aim down the chain.
+    :param world_matrices: (N, 4, 4) guide world matrices.
+    :param parents: (N,) parent indices.
+    :return: dictionary: "parents", "joint_orient", "translate" and "world_matrix".
+    """
+
+    positions = batch_ops.as_matrices(world_matrices)[:, 3, :3]
+    joint_orients, translations, joint_world_matrices = batch_ops.solve_chain_orients(
+        positions, parents, aim_axis=aim_axis, up_axis=up_axis, up_vector=up_vector)
+
+    return {
+        "parents": list(parents),
+        "joint_orient": joint_orients,
+        "translate": translations,
+        "world_matrix": joint_world_matrices,
+    }
+
+
+def chain_paths(parents):
+    """
+    Main chain below every root of a hierarchy. At a branch the deepest child is followed (first child on a tie), like
+    hierarchy.HierarchySnapshot.chain_end() does for the IK chains.
+    :param parents: (N,) parent indices, -1 for roots.
+    :return: list of index lists, one per root.
+    """
+
+    parents = [int(parent) for parent in parents]
+    children = [[] for _ in parents]
+    for index, parent in enumerate(parents):
+        if parent >= 0:
+            children[parent].append(index)
+
+    depths = batch_ops.hierarchy_depths(parents)
+    heights = [0] * len(parents)
+    for index in sorted(range(len(parents)), key=lambda i: depths[i], reverse=True):
+        if children[index]:
+            heights[index] = 1 + max(heights[child] for child in children[index])
+
+    paths = []
+    for root in [index for index, parent in enumerate(parents) if parent < 0]:
+        path = [root]
+        while children[path[-1]]:
+            child_heights = [heights[child] for child in children[path[-1]]]
+            path.append(children[path[-1]][child_heights.index(max(child_heights))])
+        paths.append(path)
+
+    return paths
+
+
+def pole_layout(world_matrices, parents, distance=1.0, free=False):
+    """
+    Pole vector positions of every chain of a skeleton, solved from the joint world matrices so the commit phase
+    doesn't have to query the IK chains it builds.
+    :param world_matrices: (N, 4, 4) joint world matrices e.g. skeleton_layout()["world_matrix"].
+    :param parents: (N,) parent indices.
+    :param distance: pole distance multiplier, see batch_ops.pole_vector_positions().
+    :param free: place the poles off the bend joints, otherwise off the start joints.
+    :return: dictionary: "starts" chain start indices and "positions" (C, 3) pole positions.
+    """
+
+    paths = chain_paths(parents)
+    if not paths:
+        return {"starts": [], "positions": np.zeros((0, 3))}
+
+    positions = batch_ops.as_matrices(world_matrices)[:, 3, :3]
+    chain_positions, lengths = batch_ops.pad_chains([positions[path] for path in paths])
+
+    return {
+        "starts": [path[0] for path in paths],
+        "positions": batch_ops.pole_vector_positions(chain_positions, lengths, distance=distance, free=free),
+    }
+
+
+def plan_guides(context):
+    """
+    Compute stage: guide layouts and names for every guide type of context["guide_data"].
+    Reads "guide_data", "rigdef" and optionally "guide_root" (default "Guides").
+    :return: {guide_type: guide_layout() + "namespace" and "full_names"}
+    """
+
+    root = context.get("guide_root", "Guides")
+
+    plans = {}
+    for entry in context["guide_data"]:
+        for guide_type, guide_values in entry.items():
+            plan = guide_layout(guide_values)
+            plan["namespace"] = f"{root}:{context['rigdef']}:{guide_type}"
+            plan["full_names"] = [f"{plan['namespace']}:{name}" for name in plan["names"]]
+            plans[guide_type] = plan
+
+    return plans
+
+
+def plan_skeleton(context):
+    """
+    Compute stage: joint values and names for every guide type planned by plan_guides().
+    Reads "guides", "rigdef" and optionally "skeleton_root" (default "skeleton_def"). Joints of every rigdef get
+    their own namespace, e.g. skeleton_def:rigdef_2:arm.
+    :return: {guide_type: skeleton_layout() + "namespace" and "full_names"}
+    """
+
+    root = context.get("skeleton_root", "skeleton_def")
+
+    plans = {}
+    for guide_type, guide_plan in context["guides"].items():
+        plan = skeleton_layout(guide_plan["world_matrix"], guide_plan["parents"])
+        plan["namespace"] = f"{root}:{context['rigdef']}:{guide_type}"
+        plan["full_names"] = [f"{plan['namespace']}:{name}" for name in guide_plan["names"]]
+        plans[guide_type] = plan
+
+    return plans
+
+
+def plan_poles(context):
+    """
+    Compute stage: pole vector positions of every chain planned by plan_skeleton().
+    Reads "skeleton" and optionally "pole_distance" (default 1.0) and "free_pole" (default False), see
+    build.generate_ik_systems().
+    :return: {guide_type: {"starts": chain start joint names, "positions": (C, 3) pole positions}}
+    """
+
+    plans = {}
+    for guide_type, skeleton_plan in context["skeleton"].items():
+        plan = pole_layout(skeleton_plan["world_matrix"], skeleton_plan["parents"],
+                           distance=context.get("pole_distance", 1.0), free=context.get("free_pole", False))
+        plan["starts"] = [skeleton_plan["full_names"][start] for start in plan["starts"]]
+        plans[guide_type] = plan
+
+    return plans
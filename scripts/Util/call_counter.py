@@ -0,0 +1,313 @@
+"""
+Opt-in maya.cmds / OpenMaya round-trip counter.
+
+While a CallCounter is active the "cmds" global of the instrumented modules is swapped for a proxy that counts every
+command, per command and per calling function, and adds up the wall time spent in each. Their OpenMaya globals
+("om2" for maya.api.OpenMaya, "om" for maya.OpenMaya) are swapped too: the entry points into the API are counted,
+that is every API object constructed (MSelectionList(), MFnDependencyNode(), MDagModifier(), ...) and every static
+call (MGlobal.*, MDagPath.getAPathTo(), ...), reported as e.g. "om2.MSelectionList". Method calls on API objects
+(selection.add(), fn.findPlug(), modifier.doIt()) aren't counted. Nothing is patched outside of an active counter.
+
+    with call_counter.CallCounter() as counter:
+        build.build_skeleton(created_guides, guide_data)
+
+    counter.assert_budget(2 * joint_count + 5)         # all commands and API entry points.
+    counter.assert_budget(0, commands=["getAttr"])      # no per attribute queries.
+    counter.assert_budget(joint_count, commands=counter.api_commands())  # API entry points only.
+    print(counter.report())
+
+CallCounter(api=False) counts cmds only.
+
+Counts include the cmds calls of the helpers the build goes through (transaction, hierarchy, incremental,
+namespaces), so a budget covers the whole operation.
+"""
+
+import sys
+import time
+import importlib
+import functools
+
+
+MODULES = ("build", "Util.autorig_utils", "Util.ops", "Util.transaction", "Util.hierarchy", "Util.incremental",
+           "Util.namespaces", "Util.undo", "Util.scene_index", "Util.handles")
+API_GLOBALS = ("om2", "om")  # OpenMaya module globals, also the prefix of their counted names.
+
+
+class BudgetExceeded(AssertionError):
+    """
+    Raised by CallCounter.assert_budget().
+    """
+
+
+def _caller():
+    """
+    :return: "module.function" of the code calling the proxied callable.
+    """
+
+    frame = sys._getframe(2)
+    return f"{frame.f_globals.get('__name__', '?')}.{frame.f_code.co_name}"
+
+
+class _CommandsProxy:
+    """
+    Stands in for the cmds module, every callable is wrapped to report to the counter.
+    """
+
+    def __init__(self, cmds, counter):
+        self._cmds = cmds
+        self._counter = counter
+        self._wrapped = {}
+
+    def __getattr__(self, name):
+        if name in self._wrapped:
+            return self._wrapped[name]
+
+        attribute = getattr(self._cmds, name)
+        if not callable(attribute):
+            return attribute
+
+        counter = self._counter
+
+        @functools.wraps(attribute)
+        def wrapper(*args, **kwargs):
+            caller = _caller()
+            start = time.perf_counter()
+            try:
+                return attribute(*args, **kwargs)
+            finally:
+                counter.record(name, caller, time.perf_counter() - start)
+
+        self._wrapped[name] = wrapper
+        return wrapper
+
+
+class _ClassProxy:
+    """
+    Stands in for an API class: constructing it and its static calls are counted, isinstance() checks and constants
+    (MFn.kJoint, MSpace.kWorld, MObject.kNullObj) go to the real class.
+    """
+
+    def __init__(self, cls, name, counter):
+        self._cls = cls
+        self._name = name
+        self._counter = counter
+        self._wrapped = {}
+
+    def __call__(self, *args, **kwargs):
+        caller = _caller()
+        start = time.perf_counter()
+        try:
+            return self._cls(*args, **kwargs)
+        finally:
+            self._counter.record(self._name, caller, time.perf_counter() - start)
+
+    def __instancecheck__(self, instance):
+        return isinstance(instance, self._cls)
+
+    def __subclasscheck__(self, subclass):
+        return issubclass(subclass, self._cls)
+
+    def __getattr__(self, name):
+        if name in self._wrapped:
+            return self._wrapped[name]
+
+        attribute = getattr(self._cls, name)
+        if not callable(attribute) or isinstance(attribute, type):
+            return attribute
+
+        counter = self._counter
+        command = f"{self._name}.{name}"
+
+        @functools.wraps(attribute)
+        def wrapper(*args, **kwargs):
+            caller = _caller()
+            start = time.perf_counter()
+            try:
+                return attribute(*args, **kwargs)
+            finally:
+                counter.record(command, caller, time.perf_counter() - start)
+
+        self._wrapped[name] = wrapper
+        return wrapper
+
+
+class _APIProxy:
+    """
+    Stands in for an OpenMaya module, its classes are wrapped in _ClassProxy() (apart from the MPx plug-in base
+    classes, which Maya constructs).
+    """
+
+    def __init__(self, module, prefix, counter):
+        self._module = module
+        self._prefix = prefix
+        self._counter = counter
+        self._wrapped = {}
+
+    def __getattr__(self, name):
+        if name in self._wrapped:
+            return self._wrapped[name]
+
+        attribute = getattr(self._module, name)
+        if isinstance(attribute, type) and not name.startswith("MPx"):  # plug-in base classes are left as they are.
+            attribute = _ClassProxy(attribute, f"{self._prefix}.{name}", self._counter)
+            self._wrapped[name] = attribute
+
+        return attribute
+
+
+class CallCounter:
+    """
+    Counts cmds calls and OpenMaya entry points made from the instrumented modules while active.
+    """
+
+    def __init__(self, modules=MODULES, api=True):
+        """
+        :param modules: modules whose cmds (and OpenMaya) globals are instrumented.
+        :param api: also count OpenMaya entry points, otherwise cmds only.
+        """
+
+        self.modules = tuple(modules)
+        self.api = api
+        self._patched = []
+        self.reset()
+
+    def reset(self):
+        self.counts = {}  # command -> calls
+        self.times = {}  # command -> seconds
+        self.callers = {}  # caller -> {command: calls}
+
+    def record(self, command, caller, seconds):
+        self.counts[command] = self.counts.get(command, 0) + 1
+        self.times[command] = self.times.get(command, 0.0) + seconds
+        by_caller = self.callers.setdefault(caller, {})
+        by_caller[command] = by_caller.get(command, 0) + 1
+
+    # patching
+    def start(self):
+        """
+        Swap in the counting proxies. Modules that aren't imported are imported first.
+        :return: self
+        """
+
+        if self._patched:
+            return self
+
+        for module_name in self.modules:
+            try:
+                module = importlib.import_module(module_name)
+            except ImportError:
+                continue
+
+            cmds = getattr(module, "cmds", None)
+            if cmds is not None and not isinstance(cmds, _CommandsProxy):
+                module.cmds = _CommandsProxy(cmds, self)
+                self._patched.append((module, "cmds", cmds))
+
+            if not self.api:
+                continue
+            for name in API_GLOBALS:
+                api = getattr(module, name, None)
+                if api is not None and not isinstance(api, _APIProxy):
+                    setattr(module, name, _APIProxy(api, name, self))
+                    self._patched.append((module, name, api))
+
+        return self
+
+    def stop(self):
+        """
+        Put the original cmds and OpenMaya modules back.
+        :return: self
+        """
+
+        for module, name, original in reversed(self._patched):
+            setattr(module, name, original)
+        self._patched = []
+
+        return self
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+    # results
+    def total(self, commands=None, callers=None):
+        """
+        :param commands: only count these commands.
+        :param callers: only count calls made from these functions ("module.function", e.g. "build.build_skeleton").
+        :return: number of calls.
+        """
+
+        if callers is None:
+            counts = self.counts
+            return sum(count for command, count in counts.items() if commands is None or command in commands)
+
+        return sum(count for caller in callers for command, count in self.callers.get(caller, {}).items()
+                   if commands is None or command in commands)
+
+    def api_commands(self):
+        """
+        :return: the counted OpenMaya entry points, e.g. ["om2.MSelectionList", "om2.MDagPath.getAPathTo"].
+        """
+
+        prefixes = tuple(f"{name}." for name in API_GLOBALS)
+        return [command for command in self.counts if command.startswith(prefixes)]
+
+    def total_time(self, commands=None):
+        """
+        :return: seconds spent inside counted calls.
+        """
+
+        return sum(seconds for command, seconds in self.times.items() if commands is None or command in commands)
+
+    def assert_budget(self, limit, commands=None, callers=None, message=None):
+        """
+        Fail when more calls were made than the budget allows.
+        :param limit: maximum number of calls.
+        :param commands: only count these commands.
+        :param callers: only count calls made from these functions.
+        :param message: prefix for the failure message.
+        :return: number of calls counted.
+        """
+
+        total = self.total(commands, callers)
+        if total > limit:
+            scope = f" of {sorted(commands)}" if commands else ""
+            raise BudgetExceeded(f"{message or 'cmds budget exceeded'}: {total} calls{scope} > {limit}. "
+                                 f"Top commands: {self.top()}")
+
+        return total
+
+    def top(self, count=5):
+        """
+        :return: list of (command, calls), most called first.
+        """
+
+        return sorted(self.counts.items(), key=lambda item: item[1], reverse=True)[:count]
+
+    def report(self):
+        """
+        :return: dictionary: "total", "time", "commands" {command: {"calls", "time"}} and "callers"
+        {caller: {command: calls}}.
+        """
+
+        return {
+            "total": self.total(),
+            "time": self.total_time(),
+            "commands": {command: {"calls": self.counts[command], "time": self.times[command]}
+                         for command, calls in self.top(len(self.counts))},
+            "callers": {caller: dict(commands) for caller, commands in self.callers.items()},
+        }
+
+
+def count_calls(func, *args, modules=MODULES, api=True, **kwargs):
+    """
+    Run func with a CallCounter active.
+    :return: (func result, CallCounter())
+    """
+
+    with CallCounter(modules, api=api) as counter:
+        result = func(*args, **kwargs)
+
+    return result, counter
@@ -0,0 +1,228 @@
+"""
+In-memory cache of parsed definition (.json) files.
+
+Entries are keyed on the absolute path and checked against the file's mtime and size on every lookup: unchanged files
+are never re-read or re-parsed, edited files are reloaded lazily on their next lookup. The cache is bounded, the least
+recently used definition is dropped first. Cache folders are listed once and indexed by filename, the listing is only
+refreshed when the folder itself changes.
+
+Definitions are shared between callers, so they are handed out frozen (read-only dictionaries, lists as tuples).
+thaw() gives back an editable copy. Copies and pickles of frozen dictionaries are plain dictionaries, so
+definitions still travel to process pools.
+
+    from Util import definition_cache
+    definition = definition_cache.load("C:/rigs/biped.json")
+    path = definition_cache.find(cache_folder, "guides")
+"""
+
+import os
+import json
+import threading
+import collections
+
+
+DEFAULT_MAX_ENTRIES = 32
+
+
+class FrozenDict(dict):
+    """
+    Read-only dictionary, still a dict for isinstance() checks and json.dumps().
+    """
+
+    __slots__ = ()
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError("Cached definitions are read-only, use definition_cache.thaw() for an editable copy.")
+
+    __setitem__ = __delitem__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+    __ior__ = _read_only
+
+    def __reduce__(self):
+        # copies and pickles come back as plain dictionaries.
+        return dict, (dict(self),)
+
+
+def freeze(value):
+    """
+    Read-only copy of parsed json data: dictionaries become FrozenDict(), lists become tuples.
+    :param value: json data.
+    :return: frozen data.
+    """
+
+    if isinstance(value, dict):
+        return FrozenDict((key, freeze(item)) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+
+    return value
+
+
+def thaw(value):
+    """
+    Editable copy of frozen data: dictionaries and lists again.
+    :param value: frozen data.
+    :return: json data.
+    """
+
+    if isinstance(value, dict):
+        return {key: thaw(item) for key, item in value.items()}
+    if isinstance(value, tuple):
+        return [thaw(item) for item in value]
+
+    return value
+
+
+def _signature(path):
+    """
+    :return: (mtime in ns, size) of path, what an entry is validated against.
+    """
+
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+class DefinitionCache:
+    """
+    Bounded LRU cache of parsed definitions plus a filename index of the folders searched with find().
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = collections.OrderedDict()  # path -> (signature, definition), least recently used first.
+        self._folders = {}  # folder -> (signature, sorted filenames)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, path):
+        return os.path.abspath(path) in self._entries
+
+    def load(self, path):
+        """
+        Parsed definition of a file, read from disk only when it isn't cached or changed since it was read.
+        :param path: path to a .json definition.
+        :return: frozen definition.
+        """
+
+        path = os.path.abspath(path)
+        if not os.path.isfile(path):
+            raise FileNotFoundError(f"Definition not found: {path}")
+
+        signature = _signature(path)
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry[0] == signature:
+                self._entries.move_to_end(path)
+                self.hits += 1
+                return entry[1]
+
+        # parse outside the lock, a concurrent miss on the same file parses it twice at worst.
+        with open(path, "r") as json_file:
+            definition = freeze(json.load(json_file))
+
+        with self._lock:
+            self.misses += 1
+            self._entries[path] = (signature, definition)
+            self._entries.move_to_end(path)
+            while len(self._entries) > max(self.max_entries, 0):
+                self._entries.popitem(last=False)
+
+        return definition
+
+    def filenames(self, folder, refresh=False):
+        """
+        Indexed listing of a folder, only listed again when the folder changed (files added, removed or renamed).
+        :param folder: folder path.
+        :param refresh: list the folder regardless.
+        :return: tuple of sorted filenames.
+        """
+
+        folder = os.path.abspath(folder)
+        signature = _signature(folder)
+        with self._lock:
+            index = self._folders.get(folder)
+            if index is not None and index[0] == signature and not refresh:
+                return index[1]
+
+        filenames = tuple(sorted(name for name in os.listdir(folder) if os.path.isfile(os.path.join(folder, name))))
+        with self._lock:
+            self._folders[folder] = (signature, filenames)
+
+        return filenames
+
+    def find(self, folder, name):
+        """
+        Path of the definition file in folder matching name: an exact "<name>.json" first, else the first filename
+        (sorted) containing name.
+        :param folder: folder path.
+        :param name: filename or part of it.
+        :return: path, None if nothing matches.
+        """
+
+        if not os.path.isdir(folder):
+            return None
+
+        for refresh in (False, True):  # a miss lists the folder once more, in case a change shared its mtime.
+            filenames = self.filenames(folder, refresh=refresh)
+            match = next((filename for filename in filenames if filename in (name, f"{name}.json")), None)
+            match = match or next((filename for filename in filenames if name in filename), None)
+            if match:
+                return os.path.join(os.path.abspath(folder), match)
+
+        return None
+
+    def invalidate(self, path=None):
+        """
+        Drop a cached definition (or folder index), everything without a path.
+        :param path: file or folder path.
+        :return: None
+        """
+
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+                self._folders.clear()
+                return
+
+            path = os.path.abspath(path)
+            self._entries.pop(path, None)
+            self._folders.pop(path, None)
+
+
+_CACHE = DefinitionCache()
+
+
+def load(path):
+    """
+    DefinitionCache.load() on the shared cache.
+    """
+
+    return _CACHE.load(path)
+
+
+def find(folder, name):
+    """
+    DefinitionCache.find() on the shared cache.
+    """
+
+    return _CACHE.find(folder, name)
+
+
+def invalidate(path=None):
+    """
+    DefinitionCache.invalidate() on the shared cache.
+    """
+
+    _CACHE.invalidate(path)
+
+
+def cache():
+    """
+    :return: the shared DefinitionCache().
+    """
+
+    return _CACHE
@@ -0,0 +1,106 @@
+"""
+In-memory stand-in for Maya, so the build pipeline runs (and can be benchmarked) in a plain Python interpreter.
+
+Covers the subset of maya.cmds, maya.api.OpenMaya and maya.OpenMaya the tool uses: DAG nodes, namespaces,
+transforms, joints, locators, ikHandles, attributes and connections, plus the scene callbacks scene_index listens to.
+Install it before anything imports maya:
+
+    from Util import fake_maya
+    fake_maya.install()
+
+    import build
+    build.prep_scene(guide_data)
+
+install() puts the fake modules in sys.modules under the real names, uninstall() takes them out again. It refuses
+to replace a real Maya that's already imported.
+"""
+
+import sys
+import types
+
+from . import scene
+from .scene import Scene, get_scene, set_scene
+
+
+MODULE_NAMES = ("maya", "maya.cmds", "maya.api", "maya.api.OpenMaya", "maya.OpenMaya", "maya.utils",
+                "maya.standalone")
+
+_previous = None
+
+
+def modules():
+    """
+    :return: {module name: fake module} for MODULE_NAMES.
+    """
+
+    from . import api, api1, cmds, standalone, utils
+
+    maya = types.ModuleType("maya")
+    maya.__path__ = []
+    maya.__fake__ = True
+    maya_api = types.ModuleType("maya.api")
+    maya_api.__path__ = []
+
+    maya.cmds = cmds
+    maya.api = maya_api
+    maya.OpenMaya = api1
+    maya.utils = utils
+    maya.standalone = standalone
+    maya_api.OpenMaya = api
+
+    return {
+        "maya": maya,
+        "maya.cmds": cmds,
+        "maya.api": maya_api,
+        "maya.api.OpenMaya": api,
+        "maya.OpenMaya": api1,
+        "maya.utils": utils,
+        "maya.standalone": standalone,
+    }
+
+
+def is_installed():
+    """
+    :return: True if the maya modules in sys.modules are the fake ones.
+    """
+
+    return getattr(sys.modules.get("maya"), "__fake__", False)
+
+
+def install(new_scene=None):
+    """
+    Register the fake maya modules. Modules that already imported maya keep the objects they imported.
+    :param new_scene: Scene() to make active, a fresh one by default.
+    :return: the active Scene().
+    """
+
+    global _previous
+
+    if "maya" in sys.modules and not is_installed():
+        raise Exception("A real maya module is already imported, the fake can't replace it.")
+
+    if not is_installed():
+        _previous = {name: sys.modules.get(name) for name in MODULE_NAMES}
+        sys.modules.update(modules())
+
+    return set_scene(new_scene if new_scene is not None else Scene())
+
+
+def uninstall():
+    """
+    Remove the fake maya modules again.
+    :return: None
+    """
+
+    global _previous
+
+    if not is_installed():
+        return
+
+    for name in MODULE_NAMES:
+        previous = (_previous or {}).get(name)
+        if previous is None:
+            sys.modules.pop(name, None)
+        else:
+            sys.modules[name] = previous
+    _previous = None
@@ -0,0 +1,1157 @@
+"""
+Fake maya.api.OpenMaya: the om2 subset the tool uses, backed by the in-memory scene.
+"""
+
+import math
+
+import numpy as np
+
+from . import scene as _scene
+
+
+def _scene_nodes():
+    return _scene.get_scene()
+
+
+# math types
+class MVector:
+    def __init__(self, *args):
+        if len(args) == 1:
+            args = tuple(args[0])[:3]
+        values = (tuple(float(v) for v in args) + (0.0, 0.0, 0.0))[:3]
+        self.x, self.y, self.z = values
+
+    def __iter__(self):
+        return iter((self.x, self.y, self.z))
+
+    def __len__(self):
+        return 3
+
+    def __getitem__(self, index):
+        return (self.x, self.y, self.z)[index]
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.x}, {self.y}, {self.z})"
+
+    def __eq__(self, other):
+        return isinstance(other, MVector) and tuple(self) == tuple(other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None
+
+    def __add__(self, other):
+        return type(self)(self.x + other[0], self.y + other[1], self.z + other[2])
+
+    def __sub__(self, other):
+        return type(self)(self.x - other[0], self.y - other[1], self.z - other[2])
+
+    def __neg__(self):
+        return type(self)(-self.x, -self.y, -self.z)
+
+    def __mul__(self, other):
+        if isinstance(other, MMatrix):
+            values = np.array(tuple(self)) @ other._values[:3, :3]
+            return type(self)(values)
+        if isinstance(other, MVector):
+            return self.x * other.x + self.y * other.y + self.z * other.z
+        return type(self)(self.x * other, self.y * other, self.z * other)
+
+    def __rmul__(self, other):
+        return type(self)(self.x * other, self.y * other, self.z * other)
+
+    def __truediv__(self, other):
+        return type(self)(self.x / other, self.y / other, self.z / other)
+
+    def __xor__(self, other):
+        return type(self)(np.cross(tuple(self), tuple(other)))
+
+    def length(self):
+        return math.sqrt(self.x * self.x + self.y * self.y + self.z * self.z)
+
+    def normal(self):
+        length = self.length()
+        return type(self)(self) / length if length else type(self)(self)
+
+    def normalize(self):
+        self.x, self.y, self.z = self.normal()
+        return self
+
+    def isEquivalent(self, other, tolerance=1e-10):
+        return all(abs(a - b) <= tolerance for a, b in zip(self, other))
+
+
+MVector.kZeroVector = MVector()
+MVector.kXaxisVector = MVector(1, 0, 0)
+MVector.kYaxisVector = MVector(0, 1, 0)
+MVector.kZaxisVector = MVector(0, 0, 1)
+
+
+class MPoint:
+    def __init__(self, *args):
+        if len(args) == 1:
+            args = tuple(args[0])
+        values = tuple(float(v) for v in args) + (0.0, 0.0, 0.0, 1.0)[len(args):]
+        self.x, self.y, self.z, self.w = values[:4]
+
+    def __iter__(self):
+        return iter((self.x, self.y, self.z, self.w))
+
+    def __len__(self):
+        return 4
+
+    def __getitem__(self, index):
+        return (self.x, self.y, self.z, self.w)[index]
+
+    def __repr__(self):
+        return f"MPoint({self.x}, {self.y}, {self.z}, {self.w})"
+
+    def __sub__(self, other):
+        if isinstance(other, MPoint):
+            return MVector(self.x - other.x, self.y - other.y, self.z - other.z)
+        return MPoint(self.x - other[0], self.y - other[1], self.z - other[2], self.w)
+
+    def __add__(self, other):
+        return MPoint(self.x + other[0], self.y + other[1], self.z + other[2], self.w)
+
+    def __mul__(self, other):
+        if isinstance(other, MMatrix):
+            return MPoint(np.array(tuple(self)) @ other._values)
+        return MPoint(self.x * other, self.y * other, self.z * other, self.w)
+
+    def distanceTo(self, other):
+        return (self - other).length()
+
+
+class MMatrix:
+    def __init__(self, values=None):
+        if values is None:
+            self._values = np.identity(4)
+        elif isinstance(values, MMatrix):
+            self._values = values._values.copy()
+        else:
+            self._values = np.array(values, dtype=np.float64).reshape(4, 4)
+
+    def __iter__(self):
+        return iter(self._values.ravel().tolist())
+
+    def __len__(self):
+        return 16
+
+    def __getitem__(self, index):
+        if isinstance(index, tuple):
+            return float(self._values[index])
+        return float(self._values.ravel()[index])
+
+    def __repr__(self):
+        return f"MMatrix({self._values.ravel().tolist()})"
+
+    def __eq__(self, other):
+        return isinstance(other, MMatrix) and np.array_equal(self._values, other._values)
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None
+
+    def __mul__(self, other):
+        if isinstance(other, MMatrix):
+            return MMatrix(self._values @ other._values)
+        return MMatrix(self._values * other)
+
+    def __add__(self, other):
+        return MMatrix(self._values + other._values)
+
+    def __sub__(self, other):
+        return MMatrix(self._values - other._values)
+
+    def getElement(self, row, column):
+        return float(self._values[row, column])
+
+    def setElement(self, row, column, value):
+        self._values[row, column] = value
+        return self
+
+    def inverse(self):
+        return MMatrix(np.linalg.inv(self._values))
+
+    def transpose(self):
+        return MMatrix(self._values.T)
+
+    def det4x4(self):
+        return float(np.linalg.det(self._values))
+
+    def isEquivalent(self, other, tolerance=1e-10):
+        return bool(np.allclose(self._values, other._values, rtol=0.0, atol=tolerance))
+
+
+MMatrix.kIdentity = MMatrix()
+
+
+class MEulerRotation:
+    kXYZ, kYZX, kZXY, kXZY, kYXZ, kZYX = range(6)
+
+    def __init__(self, x=0.0, y=0.0, z=0.0, order=0):
+        if not isinstance(x, (int, float)):
+            x, y, z = tuple(x)[:3]
+        self.x, self.y, self.z = float(x), float(y), float(z)
+        self.order = order
+
+    def __iter__(self):
+        return iter((self.x, self.y, self.z))
+
+    def __getitem__(self, index):
+        return (self.x, self.y, self.z)[index]
+
+    def __repr__(self):
+        return f"MEulerRotation({self.x}, {self.y}, {self.z}, {self.order})"
+
+    def asMatrix(self):
+        rotation = _scene.batch_ops.rotation_matrices(np.degrees((self.x, self.y, self.z)), self.order)[0]
+        matrix = np.identity(4)
+        matrix[:3, :3] = rotation
+        return MMatrix(matrix)
+
+
+class MAngle:
+    kInvalid, kRadians, kDegrees, kAngMinutes, kAngSeconds = range(5)
+
+    def __init__(self, value=0.0, unit=1):
+        self.value = float(value)
+        self.unit = unit
+
+    def asRadians(self):
+        return math.radians(self.value) if self.unit == MAngle.kDegrees else self.value
+
+    def asDegrees(self):
+        return self.value if self.unit == MAngle.kDegrees else math.degrees(self.value)
+
+
+class MSpace:
+    kInvalid, kTransform, kPreTransform, kPostTransform, kWorld = range(5)
+    kObject = kPreTransform
+
+
+class MFn:
+    kInvalid = 0
+    kBase = 1
+    kDependencyNode = 4
+    kDagNode = 107
+    kTransform = 110
+    kJoint = 121
+    kShape = 248
+    kLocator = 281
+    kIkHandle = 120
+    kIkEffector = 119
+    kIkSolver = 357
+    kMesh = 296
+
+
+# node type -> MFn types it has, see scene.NODE_TYPES.
+_FN_TYPES = {
+    "dependNode": MFn.kDependencyNode,
+    "dagNode": MFn.kDagNode,
+    "transform": MFn.kTransform,
+    "joint": MFn.kJoint,
+    "ikHandle": MFn.kIkHandle,
+    "ikEffector": MFn.kIkEffector,
+    "shape": MFn.kShape,
+    "locator": MFn.kLocator,
+    "mesh": MFn.kMesh,
+    "ikSolver": MFn.kIkSolver,
+}
+
+
+def _has_fn(node, fn_type):
+    if fn_type == MFn.kBase:
+        return True
+
+    node_type = node.type
+    while node_type is not None:
+        if _FN_TYPES.get(node_type) == fn_type:
+            return True
+        node_type = _scene.NODE_TYPES.get(node_type)
+
+    return False
+
+
+def _api_type(node):
+    node_type = node.type
+    while node_type is not None and node_type not in _FN_TYPES:
+        node_type = _scene.NODE_TYPES.get(node_type)
+    return _FN_TYPES.get(node_type, MFn.kDependencyNode)
+
+
+# nodes
+class MObject:
+    def __init__(self, other=None):
+        self._node = other._node if isinstance(other, MObject) else None
+
+    @classmethod
+    def _wrap(cls, node):
+        mobject = cls()
+        mobject._node = node
+        return mobject
+
+    def isNull(self):
+        return self._node is None
+
+    def hasFn(self, fn_type):
+        return self._node is not None and _has_fn(self._node, fn_type)
+
+    def apiType(self):
+        return MFn.kInvalid if self._node is None else _api_type(self._node)
+
+    @property
+    def apiTypeStr(self):
+        return "kInvalid" if self._node is None else self._node.type
+
+    def __eq__(self, other):
+        return isinstance(other, MObject) and self._node is other._node
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash(self._node.id if self._node is not None else 0)
+
+    def __repr__(self):
+        return f"MObject({self._node.name if self._node is not None else None!r})"
+
+
+MObject.kNullObj = MObject()
+
+
+class MObjectHandle:
+    def __init__(self, mobject=None):
+        self._node = mobject._node if mobject is not None else None
+
+    def isValid(self):
+        return self._node is not None and self._node.alive
+
+    def isAlive(self):
+        return self.isValid()
+
+    def hashCode(self):
+        return self._node.id if self._node is not None else 0
+
+    def object(self):
+        return MObject._wrap(self._node if self.isValid() else None)
+
+    def objectRef(self):
+        return self.object()
+
+
+def _node_of(item):
+    if isinstance(item, (MObject, MDagPath)):
+        node = item._node
+    elif isinstance(item, MFnDependencyNode):
+        node = item._node
+    else:
+        node = item
+    if node is None:
+        raise RuntimeError("(kInvalidParameter): Object is invalid")
+    return node
+
+
+class MDagPath:
+    def __init__(self, other=None):
+        self._node = other._node if isinstance(other, MDagPath) else None
+
+    @classmethod
+    def _wrap(cls, node):
+        path = cls()
+        path._node = node
+        return path
+
+    @staticmethod
+    def getAPathTo(mobject):
+        node = _node_of(mobject)
+        if not node.is_dag:
+            raise RuntimeError("(kInvalidParameter): Object is not a DAG node")
+        return MDagPath._wrap(node)
+
+    def isValid(self):
+        return self._node is not None and self._node.alive
+
+    def node(self):
+        return MObject._wrap(self._node)
+
+    def transform(self):
+        node = self._node
+        return MObject._wrap(node.parent if node.is_shape else node)
+
+    def fullPathName(self):
+        return self._node.long_name() if self._node is not None else ""
+
+    def partialPathName(self):
+        return self._node.name if self._node is not None else ""
+
+    def hasFn(self, fn_type):
+        return _has_fn(self._node, fn_type)
+
+    def apiType(self):
+        return _api_type(self._node)
+
+    def length(self):
+        return len(self._node.ancestors()) + 1
+
+    def childCount(self):
+        return len(self._node.children)
+
+    def child(self, index):
+        return MObject._wrap(self._node.children[index])
+
+    def push(self, child):
+        node = _node_of(child)
+        if node.parent is not self._node:
+            raise RuntimeError("(kInvalidParameter): Object is not a child of the path")
+        self._node = node
+        return self
+
+    def pop(self, count=1):
+        for _ in range(count):
+            self._node = self._node.parent
+        return self
+
+    def inclusiveMatrix(self):
+        return MMatrix(self._node.world_matrix())
+
+    def inclusiveMatrixInverse(self):
+        return MMatrix(np.linalg.inv(self._node.world_matrix()))
+
+    def exclusiveMatrix(self):
+        return MMatrix(self._node.parent_matrix())
+
+    def exclusiveMatrixInverse(self):
+        return MMatrix(np.linalg.inv(self._node.parent_matrix()))
+
+    def __eq__(self, other):
+        return isinstance(other, MDagPath) and self._node is other._node
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"MDagPath({self.fullPathName()!r})"
+
+
+class MSelectionList:
+    def __init__(self, other=None):
+        self._items = list(other._items) if isinstance(other, MSelectionList) else []
+
+    def _append(self, node, plug=None):
+        for item in self._items:
+            if item[0] is node and item[1] == plug:
+                return
+        self._items.append((node, plug))
+
+    def add(self, item, mergeWithExisting=True):
+        if isinstance(item, (MObject, MDagPath)):
+            self._append(_node_of(item))
+            return self
+        if isinstance(item, MPlug):
+            self._append(item._node, item._attribute)
+            return self
+
+        name, dot, attribute = str(item).partition(".")
+        nodes = _scene_nodes().match(name)
+        if not nodes:
+            raise RuntimeError("(kInvalidParameter): Object does not exist")
+        for node in nodes:
+            if attribute:
+                if not node.has_attribute(attribute):
+                    raise RuntimeError("(kInvalidParameter): Object does not exist")
+                self._append(node, _scene.ALIASES.get(attribute, attribute))
+            else:
+                self._append(node)
+        return self
+
+    def length(self):
+        return len(self._items)
+
+    def isEmpty(self):
+        return not self._items
+
+    def clear(self):
+        self._items = []
+        return self
+
+    def _item(self, index):
+        try:
+            node, plug = self._items[index]
+        except IndexError:
+            raise RuntimeError("(kInvalidParameter): Index not within range")
+        if not node.alive:
+            raise RuntimeError("(kInvalidParameter): Object is invalid")
+        return node, plug
+
+    def getDependNode(self, index):
+        return MObject._wrap(self._item(index)[0])
+
+    def getDagPath(self, index):
+        node = self._item(index)[0]
+        if not node.is_dag:
+            raise RuntimeError("(kInvalidParameter): Object is not a DAG node")
+        return MDagPath._wrap(node)
+
+    def getPlug(self, index):
+        node, plug = self._item(index)
+        if plug is None:
+            raise RuntimeError("(kInvalidParameter): Item is not a plug")
+        return MPlug._wrap(node, plug)
+
+    def getSelectionStrings(self, index=None):
+        items = self._items if index is None else [self._items[index]]
+        return [node.name + (f".{plug}" if plug else "") for node, plug in items]
+
+    def hasItem(self, item):
+        node = _node_of(item)
+        return any(entry[0] is node for entry in self._items)
+
+
+class MPlug:
+    def __init__(self, other=None):
+        self._node = other._node if isinstance(other, MPlug) else None
+        self._attribute = other._attribute if isinstance(other, MPlug) else None
+
+    @classmethod
+    def _wrap(cls, node, attribute):
+        plug = cls()
+        plug._node = node
+        plug._attribute = attribute
+        return plug
+
+    @property
+    def isNull(self):
+        return self._node is None
+
+    def node(self):
+        return MObject._wrap(self._node)
+
+    def name(self):
+        return f"{self._node.name}.{self._attribute}"
+
+    def partialName(self, includeNodeName=False, *args, **kwargs):
+        return self.name() if includeNodeName else self._attribute
+
+    def _is_angle(self):
+        name, index = _scene.split_attribute(self._attribute)
+        return name in _scene.ANGLE_ATTRIBUTES and index is not None
+
+    # values
+    def asDouble(self):
+        value = float(self._node.get(self._attribute))
+        return math.radians(value) if self._is_angle() else value
+
+    asFloat = asDouble
+
+    def asInt(self):
+        return int(self._node.get(self._attribute))
+
+    asShort = asInt
+
+    def asBool(self):
+        return bool(self._node.get(self._attribute))
+
+    def asString(self):
+        value = self._node.get(self._attribute)
+        return "" if value is None else str(value)
+
+    def asMAngle(self):
+        return MAngle(self.asDouble(), MAngle.kRadians)
+
+    def _set(self, value):
+        self._node.set(self._attribute, value)
+
+    def setDouble(self, value):
+        self._set(math.degrees(value) if self._is_angle() else value)
+
+    setFloat = setDouble
+
+    def setInt(self, value):
+        self._set(int(value))
+
+    setShort = setInt
+
+    def setBool(self, value):
+        self._set(bool(value))
+
+    def setString(self, value):
+        self._set(str(value))
+
+    def setMAngle(self, angle):
+        self._set(angle.asDegrees())
+
+    # state
+    @property
+    def isChannelBox(self):
+        return self._attribute in self._node.channel_box
+
+    @isChannelBox.setter
+    def isChannelBox(self, value):
+        if value:
+            self._node.channel_box.add(self._attribute)
+        else:
+            self._node.channel_box.discard(self._attribute)
+
+    @property
+    def isLocked(self):
+        return self._attribute in self._node.locked
+
+    @isLocked.setter
+    def isLocked(self, value):
+        if value:
+            self._node.locked.add(self._attribute)
+        else:
+            self._node.locked.discard(self._attribute)
+
+    @property
+    def isConnected(self):
+        return bool(self._node.scene.sources(self._node, self._attribute) or
+                    self._node.scene.destinations(self._node, self._attribute))
+
+    @property
+    def isCompound(self):
+        return self._attribute in _scene.VECTOR_ATTRIBUTES
+
+    def numChildren(self):
+        return 3 if self.isCompound else 0
+
+    def child(self, index):
+        return MPlug._wrap(self._node, f"{self._attribute}{'XYZ'[index]}")
+
+    def source(self):
+        sources = self._node.scene.sources(self._node, self._attribute)
+        if not sources:
+            return MPlug()
+        node, attribute, _ = sources[0]
+        return MPlug._wrap(node, attribute)
+
+    def destinations(self):
+        return [MPlug._wrap(node, attribute)
+                for node, attribute, _ in self._node.scene.destinations(self._node, self._attribute)]
+
+    def __repr__(self):
+        return f"MPlug({self.name() if self._node is not None else None!r})"
+
+
+# attributes
+class MFnData:
+    kInvalid, kNumeric, kPlugin, kPluginGeometry, kString = range(5)
+    kMatrix = 6
+
+
+class MFnNumericData:
+    kInvalid, kBoolean, kByte, kChar, kShort = range(5)
+    kInt, kLong = 7, 7
+    kFloat, kDouble = 10, 11
+
+
+class _AttributeSpec:
+    def __init__(self, long_name, short_name, data_type, default):
+        self.long_name = long_name
+        self.short_name = short_name
+        self.data_type = data_type
+        self.default = default
+
+
+class MFnTypedAttribute:
+    _TYPES = {MFnData.kString: "string", MFnData.kMatrix: "matrix"}
+
+    def create(self, long_name, short_name, data_type, default=None):
+        self._spec = _AttributeSpec(long_name, short_name, self._TYPES.get(data_type, "string"), default)
+        return self._spec
+
+
+class MFnNumericAttribute:
+    _TYPES = {MFnNumericData.kBoolean: "bool", MFnNumericData.kShort: "short", MFnNumericData.kInt: "long",
+              MFnNumericData.kFloat: "float", MFnNumericData.kDouble: "double"}
+
+    def create(self, long_name, short_name, data_type, default=0.0):
+        self._spec = _AttributeSpec(long_name, short_name, self._TYPES.get(data_type, "double"), default)
+        return self._spec
+
+
+# function sets
+class MFnBase:
+    def __init__(self, item=None):
+        self._node = None
+        if item is not None:
+            self.setObject(item)
+
+    def setObject(self, item):
+        self._node = _node_of(item)
+        return self
+
+    def object(self):
+        return MObject._wrap(self._node)
+
+    def hasObj(self, item):
+        return True
+
+    def type(self):
+        return _api_type(self._node)
+
+
+class MFnDependencyNode(MFnBase):
+
+    def name(self):
+        return self._node.name
+
+    def absoluteName(self):
+        return ":" + self._node.name
+
+    def setName(self, name):
+        return self._node.scene.rename(self._node, name)
+
+    @property
+    def typeName(self):
+        return self._node.type
+
+    @property
+    def namespace(self):
+        return self._node.namespace.strip(":")
+
+    def hasAttribute(self, name):
+        return self._node.has_attribute(name)
+
+    def findPlug(self, name, wantNetworkedPlug=False):
+        if not self._node.has_attribute(name):
+            raise RuntimeError(f"(kInvalidParameter): Cannot find plug: {self._node.name}.{name}")
+        return MPlug._wrap(self._node, _scene.ALIASES.get(name, name))
+
+    def attributeCount(self):
+        return len(self._node.attributes)
+
+
+class MFnDagNode(MFnDependencyNode):
+
+    def setObject(self, item):
+        self._node = _node_of(item)
+        if not self._node.is_dag:
+            raise RuntimeError("(kInvalidParameter): Object is incompatible with this method")
+        return self
+
+    def fullPathName(self):
+        return self._node.long_name()
+
+    def partialPathName(self):
+        return self._node.name
+
+    def getPath(self):
+        return MDagPath._wrap(self._node)
+
+    def dagPath(self):
+        return self.getPath()
+
+    def parentCount(self):
+        return 0 if self._node.parent is None else 1
+
+    def parent(self, index=0):
+        if self._node.parent is None:
+            raise RuntimeError("(kInvalidParameter): Index not within range")
+        return MObject._wrap(self._node.parent)
+
+    def childCount(self):
+        return len(self._node.children)
+
+    def child(self, index):
+        return MObject._wrap(self._node.children[index])
+
+    def transformationMatrix(self):
+        return MMatrix(self._node.local_matrix())
+
+
+class MFnTransform(MFnDagNode):
+
+    def translation(self, space=MSpace.kTransform):
+        if space == MSpace.kWorld:
+            return MVector(self._node.world_matrix()[3, :3])
+        return MVector(self._node.get("translate"))
+
+    def setTranslation(self, vector, space=MSpace.kTransform):
+        translate = np.array(tuple(vector)[:3], dtype=np.float64)
+        if space == MSpace.kWorld:
+            parent = self._node.parent_matrix()
+            translate = (np.append(translate, 1.0) @ np.linalg.inv(parent))[:3]
+        self._node.set("translate", translate.tolist())
+        return self
+
+    def rotation(self, space=MSpace.kTransform, asQuaternion=False):
+        return MEulerRotation(*np.radians(self._node.get("rotate")), order=self._node.get("rotateOrder"))
+
+    def setRotation(self, rotation, space=MSpace.kTransform):
+        self._node.set("rotate", np.degrees(tuple(rotation)[:3]).tolist())
+        if isinstance(rotation, MEulerRotation):
+            self._node.set("rotateOrder", rotation.order)
+        return self
+
+    def scale(self):
+        return list(self._node.get("scale"))
+
+    def setScale(self, scale):
+        self._node.set("scale", list(scale))
+        return self
+
+    def rotationOrder(self):
+        return self._node.get("rotateOrder")
+
+    def rotatePivot(self, space=MSpace.kTransform):
+        if space == MSpace.kWorld:
+            return MPoint(self._node.world_matrix()[3, :3])
+        return MPoint(0.0, 0.0, 0.0)
+
+
+# modifiers
+class MDGModifier:
+    """
+    Queues edits, doIt() applies everything queued since the last doIt(), undoIt() reverts all applied edits. A doIt()
+    after undoIt() applies the undone edits again (redo), as in Maya.
+    """
+
+    def __init__(self):
+        self._queue = []
+        self._done = []  # (operation, undo callable)
+        self._undone = []
+
+    def _create(self, node_type, parent=None):
+        node = _scene.Node(_scene_nodes(), node_type, "")
+        self._queue.append(("create", node, parent))
+        return node
+
+    def createNode(self, node_type):
+        return MObject._wrap(self._create(node_type))
+
+    def renameNode(self, mobject, name):
+        self._queue.append(("rename", _node_of(mobject), name))
+        return self
+
+    def deleteNode(self, mobject):
+        self._queue.append(("delete", _node_of(mobject)))
+        return self
+
+    def addAttribute(self, mobject, attribute):
+        self._queue.append(("add_attribute", _node_of(mobject), attribute))
+        return self
+
+    def connect(self, source, destination):
+        self._queue.append(("connect", source, destination))
+        return self
+
+    def disconnect(self, source, destination):
+        self._queue.append(("disconnect", source, destination))
+        return self
+
+    def _plug_value(self, plug, value):
+        self._queue.append(("set", plug, value))
+        return self
+
+    def newPlugValueDouble(self, plug, value):
+        return self._plug_value(plug, math.degrees(value) if plug._is_angle() else float(value))
+
+    newPlugValueFloat = newPlugValueDouble
+
+    def newPlugValueInt(self, plug, value):
+        return self._plug_value(plug, int(value))
+
+    newPlugValueShort = newPlugValueInt
+
+    def newPlugValueBool(self, plug, value):
+        return self._plug_value(plug, bool(value))
+
+    def newPlugValueString(self, plug, value):
+        return self._plug_value(plug, str(value))
+
+    def newPlugValueMAngle(self, plug, angle):
+        return self._plug_value(plug, angle.asDegrees())
+
+    def pythonCommandToExecute(self, command):
+        self._queue.append(("python", command))
+        return self
+
+    def doIt(self):
+        queue, self._queue = self._undone[::-1] + self._queue, []
+        self._undone = []
+        for operation in queue:
+            self._done.append((operation, self._apply(operation)))
+        return self
+
+    def undoIt(self):
+        while self._done:
+            operation, undo = self._done.pop()
+            undo()
+            self._undone.append(operation)
+        return self
+
+    def _apply(self, operation):
+        scene = _scene_nodes()
+        kind = operation[0]
+
+        if kind == "create":
+            node, parent = operation[1], operation[2]
+            node.name = scene.default_name(node.type)
+            scene.add(node, parent)
+            return lambda: scene.delete([node])
+
+        if kind == "rename":
+            node, name = operation[1], operation[2]
+            previous = node.name
+            scene.rename(node, name)
+            return lambda: scene.rename(node, ":" + previous)
+
+        if kind == "reparent":
+            node, parent = operation[1], operation[2]
+            previous = node.parent
+            scene.set_parent(node, parent, keep_world=False)
+            return lambda: scene.set_parent(node, previous, keep_world=False)
+
+        if kind == "delete":
+            node = operation[1]
+            nodes = [node] + node.descendants()
+            parents = [entry.parent for entry in nodes]
+            scene.delete([node])
+
+            def undo():
+                for entry, parent in zip(nodes, parents):
+                    scene.add(entry, parent)
+            return undo
+
+        if kind == "add_attribute":
+            node, spec = operation[1], operation[2]
+            node.add_attribute(spec.long_name, spec.data_type, spec.default)
+
+            def undo():
+                node.attributes.pop(spec.long_name, None)
+                node.dynamic.pop(spec.long_name, None)
+            return undo
+
+        if kind == "connect":
+            source, destination = operation[1], operation[2]
+            previous = scene.connections.get((destination._node.id, destination._attribute))
+            scene.connect(source._node, source._attribute, destination._node, destination._attribute)
+
+            def undo():
+                scene.disconnect(destination._node, destination._attribute)
+                if previous is not None:
+                    scene.connect(previous[0], previous[1], destination._node, destination._attribute)
+            return undo
+
+        if kind == "disconnect":
+            source, destination = operation[1], operation[2]
+            scene.disconnect(destination._node, destination._attribute)
+            return lambda: scene.connect(source._node, source._attribute, destination._node, destination._attribute)
+
+        if kind == "set":
+            plug, value = operation[1], operation[2]
+            previous = plug._node.get(plug._attribute)
+            plug._node.set(plug._attribute, value, force=True)
+            return lambda: plug._node.set(plug._attribute, previous, force=True)
+
+        if kind == "python":
+            exec(operation[1], {})
+            return lambda: None  # the fake keeps no undo queue for cmds edits.
+
+        raise RuntimeError(f"Unknown modifier operation: {kind}")
+
+
+class MDagModifier(MDGModifier):
+
+    def createNode(self, node_type, parent=MObject.kNullObj):
+        parent_node = parent._node if isinstance(parent, MObject) else None
+
+        # a shape without a parent gets a transform, which is what's returned (as in Maya).
+        if _scene.is_type(node_type, "shape") and parent_node is None:
+            transform = self._create("transform")
+            self._create(node_type, transform)
+            return MObject._wrap(transform)
+
+        return MObject._wrap(self._create(node_type, parent_node))
+
+    def reparentNode(self, mobject, newParent=MObject.kNullObj):
+        self._queue.append(("reparent", _node_of(mobject), newParent._node))
+        return self
+
+
+# plug-ins
+class MArgList:
+    def __init__(self, args=()):
+        self._args = list(args)
+
+    def length(self):
+        return len(self._args)
+
+
+class MPxCommand:
+    """
+    Base of plug-in commands. Undoable commands go on the fake undo queue, see cmds.undo().
+    """
+
+    def __init__(self):
+        pass
+
+    def doIt(self, args):
+        pass
+
+    def undoIt(self):
+        pass
+
+    def redoIt(self):
+        pass
+
+    def isUndoable(self):
+        return False
+
+
+class MFnPlugin:
+    def __init__(self, mobject=None, vendor="", version="", apiVersion="Any"):
+        self.vendor = vendor
+        self.version = version
+
+    def registerCommand(self, name, creator, syntax=None):
+        from . import cmds
+        cmds._register_command(name, creator)
+
+    def deregisterCommand(self, name):
+        from . import cmds
+        cmds._deregister_command(name)
+
+
+# iterators
+class MItDag:
+    kDepthFirst, kBreadthFirst = 1, 2
+
+    def __init__(self, traversalType=1, filterType=MFn.kInvalid):
+        self._filter = filterType
+        self.reset()
+
+    def reset(self):
+        nodes = _scene_nodes().dag_nodes()
+        if self._filter != MFn.kInvalid:
+            nodes = [node for node in nodes if _has_fn(node, self._filter)]
+        self._nodes = nodes
+        self._index = 0
+        return self
+
+    def isDone(self):
+        return self._index >= len(self._nodes)
+
+    def next(self):
+        self._index += 1
+        return self
+
+    def currentItem(self):
+        return MObject._wrap(self._nodes[self._index])
+
+    def getPath(self):
+        return MDagPath._wrap(self._nodes[self._index])
+
+    def fullPathName(self):
+        return self._nodes[self._index].long_name()
+
+    def partialPathName(self):
+        return self._nodes[self._index].name
+
+    def depth(self):
+        return len(self._nodes[self._index].ancestors())
+
+
+class MItDependencyNodes:
+
+    def __init__(self, filterType=MFn.kInvalid):
+        nodes = list(_scene_nodes().nodes.values())
+        if filterType != MFn.kInvalid:
+            nodes = [node for node in nodes if _has_fn(node, filterType)]
+        self._nodes = nodes
+        self._index = 0
+
+    def isDone(self):
+        return self._index >= len(self._nodes)
+
+    def next(self):
+        self._index += 1
+        return self
+
+    def thisNode(self):
+        return MObject._wrap(self._nodes[self._index])
+
+
+# messages
+class MMessage:
+
+    @staticmethod
+    def removeCallback(callback_id):
+        _scene_nodes().remove_callback(callback_id)
+
+    @staticmethod
+    def removeCallbacks(callback_ids):
+        for callback_id in callback_ids:
+            _scene_nodes().remove_callback(callback_id)
+
+
+class MDGMessage(MMessage):
+
+    @staticmethod
+    def addNodeAddedCallback(function, nodeType="dependNode", clientData=None):
+        return _scene_nodes().add_callback(
+            "node_added", lambda node: function(MObject._wrap(node), clientData), node_type=nodeType)
+
+    @staticmethod
+    def addNodeRemovedCallback(function, nodeType="dependNode", clientData=None):
+        return _scene_nodes().add_callback(
+            "node_removed", lambda node: function(MObject._wrap(node), clientData), node_type=nodeType)
+
+
+class MNodeMessage(MMessage):
+
+    @staticmethod
+    def addNameChangedCallback(node, function, clientData=None):
+        watched = node._node if isinstance(node, MObject) else None
+        return _scene_nodes().add_callback(
+            "name_changed", lambda changed, previous: function(MObject._wrap(changed), previous, clientData),
+            node=watched)
+
+
+class MNamespaceMessage(MMessage):
+
+    @staticmethod
+    def addNamespaceRenamedCallback(function, clientData=None):
+        return _scene_nodes().add_callback("namespace_renamed", lambda: function(clientData))
+
+
+class MSceneMessage(MMessage):
+    kSceneUpdate, kBeforeNew, kAfterNew, kBeforeImport, kAfterImport, kBeforeOpen, kAfterOpen = range(7)
+
+    _KINDS = {kAfterNew: "after_new", kAfterOpen: "after_open", kBeforeNew: "before_new",
+              kBeforeOpen: "before_open"}
+
+    @staticmethod
+    def addCallback(message, function, clientData=None):
+        kind = MSceneMessage._KINDS.get(message, f"scene_message_{message}")
+        return _scene_nodes().add_callback(kind, lambda: function(clientData))
+
+
+class MGlobal:
+
+    @staticmethod
+    def displayInfo(message):
+        print(message)
+
+    @staticmethod
+    def displayWarning(message):
+        print(f"# Warning: {message}")
+
+    @staticmethod
+    def displayError(message):
+        print(f"# Error: {message}")
+
+    @staticmethod
+    def getSelectionListByName(name):
+        return MSelectionList().add(name)
+
+    @staticmethod
+    def getActiveSelectionList():
+        selection = MSelectionList()
+        for node in _scene_nodes().selection:
+            selection.add(MObject._wrap(node))
+        return selection
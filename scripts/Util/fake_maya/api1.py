@@ -0,0 +1,51 @@
+"""
+Fake maya.OpenMaya (API 1.0): the few classes the tool still uses, sharing the om2 implementation.
+API 1.0 methods fill in the objects they're given instead of returning new ones.
+"""
+
+from . import api
+
+from .api import MFn, MSpace, MVector, MPoint, MAngle, MEulerRotation  # noqa: F401 - re-exported
+
+
+class MObject(api.MObject):
+    pass
+
+
+class MDagPath(api.MDagPath):
+    pass
+
+
+class MMatrix(api.MMatrix):
+    pass
+
+
+class MSelectionList(api.MSelectionList):
+
+    def getDependNode(self, index, mobject):
+        mobject._node = self._item(index)[0]
+
+    def getDagPath(self, index, path, component=None):
+        path._node = api.MSelectionList.getDagPath(self, index)._node
+
+
+class MGlobal(api.MGlobal):
+
+    @staticmethod
+    def getSelectionListByName(name, selection):
+        selection.add(name)
+
+
+class MScriptUtil:
+
+    @staticmethod
+    def createMatrixFromList(values, matrix):
+        matrix._values = api.MMatrix(list(values))._values
+
+
+class MFnDependencyNode(api.MFnDependencyNode):
+    pass
+
+
+class MFnDagNode(api.MFnDagNode):
+    pass
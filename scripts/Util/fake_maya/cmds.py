@@ -0,0 +1,879 @@
+"""
+Fake maya.cmds: the commands the tool uses, backed by the in-memory scene.
+
+Flags follow Maya's long and short names. Queries that list nothing return None, as Maya does.
+"""
+
+import os
+
+import numpy as np
+
+from . import scene as _scene
+
+try:
+    from .. import batch_ops
+except Exception as e:
+    from scripts.Util import batch_ops
+
+
+def _get_scene():
+    return _scene.get_scene()
+
+
+def _flag(kwargs, *names, default=None):
+    for name in names:
+        if name in kwargs:
+            return kwargs[name]
+    return default
+
+
+def _flatten(args):
+    items = []
+    for arg in args:
+        if isinstance(arg, (list, tuple)):
+            items.extend(_flatten(arg))
+        elif arg is not None:
+            items.append(str(arg))
+    return items
+
+
+def _or_none(items):
+    return items if items else None
+
+
+def _nodes(args, use_selection=True):
+    """
+    Resolve command arguments to nodes, defaulting to the selection.
+    """
+
+    scene = _get_scene()
+    names = _flatten(args)
+    if not names and use_selection:
+        return list(scene.selection)
+
+    nodes = []
+    for name in names:
+        matched = scene.match(name)
+        if not matched:
+            raise ValueError(f"No object matches name: {name}")
+        nodes.extend(matched)
+    return nodes
+
+
+def _plug(name):
+    node_name, dot, attribute = name.partition(".")
+    if not dot:
+        raise RuntimeError(f"'{name}' is not an attribute.")
+    node = _get_scene().find(node_name)
+    if node is None:
+        raise ValueError(f"No object matches name: {name}")
+    if not node.has_attribute(attribute):
+        raise ValueError(f"No object matches name: {name}")
+    return node, attribute
+
+
+def _name(node, long=False):
+    return node.long_name() if long else node.name
+
+
+def _vector(values):
+    values = list(values)
+    if len(values) == 1 and isinstance(values[0], (list, tuple)):
+        values = list(values[0])
+    return [float(value) for value in values]
+
+
+# namespaces
+def namespace(name=None, **kwargs):
+    scene = _get_scene()
+
+    if "set" in kwargs:
+        scene.current_namespace = scene.absolute_namespace(kwargs["set"], must_exist=True)
+        return scene.current_namespace
+
+    if "add" in kwargs or "addNamespace" in kwargs:
+        added = scene.add_namespace(_flag(kwargs, "add", "addNamespace"), _flag(kwargs, "parent", "p"))
+        return added.strip(":")
+
+    if "ex" in kwargs or "exists" in kwargs:
+        target = _flag(kwargs, "ex", "exists")
+        target = name if target is True else target
+        return scene.absolute_namespace(target) in scene.namespaces
+
+    if "rm" in kwargs or "removeNamespace" in kwargs:
+        scene.remove_namespace(_flag(kwargs, "rm", "removeNamespace"),
+                               merge_with_parent=_flag(kwargs, "mergeNamespaceWithParent", "mnp", default=False),
+                               merge_with_root=_flag(kwargs, "mergeNamespaceWithRoot", "mnr", default=False),
+                               delete_content=_flag(kwargs, "deleteNamespaceContent", "dnc", default=False))
+        return None
+
+    if "mv" in kwargs or "moveNamespace" in kwargs:
+        source, destination = _flag(kwargs, "mv", "moveNamespace")
+        scene.move_namespace(source, destination, force=_flag(kwargs, "f", "force", default=False))
+        return None
+
+    if "rename" in kwargs or "ren" in kwargs:
+        old, new = _flag(kwargs, "rename", "ren")
+        return scene.rename_namespace(old, new, _flag(kwargs, "parent", "p")).strip(":")
+
+    raise RuntimeError(f"namespace: unsupported flags {sorted(kwargs)}")
+
+
+def namespaceInfo(name=None, **kwargs):
+    scene = _get_scene()
+
+    if _flag(kwargs, "cur", "currentNamespace"):
+        current = scene.current_namespace
+        if _flag(kwargs, "absoluteName", "an") or current == ":":
+            return current
+        return current.strip(":")
+
+    if _flag(kwargs, "isRootNamespace", "ir"):
+        return scene.absolute_namespace(name) == ":"
+
+    target = scene.absolute_namespace(name, must_exist=True) if name else scene.current_namespace
+    absolute = _flag(kwargs, "absoluteName", "an", default=False)
+
+    def ns_name(ns):
+        if absolute or ns == ":":
+            return ns
+        return ns.strip(":")
+
+    if _flag(kwargs, "p", "parent"):
+        parent = target.rpartition(":")[0] or ":"
+        if target == ":":
+            return ""
+        if _flag(kwargs, "bn", "baseName"):
+            return parent.rpartition(":")[2] if parent != ":" else ":"
+        return ns_name(parent)
+
+    if _flag(kwargs, "lon", "listOnlyNamespaces"):
+        children = scene.child_namespaces(target, recursive=_flag(kwargs, "r", "recurse", default=False))
+        return _or_none([ns_name(ns) for ns in children])
+
+    if _flag(kwargs, "lod", "listOnlyDependencyNodes"):
+        nodes = scene.namespace_nodes(target)
+        return _or_none([(":" + node.name) if absolute else node.name for node in nodes])
+
+    if _flag(kwargs, "ls", "listNamespace"):
+        recursive = _flag(kwargs, "r", "recurse", default=False)
+        children = scene.child_namespaces(target, recursive=recursive)
+        namespaces = [target] + (children if recursive else [])
+        nodes = [node for ns in namespaces for node in scene.namespace_nodes(ns)]
+        if _flag(kwargs, "bn", "baseName"):
+            return _or_none([node.short_name for node in nodes] + [ns.rpartition(":")[2] for ns in children])
+        return _or_none([ns_name(":" + node.name) for node in nodes] + [ns_name(ns) for ns in children])
+
+    if _flag(kwargs, "fn", "fullName"):
+        return ns_name(target)
+
+    if _flag(kwargs, "bn", "baseName"):
+        return target.rpartition(":")[2] if target != ":" else ":"
+
+    raise RuntimeError(f"namespaceInfo: unsupported flags {sorted(kwargs)}")
+
+
+# listing
+def ls(*args, **kwargs):
+    scene = _get_scene()
+    names = _flatten(args)
+    node_type = _flag(kwargs, "type", "typ")
+    long = _flag(kwargs, "long", "l", default=False)
+
+    if _flag(kwargs, "sl", "selection"):
+        nodes = list(scene.selection)
+    elif names:
+        nodes = []
+        for name in names:
+            nodes.extend(scene.match(name.partition(".")[0]))
+    else:
+        nodes = list(scene.nodes.values())
+
+    if _flag(kwargs, "dag", "dagObjects"):
+        if names or _flag(kwargs, "sl", "selection"):
+            expanded = []
+            for node in nodes:
+                if node.is_dag:
+                    expanded.append(node)
+                    expanded.extend(node.descendants())
+            nodes = expanded
+        else:
+            nodes = scene.dag_nodes()
+
+    if _flag(kwargs, "transforms", "tr"):
+        nodes = [node for node in nodes if node.is_transform]
+    if _flag(kwargs, "shapes", "s"):
+        nodes = [node for node in nodes if node.is_shape]
+
+    if node_type:
+        types = node_type if isinstance(node_type, (list, tuple)) else [node_type]
+        nodes = [node for node in nodes if any(_scene.is_type(node.type, t) for t in types)]
+
+    nodes = list(dict.fromkeys(nodes))
+
+    if _flag(kwargs, "showType", "st"):
+        listing = []
+        for node in nodes:
+            listing.extend([_name(node, long), node.type])
+        return listing
+
+    return [_name(node, long) for node in nodes]
+
+
+def objExists(name):
+    name = str(name)
+    if "." in name:
+        try:
+            _plug(name)
+        except (ValueError, RuntimeError):
+            return False
+        return True
+    return _get_scene().find(name) is not None
+
+
+def objectType(name, **kwargs):
+    node = _get_scene().get(name)
+    if "isType" in kwargs:
+        return node.type == kwargs["isType"]
+    if "isAType" in kwargs:
+        return _scene.is_type(node.type, kwargs["isAType"])
+    return node.type
+
+
+def nodeType(name, **kwargs):
+    node = _get_scene().get(str(name).partition(".")[0])
+    if _flag(kwargs, "inherited", "i"):
+        inherited = []
+        node_type = node.type
+        while node_type is not None:
+            inherited.insert(0, node_type)
+            node_type = _scene.NODE_TYPES.get(node_type)
+        return inherited
+    return node.type
+
+
+def listRelatives(*args, **kwargs):
+    nodes = _nodes(args)
+    node_type = _flag(kwargs, "type", "typ")
+    long = _flag(kwargs, "fullPath", "f", default=False)
+
+    found = []
+    for node in nodes:
+        if _flag(kwargs, "p", "parent"):
+            found.extend([node.parent] if node.parent is not None else [])
+        elif _flag(kwargs, "ad", "allDescendents"):
+            found.extend(reversed(node.descendants()))  # Maya lists the deepest descendants first.
+        elif _flag(kwargs, "s", "shapes"):
+            found.extend(child for child in node.children if child.is_shape)
+        else:
+            found.extend(node.children)
+
+    if node_type:
+        types = node_type if isinstance(node_type, (list, tuple)) else [node_type]
+        found = [node for node in found if any(_scene.is_type(node.type, t) for t in types)]
+
+    found = list(dict.fromkeys(found))
+
+    return _or_none([_name(node, long) for node in found])
+
+
+def listConnections(name=None, **kwargs):
+    scene = _get_scene()
+    source = _flag(kwargs, "s", "source", default=True)
+    destination = _flag(kwargs, "d", "destination", default=True)
+    plugs = _flag(kwargs, "p", "plugs", default=False)
+    node_type = _flag(kwargs, "type", "t")
+
+    name = str(name)
+    if "." in name:
+        node, attribute = _plug(name)
+    else:
+        node, attribute = scene.get(name), None
+
+    found = []
+    if source:
+        found.extend(scene.sources(node, attribute))
+    if destination:
+        found.extend(scene.destinations(node, attribute))
+
+    if node_type:
+        found = [entry for entry in found if _scene.is_type(entry[0].type, node_type)]
+
+    if plugs:
+        return _or_none([f"{other.name}.{other_attribute}" for other, other_attribute, _ in found])
+
+    return _or_none([other.name for other, other_attribute, _ in found])
+
+
+def select(*args, **kwargs):
+    scene = _get_scene()
+
+    if _flag(kwargs, "cl", "clear"):
+        scene.selection = []
+        return None
+
+    nodes = _nodes(args, use_selection=False)
+    if _flag(kwargs, "d", "deselect"):
+        scene.selection = [node for node in scene.selection if node not in nodes]
+    elif _flag(kwargs, "add", "af", "addFirst"):
+        scene.selection = list(dict.fromkeys(scene.selection + nodes))
+    else:
+        scene.selection = list(dict.fromkeys(nodes))
+    return None
+
+
+# editing
+def createNode(node_type, **kwargs):
+    scene = _get_scene()
+    parent = _flag(kwargs, "parent", "p")
+    parent = scene.get(parent) if parent else None
+    node = scene.create(node_type, _flag(kwargs, "name", "n"), parent)
+    if not _flag(kwargs, "skipSelect", "ss"):
+        scene.selection = [node]
+    return node.name
+
+
+def rename(*args, **kwargs):
+    scene = _get_scene()
+    if len(args) == 1:
+        node, new_name = scene.selection[0], args[0]
+    else:
+        node, new_name = scene.get(args[0]), args[1]
+
+    previous = node.short_name
+    name = scene.rename(node, new_name)
+
+    # shapes named after their transform follow it.
+    if node.is_transform and not _flag(kwargs, "ignoreShape", "is"):
+        for child in node.children:
+            if child.is_shape and child.short_name.startswith(previous):
+                scene.rename(child, node.short_name + child.short_name[len(previous):])
+
+    return name
+
+
+def parent(*args, **kwargs):
+    scene = _get_scene()
+    names = _flatten(args)
+    world = _flag(kwargs, "w", "world", default=False)
+    relative = _flag(kwargs, "r", "relative", default=False)
+
+    if world:
+        nodes, target = [scene.get(name) for name in names], None
+    else:
+        nodes, target = [scene.get(name) for name in names[:-1]], scene.get(names[-1])
+
+    for node in nodes:
+        if node.parent is target:
+            raise RuntimeError(f"Object '{node.name}' is already a child of '{target.name if target else 'world'}'.")
+        scene.set_parent(node, target, keep_world=not relative)
+
+    return [node.name for node in nodes]
+
+
+def delete(*args, **kwargs):
+    scene = _get_scene()
+    nodes = _nodes(args)
+    if not nodes:
+        raise RuntimeError("Not enough objects or values.")
+    scene.delete(nodes)
+
+
+def duplicate(*args, **kwargs):
+    scene = _get_scene()
+    name = _flag(kwargs, "n", "name")
+    parent_only = _flag(kwargs, "po", "parentOnly", default=False)
+
+    created = []
+    for node in _nodes(args):
+        copy = _copy_node(scene, node, name or node.short_name, node.parent)
+        created.append(copy.name)
+        if not parent_only:
+            stack = [(child, copy) for child in node.children]
+            while stack:
+                child, new_parent = stack.pop(0)
+                child_copy = _copy_node(scene, child, child.short_name, new_parent)
+                created.append(child_copy.name)
+                stack.extend((grandchild, child_copy) for grandchild in child.children)
+
+    scene.selection = [scene.get(created[0])] if created else []
+    return created
+
+
+def _copy_node(scene, node, name, parent_node):
+    copy = _scene.Node(scene, node.type, "")
+    copy.attributes = {key: list(value) if isinstance(value, list) else value
+                       for key, value in node.attributes.items()}
+    copy.dynamic = dict(node.dynamic)
+    copy.locked = set(node.locked)
+    copy.name = scene.unique_name(scene.qualify(name))
+    return scene.add(copy, parent_node)
+
+
+def getAttr(name, **kwargs):
+    node, attribute = _plug(str(name))
+
+    if _flag(kwargs, "type", "typ"):
+        return node.attribute_type(attribute)
+    if _flag(kwargs, "lock", "l"):
+        return attribute in node.locked
+    if _flag(kwargs, "channelBox", "cb"):
+        return attribute in node.channel_box
+
+    value = node.get(attribute)
+    if isinstance(value, list) and len(value) == 3:
+        return [tuple(value)]
+    return value
+
+
+def setAttr(name, *values, **kwargs):
+    node, attribute = _plug(str(name))
+
+    if values:
+        if _flag(kwargs, "type", "typ") == "string":
+            value = values[0]
+        elif len(values) == 1 and not isinstance(values[0], (list, tuple)):
+            value = values[0]
+        else:
+            value = _vector(values)
+        node.set(attribute, value)
+
+    lock = _flag(kwargs, "lock", "l")
+    if lock is not None:
+        (node.locked.add if lock else node.locked.discard)(attribute)
+    channel_box = _flag(kwargs, "channelBox", "cb")
+    if channel_box is not None:
+        (node.channel_box.add if channel_box else node.channel_box.discard)(attribute)
+
+
+def addAttr(*args, **kwargs):
+    node = _nodes(args)[0]
+    node.add_attribute(_flag(kwargs, "longName", "ln"),
+                       _flag(kwargs, "dataType", "dt", "attributeType", "at", default="double"),
+                       _flag(kwargs, "defaultValue", "dv"))
+
+
+def connectAttr(source, destination, **kwargs):
+    source_node, source_attribute = _plug(source)
+    destination_node, destination_attribute = _plug(destination)
+    scene = _get_scene()
+    if scene.sources(destination_node, destination_attribute) and not _flag(kwargs, "f", "force"):
+        raise RuntimeError(f"'{destination}' already has an incoming connection.")
+    scene.connect(source_node, source_attribute, destination_node, destination_attribute)
+
+
+def disconnectAttr(source, destination, **kwargs):
+    destination_node, destination_attribute = _plug(destination)
+    _get_scene().disconnect(destination_node, destination_attribute)
+
+
+def xform(*args, **kwargs):
+    nodes = _nodes(args)
+    world = _flag(kwargs, "ws", "worldSpace", default=False)
+
+    if _flag(kwargs, "q", "query"):
+        node = nodes[0]
+        if _flag(kwargs, "m", "matrix"):
+            matrix = node.world_matrix() if world else node.local_matrix()
+            return matrix.ravel().tolist()
+        if _flag(kwargs, "rp", "rotatePivot", "sp", "scalePivot"):
+            return node.world_matrix()[3, :3].tolist() if world else [0.0, 0.0, 0.0]
+        if _flag(kwargs, "t", "translation"):
+            return node.world_matrix()[3, :3].tolist() if world else node.get("translate")
+        if _flag(kwargs, "ro", "rotation"):
+            if world:
+                return batch_ops.euler_rotations(node.world_matrix(), node.get("rotateOrder"))[0].tolist()
+            return node.get("rotate")
+        if _flag(kwargs, "s", "scale", "r", "relative"):
+            return node.get("scale")
+        if _flag(kwargs, "roo", "rotateOrder"):
+            return "xyz yzx zxy xzy yxz zyx".split()[node.get("rotateOrder")]
+        raise RuntimeError(f"xform: unsupported query {sorted(kwargs)}")
+
+    for node in nodes:
+        matrix = _flag(kwargs, "m", "matrix")
+        if matrix is not None:
+            matrix = np.array(matrix, dtype=np.float64).reshape(4, 4)
+            if world:
+                matrix = matrix @ np.linalg.inv(node.parent_matrix())
+            node.set_local_matrix(matrix)
+
+        rotate_order = _flag(kwargs, "roo", "rotateOrder")
+        if rotate_order is not None:
+            node.set("rotateOrder", "xyz yzx zxy xzy yxz zyx".split().index(rotate_order))
+
+        rotation = _flag(kwargs, "ro", "rotation")
+        if rotation is not None:
+            if world:
+                rotate = np.identity(4)
+                rotate[:3, :3] = batch_ops.rotation_matrices(rotation, node.get("rotateOrder"))[0]
+                local = rotate @ np.linalg.inv(node.parent_matrix())
+                rotation = batch_ops.euler_rotations(local, node.get("rotateOrder"))[0]
+            node.set("rotate", _vector(rotation))
+
+        scale = _flag(kwargs, "s", "scale")
+        if scale is not None:
+            node.set("scale", _vector(scale))
+
+        translation = _flag(kwargs, "t", "translation")
+        if translation is not None:
+            translation = np.array(_vector(translation))
+            if _flag(kwargs, "r", "relative"):
+                translation = translation + node.get("translate")
+            elif world:
+                translation = (np.append(translation, 1.0) @ np.linalg.inv(node.parent_matrix()))[:3]
+            node.set("translate", translation.tolist())
+
+
+def pointPosition(*args, **kwargs):
+    raise RuntimeError("pointPosition: components are not supported by the fake scene.")
+
+
+def joint(*args, **kwargs):
+    scene = _get_scene()
+
+    if _flag(kwargs, "e", "edit"):
+        for node in _nodes(args):
+            orientation = _flag(kwargs, "o", "orientation")
+            if orientation is not None:
+                node.set("jointOrient", _vector(orientation))
+            position = _flag(kwargs, "p", "position")
+            if position is not None:
+                position = np.array(_vector(position))
+                if not _flag(kwargs, "r", "relative"):
+                    position = (np.append(position, 1.0) @ np.linalg.inv(node.parent_matrix()))[:3]
+                node.set("translate", position.tolist())
+            radius = _flag(kwargs, "rad", "radius")
+            if radius is not None:
+                node.set("radius", radius)
+        return None
+
+    if _flag(kwargs, "q", "query"):
+        node = _nodes(args)[0]
+        if _flag(kwargs, "o", "orientation"):
+            return node.get("jointOrient")
+        if _flag(kwargs, "p", "position"):
+            return node.world_matrix()[3, :3].tolist()
+        raise RuntimeError(f"joint: unsupported query {sorted(kwargs)}")
+
+    selected = [node for node in scene.selection if node.type == "joint"]
+    parent_node = selected[-1] if selected else None
+
+    node = scene.create("joint", _flag(kwargs, "n", "name") or "joint1", parent_node)
+    if parent_node is not None:
+        scene.connect(parent_node, "scale", node, "inverseScale")
+
+    orientation = _flag(kwargs, "o", "orientation")
+    if orientation is not None:
+        node.set("jointOrient", _vector(orientation))
+    radius = _flag(kwargs, "rad", "radius")
+    if radius is not None:
+        node.set("radius", radius)
+
+    position = _flag(kwargs, "p", "position")
+    if position is not None:
+        position = np.array(_vector(position))
+        if not _flag(kwargs, "r", "relative"):
+            position = (np.append(position, 1.0) @ np.linalg.inv(node.parent_matrix()))[:3]
+        node.set("translate", position.tolist())
+
+    scene.selection = [node]
+    return node.name
+
+
+def spaceLocator(*args, **kwargs):
+    scene = _get_scene()
+    transform = scene.create("transform", _flag(kwargs, "n", "name") or "locator1")
+    shape = scene.create("locator", transform.short_name + "Shape", transform)
+    position = _flag(kwargs, "p", "position")
+    if position is not None:
+        shape.set("localPosition", _vector(position))
+    scene.selection = [transform]
+    return [transform.name]
+
+
+def ikHandle(*args, **kwargs):
+    scene = _get_scene()
+    start = scene.get(_flag(kwargs, "sj", "startJoint"))
+    end = scene.get(_flag(kwargs, "ee", "endEffector"))
+    solver_type = _flag(kwargs, "sol", "solver", default="ikRPsolver")
+
+    if start not in end.ancestors():
+        raise RuntimeError(f"'{end.name}' is not below '{start.name}'.")
+
+    solver = scene.find(solver_type)
+    if solver is None:
+        solver = _scene.Node(scene, solver_type, solver_type)
+        scene.add(solver)
+
+    effector = scene.create("ikEffector", "effector1", end.parent)
+    effector.set("translate", end.get("translate"))
+    for axis in "XYZ":
+        scene.connect(end, f"translate{axis}", effector, f"translate{axis}")
+
+    handle = scene.create("ikHandle", _flag(kwargs, "n", "name") or "ikHandle1")
+    handle.set("translate", end.world_matrix()[3, :3].tolist())
+    scene.connect(start, "message", handle, "startJoint")
+    scene.connect(effector, "message", handle, "endEffector")
+    scene.connect(solver, "message", handle, "ikSolver")
+
+    # Maya's default pole vector: the direction of the second joint off the start -> end line, in start space.
+    chain = [node for node in [end] + end.ancestors() if node is start or start in node.ancestors()][::-1]
+    if solver_type == "ikRPsolver" and len(chain) > 2:
+        start_position = start.world_matrix()[3, :3]
+        line = end.world_matrix()[3, :3] - start_position
+        middle = chain[1].world_matrix()[3, :3] - start_position
+        length = np.dot(line, line)
+        pole = middle - line * (np.dot(middle, line) / length if length else 0.0)
+        if np.linalg.norm(pole) > 1e-9:
+            pole = pole / np.linalg.norm(pole)
+            pole = pole @ np.linalg.inv(start.parent_matrix()[:3, :3])
+            handle.set("poleVector", pole.tolist())
+
+    scene.selection = [handle]
+    _queue_undo(scene, "ikHandle", _CreatedNodes(scene, [effector, handle]))
+    return [handle.name, effector.name]
+
+
+
+def poleVectorConstraint(*args, **kwargs):
+    scene = _get_scene()
+    nodes = _nodes(args)
+    if len(nodes) < 2:
+        raise RuntimeError("poleVectorConstraint: needs a target and an ikHandle.")
+    target, handle = nodes[0], nodes[-1]
+    if handle.type != "ikHandle":
+        raise RuntimeError(f"'{handle.name}' is not an ikHandle.")
+
+    constraint = scene.create("poleVectorConstraint",
+                              _flag(kwargs, "n", "name") or f"{handle.short_name}_poleVectorConstraint1", handle)
+    scene.connect(target, "worldMatrix", constraint, "target[0].targetParentMatrix")
+    scene.connect(constraint, "constraintTranslate", handle, "poleVector")
+
+    # not evaluated live: the pole vector is set once from the current target position, in start parent space.
+    start = scene.connections[(handle.id, "startJoint")][0]
+    pole = target.world_matrix()[3, :3] - start.world_matrix()[3, :3]
+    pole = pole @ np.linalg.inv(start.parent_matrix()[:3, :3])
+    previous = list(handle.get("poleVector"))
+    handle.set("poleVector", pole.tolist())
+
+    _queue_undo(scene, "poleVectorConstraint",
+                _CreatedNodes(scene, [constraint], [(handle, "poleVector", previous, pole.tolist())]))
+
+    return [constraint.name]
+
+# scene / session
+def file(*args, **kwargs):
+    scene = _get_scene()
+    path = args[0] if args else None
+
+    if _flag(kwargs, "q", "query"):
+        if _flag(kwargs, "sn", "sceneName", "l", "location"):
+            return scene.file_name
+        raise RuntimeError(f"file: unsupported query {sorted(kwargs)}")
+
+    if _flag(kwargs, "new"):
+        scene.fire("before_new")
+        scene.reset()
+        scene.fire("after_new")
+        return ""
+
+    if _flag(kwargs, "rename", "rn"):
+        scene.file_name = os.path.abspath(_flag(kwargs, "rename", "rn"))
+        return scene.file_name
+
+    if _flag(kwargs, "save", "s"):
+        if not scene.file_name:
+            raise RuntimeError("The scene has no name, use file(rename=...) first.")
+        scene.save(scene.file_name)
+        return scene.file_name
+
+    if _flag(kwargs, "o", "open"):
+        scene.fire("before_open")
+        scene.load(os.path.abspath(path))
+        scene.fire("after_open")
+        return scene.file_name
+
+    raise RuntimeError(f"file: unsupported flags {sorted(kwargs)}")
+
+
+def undoInfo(**kwargs):
+    """
+    Undo state and chunks. The fake's undo queue only holds undoable plug-in commands (om2 modifiers undo themselves
+    through them) and the node creation of ikHandle / poleVectorConstraint, other cmds edits aren't recorded.
+    """
+
+    scene = _get_scene()
+    if _flag(kwargs, "q", "query"):
+        if _flag(kwargs, "state", "st"):
+            return scene.undo_state
+        if _flag(kwargs, "undoName", "un"):
+            return scene.undo_queue[-1][0] if scene.undo_queue else ""
+        return None
+
+    if _flag(kwargs, "openChunk", "ock"):
+        if not scene.chunk_depth:
+            scene.undo_chunk = (_flag(kwargs, "chunkName", "cn") or "", [])
+        scene.chunk_depth += 1
+    if _flag(kwargs, "closeChunk", "cck") and scene.chunk_depth:
+        scene.chunk_depth -= 1
+        if not scene.chunk_depth:
+            chunk, scene.undo_chunk = scene.undo_chunk, None
+            if chunk[1]:  # empty chunks leave nothing to undo, as in Maya.
+                scene.undo_queue.append(chunk)
+
+    state = _flag(kwargs, "state", "st", "stateWithoutFlush", "swf")
+    if state is not None:
+        scene.undo_state = bool(state)
+        if not state and _flag(kwargs, "state", "st") is not None:
+            scene.undo_queue, scene.redo_queue = [], []
+    return None
+
+
+def undo(*args, **kwargs):
+    scene = _get_scene()
+    if scene.undo_queue:
+        chunk = scene.undo_queue.pop()
+        for command in reversed(chunk[1]):
+            command.undoIt()
+        scene.redo_queue.append(chunk)
+    return None
+
+
+def redo(*args, **kwargs):
+    scene = _get_scene()
+    if scene.redo_queue:
+        chunk = scene.redo_queue.pop()
+        for command in chunk[1]:
+            command.redoIt()
+        scene.undo_queue.append(chunk)
+    return None
+
+
+def _queue_undo(scene, name, entry):
+    if not scene.undo_state:
+        return
+    if scene.undo_chunk is not None:
+        scene.undo_chunk[1].append(entry)
+    else:
+        scene.undo_queue.append((name, [entry]))
+    scene.redo_queue = []
+
+
+class _CreatedNodes:
+    """
+    Undo queue entry of a command that creates nodes (ikHandle, poleVectorConstraint), plus the attributes it set on
+    existing nodes as (node, attribute, before, after).
+    """
+
+    def __init__(self, scene, nodes, attributes=()):
+        self.scene = scene
+        self.nodes = nodes
+        self.attributes = list(attributes)
+        self.parents = [node.parent for node in nodes]
+        ids = {node.id for node in nodes}
+        self.connections = [(source, source_attribute, destination, key[1])
+                            for key, (source, source_attribute, destination) in scene.connections.items()
+                            if key[0] in ids or source.id in ids]
+
+    def undoIt(self):
+        self.scene.delete(self.nodes)
+        for node, attribute, before, after in self.attributes:
+            node.set(attribute, before)
+
+    def redoIt(self):
+        for node, parent in zip(self.nodes, self.parents):
+            self.scene.add(node, parent)
+        for source, source_attribute, destination, destination_attribute in self.connections:
+            self.scene.connect(source, source_attribute, destination, destination_attribute)
+        for node, attribute, before, after in self.attributes:
+            node.set(attribute, after)
+
+
+# plug-ins
+_PLUGINS = {}  # plug-in name -> module
+_COMMANDS = {}
+
+
+def _register_command(name, creator):
+    if name in _COMMANDS or name in globals():
+        raise RuntimeError(f"Command '{name}' is already registered.")
+
+    def command(*args, **kwargs):
+        from .api import MArgList
+        instance = creator()
+        instance.doIt(MArgList(args))
+        if instance.isUndoable():
+            _queue_undo(_get_scene(), name, instance)
+        return None
+
+    command.__name__ = name
+    _COMMANDS[name] = command
+    globals()[name] = command
+
+
+def _deregister_command(name):
+    _COMMANDS.pop(name, None)
+    globals().pop(name, None)
+
+
+def _plugin_name(path):
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+def loadPlugin(path, **kwargs):
+    import importlib.util
+    from .api import MObject
+
+    name = _plugin_name(path)
+    if name in _PLUGINS:
+        return [name]
+    if not os.path.isfile(path):
+        raise RuntimeError(f"Plug-in not found: {path}")
+
+    spec = importlib.util.spec_from_file_location(f"_fake_plugin_{name}", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    module.initializePlugin(MObject())
+    _PLUGINS[name] = module
+    return [name]
+
+
+def unloadPlugin(path, **kwargs):
+    from .api import MObject
+
+    module = _PLUGINS.pop(_plugin_name(path), None)
+    if module is not None:
+        module.uninitializePlugin(MObject())
+
+
+def pluginInfo(path, **kwargs):
+    if _flag(kwargs, "loaded", "l"):
+        return _plugin_name(path) in _PLUGINS
+    raise RuntimeError(f"pluginInfo: unsupported flags {sorted(kwargs)}")
+
+
+def refresh(*args, **kwargs):
+    return None
+
+
+def about(**kwargs):
+    if _flag(kwargs, "batch", "b"):
+        return True
+    if _flag(kwargs, "version", "v"):
+        return "fake"
+    if _flag(kwargs, "apiVersion", "api"):
+        return 0
+    return None
+
+
+def evalDeferred(command=None, **kwargs):
+    _get_scene().deferred.append((command, (), {}))
+
+
+def warning(message, **kwargs):
+    print(f"# Warning: {message}")
+
+
+def error(message, **kwargs):
+    raise RuntimeError(message)
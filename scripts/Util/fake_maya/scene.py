@@ -0,0 +1,777 @@
+"""
+In-memory scene behind the fake maya modules: nodes, DAG hierarchy, namespaces, attributes, connections and the
+callbacks the tool listens to.
+
+Simplifications compared to Maya:
+    - node names (namespace included) are unique scene wide, so a partial path is always the node name.
+    - no instancing, pivots, shear or undo queue (om2 modifiers still undo).
+    - a name with a namespace ("Guides:rigdef_1:joint0") is resolved from the root namespace, a bare name goes into
+      the current namespace.
+"""
+
+import fnmatch
+import functools
+import itertools
+import json
+
+import numpy as np
+
+try:
+    from .. import batch_ops
+except Exception as e:
+    from scripts.Util import batch_ops
+
+
+ROOT = ":"
+DEFAULT_NAMESPACES = (":UI", ":shared")
+
+# node type -> parent type, used for type filters (ls -type transform also lists joints) and MFn checks.
+NODE_TYPES = {
+    "dependNode": None,
+    "dagNode": "dependNode",
+    "transform": "dagNode",
+    "joint": "transform",
+    "ikHandle": "transform",
+    "ikEffector": "transform",
+    "constraint": "transform",
+    "poleVectorConstraint": "constraint",
+    "shape": "dagNode",
+    "locator": "shape",
+    "mesh": "shape",
+    "ikSolver": "dependNode",
+    "ikRPsolver": "ikSolver",
+    "ikSCsolver": "ikSolver",
+    "network": "dependNode",
+}
+
+VECTOR_ATTRIBUTES = {
+    "translate": "t", "rotate": "r", "scale": "s", "shear": "sh", "rotateAxis": "ra", "jointOrient": "jo",
+    "preferredAngle": "pa", "inverseScale": "is", "poleVector": "pv", "localPosition": "lp",
+}
+ANGLE_ATTRIBUTES = {"rotate", "rotateAxis", "jointOrient", "preferredAngle"}
+MATRIX_ATTRIBUTES = {"matrix": "m", "inverseMatrix": "im", "worldMatrix": "wm", "worldInverseMatrix": "wim",
+                     "parentMatrix": "pm", "parentInverseMatrix": "pim"}
+
+_TRANSFORM_DEFAULTS = {
+    "translate": (0.0, 0.0, 0.0), "rotate": (0.0, 0.0, 0.0), "scale": (1.0, 1.0, 1.0), "shear": (0.0, 0.0, 0.0),
+    "rotateAxis": (0.0, 0.0, 0.0), "rotateOrder": 0, "visibility": True, "inheritsTransform": True,
+}
+DEFAULTS = {
+    "dependNode": {},
+    "transform": _TRANSFORM_DEFAULTS,
+    "joint": dict(_TRANSFORM_DEFAULTS, jointOrient=(0.0, 0.0, 0.0), preferredAngle=(0.0, 0.0, 0.0),
+                  inverseScale=(1.0, 1.0, 1.0), segmentScaleCompensate=True, radius=1.0),
+    "ikHandle": dict(_TRANSFORM_DEFAULTS, poleVector=(0.0, 0.0, 1.0), twist=0.0, ikBlend=1.0, startJoint=None,
+                     endEffector=None, ikSolver=None),
+    "ikEffector": _TRANSFORM_DEFAULTS,
+    "locator": {"localPosition": (0.0, 0.0, 0.0), "localScale": (1.0, 1.0, 1.0), "visibility": True},
+}
+
+# short name -> long name
+ALIASES = {"ro": "rotateOrder", "v": "visibility", "ssc": "segmentScaleCompensate", "radi": "radius",
+           "it": "inheritsTransform", "ikb": "ikBlend", "twi": "twist"}
+for _long, _short in VECTOR_ATTRIBUTES.items():
+    ALIASES[_short] = _long
+    for _axis in "XYZ":
+        ALIASES[f"{_short}{_axis.lower()}"] = f"{_long}{_axis}"
+for _long, _short in MATRIX_ATTRIBUTES.items():
+    ALIASES[_short] = _long
+
+_IDS = itertools.count(1)
+
+
+def is_type(node_type, base_type):
+    """
+    :return: True if node_type is base_type or derives from it.
+    """
+
+    while node_type is not None:
+        if node_type == base_type:
+            return True
+        node_type = NODE_TYPES.get(node_type, "dependNode" if node_type != "dependNode" else None)
+
+    return False
+
+
+@functools.lru_cache(maxsize=None)
+def split_attribute(attribute):
+    """
+    Resolve an attribute name to (long name, compound index or None), e.g. "tx" -> ("translate", 0).
+    Array indices ("worldMatrix[0]") are dropped.
+    """
+
+    attribute = attribute.split("[")[0]
+    attribute = ALIASES.get(attribute, attribute)
+
+    if attribute[:-1] in VECTOR_ATTRIBUTES and attribute[-1] in "XYZ":
+        return attribute[:-1], "XYZ".index(attribute[-1])
+
+    return attribute, None
+
+
+class Node:
+    """
+    A scene node. Vector attributes are stored as lists, angles in degrees.
+    """
+
+    def __init__(self, scene, node_type, name):
+        self.scene = scene
+        self.type = node_type
+        self.name = name
+        self.id = next(_IDS)
+        self.parent = None
+        self.children = []
+        self.alive = False
+        self.locked = set()
+        self.channel_box = set()
+        self.dynamic = {}  # dynamic attribute name -> data type
+
+        defaults = {}
+        current = node_type
+        while current is not None and current not in DEFAULTS:
+            current = NODE_TYPES.get(current)
+        defaults = DEFAULTS.get(current, {})
+        self.attributes = {key: list(value) if isinstance(value, tuple) else value for key, value in defaults.items()}
+
+        self._world = None
+
+    def __repr__(self):
+        return f"Node({self.name!r}, {self.type!r})"
+
+    # hierarchy
+    @property
+    def is_dag(self):
+        return is_type(self.type, "dagNode")
+
+    @property
+    def is_transform(self):
+        return is_type(self.type, "transform")
+
+    @property
+    def is_shape(self):
+        return is_type(self.type, "shape")
+
+    @property
+    def namespace(self):
+        namespace = self.name.rpartition(":")[0]
+        return f":{namespace}" if namespace else ROOT
+
+    @property
+    def short_name(self):
+        return self.name.rpartition(":")[2]
+
+    def ancestors(self):
+        ancestors = []
+        parent = self.parent
+        while parent is not None:
+            ancestors.append(parent)
+            parent = parent.parent
+        return ancestors
+
+    def long_name(self):
+        if not self.is_dag:
+            return self.name
+        return "|" + "|".join(node.name for node in reversed([self] + self.ancestors()))
+
+    def descendants(self):
+        """
+        Depth-first, parent before child.
+        """
+
+        found = []
+        stack = list(reversed(self.children))
+        while stack:
+            node = stack.pop()
+            found.append(node)
+            stack.extend(reversed(node.children))
+        return found
+
+    # attributes
+    def has_attribute(self, attribute):
+        name, index = split_attribute(attribute)
+        if name in MATRIX_ATTRIBUTES:
+            return self.is_transform
+        return name in self.attributes or name in ("message",)
+
+    def get(self, attribute):
+        name, index = split_attribute(attribute)
+
+        if name in MATRIX_ATTRIBUTES:
+            return self.matrix_attribute(name)
+        if name == "message":
+            return None
+        if name not in self.attributes:
+            raise RuntimeError(f"No attribute named: {self.name}.{attribute}")
+
+        value = self.attributes[name]
+        if index is not None:
+            return value[index]
+        if isinstance(value, list):
+            return list(value)
+        return value
+
+    def set(self, attribute, value, force=False):
+        name, index = split_attribute(attribute)
+
+        if name in MATRIX_ATTRIBUTES:
+            raise RuntimeError(f"Attribute: {self.name}.{attribute} is read only.")
+        if name not in self.attributes:
+            raise RuntimeError(f"No attribute named: {self.name}.{attribute}")
+        if not force and (name in self.locked or (index is not None and attribute in self.locked)):
+            raise RuntimeError(f"The attribute '{self.name}.{attribute}' is locked or connected and cannot be modified.")
+
+        if index is not None:
+            self.attributes[name][index] = float(value)
+        elif isinstance(self.attributes[name], list):
+            self.attributes[name] = [float(v) for v in value]
+        elif isinstance(self.attributes[name], bool):
+            self.attributes[name] = bool(value)
+        elif isinstance(self.attributes[name], int):
+            self.attributes[name] = int(value)
+        elif isinstance(self.attributes[name], float):
+            self.attributes[name] = float(value)
+        else:
+            self.attributes[name] = value
+
+        if self.is_transform and name in _TRANSFORM_DEFAULTS or name in ("jointOrient", "inverseScale"):
+            self.invalidate()
+
+    def add_attribute(self, name, data_type="double", default=None):
+        if name in self.attributes:
+            raise RuntimeError(f"Attribute: {self.name}.{name} already exists.")
+
+        if default is None:
+            default = {"string": "", "bool": False, "long": 0, "short": 0, "enum": 0}.get(data_type, 0.0)
+            if data_type in ("double3", "float3"):
+                default = [0.0, 0.0, 0.0]
+        self.attributes[name] = default
+        self.dynamic[name] = data_type
+
+    def attribute_type(self, attribute):
+        name, index = split_attribute(attribute)
+        if name in self.dynamic:
+            return self.dynamic[name]
+        if name in MATRIX_ATTRIBUTES:
+            return "matrix"
+        if index is not None:
+            return "doubleAngle" if name in ANGLE_ATTRIBUTES else "doubleLinear"
+        value = self.attributes.get(name)
+        if value is None:
+            return "message"
+        if isinstance(value, list):
+            return "double3"
+        if isinstance(value, bool):
+            return "bool"
+        if isinstance(value, int):
+            return "enum" if name == "rotateOrder" else "long"
+        if isinstance(value, str):
+            return "string"
+        return "double"
+
+    # matrices
+    def local_matrix(self):
+        if not self.is_transform:
+            return np.identity(4)
+
+        get = self.attributes.get
+        rotate = batch_ops.rotation_matrices(get("rotate"), get("rotateOrder", 0))[0]
+        rotate_axis = get("rotateAxis", (0.0, 0.0, 0.0))
+        if any(rotate_axis):
+            rotate = batch_ops.rotation_matrices(rotate_axis)[0] @ rotate
+        if "jointOrient" in self.attributes and any(get("jointOrient")):
+            rotate = rotate @ batch_ops.rotation_matrices(get("jointOrient"))[0]
+
+        matrix = np.identity(4)
+        matrix[:3, :3] = np.diag(get("scale")) @ rotate
+        matrix[3, :3] = get("translate")
+
+        return matrix
+
+    def world_matrix(self):
+        if self._world is None:
+            chain = [self]
+            while chain[-1].parent is not None and chain[-1].parent._world is None:
+                chain.append(chain[-1].parent)
+
+            top = chain[-1].parent
+            world = top._world if top is not None else np.identity(4)
+            for node in reversed(chain):
+                if node.attributes.get("inheritsTransform", True):
+                    world = node.local_matrix() @ world
+                else:
+                    world = node.local_matrix()
+                node._world = world
+
+        return self._world
+
+    def parent_matrix(self):
+        return self.parent.world_matrix() if self.parent is not None else np.identity(4)
+
+    def invalidate(self):
+        """
+        Drop cached world matrices below (and including) this node. A node without a cache has no cached
+        descendants either, so the walk stops there.
+        """
+
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            if node._world is None and node is not self:
+                continue
+            node._world = None
+            stack.extend(node.children)
+
+    def matrix_attribute(self, name):
+        matrices = {
+            "matrix": self.local_matrix,
+            "inverseMatrix": lambda: np.linalg.inv(self.local_matrix()),
+            "worldMatrix": self.world_matrix,
+            "worldInverseMatrix": lambda: np.linalg.inv(self.world_matrix()),
+            "parentMatrix": self.parent_matrix,
+            "parentInverseMatrix": lambda: np.linalg.inv(self.parent_matrix()),
+        }
+        return matrices[name]().ravel().tolist()
+
+    def set_local_matrix(self, matrix):
+        """
+        Split a local matrix into translate / rotate / scale, keeping jointOrient on joints.
+        """
+
+        matrix = np.array(matrix, dtype=np.float64).reshape(4, 4)
+        scale = np.linalg.norm(matrix[:3, :3], axis=-1)
+        rotation = np.identity(4)
+        rotation[:3, :3] = matrix[:3, :3] / np.where(scale > 0.0, scale, 1.0)[:, np.newaxis]
+
+        if "jointOrient" in self.attributes and any(self.attributes["jointOrient"]):
+            orient = batch_ops.rotation_matrices(self.attributes["jointOrient"])[0]
+            rotation[:3, :3] = rotation[:3, :3] @ orient.T
+
+        self.attributes["translate"] = matrix[3, :3].tolist()
+        self.attributes["rotate"] = batch_ops.euler_rotations(rotation, self.attributes.get("rotateOrder", 0))[0].tolist()
+        self.attributes["scale"] = scale.tolist()
+        self.invalidate()
+
+    def to_dict(self):
+        return {"name": self.name, "type": self.type, "parent": self.parent.name if self.parent else None,
+                "attributes": self.attributes, "dynamic": self.dynamic, "locked": sorted(self.locked)}
+
+
+class Scene:
+    """
+    The fake scene. One is active at a time, see get_scene().
+    """
+
+    def __init__(self):
+        self._callbacks = {}
+        self._callback_ids = itertools.count(1)
+        self.reset()
+
+    def reset(self):
+        self.nodes = {}  # name -> Node, in creation order.
+        self.members = {}  # namespace -> {name: Node}
+        self.namespaces = {ROOT, *DEFAULT_NAMESPACES}
+        self.current_namespace = ROOT
+        self.selection = []
+        self.connections = {}  # (destination node id, attribute) -> (source Node, attribute, destination Node)
+        self.links = {}  # node id -> connection keys the node is part of.
+        self.deferred = []
+        self.file_name = ""
+        self.undo_state = True
+        self.undo_queue = []  # entries (chunks) of undoable plug-in command objects, see cmds.undo().
+        self.redo_queue = []
+        self.undo_chunk = None  # (name, commands) of the open chunk.
+        self.chunk_depth = 0
+
+    # callbacks
+    def add_callback(self, kind, func, node=None, node_type="dependNode"):
+        callback_id = next(self._callback_ids)
+        self._callbacks[callback_id] = (kind, func, node, node_type)
+        return callback_id
+
+    def remove_callback(self, callback_id):
+        self._callbacks.pop(callback_id, None)
+
+    def fire(self, kind, node=None, *args):
+        for callback_kind, func, watched, node_type in list(self._callbacks.values()):
+            if callback_kind != kind:
+                continue
+            if node is not None:
+                if watched is not None and watched is not node:
+                    continue
+                if not is_type(node.type, node_type):
+                    continue
+                func(node, *args)
+            else:
+                func()
+
+    # namespaces
+    def absolute_namespace(self, namespace, must_exist=False):
+        """
+        Resolve a namespace given relative to the current namespace (falling back to the root) or absolute.
+        """
+
+        if namespace in (None, "", ROOT):
+            return ROOT
+
+        if namespace.startswith(ROOT):
+            candidates = [ROOT + namespace.strip(ROOT)]
+        else:
+            namespace = namespace.strip(ROOT)
+            candidates = [ROOT + namespace]
+            if self.current_namespace != ROOT:
+                candidates.insert(0, f"{self.current_namespace}:{namespace}")
+
+        for candidate in candidates:
+            if candidate in self.namespaces:
+                return candidate
+
+        if must_exist:
+            raise RuntimeError(f"Namespace '{namespace}' does not exist.")
+
+        return candidates[0]
+
+    def child_namespaces(self, namespace, recursive=False):
+        prefix = namespace.rstrip(ROOT) + ROOT
+        children = [ns for ns in self.namespaces if ns != namespace and ns.startswith(prefix)]
+        if not recursive:
+            depth = prefix.count(ROOT)
+            children = [ns for ns in children if ns.count(ROOT) == depth]
+        return sorted(children)
+
+    def namespace_nodes(self, namespace, recursive=False):
+        namespaces = [namespace] + (self.child_namespaces(namespace, recursive=True) if recursive else [])
+        return [node for ns in namespaces for node in self.members.get(ns, {}).values()]
+
+    def _index_name(self, node):
+        self.nodes[node.name] = node
+        self.members.setdefault(node.namespace, {})[node.name] = node
+
+    def _unindex_name(self, node):
+        self.nodes.pop(node.name, None)
+        members = self.members.get(node.namespace)
+        if members is not None:
+            members.pop(node.name, None)
+            if not members:
+                del self.members[node.namespace]
+
+    def add_namespace(self, name, parent=None):
+        parent = self.absolute_namespace(parent, must_exist=True) if parent else self.current_namespace
+        namespace = f"{parent.rstrip(ROOT)}:{name.strip(ROOT)}"
+        if namespace in self.namespaces:
+            raise RuntimeError(f"Namespace '{name}' is already in use.")
+
+        parts = namespace.strip(ROOT).split(ROOT)
+        for i in range(1, len(parts)):
+            if ROOT + ROOT.join(parts[:i]) not in self.namespaces:
+                raise RuntimeError(f"Namespace '{ROOT.join(parts[:i])}' does not exist.")
+
+        self.namespaces.add(namespace)
+        return namespace
+
+    def remove_namespace(self, namespace, merge_with_parent=False, merge_with_root=False, delete_content=False):
+        namespace = self.absolute_namespace(namespace, must_exist=True)
+        if namespace == ROOT or namespace in DEFAULT_NAMESPACES:
+            raise RuntimeError(f"Cannot remove namespace: {namespace}")
+        if self.current_namespace == namespace or self.current_namespace.startswith(namespace + ROOT):
+            raise RuntimeError(f"Cannot remove the current namespace: {namespace}")
+
+        children = self.child_namespaces(namespace, recursive=True)
+        nodes = self.namespace_nodes(namespace, recursive=True)
+
+        if merge_with_parent or merge_with_root:
+            target = ROOT if merge_with_root else namespace.rpartition(ROOT)[0] or ROOT
+            self.move_namespace(namespace, target, force=True)
+        elif delete_content:
+            self.delete([node for node in nodes if node.alive])
+            for child in children:
+                self.namespaces.discard(child)
+        elif nodes or children:
+            raise RuntimeError(f"Namespace '{namespace}' is not empty.")
+
+        self.namespaces.discard(namespace)
+
+    def move_namespace(self, source, destination, force=False):
+        """
+        Move the contents (nodes and child namespaces) of source into destination.
+        """
+
+        source = self.absolute_namespace(source, must_exist=True)
+        destination = self.absolute_namespace(destination, must_exist=True)
+        if destination == source or destination.startswith(source + ROOT):
+            raise RuntimeError(f"Cannot move namespace '{source}' into itself.")
+
+        def moved(namespace):
+            return destination.rstrip(ROOT) + namespace[len(source):] if namespace != source else destination
+
+        children = self.child_namespaces(source, recursive=True)
+        nodes = self.namespace_nodes(source, recursive=True)
+        for child in children:
+            self.namespaces.discard(child)
+            self.namespaces.add(moved(child))
+
+        for node in nodes:
+            new_namespace = moved(node.namespace)
+            new_name = f"{new_namespace.strip(ROOT)}:{node.short_name}" if new_namespace != ROOT else node.short_name
+            if new_name in self.nodes and not force:
+                raise RuntimeError(f"Name clash moving '{node.name}' to '{new_name}'.")
+            self.rename(node, ROOT + new_name.lstrip(ROOT))
+
+        if self.current_namespace == source or self.current_namespace.startswith(source + ROOT):
+            self.current_namespace = moved(self.current_namespace)
+
+    def rename_namespace(self, namespace, new_name, parent=None):
+        namespace = self.absolute_namespace(namespace, must_exist=True)
+        parent = self.absolute_namespace(parent, must_exist=True) if parent else namespace.rpartition(ROOT)[0] or ROOT
+        target = f"{parent.rstrip(ROOT)}:{new_name.strip(ROOT)}"
+        if target in self.namespaces:
+            raise RuntimeError(f"Namespace '{new_name}' is already in use.")
+
+        self.namespaces.add(target)
+        self.move_namespace(namespace, target, force=False)
+        self.namespaces.discard(namespace)
+        self.fire("namespace_renamed")
+        return target
+
+    # names
+    def qualify(self, name):
+        """
+        Full node name (no leading ":") for a requested name. Namespaces have to exist.
+        """
+
+        if ROOT in name.lstrip(ROOT) or name.startswith(ROOT):
+            name = name.lstrip(ROOT)
+            namespace = ROOT + name.rpartition(ROOT)[0] if ROOT in name else ROOT
+        else:
+            namespace = self.current_namespace
+            name = f"{namespace.strip(ROOT)}:{name}" if namespace != ROOT else name
+
+        if namespace not in self.namespaces:
+            raise RuntimeError(f"Namespace '{namespace}' does not exist.")
+
+        return name
+
+    def unique_name(self, name, ignore=None):
+        if name not in self.nodes or self.nodes[name] is ignore:
+            return name
+
+        base = name.rstrip("0123456789")
+        for i in itertools.count(1):
+            candidate = f"{base}{i}"
+            if candidate not in self.nodes:
+                return candidate
+
+    def default_name(self, node_type):
+        return self.unique_name(self.qualify(f"{node_type}1"))
+
+    def find(self, name):
+        """
+        Node by name, long path ("|a|b") or partial path ("a|b"). None if there is no such node.
+        """
+
+        if isinstance(name, Node):
+            return name if name.alive else None
+
+        name = str(name)
+        if "|" not in name:
+            return self.nodes.get(name.lstrip(ROOT))
+
+        leaf = name.rpartition("|")[2]
+        node = self.nodes.get(leaf.lstrip(ROOT))
+        if node is None or not node.long_name().endswith(name if name.startswith("|") else "|" + name):
+            return None
+        if name.startswith("|") and node.long_name() != name:
+            return None
+
+        return node
+
+    def get(self, name):
+        node = self.find(name)
+        if node is None:
+            raise RuntimeError(f"No object matches name: {name}")
+        return node
+
+    def match(self, pattern):
+        """
+        Nodes matching a name or wildcard pattern.
+        """
+
+        if not any(char in pattern for char in "*?["):
+            node = self.find(pattern)
+            return [node] if node is not None else []
+
+        pattern = pattern.lstrip(ROOT)
+        if "|" in pattern:
+            return [node for node in self.nodes.values() if fnmatch.fnmatchcase(node.long_name(), pattern)]
+        return [node for node in self.nodes.values() if fnmatch.fnmatchcase(node.name, pattern)]
+
+    # editing
+    def create(self, node_type, name=None, parent=None):
+        node = Node(self, node_type, "")
+        node.name = self.unique_name(self.qualify(name)) if name else self.default_name(node_type)
+        self.add(node, parent)
+        return node
+
+    def add(self, node, parent=None):
+        node.alive = True
+        self._index_name(node)
+        if parent is not None:
+            self.set_parent(node, parent, keep_world=False)
+        self.fire("node_added", node)
+        return node
+
+    def rename(self, node, new_name):
+        previous = node.name
+        new_name = self.unique_name(self.qualify(new_name), ignore=node)
+        if new_name == previous:
+            return node.name
+
+        self._unindex_name(node)
+        node.name = new_name
+        self._index_name(node)
+
+        if node.alive:
+            self.fire("name_changed", node, previous)
+
+        return node.name
+
+    def set_parent(self, node, parent, keep_world=True):
+        if parent is not None:
+            if parent is node or parent in node.descendants():
+                raise RuntimeError(f"Cannot parent '{node.name}' under itself or a descendant.")
+        world = node.world_matrix() if keep_world else None
+
+        if node.parent is not None:
+            node.parent.children.remove(node)
+        node.parent = parent
+        if parent is not None:
+            parent.children.append(node)
+        node.invalidate()
+
+        if keep_world and node.is_transform:
+            parent_world = node.parent_matrix()
+            node.set_local_matrix(world @ np.linalg.inv(parent_world))
+
+    def delete(self, nodes):
+        for node in nodes:
+            if not node.alive:
+                continue
+            for child in reversed(node.descendants()):
+                self._delete_one(child)
+            self._delete_one(node)
+
+    def _delete_one(self, node):
+        if not node.alive:
+            return
+
+        self.fire("node_removed", node)
+
+        for key in list(self.links.pop(node.id, ())):
+            self.disconnect(self.connections[key][2], key[1])
+
+        if node.parent is not None:
+            node.parent.children.remove(node)
+            node.parent = None
+        node.children = []
+
+        self._unindex_name(node)
+        if node in self.selection:
+            self.selection.remove(node)
+        node.alive = False
+
+    def connect(self, source, source_attribute, destination, destination_attribute):
+        key = (destination.id, destination_attribute)
+        self.disconnect(destination, destination_attribute)
+        self.connections[key] = (source, source_attribute, destination)
+        self.links.setdefault(source.id, set()).add(key)
+        self.links.setdefault(destination.id, set()).add(key)
+
+    def disconnect(self, destination, destination_attribute):
+        key = (destination.id, destination_attribute)
+        connection = self.connections.pop(key, None)
+        if connection is not None:
+            for node in (connection[0], destination):
+                self.links.get(node.id, set()).discard(key)
+
+    def sources(self, node, attribute=None):
+        found = []
+        for key in self.links.get(node.id, ()):
+            source, source_attribute, destination = self.connections[key]
+            if destination is node and (attribute is None or _same_attribute(key[1], attribute)):
+                found.append((source, source_attribute, key[1]))
+        return found
+
+    def destinations(self, node, attribute=None):
+        found = []
+        for key in self.links.get(node.id, ()):
+            source, source_attribute, destination = self.connections[key]
+            if source is node and (attribute is None or _same_attribute(source_attribute, attribute)):
+                found.append((destination, key[1], source_attribute))
+        return found
+
+    def roots(self):
+        return [node for node in self.nodes.values() if node.is_dag and node.parent is None]
+
+    def dag_nodes(self):
+        nodes = []
+        for root in self.roots():
+            nodes.append(root)
+            nodes.extend(root.descendants())
+        return nodes
+
+    # files
+    def to_dict(self):
+        ordered = [node for node in self.nodes.values() if not node.is_dag] + self.dag_nodes()
+        return {
+            "namespaces": sorted(self.namespaces),
+            "nodes": [node.to_dict() for node in ordered],
+            "connections": [[source.name, source_attribute, destination.name, destination_attribute]
+                            for (destination_id, destination_attribute), (source, source_attribute, destination)
+                            in self.connections.items()],
+        }
+
+    def save(self, path):
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f)
+
+    def load(self, path):
+        with open(path, "r") as f:
+            data = json.load(f)
+
+        self.reset()
+        self.namespaces.update(data["namespaces"])
+        for entry in data["nodes"]:
+            node = Node(self, entry["type"], entry["name"])
+            node.attributes.update(entry["attributes"])
+            node.dynamic.update(entry["dynamic"])
+            node.locked.update(entry["locked"])
+            self.add(node, self.nodes[entry["parent"]] if entry["parent"] else None)
+        for source, source_attribute, destination, destination_attribute in data["connections"]:
+            self.connect(self.nodes[source], source_attribute, self.nodes[destination], destination_attribute)
+        self.file_name = path
+
+
+def _same_attribute(attribute, other):
+    return split_attribute(attribute) == split_attribute(other)
+
+
+_SCENE = Scene()
+
+
+def get_scene():
+    """
+    :return: the active Scene().
+    """
+
+    return _SCENE
+
+
+def set_scene(scene):
+    """
+    Swap the active scene. Callbacks registered on the previous scene stay with it.
+    :param scene: Scene()
+    :return: scene
+    """
+
+    global _SCENE
+    _SCENE = scene
+    return scene
@@ -0,0 +1,15 @@
+"""
+Fake maya.standalone: nothing to start, the scene lives in memory.
+"""
+
+_initialized = False
+
+
+def initialize(name="python"):
+    global _initialized
+    _initialized = True
+
+
+def uninitialize():
+    global _initialized
+    _initialized = False
@@ -0,0 +1,28 @@
+"""
+Fake maya.utils: deferred calls are queued on the scene and run by processIdleEvents().
+"""
+
+from . import scene as _scene
+
+
+def executeDeferred(command, *args, **kwargs):
+    _scene.get_scene().deferred.append((command, args, kwargs))
+
+
+def processIdleEvents():
+    """
+    Run everything queued with executeDeferred() / cmds.evalDeferred().
+    :return: list of results, one per deferred call.
+    """
+
+    scene = _scene.get_scene()
+    results = []
+    while scene.deferred:
+        entry = scene.deferred.pop(0)
+        command, args, kwargs = entry if isinstance(entry, tuple) else (entry, (), {})
+        if callable(command):
+            results.append(command(*args, **kwargs))
+        else:
+            results.append(exec(command, {}))
+
+    return results
@@ -0,0 +1,300 @@
+"""
+Lightweight handle on a scene node, in place of string paths.
+
+A name has to be resolved again (cmds.objExists, MSelectionList) every time a helper is handed it, and stops
+pointing at the node once relocate_ns() renames it. A Node is resolved once and holds an MObjectHandle, so it keeps
+following the node through renames and namespace moves. Validity checks go through the handle, function sets are
+created on first use and kept, and names are only read from the node when asked for.
+
+    joint = handles.as_node("skeleton_def:rigdef_1:arm:joint0")
+    joint.fn_transform.rotation()
+    cmds.setAttr(f"{joint}.radius", 2.0)  # str() is the current name.
+
+Every helper in autorig_utils and ops takes a Node wherever it takes a node name. Helpers keep working on the
+MObject / MDagPath through om2 function sets where they can (connections, parents, matrices, joint hierarchies), the
+remaining cmds based ones read the current name. as_node() memoizes the lookup for the running build transaction, so
+a name is resolved once per build.
+"""
+
+import maya.OpenMaya as om
+import maya.api.OpenMaya as om2
+
+try:
+    from . import transaction
+except Exception as e:
+    import sys
+    sys.path.append("C:/Users/Thomas Killick/Documents/maya/modules/rigging_tool")
+    from scripts.Util import transaction
+
+
+class Node:
+    """
+    MObjectHandle (plus MDagPath for DAG nodes) of one node.
+    """
+
+    __slots__ = ("_handle", "_is_dag", "_path", "_fn", "_fn_dag", "_fn_transform")
+
+    def __init__(self, node):
+        """
+        :param node: node name, om2.MObject(), om2.MDagPath() or Node().
+        """
+
+        path = None
+        if isinstance(node, Node):
+            mobject = node.mobject
+            path = node._path
+        elif isinstance(node, om2.MDagPath):
+            path = om2.MDagPath(node)
+            mobject = path.node()
+        elif isinstance(node, om2.MObject):
+            mobject = node
+        else:
+            selection = om2.MSelectionList()
+            try:
+                selection.add(str(node))
+            except RuntimeError:
+                raise Exception(f"Object: '{node}' does not exist.")
+            if selection.length() != 1:
+                raise Exception(f"More than one object matches name: {node}")
+            mobject = selection.getDependNode(0)
+
+        if mobject.isNull():
+            raise Exception("Can't create a Node from a null MObject.")
+
+        self._handle = om2.MObjectHandle(mobject)
+        self._is_dag = mobject.hasFn(om2.MFn.kDagNode)
+        self._path = path
+        self._fn = None
+        self._fn_dag = None
+        self._fn_transform = None
+
+    def __repr__(self):
+        return f"Node({self.name if self.is_valid() else '<deleted>'!r})"
+
+    def __str__(self):
+        return self.name
+
+    def __eq__(self, other):
+        if not isinstance(other, Node):
+            return NotImplemented
+        return self.is_valid() and other.is_valid() and self.mobject == other.mobject
+
+    def __hash__(self):
+        return self._handle.hashCode()
+
+    def is_valid(self):
+        """
+        :return: False once the node is deleted.
+        """
+
+        return self._handle.isValid()
+
+    def is_named(self, name):
+        """
+        :param name: node name, partial or full path.
+        :return: True if name (still) resolves to this node.
+        """
+
+        if not self.is_valid():
+            return False
+
+        if not name.startswith("|"):
+            name = name.lstrip(":")
+        if not self._is_dag:
+            return self.fn.name() == name
+
+        full_path = self.dag_path.fullPathName()
+        return full_path == name or full_path.endswith("|" + name.lstrip("|"))
+
+    @property
+    def mobject(self):
+        if not self._handle.isValid():
+            raise Exception("Node no longer exists.")
+        return self._handle.object()
+
+    @property
+    def is_dag(self):
+        return self._is_dag
+
+    @property
+    def dag_path(self):
+        """
+        :return: om2.MDagPath(), refreshed when the node was reparented. None for DG nodes.
+        """
+
+        if not self._is_dag:
+            return None
+        if self._path is None or not self._path.isValid():
+            self._path = om2.MDagPath.getAPathTo(self.mobject)
+            self._fn_dag = None
+            self._fn_transform = None
+        return self._path
+
+    @property
+    def fn(self):
+        if self._fn is None:
+            self._fn = om2.MFnDependencyNode(self.mobject)
+        return self._fn
+
+    @property
+    def fn_dag(self):
+        path = self.dag_path
+        if path is None:
+            raise Exception(f"{self} is not a DAG node.")
+        if self._fn_dag is None:
+            self._fn_dag = om2.MFnDagNode(path)
+        return self._fn_dag
+
+    @property
+    def fn_transform(self):
+        path = self.dag_path
+        if not self.has_fn(om2.MFn.kTransform):
+            raise Exception(f"{self} is not a transform.")
+        if self._fn_transform is None:
+            self._fn_transform = om2.MFnTransform(path)
+        return self._fn_transform
+
+    def has_fn(self, fn_type):
+        return self.mobject.hasFn(fn_type)
+
+    @property
+    def is_transform(self):
+        return self.has_fn(om2.MFn.kTransform)
+
+    @property
+    def is_joint(self):
+        return self.has_fn(om2.MFn.kJoint)
+
+    # names, read from the node every time.
+    @property
+    def name(self):
+        """
+        :return: shortest unique name (partial path for DAG nodes).
+        """
+
+        if self._is_dag:
+            return self.dag_path.partialPathName()
+        return self.fn.name()
+
+    @property
+    def full_path(self):
+        if self._is_dag:
+            return self.dag_path.fullPathName()
+        return self.fn.name()
+
+    @property
+    def short_name(self):
+        """
+        :return: name without namespace or path.
+        """
+
+        return self.fn.name().rpartition(":")[2]
+
+    @property
+    def namespace(self):
+        return self.fn.name().rpartition(":")[0]
+
+    @property
+    def type_name(self):
+        return self.fn.typeName
+
+    # graph queries, through the function sets rather than by name.
+    def source(self, attribute):
+        """
+        :param attribute: attribute name e.g. "startJoint".
+        :return: Node() connected into attribute, None when nothing is.
+        """
+
+        plug = self.fn.findPlug(attribute, False).source()
+        if plug.isNull:
+            return None
+        return Node(plug.node())
+
+    def parent(self):
+        """
+        :return: Node() of the DAG parent, None under the world.
+        """
+
+        path = self.dag_path
+        if path is None or path.length() < 2:
+            return None
+        return Node(om2.MDagPath(path).pop())
+
+    # transform queries
+    def world_matrix(self):
+        return self.dag_path.inclusiveMatrix()
+
+    def world_position(self):
+        """
+        :return: world space rotate pivot, same as cmds.xform(q=True, ws=True, rp=True).
+        """
+
+        pivot = self.fn_transform.rotatePivot(om2.MSpace.kWorld)
+        return [pivot.x, pivot.y, pivot.z]
+
+    def api1_object(self):
+        """
+        maya.OpenMaya MObject of the node, for code still on the old API. The two APIs can't hand objects to each
+        other, so the node is looked up again by the full path of its DAG path (the name for DG nodes), captured
+        when this is called. The result follows the node from then on, but the lookup itself needs that name to be
+        unique for DG nodes, and gives the current path for instanced DAG nodes.
+        :return: maya.OpenMaya.MObject()
+        """
+
+        full_path = self.full_path
+        selection = om.MSelectionList()
+        try:
+            selection.add(full_path)
+        except RuntimeError:
+            raise Exception(f"Object: '{full_path}' can't be found through maya.OpenMaya.")
+        mobject = om.MObject()
+        selection.getDependNode(0, mobject)
+        return mobject
+
+
+def as_node(node):
+    """
+    Node() for a name (resolved once per running transaction) or any other input Node() takes.
+    :param node: node name, om2.MObject(), om2.MDagPath() or Node().
+    :return: Node()
+    """
+
+    if isinstance(node, Node):
+        return node
+    if isinstance(node, str):
+        return transaction.cached_node(node, Node)
+
+    return Node(node)
+
+
+def name_of(node):
+    """
+    :param node: Node() or node name.
+    :return: current node name, names are returned as is.
+    """
+
+    if isinstance(node, Node):
+        return node.name
+    return node
+
+
+def names_of(nodes):
+    """
+    :param nodes: Node(), node name or list of either.
+    :return: list of names, a single name stays a single name.
+    """
+
+    if isinstance(nodes, (list, tuple, set)):
+        return [name_of(node) for node in nodes]
+    return name_of(nodes)
+
+
+def exists(node):
+    """
+    :param node: Node() or node name.
+    :return: bool, handles are checked without going through the scene.
+    """
+
+    if isinstance(node, Node):
+        return node.is_valid()
+    return transaction.obj_exists(node)
@@ -0,0 +1,231 @@
+"""
+Snapshot of a transform hierarchy for joint traversal helpers.
+
+The hierarchy below the top-level roots of the queried objects is listed with cmds.ls(dag=True) and kept as flat
+parent / child index arrays, so parent lookups are O(1) and walks up or down a chain never go back to Maya. Names handed
+back are the shortest names unique in the scene, as listed when the snapshot was taken.
+"""
+
+from maya import cmds
+
+
+class HierarchySnapshot:
+    """
+    Parent / child arrays for a list of long DAG names in depth-first order. names holds the shortest name of every
+    node unique in the scene (cmds.ls() without long), the long names when not given.
+    """
+
+    def __init__(self, long_names, node_types, names=None):
+        self.long_names = list(long_names)
+        self.node_types = list(node_types)
+        self.names = list(names) if names is not None else list(self.long_names)
+
+        self._index = {name: i for i, name in enumerate(self.long_names)}
+        self.parents = [self._index.get(name.rpartition("|")[0], -1) for name in self.long_names]
+        self.children = [[] for _ in self.long_names]
+        for i, parent in enumerate(self.parents):
+            if parent >= 0:
+                self.children[parent].append(i)
+
+        self._by_leaf = {}
+        for i, name in enumerate(self.long_names):
+            self._by_leaf.setdefault(name.rpartition("|")[2], []).append(i)
+
+        # depth-first rank, used to sort arbitrary joint lists parent before child.
+        self._rank = {i: rank for rank, i in enumerate(self._walk([i for i, p in enumerate(self.parents) if p < 0]))}
+        self._height_cache = {}
+
+    @classmethod
+    def from_scene(cls, objects):
+        """
+        Snapshot every transform under the top-level roots of objects.
+        :param objects: object name or list of names anywhere in the hierarchies to snapshot.
+        :return: HierarchySnapshot()
+        """
+
+        long_names = cmds.ls(objects, long=True) or []
+        roots = list(dict.fromkeys("|" + name.split("|")[1] for name in long_names if name.startswith("|")))
+        if not roots:
+            return cls([], [])
+
+        listing = cmds.ls(roots, dag=True, long=True, showType=True, type="transform") or []
+        # same listing, but every name as Maya resolves it: the shortest partial path unique in the scene.
+        names = cmds.ls(roots, dag=True, type="transform") or []
+        if len(names) != len(listing) // 2:
+            names = None
+
+        return cls(listing[0::2], listing[1::2], names)
+
+    def __contains__(self, name):
+        try:
+            self.index(name)
+        except Exception:
+            return False
+        return True
+
+    def __len__(self):
+        return len(self.long_names)
+
+    def index(self, name):
+        """
+        Resolve a long, partial or short name to its index.
+        :param name: node name.
+        :return: int
+        """
+
+        if name in self._index:
+            return self._index[name]
+
+        leaf = name.rpartition("|")[2]
+        candidates = self._by_leaf.get(leaf, [])
+        if "|" in name:
+            candidates = [i for i in candidates if self.long_names[i].endswith("|" + name.lstrip("|"))]
+        if len(candidates) == 1:
+            return candidates[0]
+        if not candidates:
+            raise Exception(f"{name} is not part of this hierarchy snapshot.")
+
+        raise Exception(f"More than one object matches name: {name}")
+
+    def name(self, index):
+        """
+        Shortest name for an index that is unique in the scene (not only in the snapshot), so it can be handed to
+        cmds as is.
+        :param index: int
+        :return: str
+        """
+
+        return self.names[index]
+
+    def is_joint(self, index):
+        return self.node_types[index] == "joint"
+
+    def parent(self, name, joints_only=False):
+        """
+        :param name: node name.
+        :param joints_only: only report joint parents.
+        :return: parent name or None.
+        """
+
+        parent = self.parents[self.index(name)]
+        if parent < 0 or (joints_only and not self.is_joint(parent)):
+            return None
+
+        return self.name(parent)
+
+    def child_indices(self, index, joints_only=False):
+        return [child for child in self.children[index] if not joints_only or self.is_joint(child)]
+
+    def _walk(self, start_indices, joints_only=False):
+        stack = list(reversed(start_indices))
+        while stack:
+            index = stack.pop()
+            yield index
+            stack.extend(reversed(self.child_indices(index, joints_only)))
+
+    def descend(self, name, joints_only=False):
+        """
+        Ordered (depth-first, parent before child) descent from name, including name.
+        :param name: node name.
+        :param joints_only: only follow joints.
+        :return: list of names.
+        """
+
+        return [self.name(i) for i in self._walk([self.index(name)], joints_only)]
+
+    def branches(self, name, joints_only=False):
+        """
+        Every chain from name down to a leaf.
+        :param name: node name.
+        :param joints_only: only follow joints.
+        :return: list of lists of names.
+        """
+
+        branches = []
+        stack = [[self.index(name)]]
+        while stack:
+            path = stack.pop()
+            children = self.child_indices(path[-1], joints_only)
+            if not children:
+                branches.append([self.name(i) for i in path])
+            stack.extend(path + [child] for child in reversed(children))
+
+        return branches
+
+    def _heights(self, joints_only):
+        """
+        Length of the longest chain below every index, computed once per snapshot.
+        """
+
+        key = bool(joints_only)
+        if key not in self._height_cache:
+            heights = [0] * len(self.long_names)
+            for index in sorted(self._rank, key=self._rank.get, reverse=True):
+                children = self.child_indices(index, joints_only)
+                if children:
+                    heights[index] = 1 + max(heights[child] for child in children)
+            self._height_cache[key] = heights
+
+        return self._height_cache[key]
+
+    def chain_end(self, name, joints_only=False):
+        """
+        End of the main chain below name. At a branch the deepest child is followed (first child on a tie), so side
+        branches such as fingers off a wrist don't cut the chain short.
+        :param name: node name.
+        :param joints_only: only follow joints.
+        :return: name of the end object.
+        """
+
+        heights = self._heights(joints_only)
+        index = self.index(name)
+        children = self.child_indices(index, joints_only)
+        while children:
+            depths = [heights[child] for child in children]
+            index = children[depths.index(max(depths))]
+            children = self.child_indices(index, joints_only)
+
+        return self.name(index)
+
+    def path_between(self, start, end):
+        """
+        Chain of names from start down to end (inclusive).
+        :param start: ancestor name.
+        :param end: descendant name.
+        :return: list of names.
+        """
+
+        start_index = self.index(start)
+        path = [self.index(end)]
+        while path[-1] != start_index:
+            parent = self.parents[path[-1]]
+            if parent < 0:
+                raise Exception(f'End joint: {end} is not a descendant of start joint {start}')
+            path.append(parent)
+
+        return [self.name(i) for i in reversed(path)]
+
+    def ascend(self, name, joints_only=False):
+        """
+        Names from name up to the top of the hierarchy (or to the last joint with joints_only).
+        :param name: node name.
+        :param joints_only: stop at the first non-joint parent.
+        :return: list of names.
+        """
+
+        path = [self.index(name)]
+        parent = self.parents[path[-1]]
+        while parent >= 0 and (not joints_only or self.is_joint(parent)):
+            path.append(parent)
+            parent = self.parents[parent]
+
+        return [self.name(i) for i in path]
+
+    def order(self, names):
+        """
+        Sort names parent before child (depth-first), keeping the caller's spelling of every name.
+        :param names: list of names in this snapshot.
+        :return: list of names.
+        """
+
+        return sorted(names, key=lambda name: self._rank[self.index(name)])
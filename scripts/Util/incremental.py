@@ -0,0 +1,184 @@
+"""
+Guide hashing for incremental rig updates.
+
+Every skeleton joint carries a "guideHash" string attribute: a hash of its guide's definition (the JSON entry) and
+the guide's sampled world matrix at build time. Comparing those against the current guides tells which skeleton
+segments (one per guide type, e.g. "skeleton_def:rigdef_1:arm") and which IK systems built on them need
+rebuilding.
+"""
+
+import hashlib
+import json
+
+from maya import cmds
+import maya.api.OpenMaya as om2
+
+import numpy as np
+
+try:
+    from . import autorig_utils
+    from . import transaction
+except Exception as e:
+    import sys
+    sys.path.append("C:/Users/Thomas Killick/Documents/maya/modules/rigging_tool")
+    from scripts.Util import autorig_utils
+    from scripts.Util import transaction
+
+
+HASH_ATTRIBUTE = "guideHash"
+HASH_PRECISION = 6  # decimal places of the sampled matrices that count as a change.
+
+
+def definitions_by_type(guide_data):
+    """
+    Merge read_definition() output into one dictionary.
+    :param guide_data: list of {guide_type: {guide: definition}} e.g. [{'arm': {'joint0': {...}}}, {'leg': ...}]
+    :return: {guide_type: {guide: definition}}
+    """
+
+    definitions = {}
+    for entry in guide_data or []:
+        for guide_type, guides in entry.items():
+            definitions.setdefault(guide_type, {}).update(guides)
+
+    return definitions
+
+
+def guide_hash(definition, world_matrix):
+    """
+    Hash of one guide: its definition plus its world matrix rounded to HASH_PRECISION.
+    :param definition: guide definition dictionary (or None).
+    :param world_matrix: (4, 4) world matrix.
+    :return: hex digest string.
+    """
+
+    # + 0.0 folds -0.0 into 0.0 so sign noise doesn't count as a change.
+    matrix = np.round(np.asarray(world_matrix, dtype=np.float64).reshape(4, 4), HASH_PRECISION) + 0.0
+    data = json.dumps([definition or {}, matrix.tolist()], sort_keys=True, default=str)
+
+    return hashlib.sha1(data.encode("utf-8")).hexdigest()
+
+
+def guide_hashes(guides, definitions=None, sample=None):
+    """
+    Hash a whole guide set.
+    :param guides: list of guide names.
+    :param definitions: {guide short name: definition} for the guide type, optional.
+    :param sample: autorig_utils.sample_transforms() result for guides, sampled if not given.
+    :return: list of hashes, one per guide.
+    """
+
+    definitions = definitions or {}
+    sample = sample or autorig_utils.sample_transforms(guides)
+
+    return [guide_hash(definitions.get(guide.split(":")[-1]), matrix)
+            for guide, matrix in zip(guides, sample["world_matrix"])]
+
+
+def add_hash_attributes(modifier, joints):
+    """
+    Queue a guideHash attribute on every joint on a modifier. Call before the modifier's doIt(), then
+    set_hash_values() after it.
+    :param modifier: om2.MDGModifier() / om2.MDagModifier()
+    :param joints: list of joint MObjects.
+    :return: None
+    """
+
+    for joint in joints:
+        if om2.MFnDependencyNode(joint).hasAttribute(HASH_ATTRIBUTE):
+            continue
+        attribute = om2.MFnTypedAttribute().create(HASH_ATTRIBUTE, HASH_ATTRIBUTE, om2.MFnData.kString)
+        modifier.addAttribute(joint, attribute)
+
+
+def set_hash_values(modifier, joints, hashes):
+    """
+    Queue the guideHash values added by add_hash_attributes().
+    :param modifier: om2.MDGModifier() / om2.MDagModifier()
+    :param joints: list of joint MObjects.
+    :param hashes: list of hashes.
+    :return: None
+    """
+
+    for joint, value in zip(joints, hashes):
+        modifier.newPlugValueString(om2.MFnDependencyNode(joint).findPlug(HASH_ATTRIBUTE, False), value)
+
+
+def stored_hashes(joints):
+    """
+    Read the guideHash of existing joints.
+    :param joints: list of joint names.
+    :return: {joint: hash or None}, joints that don't exist are left out.
+    """
+
+    existing = cmds.ls(joints) or []
+    if not existing:
+        return {}
+
+    selection = om2.MSelectionList()
+    for joint in existing:
+        selection.add(joint)
+
+    hashes = {}
+    for i, joint in enumerate(existing):
+        node = om2.MFnDependencyNode(selection.getDependNode(i))
+        hashes[joint] = node.findPlug(HASH_ATTRIBUTE, False).asString() if node.hasAttribute(HASH_ATTRIBUTE) else None
+
+    return hashes
+
+
+def joint_names(guides, root, guide_type):
+    """
+    Skeleton joint names build_skeleton() creates for guides.
+    :param guides: list of guide names.
+    :param root: skeleton namespace of the rigdef e.g. "skeleton_def:rigdef_1".
+    :param guide_type: guide type e.g. "arm".
+    :return: list of joint names.
+    """
+
+    return [f"{root}:{guide_type}:{guide.split(':')[-1]}" for guide in guides]
+
+
+def prune_deleted(created):
+    """
+    Leave guides deleted since they were generated out of a generate_guide_from_cache() result.
+    :param created: {guide name: [[transform, ...], ...]} for one guide type.
+    :return: same layout, existing guides only.
+    """
+
+    return {guide: [transforms for transforms in entries if transaction.obj_exists(transforms[0])]
+            for guide, entries in created.items()}
+
+
+def stale_segments(generated_guides, guide_data=None, root="skeleton_def:rigdef_1"):
+    """
+    Work out which skeleton segments no longer match their guides.
+    :param generated_guides: {guide_type: generate_guide_from_cache() result} as kept by the UI.
+    :param guide_data: read_definition() output, so definition edits count as changes too.
+    :param root: skeleton namespace of the rigdef.
+    :return: {guide_type: {"stale": bool, "ik": bool}}. "ik" is True when the segment already drives an IK system,
+    which has to be rebuilt with it. A segment still holding joints of deleted guides is stale.
+    """
+
+    definitions = definitions_by_type(guide_data)
+
+    segments = {}
+    for guide_type, created in generated_guides.items():
+        guides = [transforms[0] for entries in prune_deleted(created).values() for transforms in entries]
+        deleted = set(transforms[0] for entries in created.values() for transforms in entries) - set(guides)
+        names = joint_names(guides, root, guide_type)
+
+        # joints left behind by deleted guides, gone once the segment was rebuilt without them.
+        stale = bool(deleted and cmds.ls(joint_names(deleted, root, guide_type)))
+        stored = stored_hashes(names)
+        stale = stale or len(stored) != len(names) or None in stored.values()
+        if not stale:
+            current = guide_hashes(guides, definitions.get(guide_type))
+            stale = any(stored.get(name) != value for name, value in zip(names, current))
+
+        segments[guide_type] = {
+            "stale": stale,
+            "ik": bool(cmds.ls(f"{root}:{guide_type}:*", type="ikHandle")),
+        }
+
+    return segments
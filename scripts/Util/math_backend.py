@@ -0,0 +1,154 @@
+"""
+Pluggable math backend for ops.py.
+
+OpenMaya is used when it can be imported, otherwise a NumPy implementation with the same interface is used so the
+math runs in a plain Python interpreter (process pools, tests, benchmarks). The backend is picked at import time and
+can be forced with the RIGGING_TOOL_MATH_BACKEND environment variable ("openmaya" or "numpy").
+"""
+
+import os
+
+import numpy as np
+
+from . import batch_ops
+
+try:
+    import maya.OpenMaya as om
+    import maya.api.OpenMaya as om2
+except ImportError:
+    om = None
+    om2 = None
+
+
+BACKEND_ENV_VAR = "RIGGING_TOOL_MATH_BACKEND"
+
+
+class OpenMayaBackend:
+    """
+    Vector math through maya.OpenMaya, matrices as maya.api.OpenMaya MMatrix() (the only matrix type ops.py returns).
+    """
+
+    name = "openmaya"
+
+    def normalise_vector(self, vector):
+        normal = om.MVector(vector[0], vector[1], vector[2]).normal()
+        return (normal.x, normal.y, normal.z)
+
+    def cross_product(self, vec1, vec2):
+        _cross_product = om.MVector(vec1[0], vec1[1], vec1[2]) ^ om.MVector(vec2[0], vec2[1], vec2[2])
+        return (_cross_product.x, _cross_product.y, _cross_product.z)
+
+    def offset_vector(self, point1, point2):
+        vec = om.MPoint(point2[0], point2[1], point2[2], 1.0) - om.MPoint(point1[0], point1[1], point1[2], 1.0)
+        return (vec.x, vec.y, vec.z)
+
+    def vector_matrix_mult(self, vector, matrix):
+        vector = om2.MVector(vector[0], vector[1], vector[2])
+        if matrix != om2.MMatrix.kIdentity:
+            vector = vector * matrix
+        return [vector.x, vector.y, vector.z]
+
+    def position_dot_product(self, point1, point2):
+        _point_1 = om.MPoint(point1[0], point1[1], point1[2], 1.0)
+        _point_2 = om.MPoint(point2[0], point2[1], point2[2], 1.0)
+        return om.MVector(_point_1 - _point_2).length()
+
+    def matrix(self, values):
+        if isinstance(values, om2.MMatrix):
+            return values
+        return om2.MMatrix(np.asarray(values, dtype=np.float64).ravel().tolist())
+
+    def matrix_values(self, matrix):
+        return np.asarray(tuple(matrix), dtype=np.float64).reshape(4, 4)
+
+    def identity(self):
+        return om2.MMatrix()
+
+    def multiply(self, matrix1, matrix2):
+        return matrix1 * matrix2
+
+    def inverse(self, matrix):
+        return matrix.inverse()
+
+
+class NumpyBackend:
+    """
+    Vector math through NumPy, matrices as (4, 4) float arrays. No Maya required.
+    """
+
+    name = "numpy"
+
+    def normalise_vector(self, vector):
+        return tuple(batch_ops.normalise_vectors(vector)[0].tolist())
+
+    def cross_product(self, vec1, vec2):
+        return tuple(np.cross(batch_ops.as_vectors(vec1), batch_ops.as_vectors(vec2))[0].tolist())
+
+    def offset_vector(self, point1, point2):
+        return tuple((batch_ops.as_vectors(point2) - batch_ops.as_vectors(point1))[0].tolist())
+
+    def vector_matrix_mult(self, vector, matrix):
+        rotation = self.matrix_values(matrix)[:3, :3]
+        return (batch_ops.as_vectors(vector) @ rotation)[0].tolist()
+
+    def position_dot_product(self, point1, point2):
+        return float(np.linalg.norm(batch_ops.as_vectors(point1) - batch_ops.as_vectors(point2)))
+
+    def matrix(self, values):
+        return np.array(values, dtype=np.float64).reshape(4, 4)
+
+    def matrix_values(self, matrix):
+        return np.asarray(matrix, dtype=np.float64).reshape(4, 4)
+
+    def identity(self):
+        return np.identity(4)
+
+    def multiply(self, matrix1, matrix2):
+        return self.matrix_values(matrix1) @ self.matrix_values(matrix2)
+
+    def inverse(self, matrix):
+        return np.linalg.inv(self.matrix_values(matrix))
+
+
+BACKENDS = {OpenMayaBackend.name: OpenMayaBackend, NumpyBackend.name: NumpyBackend}
+
+
+def get_backend(name=None):
+    """
+    Create a backend by name. With no name, honour RIGGING_TOOL_MATH_BACKEND, then prefer OpenMaya when importable.
+    Args:
+        name(str): "openmaya" or "numpy".
+
+    Returns: backend instance.
+
+    """
+
+    name = name or os.environ.get(BACKEND_ENV_VAR)
+    if not name:
+        name = OpenMayaBackend.name if om is not None else NumpyBackend.name
+
+    if name not in BACKENDS:
+        raise Exception(f"Unknown math backend: {name}. Expected one of {list(BACKENDS)}")
+    if name == OpenMayaBackend.name and om is None:
+        raise Exception("OpenMaya math backend requested but maya.OpenMaya is not importable.")
+
+    return BACKENDS[name]()
+
+
+def set_backend(name):
+    """
+    Swap the active backend used by ops.py.
+    Args:
+        name(str):
+
+    Returns: backend instance.
+
+    """
+
+    global BACKEND
+    BACKEND = get_backend(name)
+
+    return BACKEND
+
+
+BACKEND = get_backend()
@@ -0,0 +1,415 @@
+"""
+Snapshot of the scene's namespace tree and planned namespace edits.
+
+The namespace layout is listed with one namespaceInfo call and the nodes of a namespace are only queried when a plan
+needs them. Planning edits the snapshot in memory (namespaces added, renamed, merged and removed) and records the
+commands it takes in a NamespacePlan, which is then applied in one go. Clashes are found while planning, before
+anything is changed. Once the plan is applied the snapshot matches the scene again and can be reused for the next plan:
+
+    tree = namespaces.NamespaceTree.from_scene()
+    plan = namespaces.plan_guide_namespaces(tree, ["arm", "leg"], root="Guides", rigdef="rigdef_1")
+    plan.apply()
+    report = namespaces.plan_relocation(tree, "arm", parent="rigdef_2").apply().report()
+
+Namespace paths are absolute without the leading ":" ("Guides:rigdef_1:arm"), the root namespace is "".
+"""
+
+from maya import cmds
+
+try:
+    from . import transaction
+except Exception as e:
+    import sys
+    sys.path.append("C:/Users/Thomas Killick/Documents/maya/modules/rigging_tool")
+    from scripts.Util import transaction
+
+
+DEFAULT_NAMESPACES = ("UI", "shared")
+
+
+def _short_name(name):
+    return name.rpartition("|")[2].rpartition(":")[2]
+
+
+def _absolute(namespace):
+    return f":{namespace}"
+
+
+class NamespaceTree:
+    """
+    Namespace paths of a scene, plus the short names of the nodes in each namespace (queried on first use).
+    """
+
+    def __init__(self, namespaces, members=None):
+        """
+        :param namespaces: namespace paths, leading ":" optional.
+        :param members: optional {namespace: list of node names}, other namespaces are queried from the scene.
+        """
+
+        self.namespaces = set()
+        for namespace in namespaces:
+            namespace = namespace.strip(":")
+            if namespace and namespace.split(":")[0] not in DEFAULT_NAMESPACES:
+                self.namespaces.add(namespace)
+
+        # path in this tree -> path in the scene, None for namespaces that only exist in the plan.
+        self._origin = {namespace: namespace for namespace in self.namespaces}
+        self._members = {}
+        for namespace, names in (members or {}).items():
+            self._members[namespace.strip(":")] = {_short_name(name) for name in names}
+
+    @classmethod
+    def from_scene(cls):
+        """
+        :return: NamespaceTree() of every namespace in the scene.
+        """
+
+        return cls(cmds.namespaceInfo(":", listOnlyNamespaces=True, recurse=True) or [])
+
+    def __contains__(self, namespace):
+        return namespace.strip(":") in self.namespaces
+
+    def __len__(self):
+        return len(self.namespaces)
+
+    @staticmethod
+    def parent(namespace):
+        return namespace.strip(":").rpartition(":")[0]
+
+    @staticmethod
+    def base_name(namespace):
+        return namespace.strip(":").rpartition(":")[2]
+
+    def children(self, namespace, recursive=False):
+        """
+        :param namespace: namespace path, "" for the root.
+        :param recursive: include every descendant namespace.
+        :return: sorted list of namespace paths.
+        """
+
+        namespace = namespace.strip(":")
+        prefix = f"{namespace}:" if namespace else ""
+        depth = prefix.count(":")
+
+        return sorted(ns for ns in self.namespaces
+                      if ns.startswith(prefix) and (recursive or ns.count(":") == depth))
+
+    def find(self, base_name):
+        """
+        :param base_name: namespace name without its parents, e.g. "arm".
+        :return: every namespace path with that name, deepest first.
+        """
+
+        return sorted((ns for ns in self.namespaces if self.base_name(ns) == base_name),
+                      key=lambda ns: (-ns.count(":"), ns))
+
+    def members(self, namespace):
+        """
+        :param namespace: namespace path.
+        :return: set of short names (no namespace) of the nodes directly in namespace.
+        """
+
+        namespace = namespace.strip(":")
+        if namespace not in self._members:
+            origin = self._origin.get(namespace)
+            names = cmds.namespaceInfo(_absolute(origin), listOnlyDependencyNodes=True) if origin else None
+            self._members[namespace] = {_short_name(name) for name in names or []}
+
+        return self._members[namespace]
+
+    def is_empty(self, namespace):
+        return not self.members(namespace) and not self.children(namespace)
+
+    def scene_path(self, namespace):
+        """
+        :return: where namespace is in the scene before the planned edits, None if it's only planned.
+        """
+
+        return self._origin.get(namespace.strip(":"))
+
+    def resolve(self, namespace):
+        """
+        Find a namespace by path, or else by name (the shallowest namespace called that).
+        :param namespace: namespace path or name.
+        :return: namespace path, None if there is no such namespace.
+        """
+
+        if namespace.strip(":") in self.namespaces:
+            return namespace.strip(":")
+
+        found = self.find(self.base_name(namespace))
+        return min(found, key=lambda ns: (ns.count(":"), ns)) if found else None
+
+    # planned edits, the scene isn't touched.
+    def add(self, namespace):
+        namespace = namespace.strip(":")
+        self.namespaces.add(namespace)
+        self._origin[namespace] = None
+        self._members[namespace] = set()
+
+    def remove(self, namespace):
+        namespace = namespace.strip(":")
+        self.namespaces.discard(namespace)
+        self._origin.pop(namespace, None)
+        self._members.pop(namespace, None)
+
+    def move(self, source, destination):
+        """
+        Move the nodes and child namespaces of source into destination (namespace -mv). Source stays, empty.
+        """
+
+        source = source.strip(":")
+        destination = destination.strip(":")
+
+        self.members(destination).update(self.members(source))
+        self._members[source] = set()
+        self._move_children(source, destination)
+
+    def rename(self, source, destination):
+        """
+        Rename / reparent source to destination (namespace -rename -parent), contents included.
+        """
+
+        source = source.strip(":")
+        destination = destination.strip(":")
+
+        self.namespaces.add(destination)
+        self._origin[destination] = self._origin.get(source)
+        if source in self._members:
+            self._members[destination] = self._members[source]
+        self._move_children(source, destination)
+        self.remove(source)
+
+    def _move_children(self, source, destination):
+        for child in self.children(source, recursive=True):
+            moved = destination + child[len(source):]
+            self.namespaces.discard(child)
+            self.namespaces.add(moved)
+            self._origin[moved] = self._origin.pop(child, None)
+            if child in self._members:
+                self._members[moved] = self._members.pop(child)
+
+
+class NamespacePlan:
+    """
+    Ordered namespace commands, applied with apply().
+    """
+
+    def __init__(self):
+        # ("add", namespace), ("rename", source, destination), ("move", source, destination) or ("remove", namespace).
+        self.operations = []
+        self.deletes = []  # node names (as they are in the scene now), deleted in one call before the operations.
+        self.conflicts = []  # {"namespace", "target", "reason", "names"} left in place.
+
+    def __len__(self):
+        return len(self.operations)
+
+    def add(self, tree, namespace):
+        """
+        Plan namespace and its missing parents.
+        :return: None
+        """
+
+        if not namespace.strip(":"):
+            return
+
+        parts = namespace.strip(":").split(":")
+        for i in range(1, len(parts) + 1):
+            path = ":".join(parts[:i])
+            if path not in tree:
+                tree.add(path)
+                self.operations.append(("add", path))
+
+    def rename(self, tree, source, destination):
+        tree.rename(source, destination)
+        self.operations.append(("rename", source, destination))
+
+    def remove(self, tree, namespace):
+        tree.remove(namespace)
+        self.operations.append(("remove", namespace))
+
+    def merge(self, tree, source, destination, force=True):
+        """
+        Plan merging source into destination and removing source. Nodes whose name is already used in destination
+        are deleted with force, otherwise nothing is planned and the clash is recorded in conflicts.
+        :return: True if the merge was planned.
+        """
+
+        clashes = sorted(tree.members(source) & tree.members(destination))
+        child_clashes = sorted({tree.base_name(child) for child in tree.children(source)} &
+                               {tree.base_name(child) for child in tree.children(destination)})
+
+        if child_clashes:
+            self.conflicts.append({"namespace": source, "target": destination, "reason": "namespace clash",
+                                   "names": child_clashes})
+            return False
+        if clashes and not force:
+            self.conflicts.append({"namespace": source, "target": destination, "reason": "name clash",
+                                   "names": clashes})
+            return False
+
+        if clashes:
+            self.deletes.extend(_absolute(f"{tree.scene_path(source)}:{name}") for name in clashes)
+            tree.members(source).difference_update(clashes)
+
+        if not tree.is_empty(source):
+            tree.move(source, destination)
+            self.operations.append(("move", source, destination))
+
+        self.remove(tree, source)
+
+        return True
+
+    def gather(self, tree, sources, target, merge=True, force=True):
+        """
+        Plan moving every source namespace to target: the first one is renamed into place when target doesn't exist,
+        the others are merged. Without merge, sources that would need merging are only removed when empty.
+        :return: None
+        """
+
+        for source in sources:
+            if target not in tree:
+                self.add(tree, tree.parent(target))
+                self.rename(tree, source, target)
+            elif merge:
+                self.merge(tree, source, target, force=force)
+            elif tree.is_empty(source):
+                self.remove(tree, source)
+            else:
+                self.conflicts.append({"namespace": source, "target": target, "reason": "target exists",
+                                       "names": []})
+
+    def apply(self):
+        """
+        Run the planned commands. The current namespace is set to the root first.
+        :return: self
+        """
+
+        if not self.operations and not self.deletes:
+            return self
+
+        cmds.namespace(set=":")
+        if self.deletes:
+            cmds.delete(self.deletes)
+
+        for operation in self.operations:
+            command = operation[0]
+            if command == "add":
+                parent = NamespaceTree.parent(operation[1])
+                cmds.namespace(add=NamespaceTree.base_name(operation[1]), parent=_absolute(parent))
+            elif command == "rename":
+                cmds.namespace(rename=(_absolute(operation[1]), NamespaceTree.base_name(operation[2])),
+                               parent=_absolute(NamespaceTree.parent(operation[2])))
+            elif command == "move":
+                cmds.namespace(moveNamespace=(_absolute(operation[1]), _absolute(operation[2])), force=True)
+            elif command == "remove":
+                cmds.namespace(removeNamespace=_absolute(operation[1]))
+            else:
+                raise Exception(f"Unknown namespace operation: {command}")
+
+        transaction.invalidate()
+
+        return self
+
+    def report(self):
+        """
+        :return: dictionary of what the plan changes: "added", "removed" (namespaces), "renamed", "merged"
+        ((source, destination) namespaces), "deleted" (node names) and "conflicts".
+        """
+
+        by_command = {"add": [], "rename": [], "move": [], "remove": []}
+        for operation in self.operations:
+            by_command[operation[0]].append(operation[1] if len(operation) == 2 else operation[1:])
+
+        return {
+            "added": by_command["add"],
+            "renamed": by_command["rename"],
+            "merged": by_command["move"],
+            "removed": by_command["remove"],
+            "deleted": list(self.deletes),
+            "conflicts": list(self.conflicts),
+        }
+
+
+def is_stray(namespace, root="Guides", keep=("skeleton_def",)):
+    """
+    Whether a namespace named after a guide type is a leftover rather than part of a rig definition: anything that
+    isn't under a rigdef of root ("Guides:<rigdef>:...") or under one of the keep namespaces.
+    :param namespace: namespace path.
+    :param root: guide root namespace.
+    :param keep: top level namespaces owned by the tool (skeleton).
+    :return: bool
+    """
+
+    parts = namespace.strip(":").split(":")
+    if parts[0] in keep:
+        return False
+
+    return not (parts[0] == root and len(parts) >= 3)
+
+
+def plan_guide_namespaces(tree, guide_types, root="Guides", rigdef="rigdef_1", keep=("skeleton_def",), force=True):
+    """
+    Plan the namespace layout prep_scene() needs: root:rigdef:<guide type> for every guide type, with every stray
+    namespace of the same name merged into it. When the target doesn't exist yet a stray is moved into place with a
+    single rename, otherwise its contents are merged and the stray removed.
+    :param tree: NamespaceTree(), edited to the planned layout.
+    :param guide_types: guide type names.
+    :param root: guide root namespace.
+    :param rigdef: rig definition namespace.
+    :param keep: top level namespaces never merged from (see is_stray()).
+    :param force: delete stray nodes whose names are already used in the target, otherwise leave the stray.
+    :return: NamespacePlan()
+    """
+
+    plan = NamespacePlan()
+
+    rigdef_path = f"{root}:{rigdef}"
+    plan.add(tree, rigdef_path)
+
+    for guide_type in dict.fromkeys(guide_types):
+        target = f"{rigdef_path}:{guide_type}"
+        strays = [ns for ns in tree.find(guide_type) if ns != target and is_stray(ns, root=root, keep=keep)]
+
+        plan.gather(tree, strays, target, force=force)
+        plan.add(tree, target)
+
+    return plan
+
+
+def plan_relocation(tree, src_ns, parent=None, find_all=True, merge=True, force=True):
+    """
+    Plan relocate_ns(): gather the namespaces called src_ns under parent.
+    :param tree: NamespaceTree(), edited to the planned layout.
+    :param src_ns: namespace name to relocate, e.g. "arm".
+    :param parent: parent namespace path or name, the root if not given.
+    :param find_all: gather every namespace called src_ns, otherwise only the one at the root.
+    :param merge: merge into an existing parent:src_ns, otherwise only empty sources are removed.
+    :param force: delete source nodes whose names are already used in the target, otherwise leave the source.
+    :return: NamespacePlan()
+    """
+
+    plan = NamespacePlan()
+
+    src_ns = src_ns.strip(":")
+    parent_path = ""
+    if parent:
+        parent_path = tree.resolve(parent)
+        if parent_path is None:
+            raise Exception(f"Namespace: '{parent}' does not exist.")
+
+    name = tree.base_name(src_ns)
+    target = f"{parent_path}:{name}" if parent_path else name
+
+    if find_all:
+        sources = tree.find(name)
+    else:
+        sources = [src_ns] if src_ns in tree else []
+
+    # never move a namespace into itself.
+    sources = [ns for ns in sources
+               if ns != target and not ns.startswith(target + ":") and not target.startswith(ns + ":")]
+
+    plan.gather(tree, sources, target, merge=merge, force=force)
+
+    return plan
@@ -1,13 +1,20 @@
-import maya.OpenMaya as om
-import maya.api.OpenMaya as om2
-from maya import cmds
+try:
+    import maya.OpenMaya as om
+    import maya.api.OpenMaya as om2
+    from maya import cmds
+except ImportError:  # headless: math runs through the NumPy backend.
+    om = None
+    om2 = None
+    cmds = None
 
-import math
+from . import batch_ops
+from . import math_backend
 
 
 def revert_API_matrix_types(om2_mmatrix):
     """
     Revert Maya.api.OpenMaya to maya.OpenMaya MMatrix() object type.
+    Only kept for callers that still need API 1.0 matrices, the build path works with om2 matrices throughout.
     Args:
         om2_mmatrix(om2.MMatrix()):
 
@@ -15,18 +22,49 @@ def revert_API_matrix_types(om2_mmatrix):
 
     """
 
-    # Create a new MMatrix (old API)
     old_matrix = om.MMatrix()
-
-    # Extract the values from the new MMatrix (maya.api.OpenMaya.MMatrix)
-    for i in range(4):
-        for j in range(4):
-            value = om2_mmatrix[i * 4 + j]
-            # Set the value in the corresponding position of the old MMatrix
-            om.MScriptUtil.setDoubleArray(old_matrix[i], j, value)
+    om.MScriptUtil.createMatrixFromList(list(om2_mmatrix), old_matrix)
 
     return old_matrix
 
+
+def identity_matrix():
+    """
+    Identity matrix of the active backend's matrix type.
+    Returns:
+
+    """
+
+    return math_backend.BACKEND.identity()
+
+
+def multiply_matrices(matrix1, matrix2):
+    """
+    Multiply two matrices (matrix1 * matrix2).
+    Args:
+        matrix1:
+        matrix2:
+
+    Returns:
+
+    """
+
+    return math_backend.BACKEND.multiply(matrix1, matrix2)
+
+
+def inverse_matrix(matrix):
+    """
+    Inverse of our matrix.
+    Args:
+        matrix:
+
+    Returns:
+
+    """
+
+    return math_backend.BACKEND.inverse(matrix)
+
+
 def normalise_vector(vector=(0, 0, 0)):
     """
     Normalise our vector.
@@ -37,8 +75,7 @@ def normalise_vector(vector=(0, 0, 0)):
 
     """
 
-    normal = om.MVector(vector[0], vector[1], vector[2]).normal()
-    return (normal.x, normal.y, normal.z)
+    return math_backend.BACKEND.normalise_vector(vector)
 
 
 def cross_product(vec1=(0.0,0.0,0.0),vec2=(0.0,0.0,0.0)):
@@ -52,12 +89,7 @@ def cross_product(vec1=(0.0,0.0,0.0),vec2=(0.0,0.0,0.0)):
 
     """
 
-    vec1 = om.MVector(vec1[0], vec1[1], vec1[2])
-    vec2 = om.MVector(vec2[0], vec2[1], vec2[2])
-
-    _cross_product = vec1 ^ vec2
-
-    return (_cross_product.x, _cross_product.y, _cross_product.z)
+    return math_backend.BACKEND.cross_product(vec1, vec2)
 
 
 def offset_vector(point1=(0.0,0.0,0.0),point2=(0.0,0.0,0.0)):
@@ -71,12 +103,7 @@ def offset_vector(point1=(0.0,0.0,0.0),point2=(0.0,0.0,0.0)):
 
     """
 
-    pnt_1 = om.MPoint(point1[0], point1[1], point1[2], 1.0)
-    pnt_2 = om.MPoint(point2[0], point2[1], point2[2], 1.0)
-
-    vec = pnt_2 - pnt_1
-
-    return (vec.x, vec.y, vec.z)
+    return math_backend.BACKEND.offset_vector(point1, point2)
 
 
 def vector_matrix_mult(vector, matrix):
@@ -90,12 +117,8 @@ def vector_matrix_mult(vector, matrix):
 
     """
 
-    vector = om.MVector(vector[0], vector[1], vector[2])
-
-    if matrix != om.MMatrix.identity:
-        vector *= matrix
+    return math_backend.BACKEND.vector_matrix_mult(vector, matrix)
 
-    return [vector.x, vector.y, vector.z]
 
 def position_dot_product(point1=(0.0,0.0,0.0),point2=(0.0,0.0,0.0)):
     """
@@ -108,10 +131,7 @@ def position_dot_product(point1=(0.0,0.0,0.0),point2=(0.0,0.0,0.0)):
 
     """
 
-    _point_1 = om.MPoint((point1[0], point1[1], point1[2]), 1.0)
-    _point_2 = om.MPoint((point2[0], point2[1], point2[2]), 1.0)
-
-    return om.MVector(_point_1 - _point_2).length()
+    return math_backend.BACKEND.position_dot_product(point1, point2)
 
 
 def print_matrix(matrix):
@@ -125,10 +145,9 @@ def print_matrix(matrix):
 
     """
 
-    for i in range(4):
-        row = []
-        for j in range(4):
-            row.append(matrix[i*4 + j])
+    values = math_backend.BACKEND.matrix_values(matrix)
+
+    for row in values:
         print(' '.join(['{:.2f}'.format(item) for item in row]))
 
 
@@ -156,27 +175,18 @@ def get_rotation(matrix, rotation_order="xyz"):
     """
     Get our rotation values from a matrix.
     Args:
-        matrix(om.MMatrix()):
+        matrix(om2.MMatrix()):
         rotation_order(str)/(int):
 
     Returns:
 
     """
 
-    radian = 180.0/math.pi
-
-    if type(rotation_order) != str:
-        rot_orders = {'xyz':0,'yzx':1,'zxy':2,'xzy':3,'yxz':4,'zyx':5}
+    values = math_backend.BACKEND.matrix_values(matrix)
 
-        rotation_order = int(rotation_order)
+    rotation = batch_ops.euler_rotations(values, rotation_order)[0].tolist()
 
-    transformMatrix = om.MTransformationMatrix(matrix)
-
-    euler_rotation = transformMatrix.eulerRotation()
-
-    euler_rotation.reorderIt(rotation_order)
-
-    return (euler_rotation.x*radian, euler_rotation.y*radian, euler_rotation.z*radian)
+    return (rotation[0], rotation[1], rotation[2])
 
 
 # TODO: CURRENT ISSUE: we are already worldspace here if we set it, so in our main matrix it will multiply again
@@ -186,7 +196,7 @@ def get_matrix(transform, ns=None, local=True):
     TODO: Needs optimising.
     Get our matrix.
     Args:
-        transform:
+        transform: transform name or handles.Node().
         ns:
         local:
 
@@ -194,46 +204,33 @@ def get_matrix(transform, ns=None, local=True):
 
     """
 
-    obj_query = transform
-    if ns:
-        obj_query = f"{ns}:{transform}"
-
-    if not cmds.objExists(obj_query):
-        raise Exception('Object "' + transform + '" does not exist!')
-
-    matrix_attr = 'worldMatrix[0]'
-    if local:
-        matrix_attr = 'matrix'
-
-    # Get time
-    _matrix = om2.MMatrix()
+    if isinstance(transform, str):
+        obj_query = transform
+        if ns:
+            obj_query = f"{ns}:{transform}"
 
-    _matrix = cmds.getAttr(transform + "." + matrix_attr)
+        if not cmds.objExists(obj_query):
+            raise Exception('Object "' + transform + '" does not exist!')
 
-    rot_mat = [ _matrix[0], _matrix[1], _matrix[2],
-                0, _matrix[4], _matrix[5], _matrix[6],
-                0, _matrix[8], _matrix[9], _matrix[10],
-                0, 0, 0, 0, 1]
+        matrix_attr = 'worldMatrix[0]'
+        if local:
+            matrix_attr = 'matrix'
 
-    rotation_matrix = om2.MMatrix(rot_mat)
+        _matrix = cmds.getAttr(obj_query + "." + matrix_attr)
 
-    transform_matrix = om2.MTransformationMatrix(rotation_matrix)
+    else:  # handles.Node(), read straight from the node.
+        if not transform.is_valid():
+            raise Exception(f'Object {transform!r} does not exist!')
 
-    euler_rotation = transform_matrix.rotation(asQuaternion=False)
+        _matrix = list(transform.fn_dag.transformationMatrix() if local else transform.world_matrix())
 
-    orient_x = om2.MAngle(euler_rotation.x, om2.MAngle.kRadians).asDegrees()
-    orient_y = om2.MAngle(euler_rotation.y, om2.MAngle.kRadians).asDegrees()
-    orient_z = om2.MAngle(euler_rotation.z, om2.MAngle.kRadians).asDegrees()
+    orient = batch_ops.euler_rotations(_matrix)[0]
 
     matrix = buildMatrix(
         translate=(
             _matrix[12], _matrix[13], _matrix[14]
         ),
-        orient=(
-            orient_x,
-            orient_y,
-            orient_z
-        ), ws=False,
+        orient=orient, ws=False,
         transform=transform # mess sort out
     )
 
@@ -249,35 +246,23 @@ def buildMatrix(translate=(0,0,0), orient=(0,0,0), scale=(1,1,1), ws=False, tran
         orient:
         scale:
         ws:
-        transform:
+        transform: transform name or handles.Node().
 
     Returns:
 
     """
 
     # WS flag is ONLY used NOT with getMatrix()
-    rotX = math.radians(orient[0])
-    rotY = math.radians(orient[1])
-    rotZ = math.radians(orient[2])
-
-    rot_matrix = om2.MEulerRotation(rotX, rotY, rotZ).asMatrix()
-
-    scale_matrix = om2.MMatrix()
-    scale_matrix[0] = scale[0]
-    scale_matrix[5] = scale[1]
-    scale_matrix[10] = scale[2]
-
-    combined_matrix = scale_matrix * rot_matrix
-
-    # set our translation.
-    combined_matrix[12] = translate[0]
-    combined_matrix[13] = translate[1]
-    combined_matrix[14] = translate[2]
+    values = batch_ops.build_matrices(translate=translate, orient=orient, scale=scale)[0]
 
     if ws and transform:  # only use when we also have an already instanced object.
-        world_matrix = cmds.xform(transform, q=True, matrix=True, ws=True)
-        new_matrix = om2.MMatrix(world_matrix)
-        combined_matrix = new_matrix * combined_matrix
+        if isinstance(transform, str):
+            world_matrix = cmds.xform(transform, q=True, matrix=True, ws=True)
+        else:  # handles.Node()
+            world_matrix = list(transform.world_matrix())
+        values = batch_ops.as_matrices(world_matrix)[0] @ values
+
+    combined_matrix = math_backend.BACKEND.matrix(values)
 
     return combined_matrix
 
@@ -295,22 +280,9 @@ def build_matrix_from_vectors(translate=(0,0,0),xAxis=(1,0,0),yAxis=(0,1,0),zAxi
 
     """
 
-    # Create transformation matrix from input vectors
-    matrix = om.MMatrix()
-    om.MScriptUtil.setDoubleArray(matrix[0], 0, xAxis[0])
-    om.MScriptUtil.setDoubleArray(matrix[0], 1, xAxis[1])
-    om.MScriptUtil.setDoubleArray(matrix[0], 2, xAxis[2])
-    om.MScriptUtil.setDoubleArray(matrix[1], 0, yAxis[0])
-    om.MScriptUtil.setDoubleArray(matrix[1], 1, yAxis[1])
-    om.MScriptUtil.setDoubleArray(matrix[1], 2, yAxis[2])
-    om.MScriptUtil.setDoubleArray(matrix[2], 0, zAxis[0])
-    om.MScriptUtil.setDoubleArray(matrix[2], 1, zAxis[1])
-    om.MScriptUtil.setDoubleArray(matrix[2], 2, zAxis[2])
-    om.MScriptUtil.setDoubleArray(matrix[3], 0, translate[0])
-    om.MScriptUtil.setDoubleArray(matrix[3], 1, translate[1])
-    om.MScriptUtil.setDoubleArray(matrix[3], 2, translate[2])
+    values = batch_ops.build_matrices_from_vectors(translate=translate, x_axis=xAxis, y_axis=yAxis, z_axis=zAxis)[0]
 
-    return matrix
+    return math_backend.BACKEND.matrix(values)
 
 
 def buildRotation(aim_vector, up_vector=(0, 1, 0), aim_axis='x', up_axis='y'):
@@ -326,56 +298,7 @@ def buildRotation(aim_vector, up_vector=(0, 1, 0), aim_axis='x', up_axis='y'):
 
     """
 
-    # Check negative axis
-    negate_aim_axis = False
-    negate_up_vector = False
-    if aim_axis[0] == '-':
-        aim_axis = aim_axis[1]
-        negate_aim_axis = True
-    if up_axis[0] == '-':
-        up_axis = up_axis[1]
-        negate_up_vector = True
-
-    # Check valid axis
-    axis_list = ['x', 'y', 'z']
-
-    if not axis_list.count(aim_axis):
-        raise Exception('invalid aim axis')
-    if not axis_list.count(up_axis):
-        raise Exception('invalid up axis')
-    if aim_axis == up_axis:
-        raise Exception('aim and up axis are not unique.')
-
-    # calculate cross axis
-    axis_list.remove(aim_axis)
-    axis_list.remove(up_axis)
-    cross_axis = axis_list[0]
-
-    aim_vector = normalise_vector(aim_vector)
-    if negate_aim_axis:
-        aim_vector = (-aim_vector[0], -aim_vector[1], -aim_vector[2])
-
-    up_vector = normalise_vector(up_vector)
-    if negate_up_vector:
-        up_vector = (-up_vector[0], -up_vector[1], -up_vector[2])
-
-    # Get cross product vector
-    cross_vector = (0, 0, 0)
-
-    if (aim_axis == 'x' and up_axis == 'z') or (aim_axis == 'z' and up_axis == 'y'):
-        cross_vector = cross_product(up_vector, aim_vector)
-    else:
-        cross_vector = cross_product(aim_vector, up_vector)
-    # Recalculate upVector (orthogonalize)
-    if (aim_axis == 'x' and up_axis == 'z') or (aim_axis == 'z' and up_axis == 'y'):
-        up_vector = cross_product(aim_vector, cross_vector)
-    else:
-        up_vector = cross_product(cross_vector, aim_vector)
-
-    # Build axis dictionary
-    axis_dict = {aim_axis: aim_vector, up_axis: up_vector, cross_axis: cross_vector}
-    # Build rotation matrix
-    mat = build_matrix_from_vectors(xAxis=axis_dict['x'], yAxis=axis_dict['y'], zAxis=axis_dict['z'])
+    values = batch_ops.aim_rotations(aim_vector, up_vectors=up_vector, aim_axis=aim_axis, up_axis=up_axis)[0]
 
     # Return rotation matrix
-    return mat
\ No newline at end of file
+    return math_backend.BACKEND.matrix(values)
@@ -0,0 +1,316 @@
+"""
+Namespace scoped index of the scene's transforms.
+
+Walking the DAG with MItDag for every namespace query gets slow in large scenes. SceneIndex does one traversal, maps
+namespace -> short name -> MObjectHandle and keeps itself current through node added / removed / renamed callbacks,
+so a query only costs the size of its result.
+"""
+
+import fnmatch
+
+import maya.api.OpenMaya as om2
+
+
+_WILDCARDS = ("*", "?", "[")
+
+
+def _split_name(name):
+    """
+    Split a node name ("rigdef_1:arm:joint0") into (namespace, short name). Root namespace is "".
+    """
+
+    namespace, _, short_name = name.lstrip(":").rpartition(":")
+    return namespace, short_name
+
+
+def _segment_runs(namespace):
+    """
+    Every run of whole segments in a namespace, "a:b:c" -> "a", "b", "c", "a:b", "b:c", "a:b:c".
+    """
+
+    segments = namespace.split(":")
+    return {":".join(segments[start:stop])
+            for start in range(len(segments)) for stop in range(start + 1, len(segments) + 1)}
+
+
+class SceneIndex:
+    """
+    Maps namespace -> short name -> {hash: MObjectHandle} for every transform in the scene, plus the lookup tables
+    that turn namespace and name queries into dictionary hits:
+        _segments: run of namespace segments ("Guides:arm") -> namespaces containing it.
+        _names: short name -> namespaces holding a transform of that name.
+    """
+
+    def __init__(self, track=True):
+        self._namespaces = {}
+        self._segments = {}
+        self._names = {}
+        self._keys = {}
+        self._callback_ids = []
+        self.dirty = True
+
+        if track:
+            self.start_tracking()
+
+    def build(self):
+        """
+        (Re)build the index with a single DAG traversal.
+        :return: None
+        """
+
+        self._namespaces = {}
+        self._segments = {}
+        self._names = {}
+        self._keys = {}
+
+        dag_iter = om2.MItDag(om2.MItDag.kDepthFirst, om2.MFn.kTransform)
+        while not dag_iter.isDone():
+            self._add(dag_iter.currentItem())
+            dag_iter.next()
+
+        self.dirty = False
+
+    def invalidate(self):
+        """
+        Drop the index, the next query rebuilds it. Used after edits the callbacks can't describe e.g. namespace
+        renames.
+        :return: None
+        """
+
+        self.dirty = True
+
+    def _add(self, mobject):
+        handle = om2.MObjectHandle(mobject)
+        key = handle.hashCode()
+        self._remove_key(key)
+
+        namespace, short_name = _split_name(om2.MFnDependencyNode(mobject).name())
+        if namespace not in self._namespaces:
+            self._namespaces[namespace] = {}
+            for run in _segment_runs(namespace) if namespace else ():
+                self._segments.setdefault(run, set()).add(namespace)
+
+        self._namespaces[namespace].setdefault(short_name, {})[key] = handle
+        self._names.setdefault(short_name, {}).setdefault(namespace, 0)
+        self._names[short_name][namespace] += 1
+        self._keys[key] = (namespace, short_name)
+
+    def _remove_key(self, key):
+        namespace, short_name = self._keys.pop(key, (None, None))
+        if namespace is None:
+            return
+
+        items = self._namespaces[namespace]
+        handles = items[short_name]
+        handles.pop(key, None)
+        if not handles:
+            del items[short_name]
+
+        counts = self._names[short_name]
+        counts[namespace] -= 1
+        if not counts[namespace]:
+            del counts[namespace]
+            if not counts:
+                del self._names[short_name]
+
+        if not items:
+            del self._namespaces[namespace]
+            for run in _segment_runs(namespace) if namespace else ():
+                self._segments[run].discard(namespace)
+                if not self._segments[run]:
+                    del self._segments[run]
+
+    # callbacks
+    def _node_added(self, mobject, *args):
+        if not self.dirty and mobject.hasFn(om2.MFn.kTransform):
+            self._add(mobject)
+
+    def _node_removed(self, mobject, *args):
+        if not self.dirty:
+            self._remove_key(om2.MObjectHandle(mobject).hashCode())
+
+    def _name_changed(self, mobject, previous_name, *args):
+        if not self.dirty and mobject.hasFn(om2.MFn.kTransform):
+            self._add(mobject)
+
+    def _scene_changed(self, *args):
+        self.dirty = True
+
+    def start_tracking(self):
+        """
+        Register the callbacks that keep the index current. A namespace rename changes every name below it without
+        telling us about each node, so it invalidates the index instead.
+        :return: None
+        """
+
+        if self._callback_ids:
+            return
+
+        self._callback_ids = [
+            om2.MDGMessage.addNodeAddedCallback(self._node_added, "dagNode"),
+            om2.MDGMessage.addNodeRemovedCallback(self._node_removed, "dagNode"),
+            om2.MNodeMessage.addNameChangedCallback(om2.MObject(), self._name_changed),
+            om2.MNamespaceMessage.addNamespaceRenamedCallback(self._scene_changed),
+            om2.MSceneMessage.addCallback(om2.MSceneMessage.kAfterNew, self._scene_changed),
+            om2.MSceneMessage.addCallback(om2.MSceneMessage.kAfterOpen, self._scene_changed),
+        ]
+
+    def stop_tracking(self):
+        """
+        Remove our callbacks. The index is marked dirty as it can no longer be trusted.
+        :return: None
+        """
+
+        if self._callback_ids:
+            om2.MMessage.removeCallbacks(self._callback_ids)
+        self._callback_ids = []
+        self.dirty = True
+
+    @property
+    def tracking(self):
+        """
+        :return: True while our callbacks are registered.
+        """
+
+        return bool(self._callback_ids)
+
+    def namespaces(self):
+        """
+        :return: list of namespaces that currently hold transforms.
+        """
+
+        if self.dirty:
+            self.build()
+
+        return list(self._namespaces)
+
+    def _matching_namespaces(self, namespace, recursive):
+        namespace = namespace.strip(":")
+
+        if any(char in namespace for char in _WILDCARDS):
+            matched = [ns for ns in self._namespaces if fnmatch.fnmatchcase(ns, namespace)]
+            if recursive:
+                matched += [ns for ns in self._namespaces
+                            if any(ns.startswith(match + ":") for match in matched)]
+            return list(dict.fromkeys(matched))
+
+        if not recursive:
+            return [namespace] if namespace in self._namespaces else []
+
+        return [ns for ns in self._segments.get(namespace, ()) if ns == namespace or ns.startswith(namespace + ":")]
+
+    def _collect(self, namespaces, accept, short_names=None):
+        found_objects = {}
+        stale = False
+
+        for namespace in namespaces:
+            items = self._namespaces.get(namespace, {})
+            for short_name in items if short_names is None else short_names:
+                if short_name not in items or not accept(namespace, short_name):
+                    continue
+
+                for handle in list(items[short_name].values()):
+                    if not handle.isValid():
+                        stale = True
+                        continue
+
+                    mobject = handle.object()
+                    found_objects[om2.MDagPath.getAPathTo(mobject).fullPathName()] = mobject
+
+        return found_objects, stale
+
+    def _query(self, namespaces_fn, accept, short_names_fn=lambda: None):
+        # the lookups are functions, a rebuild replaces the tables they read.
+        if self.dirty:
+            self.build()
+
+        found_objects, stale = self._collect(namespaces_fn(), accept, short_names_fn())
+        if stale:  # something slipped past the callbacks, rebuild once.
+            self.build()
+            found_objects, stale = self._collect(namespaces_fn(), accept, short_names_fn())
+
+        return found_objects
+
+    def find(self, namespace, pattern=None, recursive=False):
+        """
+        Transforms in an exact namespace (or namespaces matching a glob e.g. "Guides:*:arm").
+        :param namespace: namespace or namespace glob, leading ":" optional.
+        :param pattern: optional glob the short name must match e.g. "joint*".
+        :param recursive: include child namespaces.
+        :return: dictionary of {path: object} pairs.
+        """
+
+        def accept(ns, short_name):
+            return pattern is None or fnmatch.fnmatchcase(short_name, pattern)
+
+        return self._query(lambda: self._matching_namespaces(namespace, recursive), accept)
+
+    def search(self, ns, match=None):
+        """
+        Search kept compatible with autorig_utils.search_ns_items(): every namespace containing ns as whole segments
+        ("arm" finds "Guides:arm" and "Guides:arm:twist", not "Guides:farm"), optionally filtered to names containing
+        match. The namespaces come from one _segments lookup.
+        :param ns: namespace, or run of namespace segments.
+        :param match: string contained in the node name.
+        :return: dictionary of {path: object} pairs.
+        """
+
+        ns = ns.strip(":")
+
+        def accept(namespace, short_name):
+            return not match or match in f"{namespace}:{short_name}"
+
+        return self._query(lambda: self._segments.get(ns, ()), accept)
+
+    def find_name(self, match):
+        """
+        Transforms whose short name contains match, in any namespace. Scans the distinct short names, not the scene.
+        :param match: string to match.
+        :return: dictionary of {path: object} pairs.
+        """
+
+        def short_names():
+            return [name for name in self._names if match in name]
+
+        def namespaces():
+            return {namespace for name in short_names() for namespace in self._names[name]}
+
+        return self._query(namespaces, lambda namespace, short_name: True, short_names)
+
+
+_ACTIVE_INDEX = None
+
+
+def get_index():
+    """
+    Shared, callback tracked index. Built lazily on first query.
+    :return: SceneIndex()
+    """
+
+    global _ACTIVE_INDEX
+    if _ACTIVE_INDEX is None:
+        _ACTIVE_INDEX = SceneIndex(track=True)
+
+    return _ACTIVE_INDEX
+
+
+def release_index():
+    """
+    Remove the shared index and its callbacks.
+    :return: None
+    """
+
+    global _ACTIVE_INDEX
+    if _ACTIVE_INDEX is not None:
+        _ACTIVE_INDEX.stop_tracking()
+    _ACTIVE_INDEX = None
+
+
+def invalidate():
+    """
+    Mark the shared index dirty, if there is one.
+    :return: None
+    """
+
+    if _ACTIVE_INDEX is not None:
+        _ACTIVE_INDEX.invalidate()
@@ -0,0 +1,196 @@
+"""
+Opt-in span tracing of the build, exported as Chrome trace JSON (chrome://tracing, Perfetto, speedscope).
+
+Set RIGGING_TOOL_TRACE before the build modules are imported to turn it on, either to the output path or to "1" for
+a file in the temp directory. "{pid}" in the path is replaced by the process id, so pooled workers don't overwrite
+each other. The trace is written when the process exits, or on demand with export():
+
+    RIGGING_TOOL_TRACE=/tmp/build_{pid}.json mayapy scripts/batch_build.py jobs.json
+
+    from Util import tracing
+    tracing.export("C:/temp/build.json")
+
+Functions are instrumented with @traced, spans nest per thread. annotate() adds counts (guides, joints, ...) to the
+innermost open span. With tracing off @traced returns the function untouched and annotate() / span() return
+straight away, so the instrumentation costs nothing.
+"""
+
+import os
+import sys
+import json
+import time
+import atexit
+import tempfile
+import threading
+import functools
+
+
+TRACE_ENV_VAR = "RIGGING_TOOL_TRACE"
+
+_setting = os.environ.get(TRACE_ENV_VAR, "").strip()
+ENABLED = _setting.lower() not in ("", "0", "false", "off")
+PATH = (os.path.join(tempfile.gettempdir(), "rigging_tool_trace_{pid}.json")
+        if _setting.lower() in ("1", "true", "on") else _setting)
+
+_events = []  # (name, category, start, duration, thread id, args)
+_local = threading.local()
+
+
+class _Span:
+    """
+    A timed region, recorded as one complete ("X") event when it closes.
+    """
+
+    __slots__ = ("name", "category", "args", "start")
+
+    def __init__(self, name, category, args):
+        self.name = name
+        self.category = category
+        self.args = args
+        self.start = 0.0
+
+    def __enter__(self):
+        stack = getattr(_local, "stack", None)
+        if stack is None:
+            stack = _local.stack = []
+        stack.append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        duration = time.perf_counter() - self.start
+        _local.stack.pop()
+        if exc_type is not None:
+            self.args["error"] = f"{exc_type.__name__}: {exc_value}"
+        _events.append((self.name, self.category, self.start, duration, threading.get_ident(), self.args))
+
+
+class _NullSpan:
+    """
+    Returned by span() while tracing is off.
+    """
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return None
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def span(name, category="rigging_tool", **args):
+    """
+    Context manager timing a block as a span of its own.
+    :param name: span name.
+    :param category: trace category.
+    :param args: values shown with the span.
+    :return: span context manager.
+    """
+
+    if not ENABLED:
+        return _NULL_SPAN
+
+    return _Span(name, category, args)
+
+
+def annotate(**args):
+    """
+    Add values (e.g. guides=12, joints=12) to the innermost open span of this thread.
+    :return: None
+    """
+
+    if not ENABLED:
+        return
+
+    stack = getattr(_local, "stack", None)
+    if stack:
+        stack[-1].args.update(args)
+
+
+def traced(func=None, name=None, category=None):
+    """
+    Decorator recording every call of a function as a span. Usable bare (@traced) or with arguments.
+    :param func: decorated function.
+    :param name: span name, the function's qualified name by default.
+    :param category: trace category, the function's module by default.
+    :return: the function, wrapped only while tracing is on.
+    """
+
+    if func is None:
+        return functools.partial(traced, name=name, category=category)
+
+    if not ENABLED:
+        return func
+
+    span_name = name or func.__qualname__
+    span_category = category or func.__module__.rpartition(".")[2]
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with _Span(span_name, span_category, {}):
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
+# export
+def trace_events():
+    """
+    :return: recorded spans as a list of Chrome trace event dictionaries, timestamps in microseconds.
+    """
+
+    pid = os.getpid()
+    thread_ids = {}
+    events = []
+    for name, category, start, duration, thread, args in sorted(_events, key=lambda event: event[2]):
+        tid = thread_ids.setdefault(thread, len(thread_ids))
+        events.append({"name": name, "cat": category, "ph": "X", "ts": start * 1e6, "dur": duration * 1e6,
+                       "pid": pid, "tid": tid, "args": args})
+
+    main_thread = threading.main_thread().ident
+    metadata = [{"name": "process_name", "ph": "M", "pid": pid, "tid": 0, "args": {"name": "rigging_tool"}}]
+    for thread, tid in thread_ids.items():
+        thread_name = "main" if thread == main_thread else f"worker {tid}"
+        metadata.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": thread_name}})
+
+    return metadata + events
+
+
+def export(path=None):
+    """
+    Write the recorded spans as Chrome trace JSON.
+    :param path: output file, RIGGING_TOOL_TRACE by default. "{pid}" is replaced by the process id.
+    :return: path written, None if there was nothing to write.
+    """
+
+    path = path or PATH
+    if not path or not _events:
+        return None
+
+    path = os.path.abspath(path.replace("{pid}", str(os.getpid())))
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    with open(path, "w") as trace_file:
+        json.dump({"traceEvents": trace_events(), "displayTimeUnit": "ms",
+                   "otherData": {"python": sys.version.split()[0], "argv": sys.argv}}, trace_file)
+
+    return path
+
+
+def clear():
+    """
+    Drop the spans recorded so far.
+    :return: None
+    """
+
+    del _events[:]
+
+
+if ENABLED:
+    atexit.register(export)
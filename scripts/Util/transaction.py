@@ -0,0 +1,279 @@
+"""
+Build transaction: one undo chunk per build, optional refresh / undo suspension and memoized existence queries.
+
+    with transaction.BuildTransaction("build_skeleton"):
+        ...
+
+Nested transactions join the outermost one, so build entry points can call each other freely. API modifiers go
+through apply() / record(), which put them on the undo queue (see undo), so the chunk holds the om2 edits too: one
+ctrl+z removes the whole build. On failure the chunk is undone so a failed build leaves the scene untouched.
+"""
+
+import functools
+
+from maya import cmds
+import maya.api.OpenMaya as om2
+
+try:
+    from . import undo as undo_queue
+except Exception as e:
+    import sys
+    sys.path.append("C:/Users/Thomas Killick/Documents/maya/modules/rigging_tool")
+    from scripts.Util import undo as undo_queue
+
+
+_ACTIVE = None
+
+
+class BuildTransaction:
+    """
+    Context manager wrapping a build in a single undo chunk.
+    """
+
+    def __init__(self, name="rigging_tool_build", suspend_refresh=True, record_undo=True, rollback=True):
+        """
+        :param name: undo chunk name.
+        :param suspend_refresh: suspend viewport refresh while building.
+        :param record_undo: if False undo recording is suspended (faster, but only modifiers roll back and the build
+        can't be undone afterwards).
+        :param rollback: undo everything done inside the transaction when it exits with an exception.
+        """
+
+        self.name = name
+        self.suspend_refresh = suspend_refresh
+        self.record_undo = record_undo
+        self.rollback = rollback
+
+        self.modifiers = []  # applied modifiers that aren't on the undo queue, undone by hand on rollback.
+        self._objects = {}
+        self._namespaces = {}
+        self._nodes = {}
+        self._callback_ids = []
+        self._outer = None
+        self._undo_state = None
+        self._marked = False
+        self._refresh_suspended = False
+
+    def __enter__(self):
+        global _ACTIVE
+        if _ACTIVE is not None:  # join the outer transaction.
+            self._outer = _ACTIVE
+            return _ACTIVE
+
+        _ACTIVE = self
+
+        self._undo_state = cmds.undoInfo(q=True, state=True)
+        if self.record_undo:
+            cmds.undoInfo(openChunk=True, chunkName=self.name)
+            # the chunk holds at least this entry, so undoing it on failure never undoes an earlier action.
+            self._marked = bool(self._undo_state) and undo_queue.mark()
+        elif self._undo_state:
+            cmds.undoInfo(stateWithoutFlush=False)
+
+        if self.suspend_refresh and not cmds.about(batch=True):
+            cmds.refresh(suspend=True)
+            self._refresh_suspended = True
+
+        # any node created, deleted or renamed makes memoized object queries untrustworthy.
+        self._callback_ids = [
+            om2.MDGMessage.addNodeAddedCallback(self._clear_objects, "dependNode"),
+            om2.MDGMessage.addNodeRemovedCallback(self._clear_objects, "dependNode"),
+            om2.MNodeMessage.addNameChangedCallback(om2.MObject(), self._clear_objects),
+        ]
+
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        global _ACTIVE
+        if self._outer is not None:
+            self._outer = None
+            return False
+
+        try:
+            if self._callback_ids:
+                om2.MMessage.removeCallbacks(self._callback_ids)
+            self._callback_ids = []
+
+            if self._refresh_suspended:
+                cmds.refresh(suspend=False)
+                self._refresh_suspended = False
+
+            if self.record_undo:
+                cmds.undoInfo(closeChunk=True)
+            elif self._undo_state:
+                cmds.undoInfo(stateWithoutFlush=True)
+
+            if exc_type is not None and self.rollback:
+                self.undo()
+        finally:
+            self.invalidate()
+            _ACTIVE = None
+
+        return False
+
+    def undo(self):
+        """
+        Revert the modifiers that aren't on the undo queue (last first), then the undo chunk. The chunk is only undone
+        when it's known to hold this transaction's edits (see undo.mark()), otherwise cmds edits are left in place
+        rather than risk undoing the user's previous action.
+        :return: None
+        """
+
+        for modifier in reversed(self.modifiers):
+            modifier.undoIt()
+        self.modifiers = []
+
+        if self._marked:
+            cmds.undo()
+        self._marked = False
+
+    def record(self, modifier):
+        """
+        Put an applied om2 modifier on the undo queue, or keep it to roll back by hand when it can't be queued.
+        :param modifier: om2.MDGModifier() / om2.MDagModifier()
+        :return: modifier
+        """
+
+        if not undo_queue.push(modifier):
+            self.modifiers.append(modifier)
+        return modifier
+
+    def _clear_objects(self, *args):
+        self._objects.clear()
+
+    def obj_exists(self, name):
+        if name not in self._objects:
+            self._objects[name] = cmds.objExists(name)
+        return self._objects[name]
+
+    def namespace_exists(self, namespace):
+        if not namespace.startswith(":"):  # relative to the current namespace, don't memoize.
+            return cmds.namespace(ex=namespace)
+        if namespace not in self._namespaces:
+            self._namespaces[namespace] = cmds.namespace(ex=namespace)
+        return self._namespaces[namespace]
+
+    def node(self, name, resolve):
+        """
+        Memoized name -> handles.Node() lookup. Handles survive renames, so a cached one is kept for as long as it is
+        valid and still goes by name, whatever else changes in the scene.
+        :param name: node name.
+        :param resolve: callable resolving name to a Node().
+        :return: Node()
+        """
+
+        cached = self._nodes.get(name)
+        if cached is None or not cached.is_named(name):
+            cached = self._nodes[name] = resolve(name)
+        return cached
+
+    def invalidate(self, objects=True, namespaces=True):
+        """
+        Drop memoized queries. Namespace edits must call this, node edits are picked up by callbacks.
+        :param objects: drop object existence results.
+        :param namespaces: drop namespace existence results.
+        :return: None
+        """
+
+        if objects:
+            self._objects.clear()
+        if namespaces:
+            self._namespaces.clear()
+
+
+def active():
+    """
+    :return: the running BuildTransaction() or None.
+    """
+
+    return _ACTIVE
+
+
+def obj_exists(name):
+    """
+    cmds.objExists(), memoized while a transaction is running.
+    :param name: object name.
+    :return: bool
+    """
+
+    if _ACTIVE is None:
+        return cmds.objExists(name)
+
+    return _ACTIVE.obj_exists(name)
+
+
+def namespace_exists(namespace):
+    """
+    cmds.namespace(ex=...), memoized while a transaction is running. Only absolute paths (":Guides:rigdef_1") are
+    memoized as relative ones depend on the current namespace.
+    :param namespace: namespace path.
+    :return: bool
+    """
+
+    if _ACTIVE is None:
+        return cmds.namespace(ex=namespace)
+
+    return _ACTIVE.namespace_exists(namespace)
+
+
+def cached_node(name, resolve):
+    """
+    Resolve a node name once per running transaction, see BuildTransaction.node().
+    :param name: node name.
+    :param resolve: callable resolving name to a Node().
+    :return: Node()
+    """
+
+    if _ACTIVE is None:
+        return resolve(name)
+
+    return _ACTIVE.node(name, resolve)
+
+
+def invalidate(objects=True, namespaces=True):
+    """
+    Invalidate the running transaction's memoized queries, if any.
+    :return: None
+    """
+
+    if _ACTIVE is not None:
+        _ACTIVE.invalidate(objects=objects, namespaces=namespaces)
+
+
+def record(modifier):
+    """
+    Make an applied om2 modifier undoable: it goes on the undo queue, inside the running transaction's chunk if any.
+    :param modifier: om2.MDGModifier() / om2.MDagModifier()
+    :return: modifier
+    """
+
+    if _ACTIVE is not None:
+        _ACTIVE.record(modifier)
+    else:
+        undo_queue.push(modifier)
+
+    return modifier
+
+
+def apply(modifier):
+    """
+    Apply an om2 modifier as an undoable edit, see record().
+    :param modifier: om2.MDGModifier() / om2.MDagModifier()
+    :return: modifier
+    """
+
+    modifier.doIt()
+    return record(modifier)
+
+
+def transactional(func):
+    """
+    Decorator running a build entry point inside a BuildTransaction named after it.
+    """
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with BuildTransaction(name=func.__name__):
+            return func(*args, **kwargs)
+
+    return wrapper
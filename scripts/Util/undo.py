@@ -0,0 +1,116 @@
+"""
+Undoable om2 modifiers.
+
+Modifiers applied from scripts never reach Maya's undo queue, so ctrl+z wouldn't remove what a build created through
+them. The rigging_tool_undo plug-in (plug-ins/rigging_tool_undo.py, loaded on first use) registers the
+riggingToolModifier command: push() hands it an applied modifier and the command becomes that modifier's undo queue
+entry, its undo / redo call the modifier's undoIt() / doIt(). Modifier edits are then undone in order with the cmds
+edits around them, inside the same undo chunk.
+
+    modifier = om2.MDagModifier()
+    ...
+    undo.apply(modifier)  # doIt(), on the undo queue.
+
+When the plug-in can't be loaded, or undo is off, push() returns False and the caller has to keep the modifier to
+undo it itself (see transaction.BuildTransaction).
+"""
+
+import os
+
+from maya import cmds
+import maya.api.OpenMaya as om2
+
+
+COMMAND_NAME = "riggingToolModifier"
+PLUGIN_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "plug-ins",
+                           "rigging_tool_undo.py")
+
+_pending = []  # applied modifiers waiting to be taken over by the command.
+_available = None
+
+
+class ModifierCommand(om2.MPxCommand):
+    """
+    Undo queue entry of one applied modifier.
+    """
+
+    def __init__(self):
+        om2.MPxCommand.__init__(self)
+        self.modifier = None
+
+    @staticmethod
+    def creator():
+        return ModifierCommand()
+
+    def doIt(self, args):
+        # the modifier was applied already, the command only takes it over.
+        self.modifier = _pending.pop() if _pending else None
+
+    def undoIt(self):
+        self.modifier.undoIt()
+
+    def redoIt(self):
+        self.modifier.doIt()
+
+    def isUndoable(self):
+        return self.modifier is not None
+
+
+def available():
+    """
+    Load the plug-in once.
+    :return: True if the riggingToolModifier command is available.
+    """
+
+    global _available
+    if _available is None:
+        try:
+            if not cmds.pluginInfo(PLUGIN_PATH, q=True, loaded=True):
+                cmds.loadPlugin(PLUGIN_PATH, quiet=True)
+            _available = hasattr(cmds, COMMAND_NAME)
+        except RuntimeError as e:
+            print(f"rigging_tool: {e}, om2 edits won't be undoable.")
+            _available = False
+
+    return _available
+
+
+def push(modifier):
+    """
+    Put an applied modifier on the undo queue (in the open undo chunk, if any).
+    :param modifier: om2.MDGModifier() / om2.MDagModifier(), already applied.
+    :return: True if it was queued, False if undo is off or the plug-in isn't available.
+    """
+
+    if not cmds.undoInfo(q=True, state=True) or not available():
+        return False
+
+    _pending.append(modifier)
+    getattr(cmds, COMMAND_NAME)()
+
+    if _pending:  # the plug-in was loaded against another copy of this module, nothing was queued.
+        _pending.pop()
+        return False
+
+    return True
+
+
+def apply(modifier):
+    """
+    Apply a modifier as an undoable edit.
+    :param modifier: om2.MDGModifier() / om2.MDagModifier()
+    :return: True if it was queued, see push().
+    """
+
+    modifier.doIt()
+    return push(modifier)
+
+
+def mark():
+    """
+    Put an empty entry on the undo queue, so the open undo chunk is never empty and undoing it can't reach an
+    earlier, unrelated action.
+    :return: True if it was queued.
+    """
+
+    return push(om2.MDGModifier())
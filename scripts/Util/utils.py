@@ -1,5 +1,8 @@
-import maya.standalone 
-import maya.cmds as cm
+try:
+    import maya.standalone
+    import maya.cmds as cm
+except ImportError:  # headless: definition handling works without Maya.
+    cm = None
 
 import json
 import types
@@ -7,6 +10,7 @@ import os
 import re
 
 from . import data
+from . import definition_cache
 
 CACHE_FOLDER = os.path.join(__file__, "../../../cache")
 
@@ -67,24 +71,116 @@ def increment_string(incrementing_string):
         raise ValueError("provided string does not contain num character.")
 
 
-def import_saved_skeleton():
-    
+_STANDALONE_INITIALIZED = False
+
+
+def initialize_standalone():
+    """
+    Initialize maya.standalone once per process (mayapy). Safe to call again, or from inside a Maya session.
+    Returns(bool): True if this call initialized it.
+
+    """
+
+    global _STANDALONE_INITIALIZED
+    if _STANDALONE_INITIALIZED:
+        return False
+
+    if cm is None:
+        raise Exception("maya.standalone is not available, run with mayapy.")
+
+    try:
+        if cm.about(batch=True) is not None:  # already running inside Maya.
+            _STANDALONE_INITIALIZED = True
+            return False
+    except AttributeError:  # cmds isn't populated until standalone is initialized.
+        pass
+
     maya.standalone.initialize(name="python")
-    path_to_file = ""
-    if cm.exists(path_to_file):
-        print(f"found file @ {path_to_file}")
-        cm.file(path_to_file, open=True, force=True)
-        cm.file(path_to_file, i=True)
-        """
-        We can check later the file name to know where it's at in the process.
-        """
-        cm.file(rename="saved_skeleton")
-        cm.file(save=True, type="mayaBinary")
-    
-    else: 
+    _STANDALONE_INITIALIZED = True
+
+    return True
+
+
+def uninitialize_standalone():
+    """
+    Shut maya.standalone down again, see initialize_standalone().
+    Returns: None
+
+    """
+
+    global _STANDALONE_INITIALIZED
+    if _STANDALONE_INITIALIZED and cm is not None:
+        maya.standalone.uninitialize()
+    _STANDALONE_INITIALIZED = False
+
+
+def import_saved_skeleton(path_to_file, save_name="saved_skeleton"):
+    """
+    Open a saved skeleton file headless and save it back out as a Maya binary.
+    Args:
+        path_to_file(str): file to open.
+        save_name(str): name to save as.
+
+    Returns(bool): True if the file was found.
+
+    """
+
+    initialize_standalone()
+
+    if not os.path.exists(path_to_file):
         print(f"failed to confirm existance of save file @{path_to_file}")
+        return False
+
+    print(f"found file @ {path_to_file}")
+    cm.file(path_to_file, open=True, force=True)
+    cm.file(path_to_file, i=True)
+    """
+    We can check later the file name to know where it's at in the process.
+    """
+    cm.file(rename=save_name)
+    cm.file(save=True, type="mayaBinary")
+
+    return True
+
+
+def sort_by_parent(guide_values):
+    """
+    Topologically sort a guide type's entries so every guide comes after its "parent". Dictionary order is kept
+    otherwise.
+    Args:
+        guide_values(dict): {guide_name: {..., "parent": guide_name}} e.g. guide_data()["guides"]["biped"]["limb"]["arm"]
+
+    Returns(list): guide names, parents first.
+
+    """
+
+    ordered = []
+    state = {}  # 1: visiting, 2: done
+
+    for guide in guide_values:
+        stack = [guide]
+        while stack:
+            current = stack[-1]
+            if state.get(current) == 2:
+                stack.pop()
+                continue
+
+            parent = guide_values[current].get("parent")
+            if parent is not None and state.get(parent) != 2:
+                if parent not in guide_values:
+                    raise Exception(f"'{parent}' (parent of {current}) not found in guide data.")
+                if state.get(parent) == 1:
+                    raise Exception(f"Cyclic parenting found at guide: {current}")
+                state[current] = 1
+                stack.append(parent)
+                continue
+
+            state[current] = 2
+            ordered.append(current)
+            stack.pop()
+
+    return ordered
 
-    maya.standalone.unitialize()
 
 def flatten_list(_list):
     """_summary_
@@ -181,40 +277,45 @@ def read_definition(_json, *guides, def_type="biped"):
     return guide_data
 
 
+def load_definition(path):
+    """
+    Read a definition json from an explicit path (anywhere on disk, not only the cache folder).
+    Parsed definitions are cached (see definition_cache) until the file changes, so they come back read-only.
+    Args:
+        path(str): path to a .json definition.
+
+    Returns(dict): frozen definition, definition_cache.thaw() for an editable copy.
+
+    """
+
+    return definition_cache.load(path)
+
+
 def open_definition(def_name):
     """
-    Generic read from json def.
+    Generic read from json def. The cache folder is indexed and definitions are parsed once until their file
+    changes, see definition_cache. A default definition is written when none matches.
     Args:
         def_name (str): name of definition file to find.
 
     Returns:
-        (dict)
+        (dict): frozen definition, definition_cache.thaw() for an editable copy.
         OR
-        (Bool)
+        (None)
 
     """
 
     json_file_dir = check_and_return_cache_folder()
 
-    if os.path.exists(json_file_dir):
-        print(os.listdir(json_file_dir))
-
-    for file in os.listdir(json_file_dir):
-        if def_name in file:
-            with open(os.path.join(json_file_dir, file), "r") as json_file:
-                loaded_json = json.load(json_file)
-                return loaded_json
-
-    generate_new_default_definition()
-
-    for file in os.listdir(json_file_dir):
-        if def_name in file:
-            with open(os.path.join(json_file_dir, file), "r") as json_file:
-                loaded_json = json.load(json_file)
-                return loaded_json
+    path = definition_cache.find(json_file_dir, def_name)
+    if path is None:
+        generate_new_default_definition(json_file_dir)
+        path = definition_cache.find(json_file_dir, def_name)
 
-    return
+    if path is None:
+        return None
 
+    return definition_cache.load(path)
 
 
 def generate_new_default_definition(directory=CACHE_FOLDER, filename="guides.json"):
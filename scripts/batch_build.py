@@ -0,0 +1,257 @@
+"""
+Headless batch build.
+
+Builds rigs from guide definitions and saves each one to its target file, fanned out over a pool of mayapy worker
+processes. Every worker initializes maya.standalone once and then keeps processing jobs, so the start-up cost is
+paid per worker instead of per rig.
+
+    mayapy batch_build.py jobs.json --workers 8 --report report.json
+
+jobs.json is a list of jobs:
+
+    [
+        {"definition": "cache/guides.json", "output": "out/hero.mb", "guides": ["arm", "leg"], "rigdef": "rigdef_1"},
+        ...
+    ]
+
+Only "definition" and "output" are required. Pairs can also be given on the command line:
+
+    mayapy batch_build.py --job cache/guides.json out/hero.mb --job cache/guides.json out/villain.ma
+
+The JSON report lists every job with its status, per-step timings and the error / traceback of failed jobs. Without
+--report it is printed to stdout, progress goes to stderr so the report can be piped:
+
+    mayapy batch_build.py jobs.json > report.json
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+import traceback
+
+try:
+    from Util import utils
+except Exception as e:
+    sys.path.append("C:/Users/Thomas Killick/Documents/maya/modules/rigging_tool")
+    from Util import utils
+
+
+DEFAULT_GUIDES = ["arm", "leg"]
+FILE_TYPES = {".mb": "mayaBinary", ".ma": "mayaAscii"}
+
+
+_WORKER_STARTUP = 0.0
+_WORKER_ERROR = None
+_WORKER_JOBS = 0
+
+
+def _init_worker():
+    """
+    Pool initializer: one maya.standalone per worker process. A failure is kept and reported by every job the
+    worker picks up, an exception here would make the pool respawn the worker forever.
+    """
+
+    global _WORKER_STARTUP, _WORKER_ERROR
+
+    start = time.perf_counter()
+    try:
+        utils.initialize_standalone()
+    except Exception as e:
+        _WORKER_ERROR = f"{type(e).__name__}: {e}"
+    _WORKER_STARTUP = time.perf_counter() - start
+
+
+def build_job(job, timings=None, new_scene=True):
+    """
+    Build one rig and save it when the job has an "output". Needs an initialized Maya.
+    :param job: job dictionary, see module docstring.
+    :param timings: dictionary filled with the time of every step.
+    :param new_scene: start from an empty scene.
+    :return: build.build_many() result of the job's rigdef.
+    """
+
+    from maya import cmds
+    import build  # imported here so the parent process never needs Maya.
+
+    timings = {} if timings is None else timings
+
+    def timed(step, func, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            timings[step] = time.perf_counter() - start
+
+    if new_scene:
+        timed("new_scene", cmds.file, new=True, force=True)
+
+    definition = timed("load", utils.load_definition, job["definition"])
+    guide_data = utils.read_definition(definition, *job.get("guides", DEFAULT_GUIDES))
+
+    rigdef = job.get("rigdef", "rigdef_1")
+    built = timed("build", build.build_many, [guide_data], rigdefs=[rigdef], executor="serial")[0]
+
+    if job.get("output"):
+        output = os.path.abspath(job["output"])
+        extension = os.path.splitext(output)[1].lower()
+        if extension not in FILE_TYPES:
+            raise Exception(f"Unsupported output type: {extension}, expected one of {list(FILE_TYPES)}")
+        if not os.path.isdir(os.path.dirname(output)):
+            os.makedirs(os.path.dirname(output))
+
+        cmds.file(rename=output)
+        timed("save", cmds.file, save=True, force=True, type=FILE_TYPES[extension])
+
+    return built
+
+
+def run_job(job):
+    """
+    Build one rig in a fresh scene and save it. Runs inside a worker.
+    :param job: job dictionary, see module docstring. "index" is added by run_jobs().
+    :return: report entry dictionary.
+    """
+
+    global _WORKER_JOBS
+    _WORKER_JOBS += 1
+
+    result = {
+        "index": job.get("index"),
+        "definition": job["definition"],
+        "output": job["output"],
+        "status": "ok",
+        "worker": os.getpid(),
+        "worker_job": _WORKER_JOBS,
+        "timings": {},
+    }
+    if _WORKER_JOBS == 1:
+        result["timings"]["startup"] = _WORKER_STARTUP
+
+    start = time.perf_counter()
+    try:
+        if _WORKER_ERROR:
+            raise Exception(f"Worker failed to start: {_WORKER_ERROR}")
+
+        build_job(job, result["timings"])
+
+    except Exception as e:
+        result["status"] = "failed"
+        result["error"] = f"{type(e).__name__}: {e}"
+        result["traceback"] = traceback.format_exc()
+
+    result["timings"]["total"] = time.perf_counter() - start
+
+    return result
+
+
+def _pool_context(mayapy=None):
+    """
+    Spawn context for the worker pool, pointed at mayapy when given. Otherwise the workers run the current
+    interpreter, so launch the CLI with mayapy.
+    """
+
+    context = multiprocessing.get_context("spawn")
+    if mayapy:
+        context.set_executable(mayapy)
+
+    return context
+
+
+def run_jobs(jobs, workers=None, mayapy=None):
+    """
+    Run jobs over a pool of warm mayapy workers.
+    :param jobs: list of job dictionaries.
+    :param workers: number of worker processes, defaults to the number of cores (never more than the job count).
+    :param mayapy: mayapy executable for the workers, defaults to the running interpreter.
+    :return: report dictionary.
+    """
+
+    jobs = [dict(job, index=i) for i, job in enumerate(jobs)]
+    for job in jobs:
+        missing = [key for key in ("definition", "output") if key not in job]
+        if missing:
+            raise Exception(f"Job {job['index']} is missing {missing}")
+
+    workers = max(1, min(workers or os.cpu_count() or 1, len(jobs) or 1))
+
+    start = time.perf_counter()
+    results = []
+    if jobs:
+        with _pool_context(mayapy).Pool(processes=workers, initializer=_init_worker) as pool:
+            for result in pool.imap_unordered(run_job, jobs, chunksize=1):
+                results.append(result)
+                print(f"[{len(results)}/{len(jobs)}] {result['status']}: {result['output']}", file=sys.stderr)
+
+    results.sort(key=lambda result: result["index"])
+    failed = [result for result in results if result["status"] != "ok"]
+
+    return {
+        "workers": workers,
+        "total_time": time.perf_counter() - start,
+        "job_count": len(results),
+        "failed_count": len(failed),
+        "jobs": results,
+    }
+
+
+def read_jobs(path):
+    """
+    :param path: jobs json, a list of jobs or {"jobs": [...]}
+    :return: list of job dictionaries.
+    """
+
+    with open(path, "r") as json_file:
+        jobs = json.load(json_file)
+
+    if isinstance(jobs, dict):
+        jobs = jobs.get("jobs", [])
+
+    # relative paths are relative to the jobs file.
+    root = os.path.dirname(os.path.abspath(path))
+    for job in jobs:
+        for key in ("definition", "output"):
+            if key in job and not os.path.isabs(job[key]):
+                job[key] = os.path.join(root, job[key])
+
+    return jobs
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Build and save rigs from guide definitions with mayapy workers.")
+    parser.add_argument("jobs", nargs="?", help="jobs json file.")
+    parser.add_argument("--job", nargs=2, action="append", default=[], metavar=("DEFINITION", "OUTPUT"),
+                        help="definition json and target file, can be repeated.")
+    parser.add_argument("--guides", nargs="+", default=DEFAULT_GUIDES,
+                        help="guide types to build for --job entries.")
+    parser.add_argument("--workers", type=int, default=None, help="number of worker processes.")
+    parser.add_argument("--mayapy", default=None, help="mayapy executable for the workers.")
+    parser.add_argument("--report", default=None, help="write the JSON report here instead of stdout.")
+
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    jobs = read_jobs(args.jobs) if args.jobs else []
+    jobs += [{"definition": definition, "output": output, "guides": args.guides} for definition, output in args.job]
+    if not jobs:
+        raise SystemExit("No jobs given.")
+
+    report = run_jobs(jobs, workers=args.workers, mayapy=args.mayapy)
+
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=4)
+        print(f"Report written to: {args.report}", file=sys.stderr)
+    else:
+        print(json.dumps(report, indent=4))
+
+    return 1 if report["failed_count"] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,419 @@
+"""
+Build pipeline benchmarks.
+
+Generates synthetic guide definitions (data.guide_data() schema) at growing sizes and times every build step
+separately: prep_scene, generate_guide_from_cache, build_skeleton, build_rig, search_ns_items and relocate_ns.
+
+    python benchmark.py                                   # in-memory fake Maya (Util.fake_maya)
+    mayapy benchmark.py --maya --sizes 10 100 1000        # real maya.standalone
+    python benchmark.py --sizes 10 100 --shapes deep --history benchmarks.json
+    python benchmark.py --sizes 100 1000 --executors 8 --workers 4   # serial / thread / process compute phase
+
+Two guide layouts are generated:
+    deep: chains of --depth guides, one chain per guide type.
+    wide: trees branching --branching ways, --type-size guides per guide type.
+
+Every run is appended to the history file (JSON) next to the regression thresholds it was checked against:
+
+    {
+        "thresholds": {"tolerance": 0.25, "min_delta": 0.005, "window": 5, "steps": {"build_rig": 0.5}},
+        "runs": [{"timestamp": ..., "backend": "fake", "results": {"deep": {"100": {"build_skeleton": 0.01, ...}}}}]
+    }
+
+A step regresses when it is slower than the best of the last "window" runs (same backend, shape and size) by more
+than its tolerance (relative) and min_delta (seconds). The exit code is 1 when anything regressed.
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+try:
+    from Util import utils
+except Exception as e:
+    sys.path.append("C:/Users/Thomas Killick/Documents/maya/modules/rigging_tool")
+    from Util import utils
+
+
+SIZES = (10, 100, 1000, 10000)
+SHAPES = ("deep", "wide")
+STEPS = ("prep_scene", "generate_guide_from_cache", "build_skeleton", "build_rig", "search_ns_items", "relocate_ns")
+EXECUTORS = ("serial", "thread", "process")
+
+DEFAULT_HISTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "benchmarks", "history.json")
+DEFAULT_THRESHOLDS = {
+    "tolerance": 0.25,  # relative slow down that counts as a regression.
+    "min_delta": 0.005,  # seconds, differences below this are noise.
+    "window": 5,  # number of previous runs the baseline is taken from.
+    "steps": {},  # per step tolerance overrides.
+}
+
+ROOT = "Guides"
+RIGDEF = "rigdef_1"
+SKELETON_ROOT = "skeleton_def"
+
+
+# definitions
+def synthetic_definition(guide_count, shape="deep", depth=100, branching=4, type_size=100):
+    """
+    Synthetic guide definition in the data.guide_data() schema.
+    :param guide_count: total number of guides.
+    :param shape: "deep" (chains of depth guides) or "wide" (trees branching ways).
+    :param depth: chain length of "deep" definitions, also the guides per guide type.
+    :param branching: children per guide of "wide" definitions.
+    :param type_size: guides per guide type of "wide" definitions.
+    :return: (definition dictionary, list of guide type names)
+    """
+
+    if shape not in SHAPES:
+        raise Exception(f"Unknown shape: {shape}, expected one of {SHAPES}")
+
+    per_type = max(1, depth if shape == "deep" else type_size)
+
+    limbs = {}
+    remaining = guide_count
+    while remaining > 0:
+        count = min(per_type, remaining)
+        # fixed width, so no guide type name contains another (namespace searches match substrings).
+        guide_type = f"{shape}{len(limbs):04d}"
+
+        guides = {}
+        for i in range(count):
+            if shape == "deep":
+                parent = i - 1
+                translate = [0.0, 0.0, 0.0] if not i else [1.0, 0.0, 0.0]
+                orient = [0.0, (i % 7) - 3.0, (i % 5) * 2.0 - 4.0]
+            else:
+                parent = (i - 1) // branching
+                sibling = (i - 1) % branching
+                translate = [0.0, 0.0, 0.0] if not i else [2.0, float(sibling) - branching / 2.0, 0.5 * sibling]
+                orient = [0.0, 0.0, 10.0 * sibling]
+
+            guide = {
+                "translateOffsetXYZ": translate,
+                "orientOffsetXYZ": orient,
+                "scaleXYZ": [1.0, 1.0, 1.0],
+            }
+            if i:
+                guide["parent"] = f"joint{parent}"
+            guides[f"joint{i}"] = guide
+
+        limbs[guide_type] = guides
+        remaining -= count
+
+    definition = {"guides": {"biped": {"limb": limbs}}}
+
+    return definition, list(limbs)
+
+
+# backends
+def setup_backend(use_maya=False):
+    """
+    :param use_maya: run against maya.standalone instead of the in-memory fake.
+    :return: backend name.
+    """
+
+    if use_maya:
+        utils.initialize_standalone()
+        return "maya"
+
+    from Util import fake_maya
+    fake_maya.install()
+
+    return "fake"
+
+
+def new_scene():
+    from maya import cmds
+    from Util import scene_index
+
+    cmds.file(new=True, force=True)
+    cmds.namespace(set=":")
+    scene_index.release_index()
+
+
+def seed_stray_namespaces(guide_types, count):
+    """
+    Leftovers prep_scene() has to clean up: a root namespace per guide type holding count transforms.
+    :param guide_types: list of guide type names.
+    :param count: transforms per namespace.
+    :return: None
+    """
+
+    from maya import cmds
+    import maya.api.OpenMaya as om2
+
+    modifier = om2.MDagModifier()
+    for guide_type in guide_types:
+        if not cmds.namespace(ex=f":{guide_type}"):
+            cmds.namespace(add=guide_type, parent=":")
+        for i in range(count):
+            modifier.renameNode(modifier.createNode("transform"), f":{guide_type}:stray{i}")
+    modifier.doIt()
+
+
+# measuring
+def run_pipeline(definition, guide_types, stray_count=4, count=False):
+    """
+    Build a synthetic definition step by step in a new scene.
+    :param definition: synthetic_definition() dictionary.
+    :param guide_types: guide types to build.
+    :param stray_count: transforms per stray namespace seeded for prep_scene() / relocate_ns().
+    :param count: count cmds calls (see call_counter, OpenMaya entry points aren't counted) instead of timing.
+    :return: {step: seconds} or {step: cmds calls}
+    """
+
+    import build
+    from Util import autorig_utils
+    from Util import call_counter
+
+    measured = dict.fromkeys(STEPS, 0)
+
+    def measure(step, func, *args, **kwargs):
+        if count:
+            result, counter = call_counter.count_calls(func, *args, api=False, **kwargs)
+            measured[step] += counter.total()
+        else:
+            start = time.perf_counter()
+            result = func(*args, **kwargs)
+            measured[step] += time.perf_counter() - start
+        return result
+
+    guide_data = utils.read_definition(definition, *guide_types)
+
+    new_scene()
+    seed_stray_namespaces(guide_types, stray_count)
+    measure("prep_scene", build.prep_scene, guide_data, root=ROOT)
+
+    generated = {}
+    for entry in guide_data:
+        created = measure("generate_guide_from_cache", build.generate_guide_from_cache, entry, root_ns=ROOT,
+                          rigdef_ns=RIGDEF)
+        generated.update({guide_type: created for guide_type in created})
+
+    for guide_type, created in generated.items():
+        measure("build_skeleton", build.build_skeleton, created, guide_data, rigdef=RIGDEF)
+
+    for guide_type in generated:
+        measure("build_rig", build.build_rig, f"{SKELETON_ROOT}:{RIGDEF}", guide_type)
+
+    for guide_type in guide_types:
+        measure("search_ns_items", autorig_utils.search_ns_items, guide_type)
+
+    # relocation on its own, in a scene holding only the guides: stray namespaces merged into the rigdef.
+    new_scene()
+    build.prep_scene(guide_data, root=ROOT)
+    for entry in guide_data:
+        build.generate_guide_from_cache(entry, root_ns=ROOT, rigdef_ns=RIGDEF)
+    seed_stray_namespaces(guide_types, stray_count)
+    for guide_type in guide_types:
+        measure("relocate_ns", autorig_utils.relocate_ns, src_ns=guide_type, parent=RIGDEF, merge=True, force=True)
+
+    return measured
+
+
+def run_benchmarks(sizes=SIZES, shapes=SHAPES, repeat=3, depth=100, branching=4, type_size=100, stray_count=4,
+                   count=False):
+    """
+    Time every step for every shape and size, keeping the fastest of repeat runs.
+    :param count: count cmds calls instead (one run, the counts don't vary).
+    :return: {shape: {size: {step: seconds or calls}}}, sizes as strings (JSON keys).
+    """
+
+    results = {}
+    for shape in shapes:
+        for size in sizes:
+            definition, guide_types = synthetic_definition(size, shape, depth=depth, branching=branching,
+                                                           type_size=type_size)
+
+            runs = [run_pipeline(definition, guide_types, stray_count, count=count)
+                    for _ in range(1 if count else max(1, repeat))]
+            best = {step: min(run[step] for run in runs) for step in STEPS}
+            results.setdefault(shape, {})[str(size)] = best
+
+            unit = "{} calls" if count else "{:.4f}s"
+            print(f"{shape:>5} {size:>6} guides: " +
+                  "  ".join(f"{step} {unit.format(best[step])}" for step in STEPS))
+
+    return results
+
+
+def run_executors(sizes=SIZES, shapes=SHAPES, rigdefs=8, workers=None, repeat=3, depth=100, branching=4,
+                  type_size=100):
+    """
+    Time the compute phase of build_many() (build_graph.compute()) for rigdefs copies of every definition with each
+    executor, keeping the fastest of repeat runs. Process pool times include spawning the workers.
+    :param rigdefs: rig definitions computed at once.
+    :param workers: pool size, defaults to the number of cores.
+    :return: {shape: {size: {executor: seconds}}}, sizes as strings (JSON keys).
+    """
+
+    import build
+    from Util import build_graph
+
+    graph = build.rig_graph()
+
+    results = {}
+    for shape in shapes:
+        for size in sizes:
+            definition, guide_types = synthetic_definition(size, shape, depth=depth, branching=branching,
+                                                           type_size=type_size)
+            guide_data = utils.read_definition(definition, *guide_types)
+            contexts = [{"rigdef": f"rigdef_{i + 1}", "guide_data": guide_data} for i in range(rigdefs)]
+
+            best = {}
+            for executor in EXECUTORS:
+                runs = []
+                for _ in range(max(1, repeat)):
+                    start = time.perf_counter()
+                    build_graph.compute(graph, contexts, workers=workers, executor=executor)
+                    runs.append(time.perf_counter() - start)
+                best[executor] = min(runs)
+            results.setdefault(shape, {})[str(size)] = best
+
+            print(f"{shape:>5} {size:>6} guides x {rigdefs} rigdefs: " +
+                  "  ".join(f"{executor} {best[executor]:.4f}s" for executor in EXECUTORS))
+
+    return results
+
+
+# history
+def read_history(path):
+    """
+    :param path: history json.
+    :return: history dictionary, empty (default thresholds, no runs) if the file doesn't exist.
+    """
+
+    history = {"thresholds": dict(DEFAULT_THRESHOLDS), "runs": []}
+    if os.path.isfile(path):
+        with open(path, "r") as f:
+            history.update(json.load(f))
+        history["thresholds"] = dict(DEFAULT_THRESHOLDS, **history.get("thresholds", {}))
+
+    return history
+
+
+def write_history(path, history):
+    directory = os.path.dirname(os.path.abspath(path))
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+
+    with open(path, "w") as f:
+        json.dump(history, f, indent=4)
+
+
+def find_regressions(results, history, backend, settings, key="results"):
+    """
+    Compare results against the best of the last comparable runs in history.
+    :param results: run_benchmarks() result.
+    :param history: read_history() result.
+    :param backend: backend the results were measured with.
+    :param settings: run settings, only runs with the same backend and generation settings are compared.
+    :param key: "results" (seconds, checked against the thresholds) or "commands" (cmds calls, any increase
+    regresses).
+    :return: list of regression dictionaries (shape, size, step, value, baseline, limit).
+    """
+
+    thresholds = history["thresholds"]
+    def comparable(run):
+        recorded = dict(run.get("settings") or {}, repeat=None)
+        return run.get("backend") == backend and recorded == dict(settings, repeat=None) and run.get(key)
+
+    previous = [run for run in history["runs"] if comparable(run)]
+    previous = previous[-int(thresholds["window"]):]
+
+    regressions = []
+    for shape, sizes in results.items():
+        for size, steps in sizes.items():
+            for step, value in steps.items():
+                baseline = [run[key].get(shape, {}).get(size, {}).get(step) for run in previous]
+                baseline = [entry for entry in baseline if entry is not None]
+                if not baseline:
+                    continue
+
+                best = min(baseline)
+                if key == "commands":
+                    limit = best
+                else:
+                    tolerance = thresholds["steps"].get(step, thresholds["tolerance"])
+                    limit = max(best * (1.0 + tolerance), best + thresholds["min_delta"])
+                if value > limit:
+                    regressions.append({"kind": key, "shape": shape, "size": size, "step": step, "value": value,
+                                        "baseline": best, "limit": limit, "median": statistics.median(baseline)})
+
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the rig build on synthetic guide definitions.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES), help="guide counts.")
+    parser.add_argument("--shapes", nargs="+", choices=SHAPES, default=list(SHAPES), help="guide layouts.")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per size, the fastest is kept.")
+    parser.add_argument("--depth", type=int, default=100, help="chain length of deep definitions.")
+    parser.add_argument("--branching", type=int, default=4, help="children per guide of wide definitions.")
+    parser.add_argument("--type-size", type=int, default=100, help="guides per guide type of wide definitions.")
+    parser.add_argument("--stray", type=int, default=4, help="transforms per stray namespace to relocate.")
+    parser.add_argument("--count", action="store_true", help="also count the cmds calls of every step.")
+    parser.add_argument("--executors", type=int, metavar="RIGDEFS", default=0,
+                        help="also time build_many()'s compute phase for this many rigdefs with every executor.")
+    parser.add_argument("--workers", type=int, default=None, help="pool size of --executors runs.")
+    parser.add_argument("--maya", action="store_true", help="run in maya.standalone instead of the fake scene.")
+    parser.add_argument("--history", default=DEFAULT_HISTORY, help="history json to check against and append to.")
+    parser.add_argument("--no-record", action="store_true", help="check against the history without appending.")
+
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    backend = setup_backend(args.maya)
+    settings = {"repeat": args.repeat, "depth": args.depth, "branching": args.branching,
+                "type_size": args.type_size, "stray": args.stray}
+    generation = {"depth": args.depth, "branching": args.branching, "type_size": args.type_size,
+                  "stray_count": args.stray}
+
+    results = run_benchmarks(args.sizes, args.shapes, repeat=args.repeat, **generation)
+    commands = run_benchmarks(args.sizes, args.shapes, count=True, **generation) if args.count else None
+    executors = None
+    if args.executors:
+        executors = run_executors(args.sizes, args.shapes, rigdefs=args.executors, workers=args.workers,
+                                  repeat=args.repeat, depth=args.depth, branching=args.branching,
+                                  type_size=args.type_size)
+
+    history = read_history(args.history)
+    regressions = find_regressions(results, history, backend, settings)
+    if commands:
+        regressions += find_regressions(commands, history, backend, settings, key="commands")
+
+    for regression in regressions:
+        unit = "{} calls" if regression["kind"] == "commands" else "{:.4f}s"
+        print(f"REGRESSION {regression['shape']} {regression['size']} {regression['step']}: "
+              f"{unit.format(regression['value'])} > {unit.format(regression['limit'])} "
+              f"(best {unit.format(regression['baseline'])})")
+
+    if not args.no_record:
+        history["runs"].append({
+            "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+            "backend": backend,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "settings": settings,
+            "results": results,
+            "commands": commands,
+            "executors": executors,
+            "regressions": regressions,
+        })
+        write_history(args.history, history)
+        print(f"History written to: {os.path.abspath(args.history)}")
+
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,64 +1,210 @@
 from maya import cmds
-import maya.OpenMaya as om
+import maya.api.OpenMaya as om2
+
+import numpy as np
 
 from Util import utils
 from Util import autorig_utils
+from Util import transaction
+from Util import batch_ops
+from Util import incremental
+from Util import build_graph
+from Util import tracing
+from Util import namespaces
+from Util import hierarchy
 
 try:
     from Util import utils
     from Util import  autorig_utils
+    from Util import transaction
+    from Util import batch_ops
+    from Util import incremental
+    from Util import build_graph
+    from Util import tracing
+    from Util import namespaces
+    from Util import hierarchy
 except Exception as e:
     import sys
     sys.path.append("C:/Users/Thomas Killick/Documents/maya/modules/rigging_tool")
     from Util import utils
     from Util import autorig_utils
+    from Util import transaction
+    from Util import batch_ops
+    from Util import incremental
+    from Util import build_graph
+    from Util import tracing
+    from Util import namespaces
+    from Util import hierarchy
+
+
+IK_PREFIX = "ik_"
+SKELETON_ROOT = "skeleton_def"
 
-def prep_scene(guide_data, root="Guides"):
+
+def _create_guides(plan):
     """
-    Run once per session.
-    Args:
-        guide_data:
-        rigdef:
+    Commit helper: create a guide type's locators from a build_graph.guide_layout() plan with one MDagModifier, as
+    one undoable edit (see transaction.apply()).
+    :param plan: guide layout with "full_names".
+    :return: list of created transform MObjects.
+    """
+
+    modifier = om2.MDagModifier()
+    transforms = []
+
+    # names are parents first, so every parent exists by the time its children are created.
+    for full_name, parent in zip(plan["full_names"], plan["parents"]):
+        transform = modifier.createNode("transform", transforms[parent] if parent >= 0 else om2.MObject.kNullObj)
+        modifier.renameNode(transform, full_name)
+        modifier.renameNode(modifier.createNode("locator", transform), f"{full_name}Shape")
+        transforms.append(transform)
 
-    Returns:
+    modifier.doIt()
 
+    for transform, translate, rotate, scale in zip(transforms, plan["translate"], plan["rotate"], plan["scale"]):
+        node = om2.MFnDependencyNode(transform)
+        for axis, t, r, sc in zip("XYZ", translate, rotate, scale):
+            modifier.newPlugValueDouble(node.findPlug(f"translate{axis}", False), t)
+            modifier.newPlugValueMAngle(node.findPlug(f"rotate{axis}", False), om2.MAngle(r, om2.MAngle.kDegrees))
+            modifier.newPlugValueDouble(node.findPlug(f"scale{axis}", False), sc)
+
+    # undoable, so the whole guide set goes with one undo.
+    transaction.apply(modifier)
+
+    return transforms
+
+
+def _create_joints(full_names, parents, joint_orients, translations, hashes=None):
+    """
+    Commit helper: create a joint hierarchy from solved values with one MDagModifier, as one undoable edit.
+    :param full_names: joint names (with namespace).
+    :param parents: parent index of every joint, -1 for roots.
+    :param joint_orients: (N, 3) joint orients in degrees.
+    :param translations: (N, 3) local translations.
+    :param hashes: guide hashes stored on the joints for incremental updates, see incremental.
+    :return: list of created joint MObjects.
     """
-    cmds.namespace(set=":")
-    ns_map = []
 
-    rig_def_ns = autorig_utils.setup_ns_environment()
+    depths = batch_ops.hierarchy_depths(parents)
 
-    for guide in guide_data:
-        ns_map.append(list(guide.keys())[0])
+    modifier = om2.MDagModifier()
+    joints = [None] * len(full_names)
+    for i in sorted(range(len(full_names)), key=depths.__getitem__):  # parents are created before their children.
+        joints[i] = modifier.createNode("joint", joints[parents[i]] if parents[i] >= 0 else om2.MObject.kNullObj)
+        modifier.renameNode(joints[i], full_names[i])
+    if hashes is not None:
+        incremental.add_hash_attributes(modifier, joints)
+    modifier.doIt()
 
-    existing_objs = []
-    for guide_ns in ns_map:
-        found_items = (autorig_utils.search_ns_items(guide_ns))
-        for k, v in found_items.items():
-            existing_item = om.MFnDagNode(v)
-            existing_objs.append(existing_item.name())
+    if hashes is not None:
+        incremental.set_hash_values(modifier, joints, hashes)
 
-    filtered_set = utils.filter_duplicates(existing_objs)
-    child_namespaces = []
+    for joint, parent, joint_orient, translation in zip(joints, parents, joint_orients, translations):
+        node = om2.MFnDependencyNode(joint)
+        for axis, translate, orient in zip("XYZ", translation, joint_orient):
+            modifier.newPlugValueDouble(node.findPlug(f"translate{axis}", False), translate)
+            modifier.newPlugValueMAngle(node.findPlug(f"jointOrient{axis}", False),
+                                        om2.MAngle(orient, om2.MAngle.kDegrees))
 
-    for item in filtered_set:
-        namespaces = item.split(":")
-        if rig_def_ns in namespaces:
-            continue
-        child_namespaces.append(namespaces[-2])
+        # keep child transform consistent to parent scaling, as cmds.joint() does.
+        if parent >= 0:
+            modifier.connect(om2.MFnDependencyNode(joints[parent]).findPlug("scale", False),
+                             node.findPlug("inverseScale", False))
+
+    # joints and their hash attributes are undone together.
+    transaction.apply(modifier)
 
-    filtered_ns = utils.filter_duplicates(child_namespaces)
+    return joints
 
-    for ns in filtered_ns:
-        autorig_utils.relocate_ns(src_ns=ns, parent=rig_def_ns, merge=True, force=True)
 
-    # remove any empty namespaces
-    for ns in ns_map:
-        autorig_utils.create_ns(ns=ns, full_parent_path=f"{root}:{rig_def_ns}")
-        autorig_utils.relocate_ns(src_ns=ns, parent=rig_def_ns, merge=False)
+def _create_pole_controls(full_names, positions):
+    """
+    Commit helper: create pole vector locators at solved world positions with one MDagModifier, as one undoable edit.
+    :param full_names: locator names (with namespace).
+    :param positions: (N, 3) world positions.
+    :return: list of created transform MObjects.
+    """
+
+    modifier = om2.MDagModifier()
+    transforms = []
+    for full_name in full_names:
+        transform = modifier.createNode("transform", om2.MObject.kNullObj)
+        modifier.renameNode(transform, full_name)
+        modifier.renameNode(modifier.createNode("locator", transform), f"{full_name}Shape")
+        transforms.append(transform)
+    modifier.doIt()
+
+    for transform, position in zip(transforms, positions):
+        node = om2.MFnDependencyNode(transform)
+        for axis, value in zip("XYZ", position):
+            modifier.newPlugValueDouble(node.findPlug(f"translate{axis}", False), float(value))
+
+    transaction.apply(modifier)
+
+    return transforms
+
+
+def _limb_chains(guide_namespaces):
+    """
+    Commit helper: the deform joint chains of skeleton segments, one IK limb per root joint. A segment can hold several
+    chains (e.g. left and right arms, front and back legs), their handles are then labelled with the root joint name.
+    :param guide_namespaces: segment namespaces, e.g. ["skeleton_def:rigdef_1:arm"].
+    :return: list of limbs for generate_ik_systems().
+    """
+
+    # every segment's joints in one query, IK duplicates live next to the deform joints.
+    found = cmds.ls([f"{ns}:*" for ns in guide_namespaces], type="joint") or []
+    joints = [joint for joint in found if "joint" in joint.split(":")[-1]
+              and not joint.split(":")[-1].startswith(IK_PREFIX)]
+    if not joints:
+        return []
+
+    snapshot = hierarchy.HierarchySnapshot.from_scene(joints)
+
+    by_namespace = {}
+    for joint in snapshot.order(joints):
+        by_namespace.setdefault(joint.rpartition(":")[0], []).append(joint)
+
+    limbs = []
+    for ns in guide_namespaces:
+        segment = by_namespace.get(ns, [])
+        indices = {snapshot.index(joint) for joint in segment}
+        roots = [joint for joint in segment if snapshot.parents[snapshot.index(joint)] not in indices]
+        for root in roots:
+            limbs.append({"start": root, "namespace": ns,
+                          "name": root.split(":")[-1] if len(roots) > 1 else ""})
+
+    return limbs
+
+
+@tracing.traced
+@transaction.transactional
+def prep_scene(guide_data, root="Guides", rigdef="rigdef_1"):
+    """
+    Run once per session. Makes sure root:rigdef:<guide type> exists for every guide type and merges stray
+    namespaces of the same name (e.g. from an import) into it. The namespace tree is read once, the moves / merges /
+    deletes are planned in memory and applied with as few namespace commands as possible (see namespaces).
+    :param guide_data: read_definition() output.
+    :param root: guide root namespace.
+    :param rigdef: rig definition namespace.
+    :return: applied namespaces.NamespacePlan(), stray namespaces that couldn't be merged are in its conflicts.
+    """
+
+    guide_types = [list(guide.keys())[0] for guide in guide_data]
+
+    tree = namespaces.NamespaceTree.from_scene()
+    plan = namespaces.plan_guide_namespaces(tree, guide_types, root=root, rigdef=rigdef)
+    tracing.annotate(guide_types=len(guide_types), namespaces=len(tree), operations=len(plan))
+
+    plan.apply()
+    cmds.namespace(set=":")
+
+    return plan
 
 
 # TODO: GENERATES FROM CACHE ONLY
+@tracing.traced
+@transaction.transactional
 def generate_guide_from_cache(guide_data, root_ns="Guides", rigdef_ns="rigdef_1"):
     """
     (WIP) Takes guide data from the JSON via UI
@@ -79,56 +225,26 @@ def generate_guide_from_cache(guide_data, root_ns="Guides", rigdef_ns="rigdef_1"
     guide_type_name = list(guide_data.keys())[0]
     guide_type_values = guide_data[guide_type_name]
 
-    matrices = []
-    guide_names = []
-    # generated_guides = {}
-
-    # in 3.7 dictionaries are ordered.
-    for guide, value in guide_type_values.items():
-        guide_names.append(guide)
-        if cmds.objExists(f"{ns_path}:{guide_type_name}:{guide}"):
-            return {}
-        if "parent" not in value:
-            matrices.insert(0, autorig_utils.write_and_construct_matrix(
-                translation=value["translateOffsetXYZ"],
-                orientation=value["orientOffsetXYZ"],
-                scale=value["scaleXYZ"]
-            ))  # in local space
-        elif "parent" in value:
-            matrices.append(autorig_utils.write_and_construct_matrix(
-                translation=value["translateOffsetXYZ"],
-                orientation=value["orientOffsetXYZ"],
-                scale=value["scaleXYZ"]
-            ))  # add next in array/
-        else:
-            raise Exception(f"'parent' not found in {guide} data.")
-
-    created_objects = []
+    # names, parents and channel values for every guide in one pass (see build_graph.guide_layout()).
+    plan = build_graph.guide_layout(guide_type_values)
+    plan["full_names"] = [f"{ns_path}:{guide_type_name}:{guide}" for guide in plan["names"]]
+    tracing.annotate(guide_type=guide_type_name, guides=len(plan["names"]))
+
+    if cmds.ls(plan["full_names"]):
+        return {}
 
     # need to add the objects to the namespace.
     cmds.namespace(set=f"{ns_path}:{guide_type_name}")
 
-    index = 0
-
-    for (guide, value), matrix in zip(guide_type_values.items(), matrices):
+    transforms = _create_guides(plan)
 
-        matrix_list = [matrix[i] for i in range(16)]
-
-        current_object_name = cmds.spaceLocator(name=guide_names[index])
-        created_objects.append(current_object_name)
-
-        if "parent" in value:
-            cmds.parent(current_object_name, f"{ns_path}:{guide_type_name}:{value['parent']}")
-
-        cmds.xform(current_object_name, matrix=matrix_list, os=True)
-
-        index += 1
-
-    # generated_guide = {guide_type_name: created_objects}
+    created_objects = [[om2.MFnDagNode(transform).partialPathName()] for transform in transforms]
 
     return {guide_type_name: created_objects}
 
 
+@tracing.traced
+@transaction.transactional
 def ui_guides(list_of_guide_entries):
     """
     list of our selected guide entries passed from the UI menu.
@@ -138,6 +254,7 @@ def ui_guides(list_of_guide_entries):
     """
 
     list_of_generated_guides = []  # list of our guides that are generated.
+    tracing.annotate(guide_types=len(list_of_guide_entries))
 
     for selected_guide in list_of_guide_entries:
         list_of_generated_guides.append(generate_guide_from_cache(selected_guide))
@@ -148,131 +265,382 @@ def ui_guides(list_of_guide_entries):
     return list_of_generated_guides
 
 
-def build_skeleton(current_guide_data):
+@tracing.traced
+@transaction.transactional
+def build_skeleton(current_guide_data, guide_data=None, rigdef="rigdef_1"):
     """
-    Builds out skeleton (joint chain) from our provided guides data.
+    Builds out skeleton (joint chain) from our provided guides data, under skeleton_def:<rigdef>:<guide type> like
+    build_many() does.
+    Every joint stores a hash of its guide (see incremental), used by update_rig() to skip unchanged segments.
     :param current_guide_data: dict
+    :param guide_data: read_definition() output, hashed along with the guide transforms.
+    :param rigdef: rig definition namespace.
     :return: None
     """
     # main our joints from guides
 
     cmds.select(clear=True)
-    root = "skeleton_def"
+    root = f"{SKELETON_ROOT}:{rigdef}"
 
     cmds.namespace(set=":")
-    if not cmds.namespace(ex=root):
-        autorig_utils.set_and_add_ns(set_ns=":", add_ns=root)
-
-    joints = []
-    guide_rotators = []
-
     cmds.select(clear=True)  # clear our current selection
 
     current_guide_type = list(current_guide_data.keys())[0]  # e.g. "arm"
 
-    autorig_utils.create_ns(ns=current_guide_type, full_parent_path=root)  # create our namespace to contain guides.
-
-    if cmds.namespace(ex=f"{root}:{current_guide_type}"):
-        cmds.namespace(set=f"{root}:{current_guide_type}")  # set it as active.
+    autorig_utils.create_ns_path(f"{root}:{current_guide_type}")  # create our namespace to contain joints.
+    cmds.namespace(set=f":{root}:{current_guide_type}")  # set it as active.
 
     autorig_utils.clear_objects(f"{root}:{current_guide_type}", joints_only=True)
 
-    for guide_name, guides in current_guide_data.items():
-        for i, transforms in enumerate(guides):
-            joint_name = transforms[0].split(":")[-1]
-            # guide_translation = cmds.xform(transforms[0], q=True, os=True, t=True)
-            guide_translation = [cmds.getAttr(f"{transforms[0]}.tx"),
-                                 cmds.getAttr(f"{transforms[0]}.ty"), cmds.getAttr(f"{transforms[0]}.tz") ]
-            guide_rotation = [cmds.getAttr(f"{transforms[0]}.rx"),
-                                 cmds.getAttr(f"{transforms[0]}.ry"), cmds.getAttr(f"{transforms[0]}.rz") ]
-
-            guide_rotators.append(guide_rotation)
+    guides = [transforms[0] for guide_entries in current_guide_data.values() for transforms in guide_entries]
+    tracing.annotate(guide_type=current_guide_type, guides=len(guides), joints=len(guides))
+    if not guides:
+        cmds.namespace(set=f":{root}")
+        return
 
-            joint = cmds.joint(name=joint_name, p=guide_translation, r=True)
+    # every guide read in one call, joints follow the guide hierarchy.
+    sample = autorig_utils.sample_transforms(guides)
+    parents = sample["parents"]
 
-            joints.append(joint)
+    # final orientations are solved straight from the guide positions, so no orient pass is needed afterwards.
+    layout = build_graph.skeleton_layout(sample["world_matrix"], parents)
 
-    for joint, rotator in zip(joints, guide_rotators):
-        cmds.joint(joint, e=True, o=rotator)
+    definitions = incremental.definitions_by_type(guide_data).get(current_guide_type)
+    hashes = incremental.guide_hashes(guides, definitions, sample)
 
-    # fix orientations
-    for joint in joints:
-        autorig_utils.fix_joint_orientations(joint)
+    full_names = [f"{root}:{current_guide_type}:{guide.split(':')[-1]}" for guide in guides]
+    _create_joints(full_names, parents, layout["joint_orient"], layout["translate"], hashes)
 
     # set active namespace back to root skeleton def namespace.
     cmds.namespace(set=f":{root}")
 
 
+@tracing.traced
+@transaction.transactional
+def generate_ik_systems(limbs, solver="ikRPsolver", pole_distance=1.0, free_pole=False, pole_positions=None):
+    """
+    Build IK systems on any number of joint chains in one pass. Every IK chain is duplicated with one modifier, the
+    pole vector placements of all limbs are solved together (batch_ops.pole_vector_positions()) and the pole controls
+    are created with one modifier. Only the ikHandle and poleVectorConstraint commands run per limb. Modifiers and
+    commands all go on the undo queue, so the IK systems are one undo step.
+    :param limbs: list of dictionaries: "start" start joint, "end" optional end joint (end of the longest branch by
+    default), "namespace" namespace of the IK chain, handle, effector and pole and "name" optional label for the
+    handle, effector and pole names, needed when limbs share a namespace.
+    :param solver: IK solver, pole controls are only built for "ikRPsolver".
+    :param pole_distance: pole distance multiplier, see batch_ops.pole_vector_positions().
+    :param free_pole: place the poles off the bend joints (position_pole_vector(f=True)), otherwise off the start
+    joints (f=False), which is what generate_ik_rig() always did.
+    :param pole_positions: optional (L, 3) pole positions per limb solved ahead e.g. by build_graph.plan_poles(),
+    otherwise they are solved from the IK chains.
+    :return: list of dictionaries per limb: "joints", "handle", "effector" and "pole".
+    """
+
+    if not limbs:
+        return []
+
+    labels = [(limb["namespace"].strip(":"), limb.get("name", "")) for limb in limbs]
+    handle_names = [f"{ns}:{label}_IKHandle" for ns, label in labels]
+    effector_names = [f"{ns}:{label}_IKEffector" for ns, label in labels]
+    pole_names = [f"{ns}:{label}_IKPole" for ns, label in labels] if solver == "ikRPsolver" else []
+
+    new_names = handle_names + effector_names + pole_names
+    existing = cmds.ls(new_names) or []
+    if existing or len(set(new_names)) != len(new_names):
+        raise Exception(f"error generating IK: {existing or new_names} already exists.")
+
+    ik_chains = autorig_utils.duplicate_chains([(limb["start"], limb.get("end")) for limb in limbs],
+                                               prefix=IK_PREFIX, chain_namespaces=[ns for ns, label in labels])
+    tracing.annotate(limbs=len(limbs), joints=sum(len(chain) for chain in ik_chains))
+
+    for chain in ik_chains:
+        if len(chain) < 2:
+            raise Exception(f"error generating IK: IK joint chain {chain} needs at least 2 joints.")
+
+    # every pole solved from one position query, unless the compute phase already solved them.
+    poles = []
+    if pole_names:
+        if pole_positions is None:
+            positions = autorig_utils.world_positions([joint for chain in ik_chains for joint in chain])
+            splits = np.cumsum([len(chain) for chain in ik_chains])[:-1]
+            chain_positions, lengths = batch_ops.pad_chains(np.split(positions, splits))
+            pole_positions = batch_ops.pole_vector_positions(chain_positions, lengths, distance=pole_distance,
+                                                             free=free_pole)
+        elif len(pole_positions) != len(limbs):
+            raise Exception(f"error generating IK: got {len(pole_positions)} pole positions for {len(limbs)} limbs.")
+        _create_pole_controls(pole_names, pole_positions)
+        poles = pole_names
+
+    effectors = om2.MSelectionList()
+    for chain, handle_name in zip(ik_chains, handle_names):
+        handle, effector = cmds.ikHandle(name=handle_name, startJoint=chain[0], endEffector=chain[-1], solver=solver)
+        effectors.add(effector)
+
+    # effectors renamed in one go.
+    modifier = om2.MDagModifier()
+    for i, effector_name in enumerate(effector_names):
+        modifier.renameNode(effectors.getDependNode(i), effector_name)
+    transaction.apply(modifier)
+
+    for pole, handle_name in zip(poles, handle_names):
+        cmds.poleVectorConstraint(pole, handle_name)
+
+    return [{"joints": chain, "handle": handle_name, "effector": effector_name, "pole": pole}
+            for chain, handle_name, effector_name, pole in
+            zip(ik_chains, handle_names, effector_names, poles or [None] * len(limbs))]
+
+
+@tracing.traced
+@transaction.transactional
 def generate_ik_rig(ns, guide_type, ordered_joints):
     """
-    Taking the namesapce, the type of guide e.g.arm and the list of ordereed joints, generate our IK rig.
+    Taking the namespace, the type of guide e.g. arm and the list of ordered joints, generate our IK rig on the chain
+    from the first joint, see generate_ik_systems().
     :param ns: namespace root.
     :param guide_type: guide type
     :param ordered_joints: list of ordered joints
-    :return: None
+    :return: generate_ik_systems() result of the limb.
     """
 
-    if guide_type != "arm":  #TODO: modify
-        return
+    tracing.annotate(guide_type=guide_type, joints=len(ordered_joints))
 
-    chain_root = ordered_joints[0]
-    chain_child = ordered_joints[-1]
+    return generate_ik_systems([{"start": ordered_joints[0], "namespace": f"{ns}:{guide_type}"}])[0]
 
-    cmds.namespace(set=f"{guide_type}")  # set our namespace to add current duplicate to.
 
-    duplicated_joints = autorig_utils.chain_duplication(chain_root, prefix="ik_")
+@tracing.traced
+@transaction.transactional
+def build_rig(ns, guide_type):
+    """
+    Builds out our rig (full rig).
+    :param ns: namespace
+    :param guide_type: type of guide.
+    :return: generate_ik_systems() result.
+    """
 
-    if len(duplicated_joints) != 3:
-        raise Exception("error generating IK: IK joint chain != 3")
+    # main our control rig from our skeleton.
+    limbs = _limb_chains([f"{ns}:{guide_type}"])
+    tracing.annotate(guide_type=guide_type, limbs=len(limbs))
 
-    ik_handle_name = "_IKHandle"
-    ik_effector_name = "_IKEffector"
+    return generate_ik_systems(limbs)
 
-    ik_handle = cmds.ikHandle(
-        name=ik_handle_name,
-        startJoint=duplicated_joints[0],
-        endEffector=duplicated_joints[-1],
-        solver="ikRPsolver"
-    )
 
-    ik_effector = ik_handle[1]
-    handle = ik_handle[0]
-    print(cmds.nodeType(handle))
-    print(cmds.listConnections(handle+'.ikSolver', s=True, d=False)[0])
+def _clear_ik_systems(namespaces):
+    """
+    Commit helper: delete the IK systems generate_ik_systems() built in skeleton segments (handles, effectors, pole
+    controls and constraints, IK joint chains), so they can be built again.
+    :param namespaces: segment namespaces e.g. "skeleton_def:rigdef_1:arm".
+    :return: list of deleted objects.
+    """
 
-    cmds.rename(ik_effector, ik_effector_name)
+    if not namespaces:
+        return []  # cmds.ls() of no names lists the whole scene.
 
-    autorig_utils.position_pole_vector(handle, f=False)
-    cmds.namespace(set=f":{ns}")  # set back to root skeleton def namespace.
+    patterns = [f"{ns}:{pattern}" for ns in namespaces
+                for pattern in ("*_IKHandle", "*_IKEffector", "*_IKPole", f"{IK_PREFIX}*")]
+    ik_objects = cmds.ls(patterns) or []
+    ik_objects += cmds.ls([f"{ns}:*" for ns in namespaces],
+                          type=["ikHandle", "ikEffector", "poleVectorConstraint"]) or []
+    ik_objects = list(dict.fromkeys(ik_objects))
 
+    # one delete, children (effectors, constraints) go with their parents.
+    if ik_objects:
+        cmds.delete(ik_objects)
 
-def build_rig(ns, guide_type):
+    return ik_objects
+
+
+def _migrate_skeleton_namespaces(guide_types, rigdef):
     """
-    Builds out our rig (full rig).
-    :param ns: namespace
-    :param guide_type: type of guide.
-    :return: None
+    Commit helper: skeletons used to be built straight under skeleton_def:<guide type>. Move such segments (joints,
+    their hashes and IK systems) to skeleton_def:<rigdef>:<guide type> so update_rig() finds them in scenes built
+    before the rigdef level was added.
+    :param guide_types: guide types e.g. ["arm", "leg"].
+    :param rigdef: rig definition namespace.
+    :return: list of moved segment namespaces.
     """
-    # main our control rig from our skeleton.
-    items = autorig_utils.search_ns_items(f"{ns}:{guide_type}")
 
-    deform_joints = []
-    for key, value in items.items():
-        name = key.split(":")[-1]
-        if "joint" in name and cmds.objectType(key) == 'joint':
-            deform_joints.append(f"{ns}:{guide_type}:{name}")
+    moved = []
+    for guide_type in guide_types:
+        legacy = f":{SKELETON_ROOT}:{guide_type}"
+        target = f":{SKELETON_ROOT}:{rigdef}:{guide_type}"
+        if not cmds.namespace(exists=legacy) or cmds.namespace(exists=target):
+            continue
+
+        autorig_utils.create_ns_path(target)
+        cmds.namespace(mv=(legacy, target), f=True)
+        cmds.namespace(rm=legacy)
+        moved.append(target)
+
+    if moved:
+        transaction.invalidate()
+
+    return moved
+
+
+@tracing.traced
+@transaction.transactional
+def update_rig(generated_guides, guide_data=None, force=False, rigdef="rigdef_1"):
+    """
+    Incremental rebuild: only skeleton segments whose guides changed since they were built are rebuilt, together
+    with the IK systems that were built on them. The old IK systems of those segments are deleted first, guides
+    deleted since generate_guide_from_cache() are left out of the rebuild.
+    :param generated_guides: {guide_type: generate_guide_from_cache() result}
+    :param guide_data: read_definition() output, definition edits count as changes too.
+    :param force: rebuild everything.
+    :param rigdef: rig definition namespace, see build_skeleton(). Segments of the older skeleton_def:<guide type>
+    layout are moved under it first.
+    :return: list of rebuilt guide types.
+    """
+
+    root = f"{SKELETON_ROOT}:{rigdef}"
+    _migrate_skeleton_namespaces(generated_guides, rigdef)
+    segments = incremental.stale_segments(generated_guides, guide_data, root=root)
+
+    rebuilt = [guide_type for guide_type in generated_guides if force or segments[guide_type]["stale"]]
+    rebuilt_ik = [f"{root}:{guide_type}" for guide_type in rebuilt if segments[guide_type]["ik"]]
+
+    # the old IK systems go before their joints are rebuilt.
+    _clear_ik_systems(rebuilt_ik)
+    for guide_type in rebuilt:
+        build_skeleton(incremental.prune_deleted(generated_guides[guide_type]), guide_data, rigdef=rigdef)
+
+    # IK of every rebuilt segment in one pass.
+    generate_ik_systems(_limb_chains(rebuilt_ik))
+
+    tracing.annotate(guide_types=len(generated_guides), rebuilt=len(rebuilt))
+
+    return rebuilt
+
+
+@tracing.traced
+def commit_guides(context):
+    """
+    Commit stage: create the guides planned by build_graph.plan_guides(). Guide types that already exist are skipped.
+    :param context: build context.
+    :return: {guide_type: created objects} like generate_guide_from_cache().
+    """
+
+    created = {}
+    for guide_type, plan in context["guides"].items():
+        if cmds.ls(plan["full_names"]):
+            continue
+
+        autorig_utils.create_ns_path(plan["namespace"])
+        transforms = _create_guides(plan)
+        created[guide_type] = {guide_type: [[om2.MFnDagNode(transform).partialPathName()] for transform in transforms]}
+
+    tracing.annotate(guide_types=len(created), guides=sum(len(guides[guide_type]) for guides in created.values()
+                                                          for guide_type in guides))
+
+    return created
+
+
+@tracing.traced
+def commit_skeleton(context):
+    """
+    Commit stage: create the joints planned by build_graph.plan_skeleton().
+    :param context: build context.
+    :return: {guide_type: list of joint names}
+    """
+
+    definitions = incremental.definitions_by_type(context["guide_data"])
+
+    created = {}
+    for guide_type, plan in context["skeleton"].items():
+        guide_plan = context["guides"][guide_type]
+
+        autorig_utils.create_ns_path(plan["namespace"])
+        autorig_utils.clear_objects(plan["namespace"], joints_only=True)
+
+        guide_definitions = definitions.get(guide_type, {})
+        hashes = [incremental.guide_hash(guide_definitions.get(name), matrix)
+                  for name, matrix in zip(guide_plan["names"], guide_plan["world_matrix"])]
+
+        joints = _create_joints(plan["full_names"], plan["parents"], plan["joint_orient"], plan["translate"], hashes)
+        created[guide_type] = [om2.MFnDagNode(joint).partialPathName() for joint in joints]
+
+    tracing.annotate(guide_types=len(created), joints=sum(len(joints) for joints in created.values()))
+
+    return created
+
+
+@tracing.traced
+def commit_rig(context):
+    """
+    Commit stage: build the rig on every committed skeleton segment, the limbs of all segments in one pass. The pole
+    positions come from the "poles" compute stage when it planned every limb.
+    :param context: build context.
+    :return: generate_ik_systems() result.
+    """
+
+    limbs = _limb_chains([plan["namespace"] for plan in context["skeleton"].values()])
+    tracing.annotate(guide_types=len(context["skeleton"]), limbs=len(limbs))
+
+    planned = {start: position for plan in context.get("poles", {}).values()
+               for start, position in zip(plan["starts"], plan["positions"])}
+    pole_positions = [planned.get(limb["start"]) for limb in limbs]
+    if any(position is None for position in pole_positions):
+        pole_positions = None
+
+    systems = generate_ik_systems(limbs, pole_positions=pole_positions)
+    cmds.namespace(set=":")
 
-    # search ns items recursively searches DAG so very unlikely, but to prevent breakage:
-    ordered_joints = autorig_utils.reorder_joints(deform_joints)
-    # print("ordered_joints: ", ordered_joints)
+    return systems
 
-    generate_ik_rig(ns, guide_type, ordered_joints)
+
+@tracing.traced
+def rig_graph():
+    """
+    The build as a build_graph.BuildGraph(): pure planning stages, then the stages that edit the scene.
+    :return: BuildGraph()
+    """
+
+    graph = build_graph.BuildGraph()
+    graph.add("guides", build_graph.plan_guides, requires=["guide_data", "rigdef"])
+    graph.add("skeleton", build_graph.plan_skeleton, requires=["guides", "rigdef"])
+    graph.add("poles", build_graph.plan_poles, requires=["skeleton"])
+
+    graph.add("created_guides", commit_guides, requires=["guides"], phase=build_graph.COMMIT)
+    graph.add("created_joints", commit_skeleton, requires=["skeleton", "created_guides"], phase=build_graph.COMMIT)
+    graph.add("rig", commit_rig, requires=["created_joints", "poles"], phase=build_graph.COMMIT)
+
+    return graph
+
+
+@tracing.traced
+@transaction.transactional
+def build_many(guide_data_list, rigdefs=None, workers=None, executor="thread"):
+    """
+    Build many rig definitions at once. The planning math of every rigdef runs in parallel (see build_graph), the
+    scene is then edited one rigdef at a time.
+    :param guide_data_list: one read_definition() result per rig definition.
+    :param rigdefs: rigdef namespace names, defaults to rigdef_1..N.
+    :param workers: compute pool size.
+    :param executor: "thread", "process" or "serial", see build_graph.compute() for why threads are the default.
+    :return: list of build contexts.
+    """
+
+    if rigdefs is None:
+        rigdefs = [f"rigdef_{i + 1}" for i in range(len(guide_data_list))]
+    if len(rigdefs) != len(guide_data_list):
+        raise Exception(f"Got {len(guide_data_list)} guide definitions for {len(rigdefs)} rigdefs.")
+
+    tracing.annotate(rigdefs=len(rigdefs), guide_types=sum(len(guide_data) for guide_data in guide_data_list))
+
+    graph = rig_graph()
+    contexts = [{"rigdef": rigdef, "guide_data": guide_data} for rigdef, guide_data in zip(rigdefs, guide_data_list)]
+
+    computed = build_graph.compute(graph, contexts, workers=workers, executor=executor)
+
+    cmds.namespace(set=":")
+    return build_graph.commit(graph, computed)
 
 
+@tracing.traced
 def skin():
     pass
 
 
+@tracing.traced
 def pose():
     pass
 
@@ -287,7 +655,7 @@ generated_guides = ui_guides(guides_to_generate)
 
 for guide in generated_guides:
     build_skeleton(guide)
-    build_rig("skeleton_def", "arm")"""
+    build_rig("skeleton_def:rigdef_1", "arm")"""
 
 
 """# DATA HANDLING
@@ -303,7 +671,7 @@ generated_guides = ui_guides(guide_data)
 
 build_skeleton(generated_guides)
 
-build_rig("skeleton_def:arm", "arm")"""
+build_rig("skeleton_def:rigdef_1", "arm")"""
 
 """
 guide_data is:
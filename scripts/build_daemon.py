@@ -0,0 +1,421 @@
+"""
+Build daemon: a pool of warm Maya interpreters serving build / export jobs over a local Unix socket.
+
+    mayapy build_daemon.py --socket /tmp/rigging_tool.sock --workers 4
+
+Every worker is a mayapy process that initializes maya.standalone once and then runs job after job, with the
+scene reset in between. A job that runs over its timeout gets its worker killed and replaced.
+
+Protocol: one JSON object per line, one response line per request.
+
+    {"id": 1, "type": "build", "job": {"definition": "cache/guides.json", "guides": ["arm"]}, "timeout": 60}
+    {"id": 2, "type": "export", "job": {"definition": "cache/guides.json", "output": "out/hero.mb"}}
+    {"id": 3, "type": "ping"} / {"type": "status"} / {"type": "shutdown"}
+
+    -> {"id": 1, "status": "ok", "result": {...}, "timings": {...}, "worker": 1234}
+    -> {"id": 1, "status": "failed" | "timeout", "error": "...", "traceback": "..."}
+
+Run with --worker stand-in to serve the same protocol without Maya (jobs may "sleep" and "fail"), e.g. to test
+pipeline tools against the daemon.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import queue
+import socket
+import socketserver
+import sys
+import threading
+import time
+import traceback
+
+try:
+    from Util import utils
+except Exception as e:
+    sys.path.append("C:/Users/Thomas Killick/Documents/maya/modules/rigging_tool")
+    from Util import utils
+
+
+DEFAULT_SOCKET = os.path.join(os.environ.get("TMPDIR", "/tmp"), "rigging_tool_build.sock")
+DEFAULT_TIMEOUT = 600.0
+JOB_TYPES = ("build", "export")
+
+
+class MayaWorker:
+    """
+    Runs jobs inside an initialized maya.standalone.
+    """
+
+    def setup(self):
+        utils.initialize_standalone()
+
+    def reset(self):
+        """
+        Empty scene and no build state left over from the previous job.
+        """
+
+        from maya import cmds
+        from Util import scene_index
+
+        cmds.file(new=True, force=True)
+        cmds.namespace(set=":")
+        scene_index.release_index()
+
+    def run(self, job_type, job, timings):
+        import batch_build
+
+        if job_type == "export" and not job.get("output"):
+            raise Exception("export jobs need an 'output' file.")
+        if job_type == "build":
+            job = dict(job, output=None)
+
+        built = batch_build.build_job(job, timings, new_scene=False)
+
+        return {
+            "output": job.get("output"),
+            "guides": built.get("created_guides", {}),
+            "joints": built.get("created_joints", {}),
+        }
+
+
+class StandInWorker:
+    """
+    Maya-free worker serving the same protocol. A job can ask it to "sleep" (seconds) or "fail" (message).
+    """
+
+    def setup(self):
+        pass
+
+    def reset(self):
+        pass
+
+    def run(self, job_type, job, timings):
+        start = time.perf_counter()
+        time.sleep(float(job.get("sleep", 0.0)))
+        timings["build"] = time.perf_counter() - start
+
+        if job.get("fail"):
+            raise Exception(str(job["fail"]))
+
+        return {"echo": job, "type": job_type}
+
+
+WORKERS = {"maya": MayaWorker, "stand-in": StandInWorker}
+
+
+def _worker_main(connection, worker_name):
+    """
+    Worker process loop: set up once, then reset / run / reply until told to stop (None).
+    """
+
+    start = time.perf_counter()
+    try:
+        worker = WORKERS[worker_name]()
+        worker.setup()
+    except Exception as e:
+        connection.send({"ready": False, "error": f"{type(e).__name__}: {e}", "traceback": traceback.format_exc()})
+        return
+    connection.send({"ready": True, "startup": time.perf_counter() - start})
+
+    while True:
+        try:
+            message = connection.recv()
+        except EOFError:
+            return
+        if message is None:
+            return
+
+        job_type, job = message
+        response = {"status": "ok", "timings": {}, "worker": os.getpid()}
+        start = time.perf_counter()
+        try:
+            worker.reset()
+            response["timings"]["reset"] = time.perf_counter() - start
+            response["result"] = worker.run(job_type, job, response["timings"])
+        except Exception as e:
+            response["status"] = "failed"
+            response["error"] = f"{type(e).__name__}: {e}"
+            response["traceback"] = traceback.format_exc()
+        response["timings"]["total"] = time.perf_counter() - start
+
+        connection.send(response)
+
+
+class WorkerProcess:
+    """
+    Parent side handle of one warm worker process.
+    """
+
+    def __init__(self, worker_name, context):
+        self.worker_name = worker_name
+        self.context = context
+        self.process = None
+        self.connection = None
+        self.startup = None
+        self.jobs = 0
+
+    def start(self, timeout=DEFAULT_TIMEOUT):
+        parent_connection, child_connection = self.context.Pipe()
+        self.process = self.context.Process(target=_worker_main, args=(child_connection, self.worker_name),
+                                            daemon=True)
+        self.process.start()
+        child_connection.close()
+        self.connection = parent_connection
+        self.jobs = 0
+
+        if not self.connection.poll(timeout):
+            self.kill()
+            raise Exception(f"Worker did not start within {timeout}s.")
+
+        ready = self.connection.recv()
+        if not ready["ready"]:
+            self.kill()
+            raise Exception(f"Worker failed to start: {ready['error']}")
+        self.startup = ready["startup"]
+
+    def run(self, job_type, job, timeout):
+        """
+        :return: response dictionary. On timeout the worker is killed, call restart() before reusing it.
+        """
+
+        self.connection.send((job_type, job))
+        self.jobs += 1
+
+        pid = self.pid
+        if not self.connection.poll(timeout):
+            self.kill()
+            return {"status": "timeout", "error": f"Job exceeded its {timeout}s timeout.", "worker": pid}
+
+        try:
+            return self.connection.recv()
+        except EOFError:
+            self.kill()
+            return {"status": "failed", "error": "Worker process died.", "worker": pid}
+
+    @property
+    def pid(self):
+        return self.process.pid if self.process else None
+
+    def alive(self):
+        return self.process is not None and self.process.is_alive()
+
+    def restart(self):
+        self.kill()
+        self.start()
+
+    def stop(self, timeout=5.0):
+        if self.alive():
+            try:
+                self.connection.send(None)
+            except (OSError, BrokenPipeError):
+                pass
+            self.process.join(timeout)
+        self.kill()
+
+    def kill(self):
+        if self.process is not None and self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        if self.connection is not None:
+            self.connection.close()
+        self.process = None
+        self.connection = None
+
+
+class WorkerPool:
+    """
+    Fixed size pool of WorkerProcess(). Jobs wait for an idle worker.
+    """
+
+    def __init__(self, size=1, worker_name="maya", mayapy=None):
+        if worker_name not in WORKERS:
+            raise Exception(f"Unknown worker: {worker_name}, expected one of {list(WORKERS)}")
+
+        context = multiprocessing.get_context("spawn")
+        if mayapy:
+            context.set_executable(mayapy)
+
+        self.worker_name = worker_name
+        self.workers = [WorkerProcess(worker_name, context) for _ in range(max(1, size))]
+        self._idle = queue.Queue()
+        self.completed = 0
+        self.failed = 0
+        self.timeouts = 0
+
+    def start(self):
+        for worker in self.workers:
+            worker.start()
+            self._idle.put(worker)
+
+    def stop(self):
+        for worker in self.workers:
+            worker.stop()
+
+    def run(self, job_type, job, timeout=DEFAULT_TIMEOUT):
+        worker = self._idle.get()
+        try:
+            if not worker.alive():
+                worker.restart()
+            response = worker.run(job_type, job, timeout)
+            if response["status"] == "timeout":
+                self.timeouts += 1
+                worker.restart()
+            elif response["status"] == "ok":
+                self.completed += 1
+            else:
+                self.failed += 1
+            return response
+        finally:
+            self._idle.put(worker)
+
+    def status(self):
+        return {
+            "worker": self.worker_name,
+            "size": len(self.workers),
+            "idle": self._idle.qsize(),
+            "completed": self.completed,
+            "failed": self.failed,
+            "timeouts": self.timeouts,
+            "workers": [{"pid": worker.pid, "alive": worker.alive(), "jobs": worker.jobs, "startup": worker.startup}
+                        for worker in self.workers],
+        }
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+
+            try:
+                request = json.loads(line)
+                response = self.server.daemon.handle(request)
+            except Exception as e:
+                response = {"status": "failed", "error": f"{type(e).__name__}: {e}"}
+
+            self.wfile.write((json.dumps(response, default=str) + "\n").encode("utf-8"))
+            self.wfile.flush()
+
+
+class _Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class BuildDaemon:
+    """
+    Socket front end of a WorkerPool.
+    """
+
+    def __init__(self, socket_path=DEFAULT_SOCKET, workers=1, worker_name="maya", mayapy=None,
+                 timeout=DEFAULT_TIMEOUT):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self.pool = WorkerPool(workers, worker_name=worker_name, mayapy=mayapy)
+        self.server = None
+
+    def handle(self, request):
+        """
+        Answer one protocol request. Malformed requests get a "failed" response (with their id) rather than an
+        exception, so clients can match the error to the request.
+        :param request: request dictionary.
+        :return: response dictionary.
+        """
+
+        if not isinstance(request, dict):
+            return {"status": "failed", "error": "Requests must be JSON objects."}
+
+        request_type = request.get("type")
+
+        if request_type == "ping":
+            response = {"status": "ok"}
+        elif request_type == "status":
+            response = {"status": "ok", "result": self.pool.status()}
+        elif request_type == "shutdown":
+            threading.Thread(target=self.server.shutdown, daemon=True).start()
+            response = {"status": "ok"}
+        elif request_type in JOB_TYPES:
+            job = request.get("job")
+            try:
+                timeout = float(request.get("timeout", self.timeout))
+            except (TypeError, ValueError):
+                timeout = None
+
+            if not isinstance(job, dict):
+                response = {"status": "failed", "error": "'job' must be an object."}
+            elif timeout is None:
+                response = {"status": "failed", "error": "'timeout' must be a number of seconds."}
+            else:
+                response = self.pool.run(request_type, job, timeout)
+        else:
+            response = {"status": "failed", "error": f"Unknown request type: {request_type}, expected one of "
+                                                     f"{list(JOB_TYPES) + ['ping', 'status', 'shutdown']}"}
+
+        if "id" in request:
+            response["id"] = request["id"]
+
+        return response
+
+    def serve_forever(self):
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+
+        self.pool.start()
+        self.server = _Server(self.socket_path, _RequestHandler)
+        self.server.daemon = self
+        print(f"Build daemon listening on {self.socket_path} with {len(self.pool.workers)} worker(s).",
+              file=sys.stderr)
+
+        try:
+            self.server.serve_forever()
+        finally:
+            self.server.server_close()
+            self.pool.stop()
+            if os.path.exists(self.socket_path):
+                os.remove(self.socket_path)
+
+
+def request(message, socket_path=DEFAULT_SOCKET, timeout=None):
+    """
+    Client helper: send one request to a running daemon and wait for its response.
+    :param message: request dictionary.
+    :param socket_path: daemon socket.
+    :param timeout: socket timeout in seconds.
+    :return: response dictionary.
+    """
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.settimeout(timeout)
+        client.connect(socket_path)
+        client.sendall((json.dumps(message) + "\n").encode("utf-8"))
+
+        with client.makefile("rb") as stream:
+            line = stream.readline()
+
+    if not line:
+        raise Exception("Build daemon closed the connection without a response.")
+
+    return json.loads(line)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Serve rig build / export jobs from warm Maya workers.")
+    parser.add_argument("--socket", default=DEFAULT_SOCKET, help="unix socket path.")
+    parser.add_argument("--workers", type=int, default=1, help="number of warm worker processes.")
+    parser.add_argument("--worker", choices=sorted(WORKERS), default="maya", help="worker implementation.")
+    parser.add_argument("--mayapy", default=None, help="mayapy executable for the workers.")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT, help="default per-job timeout (s).")
+
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    BuildDaemon(args.socket, workers=args.workers, worker_name=args.worker, mayapy=args.mayapy,
+                timeout=args.timeout).serve_forever()
+
+
+if __name__ == '__main__':
+    main()
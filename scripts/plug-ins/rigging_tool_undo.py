@@ -0,0 +1,25 @@
+"""
+Registers the riggingToolModifier command, the undo queue entry of om2 modifiers applied by the rigging tool.
+Loaded by Util.undo, see there.
+"""
+
+import maya.api.OpenMaya as om2
+
+try:
+    from Util import undo
+except Exception as e:
+    import sys
+    sys.path.append("C:/Users/Thomas Killick/Documents/maya/modules/rigging_tool")
+    from scripts.Util import undo
+
+
+def maya_useNewAPI():
+    pass
+
+
+def initializePlugin(plugin):
+    om2.MFnPlugin(plugin, "rigging_tool", "1.0").registerCommand(undo.COMMAND_NAME, undo.ModifierCommand.creator)
+
+
+def uninitializePlugin(plugin):
+    om2.MFnPlugin(plugin).deregisterCommand(undo.COMMAND_NAME)
@@ -0,0 +1,33 @@
+"""
+Tests run headless on the in-memory fake Maya (scripts/Util/fake_maya), every test starts from a new scene.
+"""
+
+import os
+import sys
+
+import pytest
+
+SCRIPTS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts")
+if SCRIPTS not in sys.path:
+    sys.path.insert(0, SCRIPTS)
+
+from Util import fake_maya
+
+if not fake_maya.is_installed():
+    fake_maya.install()
+
+
+@pytest.fixture(autouse=True)
+def new_scene():
+    from maya import cmds
+
+    cmds.file(new=True, force=True)
+    yield
+    cmds.namespace(set=":")
+
+
+@pytest.fixture
+def guide_data():
+    from Util import data, utils
+
+    return utils.read_definition(data.guide_data(), "arm", "leg")
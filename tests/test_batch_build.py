@@ -0,0 +1,36 @@
+import json
+
+from maya import cmds
+
+import batch_build
+from Util import data
+
+
+def _jobs_file(tmp_path, jobs):
+    (tmp_path / "guides.json").write_text(json.dumps(data.guide_data()))
+    path = tmp_path / "jobs.json"
+    path.write_text(json.dumps({"jobs": jobs}))
+
+    return str(path)
+
+
+def test_job_builds_and_saves_the_rig(tmp_path):
+    job, = batch_build.read_jobs(_jobs_file(tmp_path, [{"definition": "guides.json", "output": "out/hero.ma"}]))
+    assert job["output"] == str(tmp_path / "out" / "hero.ma")
+
+    result = batch_build.run_job(dict(job, index=0))
+
+    assert result["status"] == "ok", result.get("traceback")
+    assert {"new_scene", "load", "build", "save", "total"} <= set(result["timings"])
+    assert (tmp_path / "out" / "hero.ma").exists()
+    assert len(cmds.ls(type="ikHandle")) == 2
+
+
+def test_failed_job_is_reported(tmp_path):
+    job, = batch_build.read_jobs(_jobs_file(tmp_path, [{"definition": "guides.json", "output": "hero.fbx"}]))
+
+    result = batch_build.run_job(dict(job, index=3))
+
+    assert result["status"] == "failed" and result["index"] == 3
+    assert "Unsupported output type: .fbx" in result["error"] and result["traceback"]
+    assert "total" in result["timings"]
@@ -0,0 +1,182 @@
+import numpy as np
+import pytest
+from maya import cmds
+
+from Util import autorig_utils, batch_ops, math_backend, ops
+
+
+BENT = [[0.0, 0.0, 0.0], [2.0, 0.0, -1.0], [4.0, 0.0, 0.0]]
+ORDERS = sorted(batch_ops.ROTATION_ORDERS, key=batch_ops.ROTATION_ORDERS.get)
+
+
+def _rotate(vector, axis, degrees):
+    """
+    Reference rotation of a vector about a world axis (Rodrigues), independent of the kernels.
+    """
+
+    axis = np.identity(3)[axis]
+    radians = np.radians(degrees)
+    return (vector * np.cos(radians) + np.cross(axis, vector) * np.sin(radians) +
+            axis * np.dot(axis, vector) * (1.0 - np.cos(radians)))
+
+
+def _random_rotations(count, seed=0):
+    return np.random.default_rng(seed).uniform(-180.0, 180.0, (count, 3))
+
+
+@pytest.fixture(params=["openmaya", "numpy"])
+def backend(request):
+    previous = math_backend.BACKEND
+    yield math_backend.set_backend(request.param)
+    math_backend.BACKEND = previous
+
+
+# matrix kernels
+@pytest.mark.parametrize("order", ORDERS)
+def test_rotation_matrices_rotate_axes_in_order(order):
+    angles = _random_rotations(8)
+    matrices = batch_ops.rotation_matrices(angles, order)
+
+    # row vectors: basis vector i times the matrix is row i, rotated about the first axis of the order first.
+    for angle, matrix in zip(angles, matrices):
+        for i, basis in enumerate(np.identity(3)):
+            for axis in (batch_ops._AXES[name] for name in order):
+                basis = _rotate(basis, axis, angle[axis])
+            assert matrix[i] == pytest.approx(basis, abs=1e-12)
+
+
+@pytest.mark.parametrize("order", ORDERS)
+def test_compose_decompose_round_trip(order):
+    angles = _random_rotations(64, seed=1)
+    angles[:, batch_ops._AXES[order[1]]] /= 2.0  # middle axis in (-90, 90): one euler solution.
+    translate = np.random.default_rng(2).uniform(-10.0, 10.0, (64, 3))
+    scale = np.random.default_rng(3).uniform(0.5, 2.0, (64, 3))
+
+    matrices = batch_ops.build_matrices(translate, angles, scale, order)
+    decomposed = batch_ops.decompose_matrices(matrices, order)
+
+    for result, expected in zip(decomposed, (translate, angles, scale)):
+        assert np.abs(result - expected).max() < 1e-9
+    assert np.abs(batch_ops.build_matrices(*decomposed[:2], decomposed[2], order) - matrices).max() < 1e-12
+
+
+@pytest.mark.parametrize("order", ORDERS)
+def test_gimbal_lock_decomposes_to_the_same_matrix(order):
+    middle = batch_ops._AXES[order[1]]
+    angles = np.zeros((4, 3))
+    angles[:, middle] = [90.0, -90.0, 90.0, -90.0]
+    angles[2:, [axis for axis in range(3) if axis != middle]] = [[30.0, -45.0], [120.0, 10.0]]
+
+    matrices = batch_ops.build_matrices(orient=angles, rotation_order=order)
+    rotations = batch_ops.euler_rotations(matrices, order)
+
+    assert np.isfinite(rotations).all()
+    assert rotations[:, batch_ops._AXES[order[2]]] == pytest.approx(0.0)  # the locked angle goes to the first axis.
+    assert np.abs(batch_ops.build_matrices(orient=rotations, rotation_order=order) - matrices).max() < 1e-9
+
+
+@pytest.mark.parametrize("order", ORDERS)
+def test_ops_wrappers_match_the_kernels(backend, order):
+    angles = _random_rotations(4, seed=4)
+    angles[:, batch_ops._AXES[order[1]]] /= 2.0
+
+    for angle in angles:
+        matrix = batch_ops.build_matrices((1.0, 2.0, 3.0), angle, rotation_order=order)[0]
+        wrapped = backend.matrix(matrix)
+        assert ops.get_rotation(wrapped, order) == pytest.approx(tuple(angle))
+        assert ops.get_rotation(wrapped, batch_ops.ROTATION_ORDERS[order]) == pytest.approx(tuple(angle))
+
+    built = ops.buildMatrix(translate=(1.0, 2.0, 3.0), orient=angles[0], scale=(2.0, 1.0, 0.5))
+    assert backend.matrix_values(built) == pytest.approx(
+        batch_ops.build_matrices((1.0, 2.0, 3.0), angles[0], (2.0, 1.0, 0.5))[0])
+
+
+def test_multiply_and_inverse_match_the_kernels(backend):
+    rng = np.random.default_rng(5)
+    matrices = batch_ops.build_matrices(rng.uniform(-5, 5, (6, 3)), _random_rotations(6, seed=6),
+                                        rng.uniform(0.5, 2.0, (6, 3)))
+    parents = np.array([-1, 0, 1, 1, -1, 4])
+
+    world = batch_ops.world_matrices(matrices, parents)
+    for i, parent in enumerate(parents):
+        if parent < 0:
+            assert world[i] == pytest.approx(matrices[i])
+            continue
+        product = ops.multiply_matrices(backend.matrix(matrices[i]), backend.matrix(world[parent]))
+        assert backend.matrix_values(product) == pytest.approx(world[i])
+
+    # back to local: world * parent world inverse.
+    parent_world = np.array([world[parent] if parent >= 0 else np.identity(4) for parent in parents])
+    assert np.abs(batch_ops.relative_matrices(world, parent_world) - matrices).max() < 1e-9
+
+    for matrix in matrices:
+        inverse = ops.inverse_matrix(backend.matrix(matrix))
+        assert backend.matrix_values(inverse) == pytest.approx(np.linalg.inv(matrix))
+        identity = ops.multiply_matrices(backend.matrix(matrix), inverse)
+        assert backend.matrix_values(identity) == pytest.approx(np.identity(4), abs=1e-12)
+
+
+# pole vectors
+@pytest.mark.parametrize("chain, free_pole, start_pole", [
+    ([[0, 0, 0], [1, 0, 0], [2, 0, 0]], [1, 2, 0], [0, 1, 0]),  # along x: up_vector.
+    ([[0, 0, 0], [0, 1, 0], [0, 2, 0]], [2, 1, 0], [1, 0, 0]),  # along up_vector: the world axis furthest off it.
+    ([[1, 1, 1], [1, 1, 1], [1, 1, 1]], [1, 2, 1], [1, 2, 1]),  # collapsed: distance units along up_vector.
+    ([[1, 1, 1]], [1, 2, 1], [1, 2, 1]),                        # a single joint.
+])
+def test_straight_chains_fall_back_to_finite_poles(chain, free_pole, start_pole):
+    for free, expected in ((True, free_pole), (False, start_pole)):
+        pole = batch_ops.pole_vector_positions([chain], free=free)
+        assert np.isfinite(pole).all()
+        assert pole[0] == pytest.approx(expected)
+
+    # a zero pole vector (e.g. an unsolved handle) falls back the same way.
+    assert batch_ops.pole_vector_positions([chain], pole_vectors=[[0, 0, 0]])[0] == pytest.approx(free_pole)
+
+
+def test_straight_frames_hold_the_nearest_bent_frame():
+    straight = [[0, 0, 0], [1, 0, 0], [2, 0, 0]]
+    bent = [[0, 0, 0], [1, 0, -1], [2, 0, 0]]
+
+    poles = batch_ops.pole_vector_frames([[straight], [bent], [straight]])
+    assert poles[:, 0].tolist() == [[1, 0, -2], [1, 0, -3], [1, 0, -2]]
+
+    never_bent = batch_ops.pole_vector_frames(np.zeros((3, 1, 3, 3)))
+    assert np.isfinite(never_bent).all() and never_bent[:, 0].tolist() == [[0, 1, 0]] * 3
+
+
+def test_chains_of_different_lengths_solve_together():
+    four = [[0, 0, 0], [-2, 0, -1], [-4, 0, -2], [-5, 0, 0]]
+    positions, lengths = batch_ops.pad_chains([BENT, four, BENT[:2]])
+
+    assert positions.shape == (3, 4, 3) and lengths.tolist() == [3, 4, 2]
+    assert positions[2, 2:].tolist() == [BENT[1], BENT[1]]  # padded with the end joint.
+
+    together = batch_ops.pole_vector_positions(positions, lengths)
+    alone = [batch_ops.pole_vector_positions([chain])[0] for chain in (BENT, four, BENT[:2])]
+    assert together == pytest.approx(np.array(alone))
+
+    frames, frame_lengths = batch_ops.pad_chains([np.stack([BENT] * 2), np.stack([four] * 2)])
+    assert frames.shape == (2, 2, 4, 3) and frame_lengths.tolist() == [3, 4]
+    assert batch_ops.pole_vector_frames(frames, frame_lengths)[0] == pytest.approx(together[:2])
+
+    with pytest.raises(ValueError):
+        batch_ops.pad_chains([BENT, np.stack([four] * 2)])
+
+
+@pytest.mark.parametrize("free", [True, False])
+def test_position_pole_vector_keeps_its_math(free):
+    cmds.select(clear=True)
+    for i, position in enumerate(BENT):
+        cmds.joint(name=f":joint{i}", position=position)
+    handle = cmds.ikHandle(name="arm_IKHandle", startJoint="joint0", endEffector="joint2", solver="ikRPsolver")[0]
+
+    # the original per-handle formula.
+    root, bend, end = BENT
+    pole_vector = ops.normalise_vector(cmds.getAttr(f"{handle}.poleVector")[0])
+    if free:
+        origin, length = bend, ops.position_dot_product(root, end)
+    else:
+        origin, length = root, ops.position_dot_product(root, bend)
+    expected = [origin[i] + pole_vector[i] * length * 2.0 for i in range(3)]
+
+    assert autorig_utils.position_pole_vector(handle, f=free, distance=2.0) == pytest.approx(expected)
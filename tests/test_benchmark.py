@@ -0,0 +1,43 @@
+import json
+
+import benchmark
+
+
+def test_smallest_run_records_and_checks_history(tmp_path):
+    history = tmp_path / "history.json"
+    args = ["--sizes", "10", "--repeat", "1", "--history", str(history)]
+
+    assert benchmark.main(args) == 0
+    recorded = json.loads(history.read_text())
+    run, = recorded["runs"]
+    assert set(run["results"]) == set(benchmark.SHAPES)
+    assert all(set(run["results"][shape]["10"]) == set(benchmark.STEPS) for shape in benchmark.SHAPES)
+
+    # a recorded best no run can beat: every step regresses, and --no-record leaves the history alone.
+    for sizes in run["results"].values():
+        for steps in sizes.values():
+            steps.update(dict.fromkeys(steps, 0.0))
+    recorded["thresholds"]["min_delta"] = 0.0
+    history.write_text(json.dumps(recorded))
+
+    assert benchmark.main(args + ["--no-record"]) == 1
+    assert len(json.loads(history.read_text())["runs"]) == 1
+
+
+def test_regression_thresholds():
+    settings = {"depth": 100}
+    history = {
+        "thresholds": dict(benchmark.DEFAULT_THRESHOLDS, tolerance=0.5, min_delta=0.0, steps={"build_rig": 1.0}),
+        "runs": [{"backend": "fake", "settings": settings,
+                  "results": {"deep": {"10": {"build_skeleton": 1.0, "build_rig": 1.0}}}},
+                 {"backend": "maya", "settings": settings,
+                  "results": {"deep": {"10": {"build_skeleton": 0.1, "build_rig": 0.1}}}}],
+    }
+    results = {"deep": {"10": {"build_skeleton": 1.6, "build_rig": 1.6, "relocate_ns": 9.0}}}
+
+    # different generation settings aren't comparable.
+    assert not benchmark.find_regressions(results, history, "fake", {"depth": 10})
+
+    regression, = benchmark.find_regressions(results, history, "fake", settings)
+    assert regression["step"] == "build_skeleton"
+    assert regression["limit"] == 1.5 and regression["baseline"] == 1.0
@@ -0,0 +1,79 @@
+import os
+import threading
+import time
+
+import pytest
+
+import build_daemon
+
+
+@pytest.fixture
+def daemon(tmp_path):
+    socket_path = str(tmp_path / "build.sock")
+    daemon = build_daemon.BuildDaemon(socket_path, workers=1, worker_name="stand-in", timeout=30.0)
+    thread = threading.Thread(target=daemon.serve_forever, daemon=True)
+    thread.start()
+
+    deadline = time.monotonic() + 60.0
+    while not os.path.exists(socket_path):
+        assert thread.is_alive() and time.monotonic() < deadline, "build daemon didn't start"
+        time.sleep(0.05)
+
+    yield daemon
+
+    if thread.is_alive():
+        build_daemon.request({"type": "shutdown"}, socket_path, timeout=10.0)
+        thread.join(30.0)
+    assert not os.path.exists(socket_path)
+
+
+def _request(daemon, message):
+    return build_daemon.request(message, daemon.socket_path, timeout=30.0)
+
+
+def test_banner_goes_to_stderr(capsys, daemon):
+    captured = capsys.readouterr()
+    assert "listening on" in captured.err and not captured.out
+
+
+def test_ping_status_and_jobs(daemon):
+    assert _request(daemon, {"id": 1, "type": "ping"}) == {"status": "ok", "id": 1}
+
+    response = _request(daemon, {"id": 2, "type": "build", "job": {"guides": ["arm"]}})
+    assert response["status"] == "ok" and response["id"] == 2
+    assert response["result"] == {"echo": {"guides": ["arm"]}, "type": "build"}
+    assert {"reset", "build", "total"} <= set(response["timings"])
+
+    failed = _request(daemon, {"id": 3, "type": "export", "job": {"fail": "no output"}})
+    assert failed["status"] == "failed" and failed["id"] == 3
+    assert failed["error"] == "Exception: no output" and failed["traceback"]
+
+    status = _request(daemon, {"type": "status"})["result"]
+    assert (status["completed"], status["failed"], status["timeouts"]) == (1, 1, 0)
+    worker, = status["workers"]
+    assert worker["alive"] and worker["jobs"] == 2 and worker["pid"] == response["worker"]
+
+
+def test_timed_out_job_restarts_its_worker(daemon):
+    first = _request(daemon, {"id": "slow", "type": "build", "job": {"sleep": 30}, "timeout": 0.5})
+    assert first["status"] == "timeout" and first["id"] == "slow"
+
+    status = _request(daemon, {"type": "status"})["result"]
+    worker, = status["workers"]
+    assert status["timeouts"] == 1 and worker["alive"] and worker["pid"] != first["worker"]
+
+    # the replacement worker takes the next job.
+    assert _request(daemon, {"type": "build", "job": {}})["worker"] == worker["pid"]
+
+
+def test_bad_requests_fail_with_their_id(daemon):
+    unknown = _request(daemon, {"id": 4, "type": "render"})
+    assert unknown["status"] == "failed" and unknown["id"] == 4 and "Unknown request type" in unknown["error"]
+
+    assert _request(daemon, {"id": 5, "type": "build", "job": "arm"}) == {
+        "status": "failed", "error": "'job' must be an object.", "id": 5}
+    assert _request(daemon, {"id": 6, "type": "build", "job": {}, "timeout": "soon"})["id"] == 6
+    assert _request(daemon, ["ping"]) == {"status": "failed", "error": "Requests must be JSON objects."}
+
+    # the daemon keeps serving after bad requests.
+    assert _request(daemon, {"type": "ping"})["status"] == "ok"
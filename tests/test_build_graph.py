@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+from maya import cmds
+
+import build
+from Util import autorig_utils
+from Util import batch_ops
+from Util import build_graph
+
+
+def test_executors_compute_the_same_plans(guide_data):
+    graph = build.rig_graph()
+    contexts = [{"rigdef": f"rigdef_{i + 1}", "guide_data": guide_data} for i in range(3)]
+
+    serial = build_graph.compute(graph, contexts, executor="serial")
+    for executor in ("thread", "process"):
+        computed = build_graph.compute(graph, contexts, workers=2, executor=executor)
+
+        for expected, result in zip(serial, computed):
+            assert result["rigdef"] == expected["rigdef"]
+            for stage in ("guides", "skeleton", "poles"):
+                assert list(result[stage]) == list(expected[stage])
+                for guide_type, plan in expected[stage].items():
+                    for key, value in plan.items():
+                        np.testing.assert_array_equal(result[stage][guide_type][key], value)
+
+
+def test_chain_paths_follow_the_deepest_branch():
+    # root -> 1 -> 2 and root -> 3 -> 4 -> 5, a second root 6 -> 7.
+    parents = [-1, 0, 1, 0, 3, 4, -1, 6]
+
+    assert build_graph.chain_paths(parents) == [[0, 3, 4, 5], [6, 7]]
+    assert build_graph.chain_paths([-1, 0, 0]) == [[0, 1]]
+
+
+def test_planned_poles_match_poles_solved_in_the_scene(guide_data):
+    built, = build.build_many([guide_data], executor="serial")
+
+    assert sorted(built["poles"]) == ["arm", "leg"]
+    for system in built["rig"]:
+        positions = autorig_utils.world_positions(system["joints"])
+        expected = batch_ops.pole_vector_positions(positions[np.newaxis], free=False)[0]
+        assert cmds.xform(system["pole"], q=True, ws=True, t=True) == pytest.approx(expected.tolist())
@@ -0,0 +1,37 @@
+from maya import cmds
+
+import build
+from Util import call_counter
+
+
+def test_counts_cmds_and_api_entry_points(guide_data):
+    build.prep_scene(guide_data)
+    generated = build.generate_guide_from_cache(guide_data[0])
+
+    with call_counter.CallCounter() as counter:
+        build.build_skeleton(generated, guide_data)
+    assert cmds.ls("skeleton_def:rigdef_1:arm:*", type="joint")
+
+    api = counter.api_commands()
+    assert "om2.MDagModifier" in api and "om2.MSelectionList" in api
+    assert counter.total() == counter.total(commands=api) + counter.total(commands=set(counter.counts) - set(api))
+    assert counter.total(callers=["build._create_joints"], commands=["om2.MDagModifier"]) == 1
+
+    with call_counter.CallCounter(api=False) as cmds_only:
+        build.build_skeleton(generated, guide_data)
+    assert cmds_only.total() and not cmds_only.api_commands()
+
+
+
+def test_api_objects_still_work_while_counting():
+    from Util import autorig_utils
+
+    cmds.select(clear=True)
+    cmds.joint(name=":joint0", position=(1, 2, 3))
+
+    with call_counter.CallCounter() as counter:
+        sampled = autorig_utils.sample_transforms(["joint0"])
+
+    assert sampled["translate"].tolist() == [[1.0, 2.0, 3.0]]
+    assert counter.total(commands=["om2.MSelectionList"]) == 1
+    assert not isinstance(autorig_utils.om2, call_counter._APIProxy)
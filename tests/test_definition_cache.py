@@ -0,0 +1,105 @@
+import os
+import json
+import pickle
+
+import pytest
+from maya import cmds
+
+import build
+from Util import data, definition_cache, utils
+
+
+def _write(path, definition, mtime=None):
+    path.write_text(json.dumps(definition))
+    if mtime is not None:
+        os.utime(path, ns=(mtime, mtime))
+    return str(path)
+
+
+def test_edited_files_are_reloaded(tmp_path):
+    cache = definition_cache.DefinitionCache()
+    path = _write(tmp_path / "rig.json", {"value": 1}, mtime=1_000_000_000)
+
+    first = cache.load(path)
+    assert cache.load(path) is first and (cache.hits, cache.misses) == (1, 1)
+
+    _write(tmp_path / "rig.json", {"value": 22}, mtime=1_000_000_000)  # same mtime, new size.
+    assert cache.load(path) == {"value": 22}
+
+    _write(tmp_path / "rig.json", {"value": 33}, mtime=2_000_000_000)  # same size, new mtime.
+    assert cache.load(path) == {"value": 33} and cache.misses == 3
+
+    os.remove(path)
+    with pytest.raises(FileNotFoundError):
+        cache.load(path)
+
+
+def test_least_recently_used_is_evicted(tmp_path):
+    cache = definition_cache.DefinitionCache(max_entries=2)
+    a, b, c = (_write(tmp_path / f"{name}.json", {"name": name}) for name in "abc")
+
+    cache.load(a)
+    cache.load(b)
+    cache.load(a)  # b is now the least recently used.
+    cache.load(c)
+
+    assert len(cache) == 2 and a in cache and c in cache and b not in cache
+
+    cache.invalidate(a)
+    assert a not in cache
+    cache.invalidate()
+    assert not len(cache)
+
+
+def test_find_indexes_the_folder(tmp_path):
+    cache = definition_cache.DefinitionCache()
+    _write(tmp_path / "guides_old.json", {})
+    assert cache.find(str(tmp_path), "guides") == str(tmp_path / "guides_old.json")
+
+    _write(tmp_path / "guides.json", {})  # an exact match wins, new files are picked up.
+    assert cache.find(str(tmp_path), "guides") == str(tmp_path / "guides.json")
+    assert cache.find(str(tmp_path), "arms") is None and cache.find(str(tmp_path / "missing"), "guides") is None
+
+
+def test_definitions_are_read_only(tmp_path):
+    definition = definition_cache.load(_write(tmp_path / "rig.json", {"guides": {"joints": [1, [2, 3]]}}))
+
+    with pytest.raises(TypeError):
+        definition["guides"] = {}
+    with pytest.raises(TypeError):
+        definition["guides"].update(joints=[])
+    with pytest.raises(TypeError):
+        definition.setdefault("other", 1)
+    assert definition["guides"]["joints"] == (1, (2, 3))
+
+    editable = definition_cache.thaw(definition)
+    editable["guides"]["joints"].append(4)
+    assert editable == {"guides": {"joints": [1, [2, 3], 4]}} and type(editable["guides"]) is dict
+
+    restored = pickle.loads(pickle.dumps(definition))
+    assert type(restored) is dict and restored == definition
+    assert json.loads(json.dumps(definition)) == {"guides": {"joints": [1, [2, 3]]}}
+
+
+def test_build_does_not_edit_definitions(tmp_path):
+    path = _write(tmp_path / "guides.json", data.guide_data())
+    definition = utils.load_definition(path)
+    guide_data = utils.read_definition(definition, "arm", "leg")
+
+    # a frozen definition raises on any edit, the whole build runs on one.
+    build.prep_scene(guide_data)
+    generated = {}
+    for entry in guide_data:
+        created = build.generate_guide_from_cache(entry)
+        generated.update(dict.fromkeys(created, created))
+    for guide_type, created in generated.items():
+        build.build_skeleton(created, guide_data)
+        build.build_rig(f"{build.SKELETON_ROOT}:rigdef_1", guide_type)
+    cmds.xform("Guides:rigdef_1:arm:joint1", t=(0, 5, 1), ws=True)
+    assert build.update_rig(generated, guide_data) == ["arm"]
+
+    cmds.file(new=True, force=True)
+    build.build_many([guide_data], executor="serial")
+
+    assert utils.load_definition(path) is definition
+    assert definition_cache.thaw(definition) == data.guide_data()
@@ -0,0 +1,46 @@
+from maya import cmds
+import maya.api.OpenMaya as om2
+
+
+def test_modifier_is_undone_with_its_chunk():
+    from Util import undo
+
+    cmds.undoInfo(openChunk=True, chunkName="build")
+    modifier = om2.MDagModifier()
+    modifier.renameNode(modifier.createNode("transform"), "built")
+    undo.apply(modifier)
+    cmds.undoInfo(closeChunk=True)
+    assert cmds.ls("built")
+
+    cmds.undo()
+    assert not cmds.ls("built")
+
+    cmds.redo()
+    assert cmds.ls("built")
+
+
+def test_ik_handle_is_undoable():
+    cmds.select(clear=True)
+    for i, position in enumerate([(0, 0, 0), (2, 0, -1), (4, 0, 0)]):
+        cmds.joint(name=f":joint{i}", position=position)
+
+    handle, effector = cmds.ikHandle(name="arm_IKHandle", startJoint="joint0", endEffector="joint2")
+    assert cmds.listConnections(f"{handle}.endEffector") == [effector]
+
+    cmds.undo()
+    assert not cmds.ls(type=["ikHandle", "ikEffector"])
+
+    cmds.redo()
+    assert cmds.listConnections(f"{handle}.endEffector") == [effector]
+
+
+def test_namespace_rename_is_reported():
+    renamed = []
+    callback_id = om2.MNamespaceMessage.addNamespaceRenamedCallback(lambda *args: renamed.append(args))
+
+    cmds.namespace(add="old")
+    cmds.namespace(rename=("old", "new"))
+    om2.MMessage.removeCallback(callback_id)
+    cmds.namespace(rename=("new", "newer"))
+
+    assert len(renamed) == 1
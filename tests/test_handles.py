@@ -0,0 +1,36 @@
+from maya import cmds
+
+from Util import autorig_utils, handles
+
+
+def _chain():
+    cmds.select(clear=True)
+    for i, position in enumerate([(0, 0, 0), (2, 0, -1), (4, 0, 0)]):
+        cmds.joint(name=f":joint{i}", position=position)
+
+    return handles.as_node(cmds.ikHandle(name=":handle", startJoint="joint0", endEffector="joint2")[0])
+
+
+def test_ik_queries_follow_renamed_nodes():
+    handle = _chain()
+    start = handle.source("startJoint")
+    assert start.name == "joint0" and handle.parent() is None
+    assert handles.Node("joint1").parent() == start
+
+    cmds.rename("joint0", "root")
+    cmds.rename("handle", "arm_IKHandle")
+
+    assert handle.source("startJoint") == start
+    assert autorig_utils.get_ik_joints(handle) == ["root", "joint1", "joint2"]
+    assert autorig_utils.position_pole_vector(handle) == autorig_utils.position_pole_vector("arm_IKHandle")
+
+
+def test_api1_object_uses_the_current_path():
+    import maya.OpenMaya as om
+
+    _chain()
+    joint = handles.as_node("joint2")
+    cmds.rename("joint2", "end")
+
+    assert om.MFnDependencyNode(joint.api1_object()).name() == "end"
+    assert autorig_utils.getMObject(joint) == joint.api1_object()
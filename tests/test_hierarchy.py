@@ -0,0 +1,42 @@
+import pytest
+from maya import cmds
+
+from Util import hierarchy
+
+
+def test_names_are_unique_in_the_scene():
+    # "elbow" is unique within the snapshot, but another "elbow" in the scene makes Maya's name "L_arm|elbow".
+    snapshot = hierarchy.HierarchySnapshot(["|L_arm", "|L_arm|elbow"], ["joint", "joint"], ["L_arm", "L_arm|elbow"])
+
+    assert snapshot.descend("L_arm") == ["L_arm", "L_arm|elbow"]
+    assert snapshot.parent("elbow") == "L_arm"
+    assert hierarchy.HierarchySnapshot(["|L_arm", "|L_arm|elbow"], ["joint", "joint"]).name(1) == "|L_arm|elbow"
+
+
+def test_from_scene_names_resolve_in_cmds():
+    cmds.select(clear=True)
+    for i in range(3):
+        cmds.joint(name=f":joint{i}", position=(i, 0, 0))
+
+    snapshot = hierarchy.HierarchySnapshot.from_scene("joint1")
+
+    names = snapshot.descend("joint0")
+    assert names == cmds.ls(names) == ["joint0", "joint1", "joint2"]
+    assert snapshot.long_names[2] == "|joint0|joint1|joint2"
+
+
+def test_chain_end_follows_the_deepest_branch():
+    # a wrist with a short thumb before the longer finger, a locator at the finger tip.
+    long_names = ["|arm", "|arm|wrist", "|arm|wrist|thumb", "|arm|wrist|finger", "|arm|wrist|finger|tip",
+                  "|arm|wrist|finger|tip|loc"]
+    names = [name.rpartition("|")[2] for name in long_names]
+    snapshot = hierarchy.HierarchySnapshot(long_names, ["joint"] * 5 + ["transform"], names)
+
+    assert snapshot.chain_end("arm") == "loc" and snapshot.chain_end("arm", joints_only=True) == "tip"
+    assert snapshot.branches("wrist", joints_only=True) == [["wrist", "thumb"], ["wrist", "finger", "tip"]]
+    assert snapshot.path_between("arm", "tip") == ["arm", "wrist", "finger", "tip"]
+    assert snapshot.ascend("tip") == ["tip", "finger", "wrist", "arm"]
+    assert snapshot.order(["tip", "arm", "thumb"]) == ["arm", "thumb", "tip"]
+
+    with pytest.raises(Exception, match="not a descendant"):
+        snapshot.path_between("thumb", "tip")
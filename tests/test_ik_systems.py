@@ -0,0 +1,66 @@
+import pytest
+from maya import cmds
+
+import build
+from Util import autorig_utils
+
+
+def _chain(prefix="", positions=((0, 0, 0), (2, 0, -1), (4, 0, 0))):
+    cmds.select(clear=True)
+    for i, position in enumerate(positions):
+        cmds.joint(name=f":{prefix}joint{i}", position=position)
+
+    return f"{prefix}joint0"
+
+
+@pytest.mark.parametrize("free_pole", [False, True])
+def test_poles_match_position_pole_vector(free_pole):
+    start = _chain()
+    handle = cmds.ikHandle(name="check", startJoint=start, endEffector="joint2", solver="ikRPsolver")[0]
+    expected = autorig_utils.position_pole_vector(handle, f=free_pole)
+    cmds.delete(handle)
+
+    limb, = build.generate_ik_systems([{"start": start, "namespace": ":", "name": "arm"}], free_pole=free_pole)
+
+    assert cmds.xform(limb["pole"], q=True, ws=True, t=True) == pytest.approx(expected)
+
+
+def test_default_places_poles_off_the_start_joint():
+    _chain()
+    limb, = build.generate_ik_systems([{"start": "joint0", "namespace": ":", "name": "arm"}])
+
+    # generate_ik_rig() always built with position_pole_vector(f=False).
+    handle = cmds.ikHandle(name="check", startJoint="joint0", endEffector="joint2", solver="ikRPsolver")[0]
+    expected = autorig_utils.position_pole_vector(handle, f=False)
+    assert cmds.xform(limb["pole"], q=True, ws=True, t=True) == pytest.approx(expected)
+
+
+def test_limbs_of_different_lengths_share_a_namespace():
+    left = _chain("l_")
+    right = _chain("r_", positions=((0, 0, 0), (-2, 0, -1), (-4, 0, 0), (-5, 0, 1)))
+
+    systems = build.generate_ik_systems([{"start": left, "namespace": ":", "name": "l_arm"},
+                                         {"start": right, "namespace": ":", "name": "r_arm"}])
+
+    assert [len(system["joints"]) for system in systems] == [3, 4]
+    assert cmds.ls([system["handle"] for system in systems]) == ["l_arm_IKHandle", "r_arm_IKHandle"]
+    assert len(cmds.ls(type="poleVectorConstraint")) == 2
+
+    with pytest.raises(Exception, match="already exists"):
+        build.generate_ik_systems([{"start": left, "namespace": ":", "name": "l_arm"}])
+
+
+def test_ik_system_is_one_undo_step():
+    _chain()
+
+    limb, = build.generate_ik_systems([{"start": "joint0", "namespace": ":", "name": "arm"}])
+    assert cmds.ls([limb["handle"], limb["effector"], limb["pole"]]) == ["arm_IKHandle", "arm_IKEffector", "arm_IKPole"]
+
+    cmds.undo()
+    assert not cmds.ls(["*_IK*", "ik_*"])
+    assert not cmds.ls(type=["ikHandle", "ikEffector", "poleVectorConstraint"])
+    assert len(cmds.ls(type="joint")) == 3
+
+    cmds.redo()
+    assert cmds.ls(limb["joints"]) and cmds.ls(type="poleVectorConstraint")
+    assert cmds.listConnections(f"{limb['handle']}.endEffector") == ["arm_IKEffector"]
@@ -0,0 +1,70 @@
+import os
+import sys
+import subprocess
+
+import numpy as np
+import pytest
+
+from Util import math_backend
+
+SCRIPTS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts")
+
+
+def _headless(code, **env):
+    """
+    Run code in a fresh interpreter without Maya (and without the fake), scripts on the path.
+    """
+
+    environment = {key: value for key, value in os.environ.items() if key != math_backend.BACKEND_ENV_VAR}
+    environment.update(env, PYTHONPATH=SCRIPTS)
+    return subprocess.run([sys.executable, "-c", code], env=environment, capture_output=True, text=True)
+
+
+def test_ops_imports_headless_on_numpy():
+    result = _headless("from Util import ops, math_backend\n"
+                       "print(math_backend.BACKEND.name, ops.multiply_matrices(ops.identity_matrix(), "
+                       "ops.identity_matrix()).shape)")
+
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.split() == ["numpy", "(4,", "4)"]
+
+
+def test_unknown_backend_fails_on_import():
+    result = _headless("from Util import ops", RIGGING_TOOL_MATH_BACKEND="eigen")
+
+    assert result.returncode != 0
+    assert "Unknown math backend: eigen. Expected one of ['openmaya', 'numpy']" in result.stderr
+
+
+def test_openmaya_backend_needs_maya():
+    result = _headless("from Util import ops", RIGGING_TOOL_MATH_BACKEND="openmaya")
+
+    assert result.returncode != 0 and "maya.OpenMaya is not importable" in result.stderr
+
+
+def test_selection_and_override(monkeypatch):
+    monkeypatch.delenv(math_backend.BACKEND_ENV_VAR, raising=False)
+    assert math_backend.get_backend().name == "openmaya"  # OpenMaya (here the fake) is preferred when importable.
+
+    monkeypatch.setenv(math_backend.BACKEND_ENV_VAR, "numpy")
+    assert math_backend.get_backend().name == "numpy"
+    assert math_backend.get_backend("openmaya").name == "openmaya"  # an explicit name wins over the variable.
+
+    with pytest.raises(Exception, match="Unknown math backend"):
+        math_backend.get_backend("eigen")
+
+
+def test_set_backend_swaps_what_ops_uses():
+    from Util import ops
+
+    previous = math_backend.BACKEND
+    try:
+        assert isinstance(math_backend.set_backend("numpy"), math_backend.NumpyBackend)
+        assert isinstance(ops.identity_matrix(), np.ndarray)
+        assert ops.normalise_vector((0.0, 3.0, 4.0)) == pytest.approx((0.0, 0.6, 0.8))
+
+        math_backend.set_backend("openmaya")
+        assert not isinstance(ops.identity_matrix(), np.ndarray)
+        assert ops.normalise_vector((0.0, 3.0, 4.0)) == pytest.approx((0.0, 0.6, 0.8))
+    finally:
+        math_backend.BACKEND = previous
@@ -0,0 +1,127 @@
+import pytest
+from maya import cmds
+
+import build
+from Util import namespaces
+
+
+def _populate(layout):
+    """
+    :param layout: {namespace: [node names]}, namespaces created with their parents.
+    """
+
+    for namespace, names in layout.items():
+        parent = ""
+        for part in namespace.split(":"):
+            if not cmds.namespace(exists=f":{parent}:{part}" if parent else f":{part}"):
+                cmds.namespace(add=part, parent=f":{parent}")
+            parent = f"{parent}:{part}" if parent else part
+        for name in names:
+            cmds.createNode("transform", name=f":{namespace}:{name}")
+
+
+def test_tree_snapshot():
+    _populate({"Guides:rigdef_1:arm": ["joint0"], "arm": ["joint1"]})
+
+    tree = namespaces.NamespaceTree.from_scene()
+    assert "Guides:rigdef_1:arm" in tree and ":arm" in tree and "UI" not in tree
+    assert tree.children("Guides") == ["Guides:rigdef_1"]
+    assert tree.find("arm") == ["Guides:rigdef_1:arm", "arm"]
+    assert tree.members("arm") == {"joint1"}
+
+    tree.rename("arm", "Guides:arm")
+    assert "arm" not in tree and tree.members("Guides:arm") == {"joint1"}
+
+
+def test_plan_adds_missing_layout():
+    tree = namespaces.NamespaceTree([])
+    plan = namespaces.plan_guide_namespaces(tree, ["arm", "leg", "arm"])
+
+    assert plan.operations == [("add", "Guides"), ("add", "Guides:rigdef_1"), ("add", "Guides:rigdef_1:arm"),
+                               ("add", "Guides:rigdef_1:leg")]
+    assert not namespaces.plan_guide_namespaces(tree, ["arm", "leg"])  # the tree already holds the plan.
+
+
+def test_plan_renames_stray_into_place():
+    tree = namespaces.NamespaceTree(["Guides", "Guides:rigdef_1", "import:arm", "import:arm:sub", "skeleton_def:arm"],
+                                    members={"import:arm": ["joint0"]})
+    plan = namespaces.plan_guide_namespaces(tree, ["arm"])
+
+    assert plan.operations == [("rename", "import:arm", "Guides:rigdef_1:arm")]
+    assert "Guides:rigdef_1:arm:sub" in tree and "skeleton_def:arm" in tree
+
+
+def test_plan_merges_stray_into_existing_target():
+    members = {"arm": ["joint0", "joint1"], "Guides:rigdef_1:arm": ["joint0"]}
+    tree = namespaces.NamespaceTree(["Guides", "Guides:rigdef_1", "Guides:rigdef_1:arm", "arm"], members=members)
+    plan = namespaces.plan_guide_namespaces(tree, ["arm"])
+
+    assert plan.deletes == [":arm:joint0"]
+    assert plan.operations == [("move", "arm", "Guides:rigdef_1:arm"), ("remove", "arm")]
+    assert tree.members("Guides:rigdef_1:arm") == {"joint0", "joint1"} and "arm" not in tree
+
+
+def test_plan_records_conflicts():
+    members = {"arm": ["joint0"], "Guides:rigdef_1:arm": ["joint0"]}
+    layout = ["Guides", "Guides:rigdef_1", "Guides:rigdef_1:arm", "arm"]
+
+    plan = namespaces.plan_guide_namespaces(namespaces.NamespaceTree(layout, members=members), ["arm"], force=False)
+    assert not plan and plan.conflicts == [{"namespace": "arm", "target": "Guides:rigdef_1:arm",
+                                            "reason": "name clash", "names": ["joint0"]}]
+
+    layout += ["arm:sub", "Guides:rigdef_1:arm:sub"]
+    tree = namespaces.NamespaceTree(layout, members=dict.fromkeys(layout, []))
+    plan = namespaces.plan_guide_namespaces(tree, ["arm"])
+    assert not plan and plan.conflicts[0]["reason"] == "namespace clash" and plan.conflicts[0]["names"] == ["sub"]
+    assert "arm" in tree
+
+
+def test_prep_scene_applies_plan(guide_data):
+    _populate({"Guides:rigdef_1:arm": ["joint0"], "arm": ["joint0", "joint1"], "leg": ["joint0"]})
+
+    plan = build.prep_scene(guide_data)
+
+    assert not plan.conflicts
+    assert sorted(cmds.ls("Guides:rigdef_1:arm:*")) == ["Guides:rigdef_1:arm:joint0", "Guides:rigdef_1:arm:joint1"]
+    assert cmds.ls("Guides:rigdef_1:leg:*") == ["Guides:rigdef_1:leg:joint0"]
+    assert not cmds.namespace(exists=":arm") and not cmds.namespace(exists=":leg")
+    assert not build.prep_scene(guide_data)  # nothing left to do.
+
+
+def test_plan_relocation_report():
+    members = {"rigdef_1": [], "rigdef_1:arm": ["joint0"], "import:arm": ["joint0", "joint1"], "arm": []}
+    tree = namespaces.NamespaceTree(list(members), members=members)
+
+    report = namespaces.plan_relocation(tree, "arm", parent="rigdef_1").report()
+    assert report == {"added": [], "renamed": [], "merged": [("import:arm", "rigdef_1:arm")],
+                      "removed": ["import:arm", "arm"], "deleted": [":import:arm:joint0"], "conflicts": []}
+
+    tree = namespaces.NamespaceTree(["rigdef_1", "import:arm"], members={"import:arm": ["joint0"]})
+    report = namespaces.plan_relocation(tree, "arm", parent="rigdef_1", merge=False).report()
+    assert report["renamed"] == [("import:arm", "rigdef_1:arm")] and tree.children("rigdef_1") == ["rigdef_1:arm"]
+
+
+def test_plan_relocation_without_merge_leaves_full_sources():
+    members = {"rigdef_1": [], "rigdef_1:arm": ["joint0"], "import:arm": ["joint1"], "arm": []}
+    tree = namespaces.NamespaceTree(list(members), members=members)
+
+    plan = namespaces.plan_relocation(tree, "arm", parent="rigdef_1", merge=False)
+    assert plan.operations == [("remove", "arm")]
+    assert plan.conflicts == [{"namespace": "import:arm", "target": "rigdef_1:arm", "reason": "target exists",
+                               "names": []}]
+
+
+def test_relocate_ns_applies_plan():
+    from Util import autorig_utils
+
+    _populate({"rigdef_1:arm": ["joint0"], "import:arm": ["joint0", "joint1"], "other:arm:sub": ["joint2"]})
+
+    report = autorig_utils.relocate_ns("arm", parent="rigdef_1")
+
+    assert report["deleted"] == [":import:arm:joint0"] and not report["conflicts"]
+    expected = ["rigdef_1:arm:joint0", "rigdef_1:arm:joint1", "rigdef_1:arm:sub:joint2"]
+    assert cmds.ls(expected) == expected and not cmds.ls("import:*")
+    assert not cmds.namespace(exists=":import:arm") and not cmds.namespace(exists=":other:arm")
+
+    with pytest.raises(Exception, match="does not exist"):
+        autorig_utils.relocate_ns("arm", parent="missing")
@@ -0,0 +1,54 @@
+import pytest
+from maya import cmds
+
+from Util import autorig_utils
+from Util import scene_index
+from Util.fake_maya import scene
+
+
+@pytest.fixture
+def index():
+    for namespace in ("Guides:arm", "Guides:farm", "Guides:arm:twist"):
+        autorig_utils.create_ns_path(namespace)
+        cmds.createNode("transform", name=f":{namespace}:joint0")
+
+    index = scene_index.SceneIndex()
+    index.build()
+    yield index
+    index.stop_tracking()
+
+
+def test_callbacks_are_released():
+    registered = len(scene.get_scene()._callbacks)
+
+    index = scene_index.SceneIndex()
+    assert index.tracking and len(scene.get_scene()._callbacks) > registered
+
+    index.stop_tracking()
+    assert not index.tracking and index.dirty
+    assert len(scene.get_scene()._callbacks) == registered
+
+
+def test_search_matches_whole_segments(index):
+    assert sorted(index.search("arm")) == ["|Guides:arm:joint0", "|Guides:arm:twist:joint0"]
+    assert sorted(index.search("Guides:arm", match="twist")) == ["|Guides:arm:twist:joint0"]
+    assert list(index.find("Guides:farm")) == ["|Guides:farm:joint0"]
+
+
+def test_deleted_and_renamed_nodes_update_in_place(index):
+    cmds.delete("Guides:farm:joint0")
+    cmds.rename("Guides:arm:joint0", "Guides:arm:elbow")
+
+    # the callbacks kept the index current, no rebuild needed.
+    assert not index.dirty
+    assert not index.find("Guides:farm") and "Guides:farm" not in index.namespaces()
+    assert list(index.find("Guides:arm")) == ["|Guides:arm:elbow"]
+    assert list(index.find_name("elbow")) == ["|Guides:arm:elbow"]
+
+
+def test_namespace_rename_rebuilds(index):
+    cmds.namespace(rename=("Guides:arm", "leg"))
+
+    assert index.dirty
+    assert sorted(index.search("leg")) == ["|Guides:leg:joint0", "|Guides:leg:twist:joint0"]
+    assert not index.search("arm")
@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+from maya import cmds
+
+import benchmark
+import build
+from Util import batch_ops
+from Util import call_counter
+from Util import utils
+
+
+def test_branching_orients_keep_every_joint_in_place():
+    # a root with two branches, the second branching again.
+    positions = [(0, 0, 0), (2, 1, 0), (4, 1, 1), (1, -2, 0), (2, -3, 1), (2, -3, -1)]
+    parents = [-1, 0, 1, 0, 3, 3]
+    outside = batch_ops.build_matrices(translate=(1, 2, 3), orient=(10, 20, 30))
+
+    joint_orients, translations, world_matrices = batch_ops.solve_chain_orients(positions, parents, outside)
+
+    local = batch_ops.build_matrices(translations, joint_orients)
+    local[0] = local[0] @ outside[0]  # world_matrices() treats -1 as the scene root.
+    recomposed = batch_ops.world_matrices(local, parents)
+
+    np.testing.assert_allclose(recomposed, world_matrices, atol=1e-9)
+    np.testing.assert_allclose(recomposed[:, 3, :3], positions, atol=1e-9)
+    # branching joints aim at their first child.
+    for joint, child in ((0, 1), (3, 4)):
+        aim = batch_ops.normalise_vectors(np.subtract(positions[child], positions[joint]))[0]
+        np.testing.assert_allclose(world_matrices[joint, 0, :3], aim, atol=1e-9)
+
+
+def test_branching_skeleton_follows_guides_without_reparenting():
+    definition, guide_types = benchmark.synthetic_definition(13, shape="wide", branching=3, type_size=13)
+    guide_data = utils.read_definition(definition, *guide_types)
+    build.prep_scene(guide_data)
+    generated = build.generate_guide_from_cache(guide_data[0])
+    guides = [transforms[0] for entries in generated.values() for transforms in entries]
+    guide_matrices = [cmds.xform(guide, q=True, ws=True, m=True) for guide in guides]
+
+    with call_counter.CallCounter() as counter:
+        build.build_skeleton(generated, guide_data)
+    counter.assert_budget(0, commands=["parent"])
+
+    namespace = f"{build.SKELETON_ROOT}:rigdef_1:{guide_types[0]}"
+    joints = [f"{namespace}:{guide.split(':')[-1]}" for guide in guides]
+    for guide, joint, matrix in zip(guides, joints, guide_matrices):
+        assert cmds.xform(joint, q=True, ws=True, t=True) == pytest.approx(matrix[12:15])
+        guide_parent = [name.split(":")[-1] for name in cmds.listRelatives(guide, parent=True) or []]
+        joint_parent = [name.split(":")[-1] for name in cmds.listRelatives(joint, parent=True) or []]
+        assert joint_parent == guide_parent
+
+    # the guides themselves are left where they were.
+    for guide, matrix in zip(guides, guide_matrices):
+        assert cmds.xform(guide, q=True, ws=True, m=True) == pytest.approx(matrix)
@@ -0,0 +1,51 @@
+import json
+
+from Util import tracing
+
+
+def test_spans_nest_and_export_as_chrome_trace(monkeypatch, tmp_path):
+    monkeypatch.setattr(tracing, "ENABLED", True)
+    tracing.clear()
+
+    @tracing.traced
+    def inner():
+        tracing.annotate(joints=3)
+
+    @tracing.traced(name="outer", category="build")
+    def outer():
+        with tracing.span("block", guides=2):
+            inner()
+
+    outer()
+    path = tracing.export(str(tmp_path / "trace_{pid}.json"))
+    tracing.clear()
+
+    with open(path) as trace_file:
+        trace = json.load(trace_file)
+
+    spans = {event["name"]: event for event in trace["traceEvents"] if event["ph"] == "X"}
+    assert set(spans) == {"outer", "block", "test_spans_nest_and_export_as_chrome_trace.<locals>.inner"}
+    outer_span, block = spans["outer"], spans["block"]
+    inner_span = spans["test_spans_nest_and_export_as_chrome_trace.<locals>.inner"]
+    for parent, child in ((outer_span, block), (block, inner_span)):
+        assert parent["tid"] == child["tid"]
+        assert parent["ts"] <= child["ts"] and child["ts"] + child["dur"] <= parent["ts"] + parent["dur"]
+
+    assert outer_span["cat"] == "build" and inner_span["cat"] == "test_tracing"
+    assert block["args"] == {"guides": 2} and inner_span["args"] == {"joints": 3}
+    assert any(event["ph"] == "M" and event["name"] == "thread_name" for event in trace["traceEvents"])
+
+
+def test_off_leaves_functions_untouched():
+    assert not tracing.ENABLED  # RIGGING_TOOL_TRACE isn't set for the tests.
+
+    def func():
+        return 1
+
+    assert tracing.traced(func) is func and tracing.traced(name="named")(func) is func
+    assert tracing.span("block") is tracing._NULL_SPAN
+
+    with tracing.span("block"):
+        tracing.annotate(joints=1)
+
+    assert not tracing.trace_events()[1:] and tracing.export() is None
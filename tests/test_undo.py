@@ -0,0 +1,63 @@
+import maya.api.OpenMaya as om2
+from maya import cmds
+
+import build
+
+
+def test_duplicate_chain_is_one_undo_step(monkeypatch):
+    from Util import autorig_utils
+
+    cmds.select(clear=True)
+    for i, position in enumerate([(0, 0, 0), (2, 0, -1), (4, 0, 0)]):
+        cmds.joint(name=f"joint{i}", position=position)
+
+    # the channel box state goes through cmds, not a python string run by the modifier.
+    python_commands = []
+    monkeypatch.setattr(om2.MDagModifier, "pythonCommandToExecute",
+                        lambda self, command: python_commands.append(command), raising=True)
+
+    duplicated = autorig_utils.chain_duplication("joint0", prefix="ik_")
+    assert duplicated == ["ik_joint0", "ik_joint1", "ik_joint2"]
+    assert all(cmds.getAttr(f"{joint}.radius", channelBox=True) for joint in duplicated)
+    assert not python_commands
+
+    cmds.undo()
+    assert not cmds.ls("ik_*")
+    assert len(cmds.ls(type="joint")) == 3
+
+    cmds.redo()
+    assert cmds.xform("ik_joint1", q=True, ws=True, t=True) == cmds.xform("joint1", q=True, ws=True, t=True)
+    assert all(cmds.getAttr(f"{joint}.radius", channelBox=True) for joint in duplicated)
+
+
+def test_guide_set_is_one_undo_step(guide_data):
+    build.prep_scene(guide_data)
+    build.ui_guides(guide_data)
+    assert cmds.ls("Guides:rigdef_1:arm:*", type="transform")
+    assert cmds.ls("Guides:rigdef_1:leg:*", type="transform")
+
+    cmds.undo()
+    assert not cmds.ls("Guides:rigdef_1:arm:*")
+    assert not cmds.ls("Guides:rigdef_1:leg:*")
+
+    cmds.redo()
+    assert len(cmds.ls("Guides:rigdef_1:arm:*", type="transform")) == 3
+
+
+def test_skeleton_is_one_undo_step(guide_data):
+    from Util import incremental
+
+    build.prep_scene(guide_data)
+    generated = build.generate_guide_from_cache(guide_data[0])
+    build.build_skeleton(generated, guide_data)
+    joints = cmds.ls("skeleton_def:rigdef_1:arm:*", type="joint")
+    assert len(joints) == 3
+    assert all(cmds.getAttr(f"{joint}.{incremental.HASH_ATTRIBUTE}") for joint in joints)
+
+    cmds.undo()
+    assert not cmds.ls("skeleton_def:rigdef_1:arm:*", type="joint")
+    assert cmds.ls("Guides:rigdef_1:arm:*", type="transform")  # the guides were an earlier undo step.
+
+    cmds.redo()
+    joints = cmds.ls("skeleton_def:rigdef_1:arm:*", type="joint")
+    assert all(cmds.getAttr(f"{joint}.{incremental.HASH_ATTRIBUTE}") for joint in joints)
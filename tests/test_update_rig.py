@@ -0,0 +1,83 @@
+from maya import cmds
+
+import build
+
+
+def _build(guide_data):
+    build.prep_scene(guide_data)
+    generated = {"arm": build.generate_guide_from_cache(guide_data[0]),
+                 "leg": build.generate_guide_from_cache(guide_data[1])}
+    for guide_type, value in generated.items():
+        build.build_skeleton(value, guide_data)
+        build.build_rig("skeleton_def:rigdef_1", guide_type)
+
+    return generated
+
+
+def test_update_rig_rebuilds_ik_of_moved_guides(guide_data):
+    generated = _build(guide_data)
+    leg_handles = cmds.ls("skeleton_def:rigdef_1:leg:*", type="ikHandle")
+    guide = cmds.ls("Guides:rigdef_1:arm:*", type="transform")[1]
+
+    for i in range(2):
+        cmds.xform(guide, translation=(0, 1, 1), relative=True)
+        assert build.update_rig(generated, guide_data) == ["arm"]
+
+        assert len(cmds.ls("skeleton_def:rigdef_1:arm:*", type="ikHandle")) == 1
+        assert len(cmds.ls("skeleton_def:rigdef_1:arm:*", type="ikEffector")) == 1
+        assert len(cmds.ls("skeleton_def:rigdef_1:arm:*_IKPole")) == 1
+        assert len(cmds.ls("skeleton_def:rigdef_1:arm:ik_*", type="joint")) == 3
+        assert cmds.ls("skeleton_def:rigdef_1:leg:*", type="ikHandle") == leg_handles
+
+    assert build.update_rig(generated, guide_data) == []
+    assert len(cmds.ls(":Guides:rigdef_1:arm:*", type="transform")) == 3
+    assert cmds.ls("skeleton_def:rigdef_1:arm:*", type="ikHandle")
+
+
+def test_forced_update_rig_rebuilds_every_ik_system(guide_data):
+    generated = _build(guide_data)
+
+    assert build.update_rig(generated, guide_data, force=True) == ["arm", "leg"]
+    assert build.update_rig(generated, guide_data, force=True) == ["arm", "leg"]
+    assert len(cmds.ls(type="ikHandle")) == 2
+
+
+def test_update_rig_finds_segments_of_build_many(guide_data):
+    built, = build.build_many([guide_data], executor="serial")
+    generated = built["created_guides"]
+    assert cmds.ls("skeleton_def:rigdef_1:arm:*", type="ikHandle")
+
+    assert build.update_rig(generated, guide_data) == []
+
+    cmds.xform(cmds.ls(":Guides:rigdef_1:leg:*", type="transform")[1], translation=(0, 1, 0), relative=True)
+    assert build.update_rig(generated, guide_data) == ["leg"]
+
+
+def test_update_rig_rebuilds_segments_with_deleted_guides(guide_data):
+    from Util import incremental
+
+    generated = _build(guide_data)
+    cmds.delete("Guides:rigdef_1:leg:joint2")
+
+    segments = incremental.stale_segments(generated, guide_data)
+    assert segments["leg"]["stale"] and not segments["arm"]["stale"]
+
+    assert build.update_rig(generated, guide_data) == ["leg"]
+    assert cmds.ls("skeleton_def:rigdef_1:leg:joint*", type="joint") == ["skeleton_def:rigdef_1:leg:joint0",
+                                                                         "skeleton_def:rigdef_1:leg:joint1"]
+    assert build.update_rig(generated, guide_data) == []
+
+
+def test_update_rig_moves_segments_of_the_old_layout(guide_data):
+    generated = _build(guide_data)
+
+    # scenes built before the rigdef level kept their segments straight under skeleton_def.
+    cmds.namespace(add="arm", parent=":skeleton_def")
+    cmds.namespace(mv=(":skeleton_def:rigdef_1:arm", ":skeleton_def:arm"), f=True)
+    cmds.namespace(rm=":skeleton_def:rigdef_1:arm")
+    assert cmds.ls("skeleton_def:arm:*", type="ikHandle")
+
+    assert build.update_rig(generated, guide_data) == []
+    assert not cmds.namespace(exists=":skeleton_def:arm")
+    assert len(cmds.ls("skeleton_def:rigdef_1:arm:joint*", type="joint")) == 3
+    assert len(cmds.ls("skeleton_def:rigdef_1:arm:*", type="ikHandle")) == 1